@@ -52,6 +52,11 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
     logger.info(f"Added {project_root} to Python path")
 
+# Django project root, so shared singletons load under the same `apps.*`
+# names the Django apps use. Appended so `dex_django` stays this package.
+apps_root = os.path.join(current_dir, "dex_django")
+if apps_root not in sys.path:
+    sys.path.append(apps_root)
 
 
 # Import the routers
@@ -64,6 +69,8 @@ except ImportError as e:
     health_router = APIRouter(prefix="/health", tags=["health"])
     api_router = APIRouter(prefix="/api/v1", tags=["debug-api"])
 
+from apps.core.http_clients import http_clients
+
 # CREATE THE MISSING DISCOVERY ROUTER
 discovery_router = APIRouter(prefix="/api/v1", tags=["discovery"])
 
@@ -353,28 +360,26 @@ async def fetch_real_opportunities() -> List[Dict[str, Any]]:
     opportunities = []
     
     try:
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=15),
-            connector=aiohttp.TCPConnector(limit=10)
-        ) as session:
-            
-            # Fetch multiple chains concurrently
-            tasks = [
-                fetch_chain_opportunities(session, "ethereum", 15),
-                fetch_chain_opportunities(session, "bsc", 15), 
-                fetch_chain_opportunities(session, "base", 10),
-                fetch_chain_opportunities(session, "polygon", 10),
-            ]
-            
-            # Execute all requests concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Combine results
-            for result in results:
-                if isinstance(result, list):
-                    opportunities.extend(result)
-                else:
-                    logger.warning(f"Chain fetch failed: {result}")
+        # Shared keep-alive pool instead of a new session per request
+        client = http_clients.client(timeout=15.0)
+        
+        # Fetch multiple chains concurrently
+        tasks = [
+            fetch_chain_opportunities(client, "ethereum", 15),
+            fetch_chain_opportunities(client, "bsc", 15), 
+            fetch_chain_opportunities(client, "base", 10),
+            fetch_chain_opportunities(client, "polygon", 10),
+        ]
+        
+        # Execute all requests concurrently
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Combine results
+        for result in results:
+            if isinstance(result, list):
+                opportunities.extend(result)
+            else:
+                logger.warning(f"Chain fetch failed: {result}")
     
         # Process and score opportunities
         processed_opportunities = []
@@ -406,56 +411,56 @@ async def fetch_real_opportunities() -> List[Dict[str, Any]]:
         return []
 
 
-async def fetch_chain_opportunities(session, chain: str, limit: int) -> List[Dict[str, Any]]:
+async def fetch_chain_opportunities(client, chain: str, limit: int) -> List[Dict[str, Any]]:
     """Fetch opportunities from a specific chain."""
     opportunities = []
     
     try:
         url = f"https://api.dexscreener.com/latest/dex/pairs/{chain}"
         
-        async with session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                pairs = data.get("pairs", [])
-                
-                for pair in pairs[:limit]:
-                    try:
-                        # Extract liquidity
-                        liquidity_data = pair.get("liquidity", {})
-                        if isinstance(liquidity_data, dict):
-                            liquidity_usd = float(liquidity_data.get("usd", 0))
-                        else:
-                            liquidity_usd = float(liquidity_data) if liquidity_data else 0
-                        
-                        # Skip low liquidity
-                        if liquidity_usd < 10000:
-                            continue
-                        
-                        # Extract token info
-                        base_token = pair.get("baseToken", {})
-                        quote_token = pair.get("quoteToken", {})
-                        
-                        opp = {
-                            "chain": chain,
-                            "dex": pair.get("dexId", "unknown"),
-                            "pair_address": pair.get("pairAddress", ""),
-                            "token0_symbol": base_token.get("symbol", "UNKNOWN"),
-                            "token1_symbol": quote_token.get("symbol", "UNKNOWN"),
-                            "estimated_liquidity_usd": liquidity_usd,
-                            "volume_24h": float(pair.get("volume", {}).get("h24", 0)) if pair.get("volume") else 0,
-                            "price_change_24h": float(pair.get("priceChange", {}).get("h24", 0)) if pair.get("priceChange") else 0,
-                            "price_usd": float(pair.get("priceUsd", 0)) if pair.get("priceUsd") else 0,
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "source": "dexscreener"
-                        }
-                        opportunities.append(opp)
-                        
-                    except Exception as e:
-                        logger.debug(f"Error processing {chain} pair: {e}")
+        response = await client.get(url)
+        if response.status_code == 200:
+            data = response.json()
+            pairs = data.get("pairs", [])
+            
+            for pair in pairs[:limit]:
+                try:
+                    # Extract liquidity
+                    liquidity_data = pair.get("liquidity", {})
+                    if isinstance(liquidity_data, dict):
+                        liquidity_usd = float(liquidity_data.get("usd", 0))
+                    else:
+                        liquidity_usd = float(liquidity_data) if liquidity_data else 0
+                    
+                    # Skip low liquidity
+                    if liquidity_usd < 10000:
                         continue
-                
-                logger.info(f"📊 {chain.upper()}: Fetched {len(opportunities)} opportunities")
-                
+                    
+                    # Extract token info
+                    base_token = pair.get("baseToken", {})
+                    quote_token = pair.get("quoteToken", {})
+                    
+                    opp = {
+                        "chain": chain,
+                        "dex": pair.get("dexId", "unknown"),
+                        "pair_address": pair.get("pairAddress", ""),
+                        "token0_symbol": base_token.get("symbol", "UNKNOWN"),
+                        "token1_symbol": quote_token.get("symbol", "UNKNOWN"),
+                        "estimated_liquidity_usd": liquidity_usd,
+                        "volume_24h": float(pair.get("volume", {}).get("h24", 0)) if pair.get("volume") else 0,
+                        "price_change_24h": float(pair.get("priceChange", {}).get("h24", 0)) if pair.get("priceChange") else 0,
+                        "price_usd": float(pair.get("priceUsd", 0)) if pair.get("priceUsd") else 0,
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "source": "dexscreener"
+                    }
+                    opportunities.append(opp)
+                    
+                except Exception as e:
+                    logger.debug(f"Error processing {chain} pair: {e}")
+                    continue
+            
+            logger.info(f"📊 {chain.upper()}: Fetched {len(opportunities)} opportunities")
+            
     except Exception as e:
         logger.error(f"Failed to fetch {chain} opportunities: {e}")
     
@@ -975,6 +980,7 @@ def get_app():
         @app.on_event("startup")
         async def startup_event():
             """Initialize copy trading system on startup."""
+            await http_clients.startup()
             logger.info("🚀 FastAPI startup - initializing copy trading system...")
             result = await initialize_copy_trading_system()
             
@@ -993,6 +999,8 @@ def get_app():
                 logger.info("✅ Copy trading system shutdown completed successfully")
             else:
                 logger.warning(f"⚠️ Copy trading system shutdown failed: {result['message']}")
+            
+            await http_clients.shutdown()
         
         logger.info("🎉 Debug app with copy trading system ready!")
         logger.info("📍 Copy trading status: http://127.0.0.1:8000/api/v1/copy/system/status")
@@ -10,9 +10,9 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
 from pydantic import BaseModel, Field, validator
 
-from dex_django.apps.discovery.wallet_monitor import wallet_monitor
-from dex_django.apps.strategy.copy_trading_strategy import copy_trading_strategy
-from dex_django.apps.core.runtime_state import runtime_state
+from apps.discovery.wallet_monitor import wallet_monitor
+from apps.strategy.copy_trading_strategy import copy_trading_strategy
+from apps.core.runtime_state import runtime_state
 
 logger = logging.getLogger("api.copy_trading_integrated")
 
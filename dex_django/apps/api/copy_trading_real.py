@@ -256,7 +256,7 @@ async def discover_traders_real(request: DiscoveryRequest) -> List[Dict[str, Any
     logger.info(f"Starting real trader discovery: chains={request.chains}, limit={request.limit}")
     
     try:
-        from dex_django.apps.discovery.wallet_discovery_engine import (
+        from apps.discovery.wallet_discovery_engine import (
             wallet_discovery_engine, 
             ChainType
         )
@@ -13,8 +13,8 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
-from dex_django.apps.core.debug_state import debug_state
-from dex_django.apps.ws.debug_websockets import broadcast_thought_log, broadcast_paper_trade
+from apps.core.debug_state import debug_state
+from apps.ws.debug_websockets import broadcast_thought_log, broadcast_paper_trade
 
 logger = logging.getLogger("api.debug_routers")
 
@@ -71,7 +71,7 @@ async def readiness_check() -> Dict[str, Any]:
         
         # Try to check DEX routers
         try:
-            from apps.dex.routers import dex_manager
+            from apps.dex.routers import dex_manager, quote_cache
             router_status = {}
             for chain in ["ethereum", "bsc", "base"]:
                 chain_routers = {}
@@ -88,6 +88,7 @@ async def readiness_check() -> Dict[str, Any]:
                 router_status[chain] = chain_routers
             
             checks["dependencies"]["dex_routers"] = router_status
+            checks["quote_cache"] = quote_cache.get_stats()
         except ImportError as e:
             checks["dependencies"]["dex_routers"] = {
                 "status": "error", 
@@ -7,7 +7,7 @@ from decimal import Decimal
 
 from django.core.cache import cache
 from django.utils import timezone
-from dex_django.apps.strategy import risk_manager
+from apps.strategy import risk_manager
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
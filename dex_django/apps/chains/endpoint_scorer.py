@@ -0,0 +1,315 @@
+# APP: dex_django/apps/chains
+# FILE: endpoint_scorer.py
+"""
+Latency-aware RPC endpoint selection for DEX Sniper Pro
+
+Tracks EWMA latency and error rate per endpoint and routes calls to the
+fastest healthy one. Latency-critical calls can be hedged: if the primary
+endpoint has not answered within its p95 latency, the same request is sent
+to the next-best endpoint and the first good answer wins. Endpoints that
+keep failing are taken out of rotation and probed in the background until
+they recover.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class EndpointStats:
+    """Rolling health and latency statistics for one endpoint."""
+    url: str
+    ewma_latency_ms: float
+    error_rate: float = 0.0
+    consecutive_failures: int = 0
+    healthy: bool = True
+    total_calls: int = 0
+    total_errors: int = 0
+    last_error: Optional[str] = None
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    @property
+    def p95_latency_ms(self) -> float:
+        """95th percentile of recent successful call latencies."""
+        if not self.latencies_ms:
+            return self.ewma_latency_ms
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def score(self) -> float:
+        """Lower is better: latency penalised by recent error rate."""
+        return self.ewma_latency_ms * (1.0 + 4.0 * self.error_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ewma_latency_ms": round(self.ewma_latency_ms, 1),
+            "p95_latency_ms": round(self.p95_latency_ms, 1),
+            "error_rate": round(self.error_rate, 3),
+            "total_calls": self.total_calls,
+            "total_errors": self.total_errors,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointScorer:
+    """
+    Scores a set of interchangeable endpoints and picks the best one.
+
+    The scorer is transport-agnostic: callers report outcomes via
+    `record_success` / `record_failure`, or let `hedged()` do it for them.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        initial_latency_ms: float = 250.0,
+        min_hedge_delay_ms: float = 50.0,
+        max_hedge_delay_ms: float = 2000.0,
+        probe: Optional[Callable[[str], Awaitable[Any]]] = None,
+        probe_interval_seconds: float = 15.0
+    ):
+        """
+        Initialize the scorer.
+
+        Args:
+            urls: Endpoint URLs in configured priority order
+            alpha: EWMA smoothing factor for latency and error rate
+            failure_threshold: Consecutive failures before an endpoint is taken out of rotation
+            initial_latency_ms: Latency assumed for endpoints with no samples yet
+            min_hedge_delay_ms: Lower bound for the hedge trigger delay
+            max_hedge_delay_ms: Upper bound for the hedge trigger delay
+            probe: Coroutine used to check whether an unhealthy endpoint has recovered
+            probe_interval_seconds: Delay between background probes
+        """
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.initial_latency_ms = initial_latency_ms
+        self.min_hedge_delay_ms = min_hedge_delay_ms
+        self.max_hedge_delay_ms = max_hedge_delay_ms
+        self.probe = probe
+        self.probe_interval_seconds = probe_interval_seconds
+
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._order: List[str] = []
+        self._probe_task: Optional[asyncio.Task] = None
+
+        self.stats = {"hedges_fired": 0, "hedges_won": 0}
+
+        for url in urls:
+            self.add_endpoint(url)
+
+    def add_endpoint(self, url: str) -> None:
+        """Register an endpoint (no-op if already known)."""
+        if url in self._endpoints:
+            return
+        # Small rank-based offset keeps configured order as the tie-breaker
+        self._endpoints[url] = EndpointStats(
+            url=url,
+            ewma_latency_ms=self.initial_latency_ms + len(self._order)
+        )
+        self._order.append(url)
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._order)
+
+    def get_stats(self, url: str) -> EndpointStats:
+        return self._endpoints[url]
+
+    def record_success(self, url: str, latency_seconds: float) -> None:
+        """Record a successful call and its latency."""
+        stats = self._endpoints.get(url)
+        if stats is None:
+            return
+
+        latency_ms = latency_seconds * 1000
+        stats.total_calls += 1
+        stats.latencies_ms.append(latency_ms)
+        stats.ewma_latency_ms += self.alpha * (latency_ms - stats.ewma_latency_ms)
+        stats.error_rate *= (1 - self.alpha)
+        stats.consecutive_failures = 0
+
+        if not stats.healthy:
+            stats.healthy = True
+            logger.info(f"RPC endpoint recovered: {url}")
+
+    def record_failure(self, url: str, error: Optional[BaseException] = None) -> None:
+        """Record a failed call; repeated failures take the endpoint out of rotation."""
+        stats = self._endpoints.get(url)
+        if stats is None:
+            return
+
+        stats.total_calls += 1
+        stats.total_errors += 1
+        stats.error_rate += self.alpha * (1.0 - stats.error_rate)
+        stats.consecutive_failures += 1
+        stats.last_error = str(error)[:200] if error else None
+
+        if stats.healthy and stats.consecutive_failures >= self.failure_threshold:
+            stats.healthy = False
+            logger.warning(f"RPC endpoint marked unhealthy after {stats.consecutive_failures} failures: {url}")
+            self._ensure_probing()
+
+    def mark_unhealthy(self, url: str, error: Optional[BaseException] = None) -> None:
+        """Take an endpoint out of rotation immediately (e.g. failed connection test)."""
+        stats = self._endpoints.get(url)
+        if stats is None:
+            return
+        stats.consecutive_failures = max(stats.consecutive_failures, self.failure_threshold - 1)
+        stats.healthy = True
+        self.record_failure(url, error)
+
+    def ranked(self) -> List[str]:
+        """
+        Endpoints ordered best-first.
+
+        Healthy endpoints come first, ordered by score. Unhealthy endpoints
+        follow as a last resort so a call can still go out if all are down.
+        """
+        healthy = [url for url in self._order if self._endpoints[url].healthy]
+        unhealthy = [url for url in self._order if not self._endpoints[url].healthy]
+        healthy.sort(key=lambda url: self._endpoints[url].score)
+        unhealthy.sort(key=lambda url: self._endpoints[url].consecutive_failures)
+        return healthy + unhealthy
+
+    def best(self) -> str:
+        """Fastest healthy endpoint."""
+        return self.ranked()[0]
+
+    def hedge_delay(self, url: str) -> float:
+        """Seconds to wait on `url` before hedging to another endpoint."""
+        p95 = self._endpoints[url].p95_latency_ms
+        return min(max(p95, self.min_hedge_delay_ms), self.max_hedge_delay_ms) / 1000
+
+    async def run(self, url: str, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Run `fn(url)` and record the outcome."""
+        started = time.perf_counter()
+        try:
+            result = await fn(url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.record_failure(url, e)
+            raise
+        self.record_success(url, time.perf_counter() - started)
+        return result
+
+    async def hedged(
+        self,
+        fn: Callable[[str], Awaitable[T]],
+        accept: Optional[Callable[[T], bool]] = None
+    ) -> T:
+        """
+        Run `fn` on the best endpoint, hedging to the runner-up after its p95 latency.
+
+        Args:
+            fn: Coroutine taking an endpoint URL
+            accept: Optional check on a result; rejected results wait for the other attempt
+
+        Returns:
+            First accepted result (or the last result if none was accepted)
+        """
+        ranked = self.ranked()
+        primary = ranked[0]
+
+        if len(ranked) < 2:
+            return await self.run(primary, fn)
+
+        primary_task = asyncio.create_task(self.run(primary, fn))
+        pending = {primary_task}
+
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay(primary))
+            if done and not primary_task.exception() and (accept is None or accept(primary_task.result())):
+                return primary_task.result()
+
+            secondary = ranked[1]
+            self.stats["hedges_fired"] += 1
+            secondary_task = asyncio.create_task(self.run(secondary, fn))
+            pending = pending | {secondary_task}
+            fallback: Optional[asyncio.Task] = primary_task if done else None
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception():
+                        continue
+                    if accept is None or accept(task.result()):
+                        if task is secondary_task:
+                            self.stats["hedges_won"] += 1
+                        return task.result()
+                    fallback = task
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Neither attempt produced an accepted result
+        if fallback is not None and not fallback.exception():
+            return fallback.result()
+        return await (fallback or secondary_task)
+
+    async def call_with_failover(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Try endpoints best-first until one succeeds."""
+        last_error: Optional[BaseException] = None
+        for url in self.ranked():
+            try:
+                return await self.run(url, fn)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"RPC call failed for {url}: {e}")
+        raise last_error or RuntimeError("No endpoints configured")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-endpoint statistics, best-first."""
+        return [self._endpoints[url].to_dict() for url in self.ranked()]
+
+    async def close(self) -> None:
+        """Stop background probing."""
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def _ensure_probing(self) -> None:
+        if self.probe is None or (self._probe_task and not self._probe_task.done()):
+            return
+        try:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+        except RuntimeError:
+            # No running loop; probing will start on the next failure inside one
+            pass
+
+    async def _probe_loop(self) -> None:
+        """Probe unhealthy endpoints until all have recovered."""
+        while True:
+            unhealthy = [url for url in self._order if not self._endpoints[url].healthy]
+            if not unhealthy:
+                return
+
+            await asyncio.sleep(self.probe_interval_seconds)
+
+            results = await asyncio.gather(
+                *(self.run(url, self.probe) for url in unhealthy),
+                return_exceptions=True
+            )
+            for url, result in zip(unhealthy, results):
+                if isinstance(result, Exception):
+                    logger.debug(f"Probe failed for {url}: {result}")
@@ -10,18 +10,28 @@ Handles RPC connections, transaction building, gas estimation, and contract inte
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
-import httpx
 from eth_account import Account
 from eth_typing import ChecksumAddress
 from web3 import Web3
 from web3.types import TxParams, Wei
 
+from ..core.endpoints import resolve_rpc_urls, resolve_ws_urls
+from ..core.http_clients import http_clients
+from ..core.single_flight import SingleFlight
+from .endpoint_scorer import EndpointScorer
+from .multicall import CallResult, ContractCall, Multicall3Aggregator, MulticallError
+from .rpc_batch import JsonRpcBatcher, RpcError
+from .receipt_watcher import ReceiptWatcher
+from .rpc_cache import BlockScopedRpcCache
+from .ws_transport import WebSocketRpcTransport
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +45,7 @@ class ChainConfig:
     block_time: float
     gas_price_multiplier: float = 1.2
     max_priority_fee_gwei: int = 2
+    ws_urls: List[str] = field(default_factory=list)
     
 
 @dataclass
@@ -78,6 +89,7 @@ class EvmClient:
             ],
             native_token="ETH",
             block_time=12.0,
+            ws_urls=["wss://ethereum-rpc.publicnode.com"],
             max_priority_fee_gwei=2
         ),
         "bsc": ChainConfig(
@@ -90,6 +102,7 @@ class EvmClient:
             ],
             native_token="BNB",
             block_time=3.0,
+            ws_urls=["wss://bsc-rpc.publicnode.com"],
             max_priority_fee_gwei=1
         ),
         "base": ChainConfig(
@@ -102,6 +115,7 @@ class EvmClient:
             ],
             native_token="ETH",
             block_time=2.0,
+            ws_urls=["wss://base-rpc.publicnode.com"],
             max_priority_fee_gwei=1
         ),
         "polygon": ChainConfig(
@@ -114,17 +128,39 @@ class EvmClient:
             ],
             native_token="MATIC",
             block_time=2.0,
+            ws_urls=["wss://polygon-bor-rpc.publicnode.com"],
             max_priority_fee_gwei=30
         )
     }
     
-    def __init__(self, chain: str, private_key: Optional[str] = None):
+    # State-changing methods: sent alone, never coalesced, batched or hedged
+    UNCOALESCED_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+    
+    def __init__(
+        self,
+        chain: str,
+        private_key: Optional[str] = None,
+        enable_batching: bool = True,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 50,
+        enable_multicall: bool = True,
+        enable_cache: bool = True,
+        enable_websocket: bool = True,
+        rpc_urls: Optional[List[str]] = None
+    ):
         """
         Initialize EVM client for specified chain.
         
         Args:
             chain: Chain name (ethereum, bsc, base, polygon)
             private_key: Optional private key for signing transactions
+            enable_batching: Coalesce concurrent RPC calls into JSON-RPC batches
+            batch_window_ms: Window for collecting calls into one batch
+            max_batch_size: Maximum number of calls per batch request
+            enable_multicall: Pack concurrent contract reads into Multicall3 aggregate3 calls
+            enable_cache: Cache reads per block head (immutable results indefinitely)
+            enable_websocket: Follow new heads over eth_subscribe instead of polling
+            rpc_urls: JSON-RPC endpoints to use instead of the chain's defaults
         """
         if chain not in self.CHAIN_CONFIGS:
             raise ValueError(f"Unsupported chain: {chain}. Must be one of: {list(self.CHAIN_CONFIGS.keys())}")
@@ -134,15 +170,57 @@ class EvmClient:
         self.private_key = private_key
         self.account = Account.from_key(private_key) if private_key else None
         
-        # HTTP client for RPC calls
-        self.http_client = httpx.AsyncClient(
-            timeout=httpx.Timeout(30.0),
-            limits=httpx.Limits(max_connections=10)
+        # HTTP client for RPC calls (shared per-host connection pools)
+        self.http_client = http_clients.client(timeout=30.0)
+        
+        # Endpoints (redirected to the local replay server when DEX_REPLAY_URL is set)
+        self.rpc_urls = resolve_rpc_urls(chain, rpc_urls or self.config.rpc_urls)
+        self.ws_urls = resolve_ws_urls(self.config.ws_urls)
+        
+        # RPC endpoint management (latency/error scoring with background re-probing)
+        self.endpoint_scorer = EndpointScorer(self.rpc_urls, probe=self._probe_endpoint)
+        
+        # JSON-RPC batching
+        self.enable_batching = enable_batching
+        self._batcher = JsonRpcBatcher(
+            self._post_rpc,
+            window_seconds=batch_window_ms / 1000,
+            max_batch_size=max_batch_size
+        )
+        # Ids for requests sent outside the batcher (negative, so never a batcher id)
+        self._single_ids = itertools.count(-1, -1)
+        
+        # Multicall3 aggregation for contract reads
+        self.enable_multicall = enable_multicall
+        self._multicall = Multicall3Aggregator(
+            self._eth_call,
+            window_seconds=batch_window_ms / 1000
+        )
+        
+        # Block-scoped response cache; the head is trusted for a quarter block
+        self.rpc_cache: Optional[BlockScopedRpcCache] = (
+            BlockScopedRpcCache(chain, head_ttl_seconds=self.config.block_time / 4)
+            if enable_cache else None
+        )
+        
+        # Concurrent identical reads share one in-flight request
+        self._single_flight = SingleFlight(f"evm:{chain}")
+        
+        # Head feed: eth_subscribe over WebSocket, with block-number polling as fallback
+        self.ws_transport: Optional[WebSocketRpcTransport] = (
+            WebSocketRpcTransport(self.ws_urls)
+            if enable_websocket and self.ws_urls else None
         )
+        self._head_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        self._head_feed_task: Optional[asyncio.Task] = None
+        self._head_subscription: Optional[str] = None
+        self._last_head_number = 0
+        self._last_head_at = 0.0
+        self._recent_head_hashes: Dict[int, str] = {}
+        self._log_pollers: Dict[str, Dict[str, Any]] = {}
         
-        # RPC endpoint management
-        self.current_rpc_index = 0
-        self.failed_rpcs = set()
+        # Pending transactions resolved by one batched receipt check per block
+        self._receipt_watcher = ReceiptWatcher(self._fetch_receipts)
         
         logger.info(f"Initialized EVM client for {chain} (chain_id: {self.config.chain_id})")
     
@@ -155,34 +233,41 @@ class EvmClient:
         await self.close()
     
     async def close(self):
-        """Close the HTTP client."""
+        """Stop the head feed, flush pending RPC batches and close the HTTP client."""
+        if self._head_feed_task:
+            self._head_feed_task.cancel()
+            try:
+                await self._head_feed_task
+            except asyncio.CancelledError:
+                pass
+            self._head_feed_task = None
+        self._receipt_watcher.cancel_all()
+        if self.ws_transport:
+            await self.ws_transport.close()
+        await self._multicall.close()
+        await self._batcher.close()
+        await self.endpoint_scorer.close()
         await self.http_client.aclose()
     
     @property
     def current_rpc_url(self) -> str:
-        """Get current RPC URL with failover logic."""
-        available_rpcs = [
-            (i, url) for i, url in enumerate(self.config.rpc_urls) 
-            if i not in self.failed_rpcs
-        ]
-        
-        if not available_rpcs:
-            # Reset failed RPCs if all have failed
-            self.failed_rpcs.clear()
-            available_rpcs = list(enumerate(self.config.rpc_urls))
-        
-        if self.current_rpc_index >= len(available_rpcs):
-            self.current_rpc_index = 0
-        
-        return available_rpcs[self.current_rpc_index][1]
+        """Get the fastest healthy RPC URL."""
+        return self.endpoint_scorer.best()
     
-    async def _rpc_call(self, method: str, params: List[Any] = None) -> Any:
+    async def _rpc_call(self, method: str, params: List[Any] = None, hedge: bool = False) -> Any:
         """
         Make an RPC call with automatic failover.
         
+        Reads are served from the block-scoped cache when possible, and
+        concurrent identical reads share one in-flight request. Different
+        concurrent calls are coalesced into a single JSON-RPC batch request
+        when batching is enabled. State-changing methods go out alone.
+        
         Args:
             method: RPC method name
             params: Method parameters
+            hedge: Send a read as its own request, hedged to a second
+                endpoint; only for reads on the latency-critical path
             
         Returns:
             RPC response result
@@ -190,41 +275,168 @@ class EvmClient:
         if params is None:
             params = []
         
-        payload = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": 1
-        }
+        if method in self.UNCOALESCED_METHODS:
+            return await self._send_single(method, params)
+        
+        return await self._single_flight.do(
+            SingleFlight.key(method, params),
+            lambda: self._cached(
+                method,
+                params,
+                lambda: self._send_single(method, params, hedge=True) if hedge else self._send_rpc(method, params)
+            )
+        )
+    
+    async def _cached(
+        self,
+        method: str,
+        params: List[Any],
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Serve a call from the block-scoped cache or fetch and store it.
+        
+        A "latest" read made while the head is stale fetches the block number
+        alongside it (same JSON-RPC batch) so the result can be keyed to a block.
+        """
+        cache = self.rpc_cache
+        if cache is None:
+            return await fetch()
+        
+        if cache.needs_head(method, params):
+            cache.record_miss()
+            _, result = await asyncio.gather(self.get_block_number(), fetch(), return_exceptions=True)
+            if isinstance(result, BaseException):
+                raise result
+            cache.put(method, params, result, cache.make_key(method, params))
+            return result
+        
+        key = cache.make_key(method, params)
+        if key is not None:
+            hit, value = cache.get(key)
+            if hit:
+                return value
         
-        max_retries = len(self.config.rpc_urls)
+        result = await fetch()
+        cache.put(method, params, result, key)
+        return result
+    
+    async def _send_rpc(self, method: str, params: List[Any]) -> Any:
+        """Send a call upstream, bypassing the cache."""
+        if self.enable_batching:
+            return await self._batcher.call(method, params)
+        
+        results = await self._batcher.call_many([(method, params)])
+        return results[0]
+    
+    async def _send_single(self, method: str, params: List[Any], hedge: bool = False) -> Any:
+        """Send one call as its own request, outside the batcher."""
+        data = await self._post_rpc(
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._single_ids)},
+            hedge=hedge
+        )
+        if "error" in data:
+            raise RpcError(method, data["error"])
+        return data.get("result")
+    
+    async def batch_call(
+        self,
+        calls: List[Tuple[str, List[Any]]],
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Send several RPC calls in one JSON-RPC batch request.
         
-        for attempt in range(max_retries):
-            rpc_url = self.current_rpc_url
+        Args:
+            calls: List of (method, params) tuples
+            return_exceptions: Return per-call errors in place instead of raising
             
-            try:
-                response = await self.http_client.post(rpc_url, json=payload)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if "error" in data:
-                    raise Exception(f"RPC error: {data['error']}")
-                
-                return data.get("result")
-                
-            except Exception as e:
-                logger.warning(f"RPC call failed for {rpc_url}: {e}")
-                self.failed_rpcs.add(self.current_rpc_index)
-                self.current_rpc_index = (self.current_rpc_index + 1) % len(self.config.rpc_urls)
-                
-                if attempt == max_retries - 1:
-                    raise Exception(f"All RPC endpoints failed for {method}")
+        Returns:
+            Results in the same order as calls
+        """
+        return await self._batcher.call_many(calls, return_exceptions=return_exceptions)
+    
+    async def _post_rpc(
+        self,
+        payload: Union[Dict[str, Any], List[Dict[str, Any]]],
+        hedge: bool = False
+    ) -> Any:
+        """
+        POST a JSON-RPC payload to the best endpoint.
+        
+        A hedged single request goes to a second endpoint too after the
+        primary's p95 latency; batches are never hedged, so hedging cannot
+        double the load of the reads batched with a critical one. Everything
+        else fails over through endpoints best-first.
+        
+        Args:
+            payload: Single JSON-RPC request object or a batch array
+            hedge: Hedge a single (not batch) request
+            
+        Returns:
+            Decoded JSON response body
+        """
+        is_batch = isinstance(payload, list)
+        calls = payload if is_batch else [payload]
+        
+        async def post(rpc_url: str) -> Any:
+            response = await self.http_client.post(rpc_url, json=payload)
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            # Providers that reject batches answer with a single error object
+            if is_batch and not isinstance(data, list):
+                raise Exception(f"Batch request rejected: {data.get('error', data)}")
+            
+            return data
+        
+        try:
+            if hedge and not is_batch:
+                return await self.endpoint_scorer.hedged(post, accept=self._has_no_rpc_errors)
+            return await self.endpoint_scorer.call_with_failover(post)
+        except Exception as e:
+            methods = sorted({call["method"] for call in calls})
+            raise Exception(f"All RPC endpoints failed for {', '.join(methods)}") from e
+    
+    @staticmethod
+    def _has_no_rpc_errors(data: Any) -> bool:
+        """True when no call in a JSON-RPC response carries an error."""
+        responses = data if isinstance(data, list) else [data]
+        return not any(isinstance(item, dict) and "error" in item for item in responses)
+    
+    async def _probe_endpoint(self, rpc_url: str) -> None:
+        """Cheap liveness probe used to bring failed endpoints back into rotation."""
+        response = await self.http_client.post(
+            rpc_url,
+            json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 0},
+            timeout=5.0
+        )
+        response.raise_for_status()
+        if "result" not in response.json():
+            raise Exception(f"Probe returned no result from {rpc_url}")
     
     async def get_block_number(self) -> int:
-        """Get current block number."""
-        result = await self._rpc_call("eth_blockNumber")
-        return int(result, 16)
+        """Get current block number (reused for a fraction of the block time)."""
+        if self.rpc_cache is not None:
+            head = self.rpc_cache.fresh_head()
+            if head is not None:
+                return head
+        
+        return await self._single_flight.do("eth_blockNumber", self._fetch_block_number)
+    
+    async def _fetch_block_number(self) -> int:
+        block_number = int(await self._send_rpc("eth_blockNumber", []), 16)
+        
+        if self.rpc_cache is not None:
+            self.rpc_cache.observe_head(block_number)
+        return block_number
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the block-scoped RPC cache."""
+        if self.rpc_cache is None:
+            return {"enabled": False, "single_flight": self._single_flight.get_stats()}
+        return {"enabled": True, **self.rpc_cache.get_stats(), "single_flight": self._single_flight.get_stats()}
     
     async def get_balance(self, address: str) -> Decimal:
         """
@@ -245,6 +457,36 @@ class EvmClient:
         result = await self._rpc_call("eth_getTransactionCount", [address, "pending"])
         return int(result, 16)
     
+    async def get_gas_price(self) -> int:
+        """Node-suggested legacy gas price in wei."""
+        return int(await self._rpc_call("eth_gasPrice"), 16)
+    
+    async def get_max_priority_fee(self) -> int:
+        """Node-suggested EIP-1559 priority fee in wei."""
+        return int(await self._rpc_call("eth_maxPriorityFeePerGas"), 16)
+    
+    async def get_fee_history(
+        self,
+        block_count: int,
+        newest_block: Union[int, str] = "latest",
+        percentiles: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get EIP-1559 fee history.
+        
+        Args:
+            block_count: Number of blocks to return
+            newest_block: Newest block of the range (number or tag)
+            percentiles: Priority fee percentiles to sample per block
+            
+        Returns:
+            Raw eth_feeHistory result (baseFeePerGas has block_count + 1 entries)
+        """
+        newest = hex(newest_block) if isinstance(newest_block, int) else newest_block
+        return await self._rpc_call(
+            "eth_feeHistory", [hex(block_count), newest, percentiles or []]
+        )
+    
     async def get_gas_snapshot(self) -> GasSnapshot:
         """
         Get current gas pricing information.
@@ -252,15 +494,24 @@ class EvmClient:
         Returns:
             GasSnapshot with current gas prices
         """
+        # Served from the background gas oracle when it follows this chain
+        from .gas_oracle import gas_oracle
+        
+        estimate = gas_oracle.get_estimate(self.chain)
+        if estimate is not None:
+            return estimate.to_snapshot()
+        
         try:
-            # Get base fee from latest block
-            latest_block = await self._rpc_call("eth_getBlockByNumber", ["latest", False])
+            # Latest block (for base fee) and suggested gas price; concurrent
+            # calls share one batch round trip and repeat reads hit the block cache
+            latest_block, gas_price_hex = await asyncio.gather(
+                self._rpc_call("eth_getBlockByNumber", ["latest", False]),
+                self._rpc_call("eth_gasPrice"),
+            )
             base_fee_hex = latest_block.get("baseFeePerGas", "0x0")
             base_fee_wei = int(base_fee_hex, 16)
             base_fee_gwei = Decimal(base_fee_wei) / Decimal(10**9)
             
-            # Get suggested gas price
-            gas_price_hex = await self._rpc_call("eth_gasPrice")
             gas_price_wei = int(gas_price_hex, 16)
             gas_price_gwei = Decimal(gas_price_wei) / Decimal(10**9)
             
@@ -306,7 +557,11 @@ class EvmClient:
             from_address: Sender address
             
         Returns:
-            Estimated gas limit
+            Estimated gas limit, with a 20% buffer
+            
+        Raises:
+            Exception: the node could not estimate the transaction (it
+                would revert, or every endpoint failed)
         """
         if from_address is None and self.account:
             from_address = self.account.address
@@ -320,42 +575,82 @@ class EvmClient:
         if from_address:
             params["from"] = from_address
         
-        try:
-            result = await self._rpc_call("eth_estimateGas", [params])
-            estimated_gas = int(result, 16)
-            
-            # Add 20% buffer for safety
-            return int(estimated_gas * 1.2)
-            
-        except Exception as e:
-            logger.warning(f"Gas estimation failed: {e}")
-            # Return conservative fallback
-            return 200000
+        result = await self._rpc_call("eth_estimateGas", [params])
+        estimated_gas = int(result, 16)
+        
+        # Add 20% buffer for safety
+        return int(estimated_gas * 1.2)
     
     async def call_contract(
         self, 
         contract_address: str, 
         data: str,
-        block: str = "latest"
+        block: str = "latest",
+        hedge: bool = False
     ) -> str:
         """
         Make a read-only contract call.
         
+        Concurrent reads are packed into a single Multicall3 aggregate3
+        call when multicall is enabled.
+        
         Args:
             contract_address: Contract address
             data: Encoded function call data
             block: Block number or "latest"
+            hedge: Latency-critical read: send it alone (no Multicall3 or
+                batch), hedged to a second endpoint
             
         Returns:
             Contract call result
         """
-        params = {
-            "to": contract_address,
-            "data": data
-        }
+        params = [{"to": contract_address, "data": data}, block]
+        if hedge:
+            return await self._rpc_call("eth_call", params, hedge=True)
+        return await self._single_flight.do(
+            SingleFlight.key("eth_call", params),
+            lambda: self._cached(
+                "eth_call",
+                params,
+                lambda: self._read_contract(contract_address, data, block)
+            )
+        )
+    
+    async def _read_contract(self, contract_address: str, data: str, block: str) -> str:
+        """Uncached contract read, via Multicall3 when enabled."""
+        if self.enable_multicall:
+            try:
+                return await self._multicall.call(contract_address, data, block)
+            except MulticallError:
+                raise
+            except Exception as e:
+                logger.debug(f"Multicall3 unavailable, falling back to direct eth_call: {e}")
         
-        result = await self._rpc_call("eth_call", [params, block])
-        return result
+        return await self._eth_call({"to": contract_address, "data": data}, block)
+    
+    async def multicall(
+        self,
+        calls: List[ContractCall],
+        block: str = "latest"
+    ) -> List[CallResult]:
+        """
+        Execute many contract reads in a single Multicall3 aggregate3 call.
+        
+        Individual calls may fail without failing the batch; check
+        `CallResult.success` for each entry.
+        
+        Args:
+            calls: Contract calls to aggregate
+            block: Block number or "latest"
+            
+        Returns:
+            One CallResult per call, in order
+        """
+        return await self._multicall.aggregate(calls, block)
+    
+    async def _eth_call(self, params: Dict[str, Any], block: str) -> str:
+        """Raw eth_call used by call_contract and the Multicall3 aggregator."""
+        return await self._send_rpc("eth_call", [params, block])
     
     async def send_raw_transaction(self, signed_tx_hex: str) -> str:
         """
@@ -370,6 +665,19 @@ class EvmClient:
         result = await self._rpc_call("eth_sendRawTransaction", [signed_tx_hex])
         return result
     
+    async def get_block(self, block: Union[int, str] = "latest") -> Optional[Dict[str, Any]]:
+        """
+        Get a block header (without transactions).
+        
+        Args:
+            block: Block number or tag
+            
+        Returns:
+            Raw block object, or None if unknown
+        """
+        tag = hex(block) if isinstance(block, int) else block
+        return await self._rpc_call("eth_getBlockByNumber", [tag, False])
+    
     async def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
         """
         Get transaction receipt.
@@ -386,11 +694,63 @@ class EvmClient:
         except:
             return None
     
+    async def wait_for_receipt(
+        self,
+        tx_hash: str,
+        timeout: float = 120.0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a transaction to be mined.
+        
+        Receipts are checked once per new block, batched with every other
+        pending transaction on this chain.
+        
+        Args:
+            tx_hash: Transaction hash to wait for
+            timeout: Maximum wait time in seconds
+            
+        Returns:
+            Raw receipt, or None if not mined within the timeout
+        """
+        # Already mined (e.g. replayed or slow caller)
+        receipt = await self.get_transaction_receipt(tx_hash)
+        if receipt:
+            return receipt
+        
+        await self._ensure_head_feed()
+        return await self._receipt_watcher.wait(tx_hash, timeout)
+    
+    async def wait_for_block(self, block_number: int, timeout: float = 120.0) -> bool:
+        """
+        Wait until the chain head reaches `block_number`.
+        
+        Returns:
+            True if reached within the timeout
+        """
+        if self._last_head_number >= block_number:
+            return True
+        
+        reached = asyncio.get_running_loop().create_future()
+        
+        def on_head(header: Dict[str, Any]) -> None:
+            if int(header["number"], 16) >= block_number and not reached.done():
+                reached.set_result(True)
+        
+        await self.subscribe_new_heads(on_head)
+        try:
+            if self._last_head_number >= block_number:
+                return True
+            await asyncio.wait_for(reached, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.remove_head_listener(on_head)
+    
     async def wait_for_transaction(
         self, 
         tx_hash: str, 
-        timeout: int = 300,
-        poll_interval: float = 2.0
+        timeout: int = 300
     ) -> TransactionResult:
         """
         Wait for transaction confirmation.
@@ -398,39 +758,203 @@ class EvmClient:
         Args:
             tx_hash: Transaction hash to wait for
             timeout: Maximum wait time in seconds
-            poll_interval: Polling interval in seconds
             
         Returns:
             TransactionResult with final status
         """
-        start_time = asyncio.get_event_loop().time()
+        receipt = await self.wait_for_receipt(tx_hash, timeout)
+        
+        if receipt is None:
+            return TransactionResult(
+                tx_hash=tx_hash,
+                status="timeout",
+                error_message=f"Transaction not confirmed within {timeout}s"
+            )
+        
+        status = "confirmed" if receipt.get("status") == "0x1" else "failed"
+        
+        return TransactionResult(
+            tx_hash=tx_hash,
+            block_number=int(receipt["blockNumber"], 16),
+            gas_used=int(receipt["gasUsed"], 16),
+            status=status,
+            error_message=None if status == "confirmed" else "Transaction reverted"
+        )
+    
+    async def subscribe_new_heads(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        Register a callback for new block headers.
+        
+        The callback receives the header object (hex fields, as in newHeads);
+        coroutine callbacks are scheduled as tasks.
+        """
+        if callback not in self._head_listeners:
+            self._head_listeners.append(callback)
+        await self._ensure_head_feed()
+    
+    def remove_head_listener(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        if callback in self._head_listeners:
+            self._head_listeners.remove(callback)
+    
+    async def subscribe_logs(
+        self,
+        log_filter: Dict[str, Any],
+        callback: Callable[[Dict[str, Any]], Any]
+    ) -> str:
+        """
+        Stream logs matching `log_filter` (address / topics).
+        
+        Uses eth_subscribe("logs") when a WebSocket is available, otherwise
+        eth_getLogs over each new block range.
+        
+        Returns:
+            Subscription handle for `unsubscribe`
+        """
+        if await self._connect_ws():
+            try:
+                return await self.ws_transport.subscribe(["logs", log_filter], callback)
+            except Exception as e:
+                logger.warning(f"{self.chain}: logs subscription failed, polling instead: {e}")
+        
+        handle = f"logs-poll-{len(self._log_pollers) + 1}"
+        self._log_pollers[handle] = {"filter": log_filter, "callback": callback, "from_block": None}
+        await self._ensure_head_feed()
+        return handle
+    
+    async def unsubscribe(self, handle: str) -> None:
+        """Stop a stream started with `subscribe_logs`."""
+        if self._log_pollers.pop(handle, None) is None and self.ws_transport:
+            await self.ws_transport.unsubscribe(handle)
+    
+    def get_head_feed_status(self) -> Dict[str, Any]:
+        return {
+            "websocket": bool(self.ws_transport and self.ws_transport.is_connected),
+            "last_head": self._last_head_number,
+            "listeners": len(self._head_listeners),
+            "pending_receipts": self._receipt_watcher.pending_count,
+            "receipt_watcher": dict(self._receipt_watcher.stats),
+        }
+    
+    async def _connect_ws(self) -> bool:
+        if self.ws_transport is None:
+            return False
+        try:
+            await self.ws_transport.connect()
+            return True
+        except Exception as e:
+            logger.warning(f"{self.chain}: WebSocket unavailable ({e}), using polling")
+            return False
+    
+    async def _ensure_head_feed(self) -> None:
+        """Start following new heads (idempotent)."""
+        if self._head_feed_task and not self._head_feed_task.done():
+            return
+        
+        if self._head_subscription is None and await self._connect_ws():
+            try:
+                self._head_subscription = await self.ws_transport.subscribe(["newHeads"], self._on_new_head)
+                logger.info(f"{self.chain}: following new heads over WebSocket")
+            except Exception as e:
+                logger.warning(f"{self.chain}: newHeads subscription failed, polling instead: {e}")
+        
+        self._head_feed_task = asyncio.create_task(self._head_watchdog())
+    
+    async def _head_watchdog(self) -> None:
+        """
+        Poll the block number whenever the WebSocket is not delivering heads.
+        
+        With a live newHeads subscription this only wakes up to check it is
+        still flowing; otherwise it polls twice per block.
+        """
+        interval = self.config.block_time / 2
+        loop = asyncio.get_running_loop()
         
         while True:
-            # Check timeout
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > timeout:
-                return TransactionResult(
-                    tx_hash=tx_hash,
-                    status="timeout",
-                    error_message=f"Transaction not confirmed within {timeout}s"
-                )
+            await asyncio.sleep(interval)
             
-            # Get receipt
-            receipt = await self.get_transaction_receipt(tx_hash)
+            ws_live = (
+                self._head_subscription is not None
+                and self.ws_transport is not None
+                and self.ws_transport.is_connected
+                and loop.time() - self._last_head_at < self.config.block_time * 3
+            )
+            if ws_live:
+                continue
             
-            if receipt:
-                status = "confirmed" if receipt.get("status") == "0x1" else "failed"
-                
-                return TransactionResult(
-                    tx_hash=tx_hash,
-                    block_number=int(receipt["blockNumber"], 16),
-                    gas_used=int(receipt["gasUsed"], 16),
-                    status=status,
-                    error_message=None if status == "confirmed" else "Transaction reverted"
-                )
+            try:
+                block_number = await self.get_block_number()
+            except Exception as e:
+                logger.debug(f"{self.chain}: head poll failed: {e}")
+                continue
             
-            # Wait before next poll
-            await asyncio.sleep(poll_interval)
+            if block_number > self._last_head_number:
+                self._on_new_head({"number": hex(block_number)})
+    
+    def _on_new_head(self, header: Dict[str, Any]) -> None:
+        """Fan a new head out to the cache, pending receipts, log pollers and listeners."""
+        try:
+            number = int(header["number"], 16)
+        except (KeyError, TypeError, ValueError):
+            return
+        
+        if self.rpc_cache is not None:
+            self.rpc_cache.observe_block(header)
+        
+        # Ignore repeats (polling, resubscribe replays); a new hash at a known height is a reorg
+        block_hash = header.get("hash")
+        if number <= self._last_head_number and (not block_hash or self._recent_head_hashes.get(number) == block_hash):
+            return
+        if block_hash:
+            self._recent_head_hashes[number] = block_hash
+            self._recent_head_hashes.pop(number - 64, None)
+        self._last_head_number = max(self._last_head_number, number)
+        self._last_head_at = asyncio.get_running_loop().time()
+        
+        self._receipt_watcher.on_new_head(header)
+        
+        if self._log_pollers:
+            asyncio.create_task(self._poll_logs(number))
+        
+        for listener in list(self._head_listeners):
+            try:
+                result = listener(header)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                logger.error(f"{self.chain}: head listener failed: {e}")
+    
+    async def _poll_logs(self, head: int) -> None:
+        """eth_getLogs fallback for log subscriptions without a WebSocket."""
+        for poller in list(self._log_pollers.values()):
+            from_block = poller["from_block"] or head
+            if from_block > head:
+                continue
+            # Claim the range before awaiting so overlapping polls do not repeat it
+            poller["from_block"] = head + 1
+            try:
+                logs = await self._rpc_call("eth_getLogs", [{
+                    **poller["filter"],
+                    "fromBlock": hex(from_block),
+                    "toBlock": hex(head),
+                }])
+            except Exception as e:
+                logger.debug(f"{self.chain}: eth_getLogs poll failed: {e}")
+                poller["from_block"] = min(poller["from_block"], from_block)
+                continue
+            for log in logs or []:
+                try:
+                    result = poller["callback"](log)
+                    if asyncio.iscoroutine(result):
+                        asyncio.create_task(result)
+                except Exception as e:
+                    logger.error(f"{self.chain}: log callback failed: {e}")
+    
+    async def _fetch_receipts(self, tx_hashes: List[str]) -> List[Any]:
+        """Receipts for several transactions in one JSON-RPC batch."""
+        return await self.batch_call(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes],
+            return_exceptions=True
+        )
     
     def build_transaction(
         self,
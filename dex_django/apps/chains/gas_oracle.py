@@ -0,0 +1,407 @@
+# APP: dex_django/apps/chains
+# FILE: gas_oracle.py
+"""
+Background gas oracle for DEX Sniper Pro
+
+One oracle per chain refreshes on every new head from eth_feeHistory
+priority-fee percentiles and publishes ready-to-use EIP-1559 fee tuples
+for four urgency tiers (slow / normal / fast / urgent). Transaction
+builders read the latest estimate from memory instead of querying gas in
+the request path.
+
+Chains without a base fee (e.g. BSC) get legacy gas-price tiers derived
+from eth_gasPrice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .evm_client import EvmClient, GasSnapshot
+from .head_tracker import ChainHead, head_tracker
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("slow", "normal", "fast", "urgent")
+
+# Priority fee percentile sampled per tier
+TIER_PERCENTILES: Dict[str, float] = {
+    "slow": 10,
+    "normal": 50,
+    "fast": 75,
+    "urgent": 95,
+}
+
+# Blocks of worst-case base fee growth (12.5% per full block) covered by maxFeePerGas
+TIER_HEADROOM_BLOCKS: Dict[str, int] = {
+    "slow": 1,
+    "normal": 2,
+    "fast": 3,
+    "urgent": 6,
+}
+
+# Multipliers on eth_gasPrice for chains without a base fee
+LEGACY_MULTIPLIERS: Dict[str, Decimal] = {
+    "slow": Decimal("1.0"),
+    "normal": Decimal("1.1"),
+    "fast": Decimal("1.2"),
+    "urgent": Decimal("1.5"),
+}
+
+# Estimates older than this many blocks (by head or wall clock) are not served
+MAX_ESTIMATE_AGE_BLOCKS = 3
+
+BASE_FEE_MAX_CHANGE = Decimal("1.125")
+GWEI = Decimal(10**9)
+
+
+@dataclass(frozen=True)
+class FeeTier:
+    """Fee parameters for one urgency tier, in wei."""
+    max_fee_per_gas: int
+    max_priority_fee_per_gas: int
+    gas_price: int
+    eip1559: bool
+
+    def to_tx_params(self) -> Dict[str, int]:
+        """Fee fields for a transaction dict."""
+        if self.eip1559:
+            return {
+                "maxFeePerGas": self.max_fee_per_gas,
+                "maxPriorityFeePerGas": self.max_priority_fee_per_gas,
+            }
+        return {"gasPrice": self.gas_price}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_fee_gwei": float(Decimal(self.max_fee_per_gas) / GWEI),
+            "max_priority_fee_gwei": float(Decimal(self.max_priority_fee_per_gas) / GWEI),
+            "gas_price_gwei": float(Decimal(self.gas_price) / GWEI),
+            "eip1559": self.eip1559,
+        }
+
+
+@dataclass(frozen=True)
+class GasEstimate:
+    """Fee tiers published for the next block of a chain."""
+    chain: str
+    block_number: int
+    base_fee_wei: int
+    next_base_fee_wei: int
+    tiers: Dict[str, FeeTier]
+    updated_at: datetime
+
+    @property
+    def eip1559(self) -> bool:
+        return self.next_base_fee_wei > 0
+
+    def tier(self, name: str) -> FeeTier:
+        if name not in self.tiers:
+            raise ValueError(f"Unknown gas tier: {name}. Must be one of: {list(TIERS)}")
+        return self.tiers[name]
+
+    def to_snapshot(self) -> GasSnapshot:
+        """Legacy GasSnapshot view (normal tier)."""
+        normal = self.tiers["normal"]
+        return GasSnapshot(
+            base_fee_gwei=Decimal(self.next_base_fee_wei) / GWEI,
+            priority_fee_gwei=Decimal(normal.max_priority_fee_per_gas) / GWEI,
+            gas_price_gwei=Decimal(normal.gas_price) / GWEI,
+            timestamp=self.updated_at,
+            block_number=self.block_number
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "block_number": self.block_number,
+            "base_fee_gwei": float(Decimal(self.base_fee_wei) / GWEI),
+            "next_base_fee_gwei": float(Decimal(self.next_base_fee_wei) / GWEI),
+            "eip1559": self.eip1559,
+            "tiers": {name: tier.to_dict() for name, tier in self.tiers.items()},
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class ChainGasOracle:
+    """Maintains a rolling fee-history window for one chain and derives tiers."""
+
+    def __init__(self, client: EvmClient, window: int = 20):
+        """
+        Initialize the oracle.
+
+        Args:
+            client: EVM client used for fee history
+            window: Number of recent blocks the percentiles are taken over
+        """
+        self.client = client
+        self.chain = client.chain
+        self.window = window
+        self.estimate: Optional[GasEstimate] = None
+
+        # Per block: (number, base fee, gas used ratio, [reward per tier])
+        self._blocks: Deque[Tuple[int, int, float, List[int]]] = deque(maxlen=window)
+        self._next_base_fee = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_again = False
+        self._ready = asyncio.Event()
+
+        self.stats = {
+            "refreshes": 0,
+            "failures": 0,
+            "blocks_fetched": 0,
+            "stale_reads": 0,
+        }
+
+    async def wait_ready(self, timeout: float) -> Optional[GasEstimate]:
+        """Wait for a current estimate (returns immediately while one is fresh)."""
+        if self.estimate is None or self.is_stale():
+            self._ready.clear()
+            self.refresh_soon()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.estimate
+
+    def is_stale(self) -> bool:
+        """True if the estimate is more than MAX_ESTIMATE_AGE_BLOCKS behind."""
+        estimate = self.estimate
+        if estimate is None:
+            return True
+        head = head_tracker.latest_block(self.chain)
+        if head is not None and head - estimate.block_number > MAX_ESTIMATE_AGE_BLOCKS:
+            return True
+        # Wall clock covers a stalled head feed
+        elapsed = (datetime.now(timezone.utc) - estimate.updated_at).total_seconds()
+        return elapsed > MAX_ESTIMATE_AGE_BLOCKS * self.client.config.block_time
+
+    def current_estimate(self) -> Optional[GasEstimate]:
+        """The estimate if fresh; otherwise None and a refresh is started."""
+        if self.estimate is None:
+            return None
+        if self.is_stale():
+            self.stats["stale_reads"] += 1
+            self.refresh_soon()
+            return None
+        return self.estimate
+
+    def on_new_head(self, head: ChainHead) -> None:
+        """Head tracker callback: refresh once per new block."""
+        if self.estimate is not None and head.number <= self.estimate.block_number:
+            return
+        self.refresh_soon()
+
+    def refresh_soon(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            # A refresh is running; run once more when it finishes
+            self._refresh_again = True
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "estimate": self.estimate.to_dict() if self.estimate else None,
+            "window_blocks": len(self._blocks),
+            **self.stats,
+        }
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            self._refresh_again = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.warning(f"{self.chain}: gas oracle refresh failed: {e}")
+            if not self._refresh_again:
+                return
+
+    async def refresh(self) -> GasEstimate:
+        """Pull fee history for blocks not yet seen and republish the tiers."""
+        percentiles = [TIER_PERCENTILES[tier] for tier in TIERS]
+
+        # Only fetch blocks newer than the window; a full window on first run
+        # or after a gap. The oracle follows the tracked head when available.
+        newest = head_tracker.latest_block(self.chain)
+        last_seen = self._blocks[-1][0] if self._blocks else None
+        if newest is not None and last_seen is not None:
+            count = min(self.window, max(newest - last_seen, 0))
+            if count == 0 and not self.is_stale():
+                return self.estimate
+        else:
+            count = self.window
+
+        try:
+            history = await self.client.get_fee_history(
+                max(count, 1), newest if newest is not None else "latest", percentiles
+            )
+        except Exception as e:
+            logger.debug(f"{self.chain}: eth_feeHistory unavailable ({e}); using gas price")
+            history = None
+
+        if history and history.get("baseFeePerGas"):
+            self._ingest(history)
+
+        estimate = await self._build_estimate()
+        self.estimate = estimate
+        self._ready.set()
+        self.stats["refreshes"] += 1
+        return estimate
+
+    def _ingest(self, history: Dict[str, Any]) -> None:
+        oldest = int(history["oldestBlock"], 16)
+        base_fees = [int(fee, 16) for fee in history["baseFeePerGas"]]
+        ratios = history.get("gasUsedRatio") or []
+        rewards = history.get("reward") or []
+
+        for offset, ratio in enumerate(ratios):
+            number = oldest + offset
+            if self._blocks and number <= self._blocks[-1][0]:
+                continue
+            block_rewards = [int(r, 16) for r in rewards[offset]] if offset < len(rewards) else []
+            self._blocks.append((number, base_fees[offset], float(ratio), block_rewards))
+            self.stats["blocks_fetched"] += 1
+
+        # Last entry is the base fee of the block after the newest one
+        self._next_base_fee = base_fees[-1]
+
+    async def _build_estimate(self) -> GasEstimate:
+        block_number = self._blocks[-1][0] if self._blocks else (head_tracker.latest_block(self.chain) or 0)
+        base_fee = self._blocks[-1][1] if self._blocks else 0
+        next_base_fee = self._next_base_fee
+
+        if next_base_fee > 0:
+            tiers = await self._eip1559_tiers(next_base_fee)
+        else:
+            tiers = await self._legacy_tiers()
+
+        return GasEstimate(
+            chain=self.chain,
+            block_number=block_number,
+            base_fee_wei=base_fee,
+            next_base_fee_wei=next_base_fee,
+            tiers=tiers,
+            updated_at=datetime.now(timezone.utc)
+        )
+
+    async def _eip1559_tiers(self, next_base_fee: int) -> Dict[str, FeeTier]:
+        # Empty blocks report zero rewards and would drag the percentiles down
+        samples = [rewards for _, _, ratio, rewards in self._blocks if ratio > 0 and rewards]
+
+        if samples:
+            priority_fees = [
+                int(statistics.median(rewards[i] for rewards in samples))
+                for i in range(len(TIERS))
+            ]
+        else:
+            suggested = await self.client.get_max_priority_fee()
+            priority_fees = [suggested] * len(TIERS)
+
+        tiers: Dict[str, FeeTier] = {}
+        floor = 0
+        for name, priority in zip(TIERS, priority_fees):
+            # Tiers never get cheaper as urgency rises
+            priority = max(priority, floor)
+            floor = priority
+            headroom = BASE_FEE_MAX_CHANGE ** TIER_HEADROOM_BLOCKS[name]
+            tiers[name] = FeeTier(
+                max_fee_per_gas=int(Decimal(next_base_fee) * headroom) + priority,
+                max_priority_fee_per_gas=priority,
+                gas_price=next_base_fee + priority,
+                eip1559=True
+            )
+        return tiers
+
+    async def _legacy_tiers(self) -> Dict[str, FeeTier]:
+        gas_price = await self.client.get_gas_price()
+        tiers: Dict[str, FeeTier] = {}
+        for name in TIERS:
+            price = int(Decimal(gas_price) * LEGACY_MULTIPLIERS[name])
+            tiers[name] = FeeTier(
+                max_fee_per_gas=price,
+                max_priority_fee_per_gas=price,
+                gas_price=price,
+                eip1559=False
+            )
+        return tiers
+
+
+class GasOracleService:
+    """Registry of per-chain gas oracles driven by the head tracker."""
+
+    def __init__(self):
+        self._oracles: Dict[str, ChainGasOracle] = {}
+        self._start_lock = asyncio.Lock()
+
+    async def ensure_started(self, chain: str) -> Optional[ChainGasOracle]:
+        """Start the oracle for a chain on demand; None for non-EVM chains."""
+        if chain not in EvmClient.CHAIN_CONFIGS:
+            return None
+
+        async with self._start_lock:
+            oracle = self._oracles.get(chain)
+            if oracle is None:
+                tracker = await head_tracker.ensure_started(chain)
+                oracle = ChainGasOracle(tracker.client)
+                tracker.subscribe(oracle.on_new_head)
+                self._oracles[chain] = oracle
+                oracle.refresh_soon()
+        return oracle
+
+    async def start(self, chains: Optional[List[str]] = None) -> None:
+        chains = chains or list(EvmClient.CHAIN_CONFIGS)
+        await asyncio.gather(*(self.ensure_started(chain) for chain in chains), return_exceptions=True)
+        logger.info(f"Gas oracles started for: {', '.join(chains)}")
+
+    async def stop(self) -> None:
+        for chain, oracle in self._oracles.items():
+            head_tracker.unsubscribe(chain, oracle.on_new_head)
+            if oracle._refresh_task:
+                oracle._refresh_task.cancel()
+        self._oracles.clear()
+
+    def get_estimate(self, chain: str) -> Optional[GasEstimate]:
+        """Latest estimate if still fresh, else None; never does RPC."""
+        oracle = self._oracles.get(chain)
+        return oracle.current_estimate() if oracle else None
+
+    async def get_fees(self, chain: str, tier: str = "normal", timeout: float = 5.0) -> FeeTier:
+        """
+        Fee parameters for the next block.
+
+        Returns from memory once the chain's oracle is running; only the very
+        first call for a chain waits for the initial fee history.
+
+        Args:
+            chain: Chain name
+            tier: One of slow / normal / fast / urgent
+            timeout: Maximum wait for the first estimate
+
+        Returns:
+            FeeTier for the requested urgency
+        """
+        estimate = self.get_estimate(chain)
+        if estimate is None:
+            oracle = await self.ensure_started(chain)
+            if oracle is None:
+                raise ValueError(f"No gas oracle for chain: {chain}")
+            estimate = await oracle.wait_ready(timeout)
+            if estimate is None:
+                raise RuntimeError(f"Gas oracle for {chain} has no estimate yet")
+        return estimate.tier(tier)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {chain: oracle.get_status() for chain, oracle in self._oracles.items()}
+
+
+# Global gas oracle instance
+gas_oracle = GasOracleService()
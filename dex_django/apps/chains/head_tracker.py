@@ -0,0 +1,283 @@
+# APP: dex_django/apps/chains
+# FILE: head_tracker.py
+"""
+Per-chain block head tracking for DEX Sniper Pro
+
+One tracker per chain follows the chain head (newHeads over WebSocket,
+block-number polling as fallback) and keeps the latest number, hash,
+timestamp, base fee and block-time statistics in memory. Components read
+the head with zero RPC cost and can register callbacks for new heads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .evm_client import EvmClient
+
+logger = logging.getLogger(__name__)
+
+HeadCallback = Callable[["ChainHead"], Any]
+
+
+@dataclass
+class ChainHead:
+    """Latest known block of a chain."""
+    chain: str
+    number: int
+    block_hash: Optional[str]
+    timestamp: Optional[datetime]
+    base_fee_wei: Optional[int]
+    received_at: datetime
+
+    @property
+    def base_fee_gwei(self) -> Optional[Decimal]:
+        if self.base_fee_wei is None:
+            return None
+        return Decimal(self.base_fee_wei) / Decimal(10**9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "number": self.number,
+            "hash": self.block_hash,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "base_fee_gwei": float(self.base_fee_gwei) if self.base_fee_wei is not None else None,
+            "received_at": self.received_at.isoformat(),
+        }
+
+
+class ChainHeadTracker:
+    """Follows the head of one chain and fans new heads out to subscribers."""
+
+    def __init__(self, client: EvmClient, window: int = 100):
+        """
+        Initialize the tracker.
+
+        Args:
+            client: EVM client used to follow heads
+            window: Number of recent block intervals kept for statistics
+        """
+        self.client = client
+        self.chain = client.chain
+        self.head: Optional[ChainHead] = None
+
+        self._intervals: Deque[float] = deque(maxlen=window)
+        self._callbacks: List[HeadCallback] = []
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+        self.stats = {
+            "heads": 0,
+            "header_fetches": 0,
+            "reorgs": 0,
+        }
+
+    @property
+    def block_number(self) -> Optional[int]:
+        return self.head.number if self.head else None
+
+    async def start(self) -> None:
+        """Start following heads (idempotent) and load the current head."""
+        async with self._start_lock:
+            if self._started:
+                return
+            await self.client.subscribe_new_heads(self._on_header)
+            self._started = True
+
+        if self.head is None:
+            try:
+                await self._on_header(await self.client.get_block("latest"))
+            except Exception as e:
+                logger.warning(f"{self.chain}: initial head fetch failed: {e}")
+
+    async def stop(self) -> None:
+        self.client.remove_head_listener(self._on_header)
+        self._started = False
+
+    def subscribe(self, callback: HeadCallback) -> None:
+        """Call `callback(ChainHead)` on every new head (sync or async)."""
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: HeadCallback) -> None:
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    async def wait_for_block(self, block_number: int, timeout: float) -> bool:
+        """Wait until the head reaches `block_number`."""
+        if self.block_number is not None and self.block_number >= block_number:
+            return True
+
+        reached = asyncio.get_running_loop().create_future()
+
+        def on_head(head: ChainHead) -> None:
+            if head.number >= block_number and not reached.done():
+                reached.set_result(True)
+
+        self.subscribe(on_head)
+        try:
+            await asyncio.wait_for(reached, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.unsubscribe(on_head)
+
+    def get_block_time_stats(self) -> Dict[str, Any]:
+        """Observed block interval statistics (seconds)."""
+        intervals = list(self._intervals)
+        if not intervals:
+            return {
+                "samples": 0,
+                "configured": self.client.config.block_time,
+            }
+        ordered = sorted(intervals)
+        return {
+            "samples": len(intervals),
+            "configured": self.client.config.block_time,
+            "mean": round(statistics.fmean(intervals), 3),
+            "median": round(statistics.median(intervals), 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            "last": round(intervals[-1], 3),
+        }
+
+    def expected_block_time(self) -> float:
+        """Median observed block time, or the configured one before enough samples."""
+        if len(self._intervals) < 5:
+            return self.client.config.block_time
+        return statistics.median(self._intervals)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "following": self._started,
+            "head": self.head.to_dict() if self.head else None,
+            "block_time": self.get_block_time_stats(),
+            "subscribers": len(self._callbacks),
+            **self.stats,
+        }
+
+    async def _on_header(self, header: Dict[str, Any]) -> None:
+        """Handle a newHeads header or a polled block number."""
+        if not header or header.get("number") is None:
+            return
+
+        # Polled heads carry only the number; fetch the header once (block-cached)
+        if header.get("timestamp") is None:
+            self.stats["header_fetches"] += 1
+            try:
+                header = await self.client.get_block(header["number"]) or header
+            except Exception as e:
+                logger.debug(f"{self.chain}: header fetch failed: {e}")
+
+        number = int(header["number"], 16)
+        previous = self.head
+
+        if previous is not None:
+            if number < previous.number:
+                return
+            if number == previous.number:
+                if header.get("hash") in (None, previous.block_hash):
+                    return
+                self.stats["reorgs"] += 1
+
+        timestamp = None
+        if header.get("timestamp") is not None:
+            timestamp = datetime.fromtimestamp(int(header["timestamp"], 16), tz=timezone.utc)
+
+        base_fee = header.get("baseFeePerGas")
+
+        head = ChainHead(
+            chain=self.chain,
+            number=number,
+            block_hash=header.get("hash"),
+            timestamp=timestamp,
+            base_fee_wei=int(base_fee, 16) if base_fee is not None else None,
+            received_at=datetime.now(timezone.utc)
+        )
+
+        if previous is not None and previous.timestamp and timestamp and number > previous.number:
+            # Average over skipped blocks when heads were missed
+            interval = (timestamp - previous.timestamp).total_seconds() / (number - previous.number)
+            if interval > 0:
+                self._intervals.append(interval)
+
+        self.head = head
+        self.stats["heads"] += 1
+
+        for callback in list(self._callbacks):
+            try:
+                result = callback(head)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                logger.error(f"{self.chain}: head callback failed: {e}")
+
+
+class HeadTrackerService:
+    """Registry of per-chain head trackers."""
+
+    def __init__(self):
+        self._trackers: Dict[str, ChainHeadTracker] = {}
+
+    def get_tracker(self, chain: str) -> ChainHeadTracker:
+        """Tracker for a chain (created on first use, not yet started)."""
+        if chain not in self._trackers:
+            self._trackers[chain] = ChainHeadTracker(EvmClient(chain))
+        return self._trackers[chain]
+
+    async def start(self, chains: Optional[List[str]] = None) -> None:
+        """Start following the given chains (default: all configured EVM chains)."""
+        chains = chains or list(EvmClient.CHAIN_CONFIGS)
+        await asyncio.gather(
+            *(self.get_tracker(chain).start() for chain in chains),
+            return_exceptions=True
+        )
+        logger.info(f"Head tracking started for: {', '.join(chains)}")
+
+    async def ensure_started(self, chain: str) -> Optional[ChainHeadTracker]:
+        """Start tracking a chain on demand; None for chains without an EVM config."""
+        if chain not in EvmClient.CHAIN_CONFIGS:
+            return None
+        tracker = self.get_tracker(chain)
+        await tracker.start()
+        return tracker
+
+    async def stop(self) -> None:
+        for tracker in self._trackers.values():
+            await tracker.stop()
+            await tracker.client.close()
+        self._trackers.clear()
+
+    def get_head(self, chain: str) -> Optional[ChainHead]:
+        """Latest known head; never does RPC."""
+        tracker = self._trackers.get(chain)
+        return tracker.head if tracker else None
+
+    def latest_block(self, chain: str) -> Optional[int]:
+        """Latest known block number; never does RPC."""
+        head = self.get_head(chain)
+        return head.number if head else None
+
+    def subscribe(self, chain: str, callback: HeadCallback) -> None:
+        self.get_tracker(chain).subscribe(callback)
+
+    def unsubscribe(self, chain: str, callback: HeadCallback) -> None:
+        tracker = self._trackers.get(chain)
+        if tracker:
+            tracker.unsubscribe(callback)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {chain: tracker.get_status() for chain, tracker in self._trackers.items()}
+
+
+# Global head tracker instance
+head_tracker = HeadTrackerService()
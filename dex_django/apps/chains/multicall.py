@@ -0,0 +1,273 @@
+# APP: dex_django/apps/chains
+# FILE: multicall.py
+"""
+Multicall3 aggregation for DEX Sniper Pro
+
+Packs many read-only contract calls into a single `aggregate3` eth_call.
+Each call may fail independently without reverting the whole batch.
+Multicall3 is deployed at the same address on Ethereum, BSC, Base and Polygon.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import decode, encode
+
+logger = logging.getLogger(__name__)
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Function selectors
+AGGREGATE3_SELECTOR = "0x82ad56cb"       # aggregate3((address,bool,bytes)[])
+GET_ETH_BALANCE_SELECTOR = "0x4d2301cc"  # getEthBalance(address)
+BALANCE_OF_SELECTOR = "0x70a08231"       # balanceOf(address)
+DECIMALS_SELECTOR = "0x313ce567"         # decimals()
+GET_RESERVES_SELECTOR = "0x0902f1ac"     # getReserves()
+GET_AMOUNTS_OUT_SELECTOR = "0xd06ca61f"  # getAmountsOut(uint256,address[])
+
+# eth_call(tx_params, block) -> hex string or bytes
+EthCall = Callable[[Dict[str, Any], str], Awaitable[Any]]
+
+
+class MulticallError(Exception):
+    """A call inside a Multicall3 batch failed."""
+
+
+@dataclass
+class ContractCall:
+    """A single read-only call to pack into aggregate3."""
+    target: str
+    call_data: str
+    allow_failure: bool = True
+
+
+@dataclass
+class CallResult:
+    """Outcome of one call inside aggregate3."""
+    success: bool
+    return_data: str
+
+
+@dataclass
+class _QueuedCall:
+    call: ContractCall
+    future: asyncio.Future = field(repr=False)
+
+
+def _to_bytes(data: Any) -> bytes:
+    """Normalize hex strings and HexBytes into raw bytes."""
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    raise TypeError(f"Unsupported call data type: {type(data)!r}")
+
+
+def encode_aggregate3(calls: Sequence[ContractCall]) -> str:
+    """Encode calldata for Multicall3.aggregate3."""
+    encoded = encode(
+        ["(address,bool,bytes)[]"],
+        [[(call.target, call.allow_failure, _to_bytes(call.call_data)) for call in calls]]
+    )
+    return AGGREGATE3_SELECTOR + encoded.hex()
+
+
+def decode_aggregate3(return_data: Any) -> List[CallResult]:
+    """Decode the (bool,bytes)[] result of aggregate3."""
+    (results,) = decode(["(bool,bytes)[]"], _to_bytes(return_data))
+    return [CallResult(success=success, return_data="0x" + data.hex()) for success, data in results]
+
+
+def balance_of_call(token: str, owner: str) -> ContractCall:
+    """ERC20 balanceOf(owner) call."""
+    return ContractCall(token, BALANCE_OF_SELECTOR + encode(["address"], [owner]).hex())
+
+
+def decimals_call(token: str) -> ContractCall:
+    """ERC20 decimals() call."""
+    return ContractCall(token, DECIMALS_SELECTOR)
+
+
+def reserves_call(pair: str) -> ContractCall:
+    """Uniswap V2 pair getReserves() call."""
+    return ContractCall(pair, GET_RESERVES_SELECTOR)
+
+
+def eth_balance_call(owner: str) -> ContractCall:
+    """Native balance via Multicall3.getEthBalance(owner)."""
+    return ContractCall(MULTICALL3_ADDRESS, GET_ETH_BALANCE_SELECTOR + encode(["address"], [owner]).hex())
+
+
+def amounts_out_call(router: str, amount_in: int, path: Sequence[str]) -> ContractCall:
+    """Uniswap V2 router getAmountsOut(amount_in, path) call."""
+    return ContractCall(
+        router,
+        GET_AMOUNTS_OUT_SELECTOR + encode(["uint256", "address[]"], [amount_in, list(path)]).hex()
+    )
+
+
+def decode_uint(return_data: str) -> int:
+    """Decode a single uint256 return value."""
+    return decode(["uint256"], _to_bytes(return_data))[0]
+
+
+def decode_reserves(return_data: str) -> Tuple[int, int, int]:
+    """Decode getReserves() into (reserve0, reserve1, block_timestamp_last)."""
+    return tuple(decode(["uint112", "uint112", "uint32"], _to_bytes(return_data)))
+
+
+def decode_amounts(return_data: str) -> List[int]:
+    """Decode a uint256[] return value such as getAmountsOut."""
+    return list(decode(["uint256[]"], _to_bytes(return_data))[0])
+
+
+class Multicall3Aggregator:
+    """
+    Batches contract reads through Multicall3.
+
+    `aggregate()` sends an explicit list of calls in one eth_call.
+    `call()` queues a single call; calls queued for the same block within
+    the batching window are packed into the same aggregate3 request.
+    """
+
+    def __init__(
+        self,
+        eth_call: EthCall,
+        window_seconds: float = 0.005,
+        max_calls_per_batch: int = 100,
+        address: str = MULTICALL3_ADDRESS
+    ):
+        """
+        Initialize the aggregator.
+
+        Args:
+            eth_call: Coroutine performing eth_call(tx_params, block)
+            window_seconds: How long to collect queued calls before sending
+            max_calls_per_batch: Maximum calls packed into one aggregate3
+            address: Multicall3 contract address
+        """
+        self._eth_call = eth_call
+        self.window_seconds = window_seconds
+        self.max_calls_per_batch = max(1, max_calls_per_batch)
+        self.address = address
+
+        self._queues: Dict[str, List[_QueuedCall]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: set = set()
+
+        self.stats = {
+            "calls": 0,
+            "aggregate_requests": 0,
+            "failed_calls": 0,
+        }
+
+    async def aggregate(
+        self,
+        calls: Sequence[ContractCall],
+        block: str = "latest"
+    ) -> List[CallResult]:
+        """
+        Execute calls through aggregate3.
+
+        Args:
+            calls: Calls to execute
+            block: Block number (hex) or tag
+
+        Returns:
+            One CallResult per call, in order
+
+        Raises:
+            MulticallError: If a batch returned a different number of results than calls
+        """
+        results: List[CallResult] = []
+
+        for start in range(0, len(calls), self.max_calls_per_batch):
+            chunk = list(calls[start:start + self.max_calls_per_batch])
+            self.stats["calls"] += len(chunk)
+            self.stats["aggregate_requests"] += 1
+
+            raw = await self._eth_call(
+                {"to": self.address, "data": encode_aggregate3(chunk)},
+                block
+            )
+            chunk_results = decode_aggregate3(raw)
+            if len(chunk_results) != len(chunk):
+                # Results can't be matched to calls; fail the whole batch
+                raise MulticallError(
+                    f"aggregate3 returned {len(chunk_results)} results for {len(chunk)} calls"
+                )
+            self.stats["failed_calls"] += sum(1 for result in chunk_results if not result.success)
+            results.extend(chunk_results)
+
+        return results
+
+    async def call(self, target: str, call_data: str, block: str = "latest") -> str:
+        """
+        Queue a single call for the next aggregate3 batch.
+
+        Args:
+            target: Contract address
+            call_data: Encoded function call data
+            block: Block number (hex) or tag
+
+        Returns:
+            Hex-encoded return data
+
+        Raises:
+            MulticallError: If the call reverted inside the batch
+        """
+        loop = asyncio.get_running_loop()
+        queued = _QueuedCall(ContractCall(target, call_data), loop.create_future())
+        queue = self._queues.setdefault(block, [])
+        queue.append(queued)
+
+        if len(queue) >= self.max_calls_per_batch:
+            self._flush(block)
+        elif block not in self._flush_handles:
+            self._flush_handles[block] = loop.call_later(self.window_seconds, self._flush, block)
+
+        return await queued.future
+
+    async def close(self) -> None:
+        """Send queued calls and wait for in-flight batches."""
+        for block in list(self._queues):
+            self._flush(block)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _flush(self, block: str) -> None:
+        handle = self._flush_handles.pop(block, None)
+        if handle is not None:
+            handle.cancel()
+
+        queue = self._queues.pop(block, [])
+        if not queue:
+            return
+
+        task = asyncio.create_task(self._send(queue, block))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, queue: List[_QueuedCall], block: str) -> None:
+        try:
+            results = await self.aggregate([queued.call for queued in queue], block)
+        except Exception as e:
+            logger.warning(f"Multicall3 aggregate failed for {len(queue)} calls: {e}")
+            for queued in queue:
+                if not queued.future.done():
+                    queued.future.set_exception(e)
+            return
+
+        for queued, result in zip(queue, results):
+            if queued.future.done():
+                continue
+            if result.success:
+                queued.future.set_result(result.return_data)
+            else:
+                queued.future.set_exception(
+                    MulticallError(f"Call to {queued.call.target} reverted: {result.return_data}")
+                )
@@ -4,7 +4,7 @@ import asyncio
 import logging
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
 
 import httpx
 from web3 import AsyncWeb3, AsyncHTTPProvider
@@ -12,9 +12,13 @@ from web3.exceptions import Web3Exception
 
 # Using your existing Django storage models
 from apps.storage.models import Provider
+from apps.chains.endpoint_scorer import EndpointScorer
+from apps.chains.multicall import Multicall3Aggregator
 
 logger = logging.getLogger("api")
 
+T = TypeVar("T")
+
 
 @dataclass
 class ChainConfig:
@@ -37,7 +41,7 @@ class ChainConfig:
 class Web3ProviderManager:
     """
     Manages Web3 connections across multiple chains with failover support.
-    Handles provider rotation and connection health monitoring.
+    Routes calls to the fastest healthy provider using per-chain endpoint scoring.
     """
     
     CHAIN_CONFIGS = {
@@ -78,9 +82,9 @@ class Web3ProviderManager:
     }
     
     def __init__(self):
-        self._providers: Dict[str, List[AsyncWeb3]] = {}
-        self._current_provider_index: Dict[str, int] = {}
-        self._provider_health: Dict[str, Dict[int, bool]] = {}
+        self._providers: Dict[str, Dict[str, AsyncWeb3]] = {}
+        self._scorers: Dict[str, EndpointScorer] = {}
+        self._multicall: Dict[str, Multicall3Aggregator] = {}
     
     async def initialize(self) -> None:
         """Initialize Web3 providers from database configuration."""
@@ -138,61 +142,98 @@ class Web3ProviderManager:
     async def _init_chain_providers(self, chain: str, rpc_urls: List[str]) -> None:
         """Initialize Web3 providers for a specific chain."""
         try:
-            providers = []
+            providers = {url: AsyncWeb3(AsyncHTTPProvider(url)) for url in rpc_urls}
+            
+            async def probe(url: str) -> None:
+                await asyncio.wait_for(providers[url].eth.get_block_number(), timeout=5.0)
+            
+            scorer = EndpointScorer(rpc_urls, probe=probe)
+            
+            connected = 0
             for url in rpc_urls:
                 try:
-                    provider = AsyncWeb3(AsyncHTTPProvider(url))
-                    # Test connection
-                    await asyncio.wait_for(provider.eth.get_block_number(), timeout=5.0)
-                    providers.append(provider)
+                    # Test connection (also seeds the latency estimate)
+                    await scorer.run(url, probe)
+                    connected += 1
                     logger.info("Connected to %s RPC: %s", chain, url[:50] + "...")
                 except Exception as e:
+                    scorer.mark_unhealthy(url, e)
                     logger.warning("Failed to connect to %s RPC %s: %s", chain, url[:50], e)
             
-            if providers:
+            if connected:
                 self._providers[chain] = providers
-                self._current_provider_index[chain] = 0
-                self._provider_health[chain] = {i: True for i in range(len(providers))}
+                self._scorers[chain] = scorer
+            else:
+                await scorer.close()
                 
         except Exception:
             logger.exception("Failed to initialize providers for chain %s", chain)
     
     async def get_provider(self, chain: str) -> Optional[AsyncWeb3]:
-        """Get active Web3 provider for a chain with automatic failover."""
+        """Get the fastest healthy Web3 provider for a chain."""
         if chain not in self._providers or not self._providers[chain]:
             return None
         
-        providers = self._providers[chain]
-        current_idx = self._current_provider_index[chain]
+        return self._providers[chain][self._scorers[chain].best()]
+    
+    async def call(
+        self,
+        chain: str,
+        fn: Callable[[AsyncWeb3], Awaitable[T]],
+        hedge: bool = False
+    ) -> T:
+        """
+        Run `fn(provider)` on the best provider for a chain and record its latency.
         
-        # Try current provider first
-        if self._provider_health[chain].get(current_idx, False):
-            return providers[current_idx]
+        Args:
+            chain: Chain name
+            fn: Coroutine taking an AsyncWeb3 provider
+            hedge: Send to a second provider if the first exceeds its p95 latency
+        """
+        if chain not in self._providers or not self._providers[chain]:
+            raise RuntimeError(f"No Web3 provider available for chain {chain}")
         
-        # Find next healthy provider
-        for i in range(len(providers)):
-            if self._provider_health[chain].get(i, False):
-                self._current_provider_index[chain] = i
-                return providers[i]
+        providers = self._providers[chain]
+        scorer = self._scorers[chain]
+        
+        async def run(url: str) -> T:
+            return await fn(providers[url])
         
-        # All providers unhealthy - try to reconnect
-        await self._health_check_chain(chain)
-        return providers[0] if providers else None
+        if hedge:
+            return await scorer.hedged(run)
+        return await scorer.call_with_failover(run)
+    
+    def get_endpoint_stats(self, chain: str) -> List[Dict[str, Any]]:
+        """Latency and health statistics for each provider on a chain."""
+        scorer = self._scorers.get(chain)
+        return scorer.snapshot() if scorer else []
     
     async def get_balance(self, chain: str, address: str) -> Optional[Decimal]:
         """Get native token balance for an address."""
-        provider = await self.get_provider(chain)
-        if not provider:
+        if not await self.get_provider(chain):
             return None
         
         try:
-            balance_wei = await provider.eth.get_balance(address)
+            balance_wei = await self.call(chain, lambda provider: provider.eth.get_balance(address))
             config = self.CHAIN_CONFIGS[chain]
             return Decimal(balance_wei) / Decimal(10 ** config.native_decimals)
         except Exception as e:
             logger.warning("Failed to get balance for %s on %s: %s", address, chain, e)
             return None
     
+    def get_multicall(self, chain: str) -> Multicall3Aggregator:
+        """Get the Multicall3 aggregator that batches contract reads for a chain."""
+        if chain not in self._multicall:
+            async def eth_call(params: Dict[str, Any], block: str) -> Any:
+                # Quotes are latency-critical, so hedge them across providers
+                return await self.call(
+                    chain, lambda provider: provider.eth.call(params, block), hedge=True
+                )
+            
+            self._multicall[chain] = Multicall3Aggregator(eth_call)
+        
+        return self._multicall[chain]
+    
     def get_chain_config(self, chain: str) -> Optional[ChainConfig]:
         """Get configuration for a specific chain."""
         return self.CHAIN_CONFIGS.get(chain)
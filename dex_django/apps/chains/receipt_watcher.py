@@ -0,0 +1,132 @@
+# APP: dex_django/apps/chains
+# FILE: receipt_watcher.py
+"""
+Block-driven transaction receipt watching for DEX Sniper Pro
+
+Instead of every caller polling eth_getTransactionReceipt on a timer, pending
+transactions are registered with a watcher. On each new block head the
+watcher looks up the receipts of all pending transactions in one JSON-RPC
+batch and resolves the waiters whose transaction was mined.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Batch receipt lookup: tx hashes -> receipts (None / exception when not available)
+ReceiptFetcher = Callable[[List[str]], Awaitable[List[Any]]]
+
+
+class ReceiptWatcher:
+    """Resolves pending transactions once per new block with one batched lookup."""
+
+    def __init__(self, fetch_receipts: ReceiptFetcher):
+        """
+        Initialize the watcher.
+
+        Args:
+            fetch_receipts: Coroutine returning receipts for a list of tx hashes, in order
+        """
+        self._fetch_receipts = fetch_receipts
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._check_task: Optional[asyncio.Task] = None
+        self._recheck = False
+
+        self.stats = {
+            "watched": 0,
+            "checks": 0,
+            "receipts_found": 0,
+            "timeouts": 0,
+        }
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def watch(self, tx_hash: str) -> asyncio.Future:
+        """Register a transaction; the returned future resolves with its receipt."""
+        tx_hash = tx_hash.lower()
+        future = self._pending.get(tx_hash)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tx_hash] = future
+            self.stats["watched"] += 1
+        return future
+
+    async def wait(self, tx_hash: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until the transaction is mined.
+
+        Args:
+            tx_hash: Transaction hash
+            timeout: Maximum wait in seconds
+
+        Returns:
+            Receipt, or None on timeout
+        """
+        tx_hash = tx_hash.lower()
+        future = self.watch(tx_hash)
+        self._waiters[tx_hash] = self._waiters.get(tx_hash, 0) + 1
+        try:
+            # Shield so one waiter timing out does not cancel the shared future
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return None
+        finally:
+            remaining = self._waiters.get(tx_hash, 1) - 1
+            if remaining > 0:
+                self._waiters[tx_hash] = remaining
+            else:
+                self._waiters.pop(tx_hash, None)
+                if not future.done() and self._pending.get(tx_hash) is future:
+                    # Last waiter gave up; stop checking this hash
+                    self._pending.pop(tx_hash, None)
+                    future.cancel()
+
+    def on_new_head(self, header: Optional[Dict[str, Any]] = None) -> None:
+        """Trigger one batched receipt check for everything pending."""
+        if not self._pending:
+            return
+        if self._check_task and not self._check_task.done():
+            # A check is still running; run once more when it finishes
+            self._recheck = True
+            return
+        self._check_task = asyncio.create_task(self._check())
+
+    def cancel_all(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        self._waiters.clear()
+
+    async def _check(self) -> None:
+        while True:
+            self._recheck = False
+            hashes = list(self._pending)
+            if not hashes:
+                return
+
+            self.stats["checks"] += 1
+            try:
+                receipts = await self._fetch_receipts(hashes)
+            except Exception as e:
+                logger.debug(f"Batched receipt check failed: {e}")
+                receipts = []
+
+            for tx_hash, receipt in zip(hashes, receipts):
+                if not isinstance(receipt, dict) or receipt.get("blockNumber") is None:
+                    continue
+                future = self._pending.pop(tx_hash, None)
+                if future is not None and not future.done():
+                    future.set_result(receipt)
+                    self.stats["receipts_found"] += 1
+
+            if not self._recheck:
+                return
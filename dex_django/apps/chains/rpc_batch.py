@@ -0,0 +1,215 @@
+# APP: dex_django/apps/chains
+# FILE: rpc_batch.py
+"""
+JSON-RPC batch transport for DEX Sniper Pro
+
+Collects JSON-RPC calls and sends them as a single JSON-RPC array request.
+Calls that arrive within a short window are coalesced automatically and
+responses are matched back to their callers by request id.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Transport receives a JSON-RPC payload (single object or array) and returns the decoded JSON body
+RpcTransport = Callable[[Union[Dict[str, Any], List[Dict[str, Any]]]], Awaitable[Any]]
+
+
+class RpcError(Exception):
+    """JSON-RPC error returned for an individual call."""
+
+    def __init__(self, method: str, error: Any):
+        self.method = method
+        self.error = error
+        super().__init__(f"RPC error: {error}")
+
+
+@dataclass
+class _PendingCall:
+    """A queued JSON-RPC call waiting for its batch to be sent."""
+    request_id: int
+    method: str
+    params: List[Any]
+    future: asyncio.Future = field(repr=False)
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "method": self.method,
+            "params": self.params,
+            "id": self.request_id
+        }
+
+
+class JsonRpcBatcher:
+    """
+    Coalesces JSON-RPC calls into array requests.
+
+    Calls made through `call()` are queued and flushed either when the
+    batching window elapses or when the batch reaches `max_batch_size`.
+    `call_many()` sends a known set of calls immediately as one batch.
+    """
+
+    def __init__(
+        self,
+        transport: RpcTransport,
+        window_seconds: float = 0.005,
+        max_batch_size: int = 50
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            transport: Coroutine that posts a payload and returns the decoded response
+            window_seconds: How long to wait for more calls before flushing
+            max_batch_size: Maximum number of calls per JSON-RPC array
+        """
+        self._transport = transport
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._ids = itertools.count(1)
+        self._pending: List[_PendingCall] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "calls": 0,
+            "batches_sent": 0,
+            "largest_batch": 0,
+            "transport_errors": 0,
+        }
+
+    async def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """
+        Queue a call and wait for its result.
+
+        Args:
+            method: RPC method name
+            params: Method parameters
+
+        Returns:
+            RPC response result
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._enqueue(loop, method, params)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_seconds, self._flush)
+
+        return await pending.future
+
+    async def call_many(
+        self,
+        calls: Sequence[Tuple[str, Optional[List[Any]]]],
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Send a set of calls immediately as JSON-RPC batches.
+
+        Args:
+            calls: Sequence of (method, params) tuples
+            return_exceptions: Return per-call errors in place instead of raising
+
+        Returns:
+            Results in the same order as `calls`
+        """
+        if not calls:
+            return []
+
+        loop = asyncio.get_running_loop()
+        batch = [
+            _PendingCall(next(self._ids), method, list(params or []), loop.create_future())
+            for method, params in calls
+        ]
+        self.stats["calls"] += len(batch)
+
+        for start in range(0, len(batch), self.max_batch_size):
+            self._spawn(batch[start:start + self.max_batch_size])
+
+        return await asyncio.gather(
+            *(pending.future for pending in batch),
+            return_exceptions=return_exceptions
+        )
+
+    async def close(self) -> None:
+        """Flush queued calls and wait for in-flight batches to finish."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def _enqueue(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        method: str,
+        params: Optional[List[Any]]
+    ) -> _PendingCall:
+        pending = _PendingCall(next(self._ids), method, list(params or []), loop.create_future())
+        self._pending.append(pending)
+        self.stats["calls"] += 1
+        return pending
+
+    def _flush(self) -> None:
+        """Send everything that is currently queued."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            self._spawn(batch)
+
+    def _spawn(self, batch: List[_PendingCall]) -> None:
+        task = asyncio.create_task(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[_PendingCall]) -> None:
+        """Post one batch and resolve its futures."""
+        self.stats["batches_sent"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+        # A single call goes out as a plain object for providers that dislike arrays
+        if len(batch) == 1:
+            payload: Union[Dict[str, Any], List[Dict[str, Any]]] = batch[0].to_payload()
+        else:
+            payload = [pending.to_payload() for pending in batch]
+
+        try:
+            data = await self._transport(payload)
+        except Exception as e:
+            self.stats["transport_errors"] += 1
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        responses = data if isinstance(data, list) else [data]
+        by_id: Dict[Any, Dict[str, Any]] = {}
+        for response in responses:
+            if isinstance(response, dict) and "id" in response:
+                by_id[response["id"]] = response
+
+        for pending in batch:
+            if pending.future.done():
+                continue
+
+            response = by_id.get(pending.request_id)
+            if response is None:
+                pending.future.set_exception(
+                    RpcError(pending.method, f"no response for request id {pending.request_id}")
+                )
+            elif "error" in response:
+                pending.future.set_exception(RpcError(pending.method, response["error"]))
+            else:
+                pending.future.set_result(response.get("result"))
@@ -0,0 +1,395 @@
+# APP: dex_django/apps/chains
+# FILE: rpc_cache.py
+"""
+Block-scoped JSON-RPC response cache for DEX Sniper Pro
+
+State reads (eth_call, eth_getBalance, eth_gasPrice, ...) are cached per
+block: a "latest" read is keyed to the current head and stops matching as
+soon as a new head is observed. Immutable results (token decimals/symbol/
+name, mined receipts and transactions, chain id) are kept until evicted.
+When a block hash changes under a known height the entries for that height
+and above are dropped, including receipts mined in the orphaned blocks.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .multicall import DECIMALS_SELECTOR
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_SELECTOR = "0x95d89b41"  # symbol()
+NAME_SELECTOR = "0x06fdde03"    # name()
+
+# State reads cached per block -> position of the block parameter (None = implicit "latest")
+PER_BLOCK_METHODS: Dict[str, Optional[int]] = {
+    "eth_call": 1,
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getStorageAt": 2,
+    "eth_getBlockByNumber": 0,
+    "eth_feeHistory": 1,
+    "eth_gasPrice": None,
+    "eth_maxPriorityFeePerGas": None,
+}
+
+# Results that never change once they exist (until a reorg)
+IMMUTABLE_METHODS = frozenset({
+    "eth_chainId",
+    "eth_getTransactionReceipt",
+    "eth_getTransactionByHash",
+})
+
+# Argument-less ERC20 metadata calls
+IMMUTABLE_CALL_SELECTORS = frozenset({DECIMALS_SELECTOR, SYMBOL_SELECTOR, NAME_SELECTOR})
+
+
+class CacheKey(NamedTuple):
+    """(chain, block, method, params); block is None for immutable entries."""
+    chain: str
+    block: Optional[int]
+    method: str
+    params: str
+
+
+class BlockScopedRpcCache:
+    """
+    Per-chain RPC cache scoped to block heads.
+
+    The owner reports heads via `observe_head()` (block number polls,
+    fetched blocks, newHeads subscriptions) and routes reads through
+    `make_key()` / `get()` / `put()`.
+    """
+
+    def __init__(
+        self,
+        chain: str,
+        head_ttl_seconds: float = 1.0,
+        retained_blocks: int = 8,
+        max_entries_per_block: int = 2000,
+        max_immutable_entries: int = 20000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            chain: Chain name, part of every key
+            head_ttl_seconds: How long an observed head is trusted without a refresh
+            retained_blocks: Recent blocks whose entries are kept for explicit block reads
+            max_entries_per_block: Entry cap for a single block
+            max_immutable_entries: LRU cap for immutable entries
+        """
+        self.chain = chain
+        self.head_ttl_seconds = head_ttl_seconds
+        self.retained_blocks = max(1, retained_blocks)
+        self.max_entries_per_block = max_entries_per_block
+        self.max_immutable_entries = max_immutable_entries
+
+        self._head: Optional[int] = None
+        self._head_seen_at = 0.0
+        self._block_hashes: Dict[int, str] = {}
+        self._blocks: Dict[int, Dict[Tuple[str, str], Any]] = {}
+        self._immutable: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        # Mined receipts/transactions: immutable key -> (block number, block hash), and the reverse index
+        self._mined_in: Dict[Tuple[str, str], Tuple[int, Optional[str]]] = {}
+        self._mined_by_block: Dict[int, Set[Tuple[str, str]]] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "head_hits": 0,
+            "head_misses": 0,
+            "new_heads": 0,
+            "reorgs": 0,
+            "evictions": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Heads and reorgs
+    # ------------------------------------------------------------------
+
+    @property
+    def head(self) -> Optional[int]:
+        return self._head
+
+    def fresh_head(self) -> Optional[int]:
+        """Current head if it was observed within the head TTL (counted as a head hit)."""
+        if self._head is not None and time.monotonic() - self._head_seen_at < self.head_ttl_seconds:
+            self.stats["head_hits"] += 1
+            return self._head
+        self.stats["head_misses"] += 1
+        return None
+
+    def observe_head(
+        self,
+        number: int,
+        block_hash: Optional[str] = None,
+        parent_hash: Optional[str] = None
+    ) -> None:
+        """
+        Record a block seen on chain.
+
+        Advances the head when `number` is newer. A hash that differs from
+        the one recorded for the same height (or for the parent height)
+        means the chain reorganised, and entries from there on are dropped.
+        """
+        head_before = self._head
+
+        if block_hash:
+            block_hash = block_hash.lower()
+            known = self._block_hashes.get(number)
+            if known is not None and known != block_hash:
+                self._reorg(number)
+            self._block_hashes[number] = block_hash
+            self._drop_orphaned_receipts(number, block_hash)
+
+        if parent_hash and number > 0:
+            parent_hash = parent_hash.lower()
+            known_parent = self._block_hashes.get(number - 1)
+            if known_parent is not None and known_parent != parent_hash:
+                self._reorg(number - 1)
+            self._block_hashes[number - 1] = parent_hash
+
+        # Load-balanced endpoints may lag; a lower number alone is not a reorg
+        if self._head is None or number >= self._head:
+            if self._head is not None and number > self._head:
+                self.stats["new_heads"] += 1
+            self._head = number
+            # A reorg below the previous head leaves the real tip unknown
+            is_tip = head_before is None or number >= head_before
+            self._head_seen_at = time.monotonic() if is_tip else 0.0
+            self._prune()
+
+    def observe_block(self, block: Dict[str, Any]) -> None:
+        """Record a block object returned by eth_getBlockByNumber or newHeads."""
+        number = block.get("number")
+        if number is None:
+            return
+        self.observe_head(
+            int(number, 16) if isinstance(number, str) else int(number),
+            block.get("hash"),
+            block.get("parentHash")
+        )
+
+    def invalidate_from(self, block_number: int) -> None:
+        """Drop everything cached for `block_number` and later (external reorg signal)."""
+        self._reorg(block_number)
+
+    def clear(self) -> None:
+        self._blocks.clear()
+        self._immutable.clear()
+        self._mined_in.clear()
+        self._mined_by_block.clear()
+        self._block_hashes.clear()
+        self._head = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def needs_head(self, method: str, params: List[Any]) -> bool:
+        """True when a per-block read targets "latest" but the head is unknown or stale."""
+        if method not in PER_BLOCK_METHODS or method == "eth_getBlockByNumber":
+            return False
+        if self._is_immutable(method, params):
+            return False
+        if self._block_tag(method, params) != "latest":
+            return False
+        return self._head is None or time.monotonic() - self._head_seen_at >= self.head_ttl_seconds
+
+    def make_key(self, method: str, params: List[Any]) -> Optional[CacheKey]:
+        """Cache key for a call, or None if the call must not be cached right now."""
+        params_key = self._params_key(params)
+
+        if self._is_immutable(method, params):
+            # The block tag does not matter for immutable reads
+            if method == "eth_call":
+                params_key = self._params_key(params[:1])
+            return CacheKey(self.chain, None, method, params_key)
+
+        if method not in PER_BLOCK_METHODS:
+            return None
+
+        block = self._resolve_block(self._block_tag(method, params))
+        if block is None:
+            return None
+
+        return CacheKey(self.chain, block, method, params_key)
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """Look up a key; returns (hit, value)."""
+        entry_key = (key.method, key.params)
+
+        if key.block is None:
+            if entry_key in self._immutable:
+                self._immutable.move_to_end(entry_key)
+                self.stats["hits"] += 1
+                return True, self._immutable[entry_key]
+        else:
+            entries = self._blocks.get(key.block)
+            if entries is not None and entry_key in entries:
+                self.stats["hits"] += 1
+                return True, entries[entry_key]
+
+        self.stats["misses"] += 1
+        return False, None
+
+    def record_miss(self) -> None:
+        """Count a read that bypassed the lookup (e.g. issued before the head was known)."""
+        self.stats["misses"] += 1
+
+    def put(
+        self,
+        method: str,
+        params: List[Any],
+        result: Any,
+        key: Optional[CacheKey] = None
+    ) -> None:
+        """
+        Store a call result.
+
+        `key` is the key computed before the call was sent, so a head that
+        advanced in the meantime does not mislabel the result. Fetched blocks
+        are always observed as heads and stored under their own number.
+        """
+        if result is None:
+            # Pending receipts/transactions, unknown blocks
+            return
+
+        if method == "eth_getBlockByNumber" and isinstance(result, dict) and result.get("number"):
+            self.observe_block(result)
+            tag = self._block_tag(method, params)
+            if tag == "latest" or (isinstance(tag, str) and tag.startswith("0x")):
+                key = CacheKey(self.chain, int(result["number"], 16), method, self._params_key(params))
+
+        if key is None:
+            return
+
+        entry_key = (key.method, key.params)
+
+        if key.block is None:
+            if key.method == "eth_call" and result in ("0x", ""):
+                # Not a token contract (yet); do not pin the empty answer forever
+                return
+            if key.method in ("eth_getTransactionReceipt", "eth_getTransactionByHash"):
+                if not isinstance(result, dict) or result.get("blockNumber") is None:
+                    return
+                mined = int(result["blockNumber"], 16)
+                self._mined_in[entry_key] = (mined, result.get("blockHash"))
+                self._mined_by_block.setdefault(mined, set()).add(entry_key)
+            self._immutable[entry_key] = result
+            self._immutable.move_to_end(entry_key)
+            while len(self._immutable) > self.max_immutable_entries:
+                evicted, _ = self._immutable.popitem(last=False)
+                self._forget_mined(evicted)
+                self.stats["evictions"] += 1
+            return
+
+        if self._head is not None and key.block < self._head - self.retained_blocks + 1:
+            return
+
+        entries = self._blocks.setdefault(key.block, {})
+        if len(entries) >= self.max_entries_per_block and entry_key not in entries:
+            self.stats["evictions"] += 1
+            return
+        entries[entry_key] = result
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "head": self._head,
+            "cached_blocks": len(self._blocks),
+            "block_entries": sum(len(entries) for entries in self._blocks.values()),
+            "immutable_entries": len(self._immutable),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _params_key(params: List[Any]) -> str:
+        # Hex data and addresses are case-insensitive
+        return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str).lower()
+
+    @staticmethod
+    def _block_tag(method: str, params: List[Any]) -> Any:
+        index = PER_BLOCK_METHODS.get(method)
+        if index is None:
+            return "latest"
+        return params[index] if len(params) > index else "latest"
+
+    def _resolve_block(self, tag: Any) -> Optional[int]:
+        if isinstance(tag, int):
+            return tag
+        if not isinstance(tag, str):
+            return None
+        if tag == "latest":
+            if self._head is None or time.monotonic() - self._head_seen_at >= self.head_ttl_seconds:
+                return None
+            return self._head
+        if tag.startswith("0x"):
+            return int(tag, 16)
+        # pending / safe / finalized / earliest move independently of the head
+        return None
+
+    @staticmethod
+    def _is_immutable(method: str, params: List[Any]) -> bool:
+        if method in IMMUTABLE_METHODS:
+            return True
+        if method == "eth_call" and params and isinstance(params[0], dict):
+            data = str(params[0].get("data") or params[0].get("input") or "").lower()
+            return data in IMMUTABLE_CALL_SELECTORS
+        return False
+
+    def _reorg(self, from_block: int) -> None:
+        self.stats["reorgs"] += 1
+        logger.warning(f"{self.chain}: reorg detected at block {from_block}, dropping cached entries")
+
+        for number in [n for n in self._blocks if n >= from_block]:
+            del self._blocks[number]
+        for number in [n for n in self._block_hashes if n >= from_block]:
+            del self._block_hashes[number]
+        for number in [n for n in self._mined_by_block if n >= from_block]:
+            for entry_key in self._mined_by_block.pop(number):
+                self._mined_in.pop(entry_key, None)
+                self._immutable.pop(entry_key, None)
+
+        if self._head is not None and self._head >= from_block:
+            # Force the next "latest" read to re-learn the head
+            self._head = from_block - 1
+            self._head_seen_at = 0.0
+
+    def _drop_orphaned_receipts(self, number: int, block_hash: str) -> None:
+        """Receipts recorded at `number` under a different block hash belong to an orphaned block."""
+        orphaned = [
+            entry_key for entry_key in self._mined_by_block.get(number, ())
+            if (self._mined_in[entry_key][1] or block_hash).lower() != block_hash
+        ]
+        for entry_key in orphaned:
+            self._forget_mined(entry_key)
+            self._immutable.pop(entry_key, None)
+
+    def _forget_mined(self, entry_key: Tuple[str, str]) -> None:
+        mined = self._mined_in.pop(entry_key, None)
+        if mined is None:
+            return
+        keys = self._mined_by_block.get(mined[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self._mined_by_block[mined[0]]
+
+    def _prune(self) -> None:
+        oldest = self._head - self.retained_blocks + 1
+        for number in [n for n in self._blocks if n < oldest]:
+            del self._blocks[number]
+        for number in [n for n in self._block_hashes if n < oldest - 64]:
+            del self._block_hashes[number]
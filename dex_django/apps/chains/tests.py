@@ -1,3 +1,539 @@
-from django.test import TestCase
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from eth_abi import decode, encode
+
+from apps.chains.endpoint_scorer import EndpointScorer
+from apps.chains.evm_client import EvmClient
+from apps.chains.gas_oracle import ChainGasOracle, FeeTier
+from apps.chains.multicall import (
+    AGGREGATE3_SELECTOR,
+    ContractCall,
+    Multicall3Aggregator,
+    MulticallError,
+    balance_of_call,
+    decode_uint,
+)
+from apps.chains.rpc_batch import JsonRpcBatcher, RpcError
+from apps.chains.rpc_cache import BlockScopedRpcCache
+
+
+class FakeTransport:
+    """JSON-RPC transport answering each call from `respond(call)`; records payloads."""
+
+    def __init__(self, respond=None, reverse=False):
+        self.respond = respond or (lambda call: {"result": call["method"]})
+        self.reverse = reverse
+        self.payloads = []
+
+    async def __call__(self, payload):
+        self.payloads.append(payload)
+        calls = payload if isinstance(payload, list) else [payload]
+        responses = []
+        for call in calls:
+            response = self.respond(call)
+            if response is not None:
+                responses.append({"jsonrpc": "2.0", "id": call["id"], **response})
+        if self.reverse:
+            responses.reverse()
+        return responses if isinstance(payload, list) else responses[0]
+
+
+class JsonRpcBatcherTests(SimpleTestCase):
+    """Batching, response matching and error propagation."""
+
+    async def test_concurrent_calls_share_one_batch(self):
+        transport = FakeTransport()
+        batcher = JsonRpcBatcher(transport, window_seconds=0.01)
+
+        results = await asyncio.gather(
+            batcher.call("eth_blockNumber"), batcher.call("eth_chainId"), batcher.call("eth_gasPrice")
+        )
+
+        self.assertEqual(results, ["eth_blockNumber", "eth_chainId", "eth_gasPrice"])
+        self.assertEqual(len(transport.payloads), 1)
+        self.assertEqual(len(transport.payloads[0]), 3)
+
+    async def test_single_call_is_sent_as_object(self):
+        transport = FakeTransport()
+        batcher = JsonRpcBatcher(transport, window_seconds=0.001)
+
+        await batcher.call("eth_blockNumber")
+
+        self.assertIsInstance(transport.payloads[0], dict)
+
+    async def test_out_of_order_responses_matched_by_id(self):
+        transport = FakeTransport(respond=lambda call: {"result": call["params"][0]}, reverse=True)
+        batcher = JsonRpcBatcher(transport)
+
+        results = await batcher.call_many([("eth_getBalance", [f"0x{i}"]) for i in range(5)])
+
+        self.assertEqual(results, [f"0x{i}" for i in range(5)])
+
+    async def test_error_fails_only_its_call(self):
+        def respond(call):
+            if call["params"] == ["bad"]:
+                return {"error": {"code": -32000, "message": "execution reverted"}}
+            return {"result": "ok"}
+
+        batcher = JsonRpcBatcher(FakeTransport(respond))
+
+        results = await batcher.call_many(
+            [("eth_call", ["good"]), ("eth_call", ["bad"]), ("eth_call", ["good"])], return_exceptions=True
+        )
+
+        self.assertEqual(results[0], "ok")
+        self.assertIsInstance(results[1], RpcError)
+        self.assertEqual(results[1].error["code"], -32000)
+        self.assertEqual(results[2], "ok")
+
+    async def test_missing_response_is_an_error(self):
+        batcher = JsonRpcBatcher(FakeTransport(lambda call: None if call["params"] == ["lost"] else {"result": 1}))
+
+        results = await batcher.call_many([("eth_call", ["kept"]), ("eth_call", ["lost"])], return_exceptions=True)
+
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], RpcError)
+        self.assertIn("no response", str(results[1]))
+
+    async def test_transport_failure_fails_every_call(self):
+        async def transport(payload):
+            raise ConnectionError("endpoint down")
+
+        batcher = JsonRpcBatcher(transport)
+
+        results = await batcher.call_many([("eth_chainId", []), ("eth_blockNumber", [])], return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+        self.assertEqual(batcher.stats["transport_errors"], 1)
+
+    async def test_large_call_sets_are_split(self):
+        transport = FakeTransport()
+        batcher = JsonRpcBatcher(transport, max_batch_size=2)
+
+        results = await batcher.call_many([("eth_chainId", [])] * 5)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual([len(p) if isinstance(p, list) else 1 for p in transport.payloads], [2, 2, 1])
+
+
+class EvmClientTransportTests(SimpleTestCase):
+    """Which requests are batched and which are hedged."""
+
+    def setUp(self):
+        self.client = EvmClient(
+            "ethereum", enable_cache=False, enable_multicall=False, enable_websocket=False,
+            rpc_urls=["http://primary", "http://secondary"]
+        )
+        self.routes = []
+        self.posted = []
+
+        async def hedged(fn, accept=None):
+            self.routes.append("hedged")
+            return await fn("http://primary")
+
+        async def call_with_failover(fn):
+            self.routes.append("failover")
+            return await fn("http://primary")
+
+        transport = FakeTransport(lambda call: {"result": "0x1"})
+
+        async def post(url, json):
+            self.posted.append(json)
+            data = await transport(json)
+            return type("Response", (), {"raise_for_status": lambda self: None, "json": lambda self: data})()
+
+        self.client.endpoint_scorer.hedged = hedged
+        self.client.endpoint_scorer.call_with_failover = call_with_failover
+        self.client.http_client.post = post
+
+    async def test_raw_transaction_is_sent_alone(self):
+        await asyncio.gather(
+            self.client.send_raw_transaction("0xsigned"),
+            self.client.call_contract("0x" + "1" * 40, "0x01"),
+            self.client.get_block("latest"),
+        )
+
+        raw = [p for p in self.posted if isinstance(p, dict) and p["method"] == "eth_sendRawTransaction"]
+        self.assertEqual(len(raw), 1)
+        batches = [p for p in self.posted if isinstance(p, list)]
+        self.assertEqual([sorted(c["method"] for c in b) for b in batches], [["eth_call", "eth_getBlockByNumber"]])
+        self.assertNotIn("hedged", self.routes)
+
+    async def test_only_opted_in_reads_are_hedged(self):
+        await self.client.call_contract("0x" + "1" * 40, "0x01")
+        self.assertEqual(self.routes, ["failover"])
+
+        await self.client.call_contract("0x" + "1" * 40, "0x02", hedge=True)
+        self.assertEqual(self.routes, ["failover", "hedged"])
+        self.assertIsInstance(self.posted[-1], dict)
+
+
+class FakeMulticall3:
+    """eth_call stand-in for Multicall3: answers each inner call from `respond(target, data)`."""
+
+    def __init__(self, respond, drop_last=False):
+        self.respond = respond
+        self.drop_last = drop_last
+        self.requests = []
+
+    async def __call__(self, params, block):
+        data = params["data"]
+        assert data.startswith(AGGREGATE3_SELECTOR)
+        (calls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[len(AGGREGATE3_SELECTOR):]))
+        self.requests.append((block, calls))
+        results = [self.respond(target, call_data) for target, _, call_data in calls]
+        if self.drop_last:
+            results = results[:-1]
+        return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+
+
+def uint_result(value):
+    return True, encode(["uint256"], [value])
+
+
+class Multicall3AggregatorTests(SimpleTestCase):
+    """aggregate3 packing, result matching and per-call failures."""
+
+    async def test_aggregate_returns_results_in_call_order(self):
+        tokens = ["0x" + f"{i:040x}" for i in range(1, 4)]
+        fake = FakeMulticall3(lambda target, data: uint_result(int(target, 16) * 10))
+        aggregator = Multicall3Aggregator(fake)
+
+        results = await aggregator.aggregate([balance_of_call(token, "0x" + "a" * 40) for token in tokens])
+
+        self.assertEqual([decode_uint(r.return_data) for r in results], [10, 20, 30])
+        self.assertEqual(len(fake.requests), 1)
+
+    async def test_result_count_mismatch_fails_the_batch(self):
+        fake = FakeMulticall3(lambda target, data: uint_result(1), drop_last=True)
+        aggregator = Multicall3Aggregator(fake)
+
+        with self.assertRaises(MulticallError):
+            await aggregator.aggregate([ContractCall("0x" + "1" * 40, "0x01"), ContractCall("0x" + "2" * 40, "0x01")])
+
+    async def test_queued_calls_are_packed_per_block(self):
+        fake = FakeMulticall3(lambda target, data: uint_result(len(data)))
+        aggregator = Multicall3Aggregator(fake, window_seconds=0.01)
+
+        await asyncio.gather(
+            aggregator.call("0x" + "1" * 40, "0x01"),
+            aggregator.call("0x" + "2" * 40, "0x0102"),
+            aggregator.call("0x" + "3" * 40, "0x01", block="0x10"),
+        )
+
+        self.assertEqual(sorted((block, len(calls)) for block, calls in fake.requests), [("0x10", 1), ("latest", 2)])
+
+    async def test_reverted_call_fails_only_that_caller(self):
+        def respond(target, data):
+            return (False, b"") if target.endswith("2") else uint_result(7)
+
+        aggregator = Multicall3Aggregator(FakeMulticall3(respond), window_seconds=0.01)
+
+        ok, reverted = await asyncio.gather(
+            aggregator.call("0x" + "1" * 40, "0x01"),
+            aggregator.call("0x" + "2" * 40, "0x01"),
+            return_exceptions=True,
+        )
+
+        self.assertEqual(decode_uint(ok), 7)
+        self.assertIsInstance(reverted, MulticallError)
+        self.assertEqual(aggregator.stats["failed_calls"], 1)
+
+    async def test_large_call_sets_are_chunked(self):
+        fake = FakeMulticall3(lambda target, data: uint_result(1))
+        aggregator = Multicall3Aggregator(fake, max_calls_per_batch=2)
+
+        results = await aggregator.aggregate([ContractCall("0x" + "1" * 40, "0x01")] * 5)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual([len(calls) for _, calls in fake.requests], [2, 2, 1])
+
+
+class EndpointScorerTests(SimpleTestCase):
+    """Ranking, health tracking, failover and hedging."""
+
+    def test_faster_endpoint_ranks_first(self):
+        scorer = EndpointScorer(["http://a", "http://b"])
+        for _ in range(10):
+            scorer.record_success("http://a", 0.300)
+            scorer.record_success("http://b", 0.050)
+
+        self.assertEqual(scorer.best(), "http://b")
+
+    def test_repeated_failures_take_endpoint_out_of_rotation(self):
+        scorer = EndpointScorer(["http://a", "http://b"], failure_threshold=3)
+        for _ in range(3):
+            scorer.record_failure("http://a", ConnectionError("refused"))
+
+        self.assertFalse(scorer.get_stats("http://a").healthy)
+        self.assertEqual(scorer.ranked(), ["http://b", "http://a"])
+
+        scorer.record_success("http://a", 0.010)
+        self.assertTrue(scorer.get_stats("http://a").healthy)
+
+    async def test_failover_tries_next_endpoint(self):
+        scorer = EndpointScorer(["http://a", "http://b"])
+
+        async def fn(url):
+            if url == "http://a":
+                raise ConnectionError("refused")
+            return url
+
+        self.assertEqual(await scorer.call_with_failover(fn), "http://b")
+        self.assertEqual(scorer.get_stats("http://a").total_errors, 1)
+
+    async def test_fast_primary_is_not_hedged(self):
+        scorer = EndpointScorer(["http://a", "http://b"], min_hedge_delay_ms=50)
+        calls = []
+
+        async def fn(url):
+            calls.append(url)
+            return url
+
+        self.assertEqual(await scorer.hedged(fn), "http://a")
+        self.assertEqual(calls, ["http://a"])
+        self.assertEqual(scorer.stats["hedges_fired"], 0)
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        scorer = EndpointScorer(["http://a", "http://b"], min_hedge_delay_ms=10, max_hedge_delay_ms=10)
+        cancelled = asyncio.Event()
+
+        async def fn(url):
+            if url == "http://a":
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return url
+
+        self.assertEqual(await scorer.hedged(fn), "http://b")
+        await asyncio.wait_for(cancelled.wait(), 1)
+        self.assertEqual(scorer.stats["hedges_fired"], 1)
+        self.assertEqual(scorer.stats["hedges_won"], 1)
+
+    async def test_rejected_primary_result_waits_for_hedge(self):
+        scorer = EndpointScorer(["http://a", "http://b"], min_hedge_delay_ms=10, max_hedge_delay_ms=10)
+
+        async def fn(url):
+            return {"error": "header not found"} if url == "http://a" else {"result": "0x1"}
+
+        result = await scorer.hedged(fn, accept=lambda data: "error" not in data)
+
+        self.assertEqual(result, {"result": "0x1"})
+
+
+TOKEN = "0x" + "ab" * 20
+
+
+def balance_call(block="latest"):
+    return [{"to": TOKEN, "data": "0x70a08231" + "00" * 32}, block]
+
+
+class BlockScopedRpcCacheTests(SimpleTestCase):
+    """Block-scoped RPC cache: head keying, immutable reads and reorg eviction."""
+
+    def test_latest_read_needs_a_fresh_head(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+
+        self.assertTrue(cache.needs_head("eth_call", balance_call()))
+        self.assertIsNone(cache.make_key("eth_call", balance_call()))
+
+        cache.observe_head(100, "0xaa")
+
+        self.assertFalse(cache.needs_head("eth_call", balance_call()))
+        self.assertEqual(cache.make_key("eth_call", balance_call()).block, 100)
+
+    def test_latest_entry_stops_matching_after_new_head(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+        cache.observe_head(100, "0xaa")
+        key = cache.make_key("eth_call", balance_call())
+        cache.put("eth_call", balance_call(), "0x01", key)
+
+        self.assertEqual(cache.get(cache.make_key("eth_call", balance_call())), (True, "0x01"))
+
+        cache.observe_head(101, "0xbb", "0xaa")
+
+        self.assertEqual(cache.get(cache.make_key("eth_call", balance_call())), (False, None))
+        # Block 100 is still retained for its own key
+        self.assertEqual(cache.get(key), (True, "0x01"))
+
+    def test_token_metadata_is_cached_across_blocks(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+        params = [{"to": TOKEN, "data": "0x313ce567"}, "latest"]
+
+        key = cache.make_key("eth_call", params)
+        self.assertIsNone(key.block)
+        cache.put("eth_call", params, "0x12", key)
+        cache.observe_head(100, "0xaa")
+
+        self.assertEqual(cache.get(cache.make_key("eth_call", [params[0], "0x1"])), (True, "0x12"))
+
+    def test_pending_receipt_is_not_cached(self):
+        cache = BlockScopedRpcCache("ethereum")
+        key = cache.make_key("eth_getTransactionReceipt", ["0xdead"])
+
+        cache.put("eth_getTransactionReceipt", ["0xdead"], None, key)
+
+        self.assertEqual(cache.get(key), (False, None))
+
+    def test_reorg_drops_entries_and_orphaned_receipts(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+        cache.observe_head(100, "0xaa")
+        cache.observe_head(101, "0xbb", "0xaa")
+        cache.put("eth_call", balance_call(hex(100)), "0x01", cache.make_key("eth_call", balance_call(hex(100))))
+        cache.put("eth_call", balance_call(hex(101)), "0x02", cache.make_key("eth_call", balance_call(hex(101))))
+        receipt_key = cache.make_key("eth_getTransactionReceipt", ["0xdead"])
+        cache.put(
+            "eth_getTransactionReceipt", ["0xdead"],
+            {"blockNumber": hex(101), "blockHash": "0xbb", "status": "0x1"},
+            receipt_key
+        )
+
+        # A different block at height 101
+        cache.observe_head(101, "0xcc", "0xaa")
+
+        self.assertEqual(cache.stats["reorgs"], 1)
+        self.assertEqual(cache.get(cache.make_key("eth_call", balance_call(hex(101)))), (False, None))
+        self.assertEqual(cache.get(receipt_key), (False, None))
+        self.assertEqual(cache.get(cache.make_key("eth_call", balance_call(hex(100)))), (True, "0x01"))
+
+    def test_reorg_below_head_forces_head_refresh(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+        cache.observe_head(100, "0xaa")
+        cache.observe_head(101, "0xbb", "0xaa")
+
+        cache.invalidate_from(101)
+
+        self.assertEqual(cache.head, 100)
+        self.assertTrue(cache.needs_head("eth_call", balance_call()))
+
+    def test_lagging_endpoint_does_not_rewind_head(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60)
+        cache.observe_head(101)
+
+        cache.observe_head(99)
+
+        self.assertEqual(cache.head, 101)
+        self.assertEqual(cache.stats["reorgs"], 0)
+
+    def test_old_blocks_are_pruned(self):
+        cache = BlockScopedRpcCache("ethereum", head_ttl_seconds=60, retained_blocks=2)
+        cache.observe_head(100)
+        cache.put("eth_call", balance_call(hex(100)), "0x01", cache.make_key("eth_call", balance_call(hex(100))))
+
+        cache.observe_head(102)
+
+        self.assertEqual(cache.get(cache.make_key("eth_call", balance_call(hex(100)))), (False, None))
+        self.assertEqual(cache.get_stats()["cached_blocks"], 0)
+
+
+class FakeFeeClient:
+    """EVM client serving canned fee history; chain is never tracked by the head tracker."""
+
+    def __init__(self, history=None, gas_price=0, priority_fee=0):
+        self.chain = "testnet"
+        self.config = SimpleNamespace(block_time=12)
+        self.history = history
+        self.gas_price = gas_price
+        self.priority_fee = priority_fee
+        self.fee_history_calls = 0
+        self.release = None
+
+    async def get_fee_history(self, block_count, newest_block, percentiles):
+        self.fee_history_calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.history is None:
+            raise RuntimeError("method not found")
+        return self.history
+
+    async def get_gas_price(self):
+        return self.gas_price
+
+    async def get_max_priority_fee(self):
+        return self.priority_fee
+
+
+def fee_history(oldest, base_fees, ratios, rewards):
+    return {
+        "oldestBlock": hex(oldest),
+        "baseFeePerGas": [hex(fee) for fee in base_fees],
+        "gasUsedRatio": ratios,
+        "reward": [[hex(r) for r in block] for block in rewards],
+    }
+
+
+class ChainGasOracleTests(SimpleTestCase):
+    """Gas oracle tiers, legacy fallback and stale-estimate handling."""
+
+    def test_fee_tier_tx_params(self):
+        tier = FeeTier(max_fee_per_gas=30, max_priority_fee_per_gas=2, gas_price=20, eip1559=True)
+
+        self.assertEqual(tier.to_tx_params(), {"maxFeePerGas": 30, "maxPriorityFeePerGas": 2})
+        self.assertEqual(replace(tier, eip1559=False).to_tx_params(), {"gasPrice": 20})
+
+    async def test_eip1559_tiers_from_fee_history(self):
+        gwei = 10**9
+        history = fee_history(
+            100,
+            [10 * gwei, 10 * gwei, 10 * gwei, 10 * gwei],
+            [0.5, 0.0, 0.5],
+            # The empty block's zero rewards are ignored
+            [[1 * gwei, 2 * gwei, 3 * gwei, 1 * gwei], [0, 0, 0, 0], [1 * gwei, 2 * gwei, 3 * gwei, 1 * gwei]]
+        )
+        oracle = ChainGasOracle(FakeFeeClient(history))
+
+        estimate = await oracle.refresh()
+
+        self.assertTrue(estimate.eip1559)
+        self.assertEqual(estimate.block_number, 102)
+        self.assertEqual(estimate.tier("slow").max_priority_fee_per_gas, 1 * gwei)
+        self.assertEqual(estimate.tier("fast").max_priority_fee_per_gas, 3 * gwei)
+        # Urgency never gets cheaper
+        self.assertEqual(estimate.tier("urgent").max_priority_fee_per_gas, 3 * gwei)
+        normal = estimate.tier("normal")
+        self.assertEqual(normal.gas_price, 12 * gwei)
+        self.assertEqual(normal.max_fee_per_gas, int(10 * gwei * 1.125 ** 2) + 2 * gwei)
+        with self.assertRaises(ValueError):
+            estimate.tier("instant")
+
+    async def test_legacy_tiers_without_fee_history(self):
+        oracle = ChainGasOracle(FakeFeeClient(history=None, gas_price=100))
+
+        estimate = await oracle.refresh()
+
+        self.assertFalse(estimate.eip1559)
+        self.assertEqual(estimate.tier("slow").to_tx_params(), {"gasPrice": 100})
+        self.assertEqual(estimate.tier("urgent").to_tx_params(), {"gasPrice": 150})
+
+    async def test_stale_estimate_is_not_served(self):
+        oracle = ChainGasOracle(FakeFeeClient(history=None, gas_price=100))
+        await oracle.refresh()
+        self.assertIsNotNone(oracle.current_estimate())
+
+        oracle.estimate = replace(oracle.estimate, updated_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+
+        self.assertIsNone(oracle.current_estimate())
+        self.assertEqual(oracle.stats["stale_reads"], 1)
+        await oracle._refresh_task
+        self.assertIsNotNone(oracle.current_estimate())
+
+    async def test_refresh_requests_while_running_are_coalesced(self):
+        client = FakeFeeClient(history=None, gas_price=100)
+        client.release = asyncio.Event()
+        oracle = ChainGasOracle(client)
+
+        oracle.refresh_soon()
+        await asyncio.sleep(0)
+        oracle.refresh_soon()
+        oracle.refresh_soon()
+        client.release.set()
+        await oracle._refresh_task
+
+        # The running refresh plus one follow-up
+        self.assertEqual(client.fee_history_calls, 2)
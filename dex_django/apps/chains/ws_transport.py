@@ -0,0 +1,288 @@
+# APP: dex_django/apps/chains
+# FILE: ws_transport.py
+"""
+WebSocket JSON-RPC transport for DEX Sniper Pro
+
+Keeps one persistent WebSocket per chain for `eth_subscribe` streams
+(newHeads, logs) and plain requests. Responses are matched to callers by
+id; subscription notifications are dispatched to the registered callback.
+On disconnect the transport reconnects with backoff, rotating through the
+configured endpoints, and re-creates every active subscription.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from .rpc_batch import RpcError
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SubscriptionCallback = Callable[[Any], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class _Subscription:
+    """An active eth_subscribe stream (survives reconnects)."""
+    handle: str
+    params: List[Any]
+    callback: SubscriptionCallback
+    server_id: Optional[str] = None
+
+
+class WebSocketRpcTransport:
+    """
+    Persistent WebSocket JSON-RPC connection with subscription support.
+
+    Subscriptions are identified by a local handle that stays valid across
+    reconnects, even though the node assigns a new subscription id each time.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        request_timeout: float = 10.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            urls: WebSocket endpoints, tried in order on (re)connect
+            request_timeout: Timeout for a single request
+            reconnect_delay: Initial delay before reconnecting
+            max_reconnect_delay: Cap for the exponential reconnect backoff
+        """
+        if not urls:
+            raise ValueError("At least one WebSocket URL is required")
+
+        self.urls = list(urls)
+        self.request_timeout = request_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._ws: Any = None
+        self._url_index = 0
+        self._ids = itertools.count(1)
+        self._handles = itertools.count(1)
+        self._pending: Dict[int, Tuple[str, asyncio.Future]] = {}
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._by_server_id: Dict[str, _Subscription] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._connected = asyncio.Event()
+        self._closed = False
+
+        self.stats = {
+            "connects": 0,
+            "disconnects": 0,
+            "requests": 0,
+            "notifications": 0,
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def url(self) -> str:
+        return self.urls[self._url_index % len(self.urls)]
+
+    async def connect(self) -> None:
+        """Open the connection (no-op when already connected)."""
+        if not WEBSOCKETS_AVAILABLE:
+            raise RuntimeError("websockets package is not installed")
+
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            if self._reader_task and not self._reader_task.done():
+                # Reader is already reconnecting; wait for it instead of opening a second socket
+                await asyncio.wait_for(self._connected.wait(), timeout=self.request_timeout)
+                return
+            self._closed = False
+            await self._open()
+            self._reader_task = asyncio.create_task(self._run())
+
+    async def request(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """
+        Send a JSON-RPC request over the socket.
+
+        Args:
+            method: RPC method name
+            params: Method parameters
+
+        Returns:
+            RPC response result
+        """
+        if not self.is_connected:
+            await self.connect()
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (method, future)
+        self.stats["requests"] += 1
+
+        try:
+            await self._ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params or [],
+            }))
+            return await asyncio.wait_for(future, timeout=self.request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def subscribe(self, params: List[Any], callback: SubscriptionCallback) -> str:
+        """
+        Start an eth_subscribe stream.
+
+        Args:
+            params: eth_subscribe params, e.g. ["newHeads"] or ["logs", {...}]
+            callback: Called with each notification result (sync or async)
+
+        Returns:
+            Local subscription handle
+        """
+        subscription = _Subscription(handle=f"sub-{next(self._handles)}", params=params, callback=callback)
+        self._subscriptions[subscription.handle] = subscription
+        try:
+            await self._activate(subscription)
+        except Exception:
+            self._subscriptions.pop(subscription.handle, None)
+            raise
+        return subscription.handle
+
+    async def unsubscribe(self, handle: str) -> None:
+        """Stop a stream started with `subscribe`."""
+        subscription = self._subscriptions.pop(handle, None)
+        if subscription is None or subscription.server_id is None:
+            return
+        self._by_server_id.pop(subscription.server_id, None)
+        if self.is_connected:
+            try:
+                await self.request("eth_unsubscribe", [subscription.server_id])
+            except Exception as e:
+                logger.debug(f"eth_unsubscribe failed: {e}")
+
+    async def close(self) -> None:
+        """Close the socket and stop reconnecting."""
+        self._closed = True
+        self._connected.clear()
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        self._fail_pending(ConnectionError("WebSocket transport closed"))
+
+    async def _open(self) -> None:
+        self._ws = await websockets.connect(self.url, max_size=None, ping_interval=20)
+        self._connected.set()
+        self.stats["connects"] += 1
+        logger.info(f"WebSocket connected: {self.url}")
+
+    async def _activate(self, subscription: _Subscription) -> None:
+        server_id = await self.request("eth_subscribe", subscription.params)
+        subscription.server_id = server_id
+        self._by_server_id[server_id] = subscription
+
+    async def _run(self) -> None:
+        """Read messages; reconnect and resubscribe when the socket drops."""
+        delay = self.reconnect_delay
+
+        while not self._closed:
+            try:
+                async for message in self._ws:
+                    self._dispatch(message)
+                    delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket error on {self.url}: {e}")
+
+            if self._closed:
+                return
+
+            self._connected.clear()
+            self.stats["disconnects"] += 1
+            self._fail_pending(ConnectionError(f"WebSocket disconnected: {self.url}"))
+            self._by_server_id.clear()
+
+            # Reconnect, rotating endpoints, then restore subscriptions
+            while not self._closed:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                self._url_index += 1
+                try:
+                    await self._open()
+                    break
+                except Exception as e:
+                    logger.warning(f"WebSocket reconnect to {self.url} failed: {e}")
+
+            if self._closed:
+                return
+
+            # Restore subscriptions in the background; the reader must keep
+            # running so their eth_subscribe responses can be delivered
+            for subscription in list(self._subscriptions.values()):
+                asyncio.create_task(self._resubscribe(subscription))
+
+    async def _resubscribe(self, subscription: _Subscription) -> None:
+        try:
+            await self._activate(subscription)
+        except Exception as e:
+            logger.warning(f"Failed to restore subscription {subscription.params[0]}: {e}")
+
+    def _dispatch(self, message: Union[str, bytes]) -> None:
+        try:
+            data = json.loads(message)
+        except ValueError:
+            logger.debug("Ignoring non-JSON WebSocket message")
+            return
+
+        if data.get("method") == "eth_subscription":
+            params = data.get("params") or {}
+            subscription = self._by_server_id.get(params.get("subscription"))
+            if subscription is None:
+                return
+            self.stats["notifications"] += 1
+            try:
+                result = subscription.callback(params.get("result"))
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                logger.error(f"Subscription callback failed: {e}")
+            return
+
+        method, future = self._pending.get(data.get("id"), (None, None))
+        if future is None or future.done():
+            return
+        if "error" in data:
+            future.set_exception(RpcError(method, data["error"]))
+        else:
+            future.set_result(data.get("result"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
@@ -8,11 +8,11 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 
-from dex_django.apps.discovery.wallet_monitor import wallet_monitor, WalletTransaction
-from dex_django.apps.strategy.copy_trading_strategy import copy_trading_strategy
-from dex_django.apps.strategy.trader_performance_tracker import trader_performance_tracker
-from dex_django.apps.trading.live_executor import live_executor
-from dex_django.apps.core.runtime_state import runtime_state
+from apps.discovery.wallet_monitor import wallet_monitor, WalletTransaction
+from apps.strategy.copy_trading_strategy import copy_trading_strategy
+from apps.strategy.trader_performance_tracker import trader_performance_tracker
+from apps.trading.live_executor import live_executor
+from apps.core.runtime_state import runtime_state
 
 logger = logging.getLogger("copy_trading.coordinator")
 
@@ -514,4 +514,11 @@ class CopyTradingCoordinator:
             if self._running:
                 await self.stop_system()
             
-            # Restore original
\ No newline at end of file
+            # Restore original wallet monitor callback
+            wallet_monitor._emit_copy_signal = self._original_emit_copy_signal
+            
+            await live_executor.cleanup()
+            logger.info("Copy trading coordinator cleaned up")
+            
+        except Exception as e:
+            logger.error(f"Error during coordinator cleanup: {e}")
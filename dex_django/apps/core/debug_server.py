@@ -10,10 +10,13 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from dex_django.apps.api.debug_routers import health_router, api_router, cleanup_disconnected_clients
-from dex_django.apps.core.debug_state import debug_state
-from dex_django.apps.core.django_setup import setup_django, get_django_status
-from dex_django.apps.ws.debug_websockets import router as ws_router, periodic_metrics_broadcast
+from apps.api.debug_routers import health_router, api_router, cleanup_disconnected_clients
+from apps.core.debug_state import debug_state
+from apps.core.django_setup import setup_django, get_django_status
+from apps.chains.gas_oracle import gas_oracle
+from apps.chains.head_tracker import head_tracker
+from apps.core.http_clients import http_clients
+from apps.ws.debug_websockets import router as ws_router, periodic_metrics_broadcast
 
 logger = logging.getLogger("core.debug_server")
 
@@ -25,6 +28,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     Handles application startup and shutdown tasks including:
     - Django ORM initialization
+    - Shared HTTP connection pools
     - Background task scheduling
     - Resource cleanup
     """
@@ -41,6 +45,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         else:
             logger.warning("Django ORM initialization failed - some features may be unavailable")
         
+        # Shared keep-alive HTTP pools for RPC and explorer APIs
+        await http_clients.startup()
+        
         # Start background tasks
         background_tasks = await _start_background_tasks()
         
@@ -67,6 +74,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
                     except asyncio.CancelledError:
                         pass
         
+        # Stop gas oracles and head tracking, then close shared HTTP pools
+        await gas_oracle.stop()
+        await head_tracker.stop()
+        await http_clients.shutdown()
+        
         # Cleanup debug state
         debug_state.shutdown()
         
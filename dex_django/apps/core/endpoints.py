@@ -0,0 +1,63 @@
+# APP: dex_django/apps/core
+# FILE: endpoints.py
+"""
+Upstream endpoint resolution for DEX Sniper Pro
+
+By default every client talks to its real provider. When the
+DEX_REPLAY_URL environment variable is set (e.g. http://127.0.0.1:8545),
+JSON-RPC, block explorer and subgraph traffic is redirected to the local
+replay server (apps/sim/replay_server.py) so benchmarks run offline:
+
+    JSON-RPC       -> {replay}/rpc/{chain}
+    explorer/graph -> {replay}/upstream/{original host}{original path}
+
+The original host stays in the path, so the replay server can tell
+providers apart and rate limiting still applies the provider's quota.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+REPLAY_URL_ENV = "DEX_REPLAY_URL"
+UPSTREAM_PREFIX = "/upstream/"
+
+
+def replay_base_url() -> Optional[str]:
+    """Replay server base URL, or None when talking to real providers."""
+    url = os.getenv(REPLAY_URL_ENV, "").strip()
+    return url.rstrip("/") or None
+
+
+def resolve_url(url: str) -> str:
+    """Explorer / subgraph URL to use (unchanged unless replay is enabled)."""
+    base = replay_base_url()
+    if base is None:
+        return url
+
+    parts = urlsplit(url)
+    resolved = f"{base}{UPSTREAM_PREFIX}{parts.netloc}{parts.path}"
+    return f"{resolved}?{parts.query}" if parts.query else resolved
+
+
+def resolve_rpc_urls(chain: str, urls: List[str]) -> List[str]:
+    """JSON-RPC endpoints for a chain."""
+    base = replay_base_url()
+    if base is None:
+        return list(urls)
+    return [f"{base}/rpc/{chain}"]
+
+
+def resolve_ws_urls(urls: List[str]) -> List[str]:
+    """WebSocket endpoints; none under replay (clients fall back to polling)."""
+    return [] if replay_base_url() else list(urls)
+
+
+def original_host(url: str) -> str:
+    """Provider host a (possibly replay-redirected) URL stands for."""
+    parts = urlsplit(url)
+    if parts.path.startswith(UPSTREAM_PREFIX):
+        return parts.path[len(UPSTREAM_PREFIX):].split("/", 1)[0].lower()
+    return (parts.netloc or url).lower()
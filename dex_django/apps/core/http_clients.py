@@ -0,0 +1,147 @@
+# APP: dex_django/apps/core
+# FILE: http_clients.py
+"""
+Process-wide shared HTTP connection pools for DEX Sniper Pro
+
+One pooled httpx.AsyncClient per upstream host (scheme + host + port),
+shared by every component that talks to that host. Connections are kept
+alive and, when the `h2` package is installed, multiplexed over HTTP/2,
+so repeated RPC and explorer calls stop paying for new TLS handshakes.
+
+Components obtain a `SharedHttpClient` facade via `http_clients.client()`.
+It routes each request to the pool for the request's host and applies the
+component's default timeout. Closing the facade is a no-op; the pools are
+closed by the application shutdown hook.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("core.http_clients")
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+TimeoutTypes = Union[float, httpx.Timeout, None]
+
+
+class HttpClientRegistry:
+    """Registry of pooled httpx clients keyed by upstream host."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        default_timeout: float = 30.0,
+        http2: bool = True
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.default_timeout = default_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 not installed - shared HTTP pools will use HTTP/1.1 keep-alive")
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Pool key for a URL: scheme://host[:port]."""
+        parts = urlsplit(str(url))
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def get_pool(self, url: str) -> httpx.AsyncClient:
+        """Get (or create) the pooled client for the host of `url`."""
+        key = self.host_key(url)
+        client = self._clients.get(key)
+
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.default_timeout)
+            )
+            self._clients[key] = client
+            logger.debug(f"Created shared HTTP pool for {key} (http2={self.http2})")
+
+        self._requests[key] = self._requests.get(key, 0) + 1
+        return client
+
+    def client(self, timeout: TimeoutTypes = None) -> "SharedHttpClient":
+        """Get a client facade with its own default timeout."""
+        return SharedHttpClient(self, timeout if timeout is not None else self.default_timeout)
+
+    async def startup(self) -> None:
+        """Application startup hook."""
+        logger.info(f"Shared HTTP pools ready (http2={self.http2}, max_connections={self.limits.max_connections})")
+
+    async def shutdown(self) -> None:
+        """Application shutdown hook: close every pooled connection."""
+        clients, self._clients = self._clients, {}
+        for key, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP pool for {key}: {e}")
+        logger.info(f"Closed {len(clients)} shared HTTP pools")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool usage statistics for health/debug endpoints."""
+        return {
+            "http2": self.http2,
+            "pools": len(self._clients),
+            "requests_by_host": dict(self._requests),
+        }
+
+
+class SharedHttpClient:
+    """
+    httpx-compatible facade over the shared per-host pools.
+
+    Supports the subset of the AsyncClient API used across the codebase.
+    """
+
+    def __init__(self, registry: HttpClientRegistry, timeout: TimeoutTypes):
+        self._registry = registry
+        self._timeout = timeout
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        kwargs.setdefault("timeout", self._timeout)
+        return await self._registry.get_pool(url).request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @property
+    def is_closed(self) -> bool:
+        return False
+
+    async def aclose(self) -> None:
+        """No-op: shared pools are closed by the application shutdown hook."""
+
+    async def __aenter__(self) -> "SharedHttpClient":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.aclose()
+
+
+# Global registry instance
+http_clients = HttpClientRegistry()
@@ -0,0 +1,254 @@
+# APP: dex_django/apps/core
+# FILE: rate_limiter.py
+"""
+Shared async token-bucket rate limiting for DEX Sniper Pro
+
+Every component calling an external API (Etherscan-family explorers,
+DexScreener, ...) draws from one bucket per (API key, endpoint host), so
+the provider quota is shared correctly no matter how many analyzers,
+monitors and discovery jobs run at once. Buckets refill continuously at a
+rate just under the provider's published limit.
+
+Waiters are served by priority: live copy-trade monitoring goes before
+interactive requests, which go before background discovery. Background
+callers additionally leave a small token reserve untouched so a live
+request arriving after a discovery burst does not have to wait a full
+refill interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from .endpoints import original_host
+
+logger = logging.getLogger("core.rate_limiter")
+
+
+class Priority(IntEnum):
+    """Request priority classes; lower values are served first."""
+    LIVE = 0          # Copy-trade wallet monitoring
+    INTERACTIVE = 1   # User-initiated requests
+    DISCOVERY = 2     # Background discovery and analysis
+
+
+# Published provider limits per host: (requests per second, burst)
+PROVIDER_QUOTAS: Dict[str, Tuple[float, int]] = {
+    "api.etherscan.io": (5.0, 5),
+    "api.bscscan.com": (5.0, 5),
+    "api.basescan.org": (5.0, 5),
+    "api.polygonscan.com": (5.0, 5),
+    "api.arbiscan.io": (5.0, 5),
+    "api-optimistic.etherscan.io": (5.0, 5),
+    "api.dexscreener.com": (5.0, 10),
+}
+DEFAULT_QUOTA: Tuple[float, int] = (5.0, 5)
+
+# Run just under the quota to absorb clock skew on the provider side
+QUOTA_HEADROOM = 0.9
+
+
+class TokenBucket:
+    """Continuously refilling token bucket with priority-ordered waiters."""
+
+    def __init__(self, rate: float, burst: int, live_reserve: float = 1.0):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            live_reserve: Tokens non-live callers must leave in the bucket
+        """
+        self.rate = rate
+        self.capacity = float(burst)
+        self.live_reserve = live_reserve if burst > 2 else 0.0
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+        self.stats = {
+            "granted": 0,
+            "waited": 0,
+            "total_wait_seconds": 0.0,
+            "penalties": 0,
+        }
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, priority: Priority = Priority.DISCOVERY) -> float:
+        """
+        Take one token, waiting if necessary.
+
+        Returns:
+            Seconds spent waiting
+        """
+        self._refill()
+        no_one_ahead = not self._waiters or self._waiters[0][0] > priority
+        if no_one_ahead and self._tokens >= self._required(priority):
+            self._tokens -= 1
+            self.stats["granted"] += 1
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Token was granted as the caller gave up; put it back
+                self._tokens += 1
+            raise
+
+        waited = time.monotonic() - started
+        self.stats["granted"] += 1
+        self.stats["waited"] += 1
+        self.stats["total_wait_seconds"] += waited
+        return waited
+
+    def penalize(self, seconds: float) -> None:
+        """Provider reported a rate-limit hit: pause the bucket for `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - self.rate * seconds
+        self.stats["penalties"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        waited = self.stats["waited"]
+        return {
+            "rate_per_sec": round(self.rate, 3),
+            "burst": int(self.capacity),
+            "tokens": round(self.tokens, 2),
+            "queued": len(self._waiters),
+            **{k: v for k, v in self.stats.items() if k != "total_wait_seconds"},
+            "avg_wait_ms": round(self.stats["total_wait_seconds"] / waited * 1000, 1) if waited else 0.0,
+        }
+
+    def _required(self, priority: int) -> float:
+        return 1.0 if priority == Priority.LIVE else 1.0 + self.live_reserve
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _pump(self) -> None:
+        """Hand out tokens to queued waiters, most urgent first."""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            self._refill()
+            needed = self._required(priority)
+            if self._tokens >= needed:
+                heapq.heappop(self._waiters)
+                self._tokens -= 1
+                future.set_result(None)
+                continue
+
+            # Sleep until enough tokens, or until a more urgent waiter arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=(needed - self._tokens) / self.rate)
+            except asyncio.TimeoutError:
+                pass
+
+
+class RateLimiterRegistry:
+    """Token buckets keyed by (API key, endpoint host)."""
+
+    def __init__(self, headroom: float = QUOTA_HEADROOM):
+        self.headroom = headroom
+        self._quotas: Dict[str, Tuple[float, int]] = dict(PROVIDER_QUOTAS)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def configure(self, host: str, rate: float, burst: int) -> None:
+        """Set the published quota of a host (applies to buckets created afterwards)."""
+        self._quotas[host.lower()] = (rate, burst)
+
+    def bucket(self, endpoint: str, api_key: Optional[str] = None) -> TokenBucket:
+        """Bucket for an endpoint URL (or host) and API key."""
+        host = self._host(endpoint)
+        key = (api_key or "", host)
+        if key not in self._buckets:
+            rate, burst = self._quotas.get(host, DEFAULT_QUOTA)
+            self._buckets[key] = TokenBucket(rate * self.headroom, burst)
+        return self._buckets[key]
+
+    async def acquire(
+        self,
+        endpoint: str,
+        api_key: Optional[str] = None,
+        priority: Priority = Priority.DISCOVERY
+    ) -> float:
+        """
+        Wait for permission to make one request.
+
+        Args:
+            endpoint: Request URL or host
+            api_key: API key the request is billed to
+            priority: Priority class of the caller
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = await self.bucket(endpoint, api_key).acquire(priority)
+        if waited > 1.0:
+            logger.debug(f"Rate limited {self._host(endpoint)} for {waited:.2f}s ({priority.name})")
+        return waited
+
+    def penalize(self, endpoint: str, api_key: Optional[str] = None, seconds: float = 1.0) -> None:
+        """Back off after the provider rejected a request for exceeding its quota."""
+        self.bucket(endpoint, api_key).penalize(seconds)
+        logger.warning(f"Provider rate limit hit on {self._host(endpoint)}; backing off {seconds:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            f"{host}[{self._mask(api_key)}]": bucket.get_stats()
+            for (api_key, host), bucket in self._buckets.items()
+        }
+
+    @staticmethod
+    def _host(endpoint: str) -> str:
+        # Replay-redirected URLs keep the provider's quota
+        return original_host(endpoint)
+
+    @staticmethod
+    def _mask(api_key: str) -> str:
+        return f"...{api_key[-4:]}" if api_key else "no-key"
+
+
+def is_rate_limit_response(response: Any) -> bool:
+    """True for HTTP 429 or an Etherscan-style 'Max rate limit reached' body."""
+    if getattr(response, "status_code", None) == 429:
+        return True
+    try:
+        data = response.json()
+    except Exception:
+        return False
+    if not isinstance(data, dict) or data.get("status") != "0":
+        return False
+    return "rate limit" in str(data.get("result", "")).lower()
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiterRegistry()
@@ -0,0 +1,84 @@
+# APP: dex_django/apps/core
+# FILE: single_flight.py
+"""
+Single-flight request coalescing for DEX Sniper Pro
+
+Concurrent callers asking for the same thing share one in-flight request.
+The first caller starts the work; everyone who arrives with the same key
+before it finishes awaits the same result (or exception). Nothing is
+cached afterwards - the next call after completion starts a new flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicates concurrent async calls by key."""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        self.stats = {
+            "calls": 0,
+            "flights": 0,
+            "shared": 0,
+        }
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Build a stable key from arbitrary JSON-like parts (dict order ignored)."""
+        return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn()` unless an identical call is already in flight.
+
+        A caller that is cancelled only stops waiting; the shared request
+        keeps running for the other callers.
+
+        Args:
+            key: Identity of the request
+            fn: Coroutine factory performing the request
+
+        Returns:
+            Result of the shared request
+        """
+        self.stats["calls"] += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(future)
+
+        self.stats["flights"] += 1
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            "name": self.name,
+            **self.stats,
+            "in_flight": len(self._inflight),
+            "dedup_ratio": round(self.stats["shared"] / calls, 4) if calls else 0.0,
+        }
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Retrieve the exception so an unobserved failure is not logged as such
+        if not future.cancelled():
+            future.exception()
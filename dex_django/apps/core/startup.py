@@ -8,6 +8,7 @@ from typing import Dict, Any
 
 from dex_django.core.database import init_db
 from dex_django.copy_trading.copy_trading_coordinator import copy_trading_coordinator
+from apps.storage.token_index import token_index
 
 logger = logging.getLogger("core.startup")
 
@@ -32,13 +33,18 @@ async def initialize_application() -> Dict[str, Any]:
         results["database_init"] = "success"
         logger.info("Database initialized successfully")
         
-        # 2. Initialize copy trading coordinator (without starting)
+        # 2. Load token/pair index used by quoting and routing
+        logger.info("Loading token/pair index...")
+        await token_index.load()
+        results["token_index"] = token_index.get_stats()
+        
+        # 3. Initialize copy trading coordinator (without starting)
         logger.info("Initializing copy trading coordinator...")
         await copy_trading_coordinator.initialize()
         results["copy_trading_ready"] = True
         logger.info("Copy trading coordinator initialized")
         
-        # 3. Set final status
+        # 4. Set final status
         results["status"] = "success"
         results["message"] = "Application initialized successfully"
         
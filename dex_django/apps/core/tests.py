@@ -1,3 +1,106 @@
-from django.test import TestCase
+import asyncio
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from apps.core.rate_limiter import (
+    Priority,
+    RateLimiterRegistry,
+    TokenBucket,
+    is_rate_limit_response,
+)
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Token bucket bursts, refill waits, priority order and penalties."""
+
+    async def test_burst_is_granted_without_waiting(self):
+        bucket = TokenBucket(rate=1.0, burst=3)
+
+        waits = [await bucket.acquire(Priority.LIVE) for _ in range(3)]
+
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.stats["waited"], 0)
+
+    async def test_empty_bucket_waits_for_refill(self):
+        bucket = TokenBucket(rate=50.0, burst=1)
+        await bucket.acquire(Priority.LIVE)
+
+        waited = await bucket.acquire(Priority.LIVE)
+
+        self.assertGreater(waited, 0.0)
+        self.assertEqual(bucket.stats["waited"], 1)
+
+    async def test_discovery_leaves_reserve_for_live(self):
+        bucket = TokenBucket(rate=0.01, burst=3)
+        await bucket.acquire(Priority.DISCOVERY)
+        await bucket.acquire(Priority.DISCOVERY)
+
+        # One token left: discovery must leave it, live may take it
+        waiter = asyncio.create_task(bucket.acquire(Priority.DISCOVERY))
+        await asyncio.sleep(0)
+        self.assertEqual(await asyncio.wait_for(bucket.acquire(Priority.LIVE), 1), 0.0)
+        self.assertFalse(waiter.done())
+        waiter.cancel()
+        bucket._pump_task.cancel()
+
+    async def test_live_waiter_is_served_before_earlier_discovery_waiter(self):
+        # Burst 2 has no live reserve, so both classes need a single token
+        bucket = TokenBucket(rate=50.0, burst=2)
+        await bucket.acquire(Priority.LIVE)
+        await bucket.acquire(Priority.LIVE)
+        served = []
+
+        async def take(priority):
+            await bucket.acquire(priority)
+            served.append(priority)
+
+        await asyncio.wait_for(
+            asyncio.gather(take(Priority.DISCOVERY), take(Priority.LIVE)), 1
+        )
+
+        self.assertEqual(served, [Priority.LIVE, Priority.DISCOVERY])
+
+    async def test_penalty_pauses_the_bucket(self):
+        bucket = TokenBucket(rate=20.0, burst=5)
+
+        bucket.penalize(0.1)
+
+        self.assertLess(bucket.tokens, 0)
+        self.assertGreaterEqual(await asyncio.wait_for(bucket.acquire(Priority.LIVE), 1), 0.1)
+        self.assertEqual(bucket.stats["penalties"], 1)
+
+
+class RateLimiterRegistryTests(SimpleTestCase):
+    """Bucket sharing per (API key, host) and rate-limit response detection."""
+
+    def test_buckets_are_shared_per_key_and_host(self):
+        registry = RateLimiterRegistry()
+
+        bucket = registry.bucket("https://api.etherscan.io/api?module=account", "KEY1")
+
+        self.assertIs(registry.bucket("https://api.etherscan.io/api?module=logs", "KEY1"), bucket)
+        self.assertIsNot(registry.bucket("https://api.etherscan.io/api", "KEY2"), bucket)
+        self.assertIsNot(registry.bucket("https://api.bscscan.com/api", "KEY1"), bucket)
+
+    def test_configured_quota_applies_with_headroom(self):
+        registry = RateLimiterRegistry(headroom=0.5)
+        registry.configure("api.example.com", rate=10.0, burst=7)
+
+        bucket = registry.bucket("https://api.example.com/v1")
+
+        self.assertEqual(bucket.rate, 5.0)
+        self.assertEqual(bucket.capacity, 7.0)
+
+    def test_rate_limit_responses(self):
+        def response(status_code, body):
+            return SimpleNamespace(status_code=status_code, json=lambda: body)
+
+        self.assertTrue(is_rate_limit_response(response(429, None)))
+        self.assertTrue(is_rate_limit_response(
+            response(200, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"})
+        ))
+        self.assertFalse(is_rate_limit_response(
+            response(200, {"status": "0", "message": "NOTOK", "result": "Invalid API Key"})
+        ))
+        self.assertFalse(is_rate_limit_response(response(200, {"status": "1", "result": []})))
@@ -0,0 +1,343 @@
+"""
+One-pass receipt log decoder for swaps.
+
+Logs are dispatched on topic0 through a table of decoders for ERC20
+Transfer, Uniswap V2 Swap and Sync, and Uniswap V3 Swap; any other log costs
+one dict lookup. While walking the logs the decoder remembers the last token
+sent into and out of every address. In both V2 and V3 a pool's Swap event
+comes after its token transfers, so each Swap resolves to a hop with both
+tokens and exact raw amounts, without a second pass or any RPC.
+
+Decoded receipts are cached per (chain, tx hash), so the wallet monitor,
+the executors and the analyzers decode a transaction once and share it.
+Human amounts use token decimals from the token index, then a local cache
+filled by decimals() reads for tokens that are not indexed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from apps.chains.head_tracker import head_tracker
+from apps.chains.multicall import DECIMALS_SELECTOR
+from apps.storage.token_index import token_index
+
+logger = logging.getLogger("api")
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+V2_SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
+V3_SWAP_TOPIC = "0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67"
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+DEFAULT_DECIMALS = 18
+MAX_CACHED_RECEIPTS = 2048
+
+
+def _hex(value: Any) -> str:
+    """Lowercase 0x-hex from JSON-RPC strings or web3 HexBytes."""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    return str(value).lower()
+
+
+def _quantity(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value else 0
+
+
+def _words(data: Any) -> List[int]:
+    data = _hex(data)[2:]
+    return [int(data[i:i + 64], 16) for i in range(0, len(data) - 63, 64)]
+
+
+def _signed(word: int) -> int:
+    return word - 2**256 if word >= 2**255 else word
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:]
+
+
+@dataclass(frozen=True)
+class TokenTransfer:
+    """ERC20 Transfer log."""
+    token: str
+    sender: str
+    recipient: str
+    amount: int
+    log_index: int
+
+
+@dataclass(frozen=True)
+class SwapHop:
+    """One pool swap, raw units. Tokens are None if no transfer named them."""
+    pool: str
+    version: str  # "v2" | "v3"
+    token_in: Optional[str]
+    token_out: Optional[str]
+    amount_in: int
+    amount_out: int
+    recipient: str
+    log_index: int
+
+
+@dataclass
+class DecodedReceipt:
+    """Transfers, swap hops and post-swap reserves of one transaction."""
+    chain: str
+    tx_hash: str
+    block_number: int
+    status: int = 1
+    transfers: List[TokenTransfer] = field(default_factory=list)
+    hops: List[SwapHop] = field(default_factory=list)
+    reserves: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # V2 pair -> last Sync
+    decimals: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def amount_in(self) -> int:
+        """Raw input of the first hop."""
+        return self.hops[0].amount_in if self.hops else 0
+
+    @property
+    def amount_out(self) -> int:
+        """Raw output of the last hop."""
+        return self.hops[-1].amount_out if self.hops else 0
+
+    def received(self, token: str, account: str) -> int:
+        """Raw amount of `token` transferred to `account`."""
+        token, account = token.lower(), account.lower()
+        return sum(t.amount for t in self.transfers if t.token == token and t.recipient == account)
+
+    def sent(self, token: str, account: str) -> int:
+        """Raw amount of `token` transferred from `account`."""
+        token, account = token.lower(), account.lower()
+        return sum(t.amount for t in self.transfers if t.token == token and t.sender == account)
+
+    def tokens(self) -> Set[str]:
+        """Tokens swapped in this transaction."""
+        return {token for hop in self.hops for token in (hop.token_in, hop.token_out) if token}
+
+    def to_human(self, token: Optional[str], raw: int) -> Decimal:
+        """Raw amount in whole tokens (18 decimals when unknown, e.g. native)."""
+        decimals = self.decimals.get(token.lower(), DEFAULT_DECIMALS) if token else DEFAULT_DECIMALS
+        return Decimal(raw) / Decimal(10) ** decimals
+
+
+class _Walk:
+    """State of one pass over a receipt's logs."""
+
+    def __init__(self, result: DecodedReceipt):
+        self.result = result
+        self.last_in: Dict[str, str] = {}   # address -> last token sent to it
+        self.last_out: Dict[str, str] = {}  # address -> last token sent from it
+
+
+def _decode_transfer(log: Dict[str, Any], topics: List[str], walk: _Walk) -> None:
+    if len(topics) != 3:
+        return  # ERC721 Transfer also indexes the token id
+    token = _hex(log.get("address", ""))
+    sender, recipient = _topic_address(topics[1]), _topic_address(topics[2])
+    words = _words(log.get("data", "0x"))
+    walk.result.transfers.append(TokenTransfer(
+        token, sender, recipient, words[0] if words else 0, _quantity(log.get("logIndex", 0))
+    ))
+    walk.last_out[sender] = token
+    walk.last_in[recipient] = token
+
+
+def _add_hop(walk: _Walk, log: Dict[str, Any], version: str, recipient: str, delta0: int, delta1: int) -> None:
+    # Positive deltas went into the pool, negative ones came out
+    pool = _hex(log.get("address", ""))
+    walk.result.hops.append(SwapHop(
+        pool=pool,
+        version=version,
+        token_in=walk.last_in.get(pool),
+        token_out=walk.last_out.get(pool),
+        amount_in=max(delta0, delta1, 0),
+        amount_out=max(-delta0, -delta1, 0),
+        recipient=recipient,
+        log_index=_quantity(log.get("logIndex", 0)),
+    ))
+
+
+def _decode_v2_swap(log: Dict[str, Any], topics: List[str], walk: _Walk) -> None:
+    words = _words(log.get("data", "0x"))
+    if len(words) < 4 or len(topics) < 3:
+        return
+    amount0_in, amount1_in, amount0_out, amount1_out = words[:4]
+    _add_hop(walk, log, "v2", _topic_address(topics[2]), amount0_in - amount0_out, amount1_in - amount1_out)
+
+
+def _decode_v3_swap(log: Dict[str, Any], topics: List[str], walk: _Walk) -> None:
+    words = _words(log.get("data", "0x"))
+    if len(words) < 2 or len(topics) < 3:
+        return
+    _add_hop(walk, log, "v3", _topic_address(topics[2]), _signed(words[0]), _signed(words[1]))
+
+
+def _decode_sync(log: Dict[str, Any], topics: List[str], walk: _Walk) -> None:
+    words = _words(log.get("data", "0x"))
+    if len(words) >= 2:
+        walk.result.reserves[_hex(log.get("address", ""))] = (words[0], words[1])
+
+
+LogHandler = Callable[[Dict[str, Any], List[str], _Walk], None]
+
+# topic0 -> decoder
+DECODERS: Dict[str, LogHandler] = {
+    TRANSFER_TOPIC: _decode_transfer,
+    V2_SWAP_TOPIC: _decode_v2_swap,
+    V3_SWAP_TOPIC: _decode_v3_swap,
+    SYNC_TOPIC: _decode_sync,
+}
+
+
+class LogDecoder:
+    """Receipt decoder with a shared per-transaction result cache."""
+
+    def __init__(self, max_cached: int = MAX_CACHED_RECEIPTS):
+        self.max_cached = max_cached
+        self._receipts: "OrderedDict[Tuple[str, str], DecodedReceipt]" = OrderedDict()
+        self._decimals: Dict[Tuple[str, str], int] = {}
+
+        self.stats = {
+            "decoded": 0,
+            "cache_hits": 0,
+            "logs": 0,
+            "skipped_logs": 0,
+            "decimals_reads": 0,
+        }
+
+    def get(self, chain: str, tx_hash: str) -> Optional[DecodedReceipt]:
+        """Previously decoded transaction, if any. Never does RPC."""
+        decoded = self._receipts.get((chain, tx_hash.lower()))
+        if decoded is not None:
+            self._receipts.move_to_end((chain, tx_hash.lower()))
+            self.stats["cache_hits"] += 1
+        return decoded
+
+    def decode(self, chain: str, receipt: Dict[str, Any]) -> DecodedReceipt:
+        """
+        Decode a receipt in one pass (cached by transaction hash).
+
+        Only decimals already known are attached; use `decode_receipt` to
+        look up the rest.
+        """
+        tx_hash = _hex(receipt.get("transactionHash", ""))
+        cached = self.get(chain, tx_hash) if tx_hash else None
+        if cached is not None:
+            return cached
+
+        walk = _Walk(DecodedReceipt(
+            chain=chain,
+            tx_hash=tx_hash,
+            block_number=_quantity(receipt.get("blockNumber", 0)),
+            status=_quantity(receipt.get("status", 1)),
+        ))
+
+        for log in receipt.get("logs") or []:
+            topics = [_hex(topic) for topic in log.get("topics") or []]
+            decoder = DECODERS.get(topics[0]) if topics else None
+            if decoder is None:
+                self.stats["skipped_logs"] += 1
+                continue
+            decoder(log, topics, walk)
+        self.stats["logs"] += len(receipt.get("logs") or [])
+
+        result = walk.result
+        for token in self._swap_tokens(result):
+            decimals = self.decimals(chain, token)
+            if decimals is not None:
+                result.decimals[token] = decimals
+
+        self.stats["decoded"] += 1
+        if tx_hash:
+            self._receipts[(chain, tx_hash)] = result
+            while len(self._receipts) > self.max_cached:
+                self._receipts.popitem(last=False)
+        return result
+
+    async def decode_receipt(self, chain: str, receipt: Dict[str, Any], client: Any = None) -> DecodedReceipt:
+        """`decode`, with decimals of unindexed tokens read from chain."""
+        result = self.decode(chain, receipt)
+        missing = [token for token in self._swap_tokens(result) if token not in result.decimals]
+        if missing:
+            await self._load_decimals(chain, missing, client)
+            for token in missing:
+                decimals = self.decimals(chain, token)
+                if decimals is not None:
+                    result.decimals[token] = decimals
+        return result
+
+    async def decode_transaction(self, chain: str, tx_hash: str, client: Any = None) -> Optional[DecodedReceipt]:
+        """Decoded transaction from the cache, or fetched and decoded; None if not mined."""
+        cached = self.get(chain, tx_hash)
+        if cached is not None:
+            return cached
+
+        client = client or await self._client(chain)
+        receipt = await client.get_transaction_receipt(tx_hash)
+        if receipt is None:
+            return None
+        return await self.decode_receipt(chain, receipt, client)
+
+    def decimals(self, chain: str, token: str) -> Optional[int]:
+        """Token decimals from the token index or the local cache."""
+        entry = token_index.get_token(chain, token)
+        if entry is not None:
+            return entry.decimals
+        return self._decimals.get((chain, token.lower()))
+
+    async def load_decimals(self, chain: str, token: str, client: Any = None) -> Optional[int]:
+        """`decimals`, read from chain if the token is not known yet."""
+        decimals = self.decimals(chain, token)
+        if decimals is None:
+            await self._load_decimals(chain, [token], client)
+            decimals = self.decimals(chain, token)
+        return decimals
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_receipts": len(self._receipts),
+            "cached_decimals": len(self._decimals),
+        }
+
+    @staticmethod
+    def _swap_tokens(result: DecodedReceipt) -> Set[str]:
+        return result.tokens() | {t.token for t in result.transfers}
+
+    async def _load_decimals(self, chain: str, tokens: Iterable[str], client: Any = None) -> None:
+        try:
+            client = client or await self._client(chain)
+        except Exception as e:
+            logger.debug("No client for decimals on %s: %s", chain, e)
+            return
+
+        async def read(token: str) -> None:
+            try:
+                result = await client.call_contract(token, DECIMALS_SELECTOR)
+                self.stats["decimals_reads"] += 1
+                if result and result != "0x":
+                    self._decimals[(chain, token.lower())] = int(result, 16)
+            except Exception as e:
+                logger.debug("decimals() failed for %s on %s: %s", token, chain, e)
+
+        # Concurrent reads are packed into one Multicall3 call by the client
+        await asyncio.gather(*(read(token) for token in tokens))
+
+    async def _client(self, chain: str) -> Any:
+        tracker = await head_tracker.ensure_started(chain)
+        if tracker is None:
+            raise RuntimeError(f"no EVM client for {chain}")
+        return tracker.client
+
+
+# Global log decoder instance
+log_decoder = LogDecoder()
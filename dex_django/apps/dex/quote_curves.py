@@ -0,0 +1,206 @@
+"""
+Vectorized quote curves for position sizing.
+
+Returns amount-out and price impact for a whole vector of input sizes in
+one call, computed with NumPy from the mirrored pool state:
+
+- V2: the constant-product formula applied element-wise.
+- V3: the in-range liquidity between initialized ticks is laid out as
+  price segments; each size is located with a searchsorted over the
+  cumulative segment inputs and finished in closed form.
+
+Curves are float64 approximations (within rounding of the exact integer
+quoters) meant for sizing decisions such as "largest size under the
+slippage cap", not for minimum-out amounts on transactions.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from apps.dex.reserve_mirror import DEFAULT_V2_FEE_BPS, V2_FEE_BPS, reserve_mirror
+from apps.dex.v3_quoter import FEE_DENOMINATOR, V3PoolState, v3_quoter
+from apps.storage.token_index import token_index
+
+logger = logging.getLogger("api")
+
+# Default size grid: from a millionth to half of the input-side depth
+DEFAULT_CURVE_POINTS = 64
+MIN_SIZE_FRACTION = 1e-6
+MAX_SIZE_FRACTION = 0.5
+
+
+@dataclass
+class QuoteCurve:
+    """Amount out and price impact over a vector of input sizes (raw units)."""
+    amounts_in: np.ndarray
+    amounts_out: np.ndarray
+    price_impact_bps: np.ndarray
+    reserve_in: float        # Input-side depth: V2 reserve, V3 virtual reserve at spot
+    decimals_in: int = 18
+
+    def max_input_under(self, max_impact_bps: float) -> float:
+        """Largest input (raw units) whose price impact stays within the cap."""
+        within = self.price_impact_bps <= max_impact_bps
+        if not within.any():
+            return 0.0
+        if within.all():
+            return float(self.amounts_in[-1])
+
+        # Impact is monotonic in size: interpolate across the first crossing
+        i = int(np.argmin(within))
+        x0, x1 = self.amounts_in[i - 1], self.amounts_in[i]
+        y0, y1 = self.price_impact_bps[i - 1], self.price_impact_bps[i]
+        return float(x0 + (x1 - x0) * (max_impact_bps - y0) / (y1 - y0)) if y1 > y0 else float(x0)
+
+    def max_input_under_human(self, max_impact_bps: float) -> float:
+        """`max_input_under` in whole tokens."""
+        return self.max_input_under(max_impact_bps) / 10 ** self.decimals_in
+
+
+def default_sizes(reserve_in: float, points: int = DEFAULT_CURVE_POINTS) -> np.ndarray:
+    """Geometric size grid scaled to the input-side depth."""
+    return np.geomspace(reserve_in * MIN_SIZE_FRACTION, reserve_in * MAX_SIZE_FRACTION, points)
+
+
+def v2_curve(reserve_in: float, reserve_out: float, fee_bps: int, amounts_in: np.ndarray) -> QuoteCurve:
+    """Constant-product curve for a V2 pair."""
+    amounts_in = np.asarray(amounts_in, dtype=np.float64)
+    effective_in = amounts_in * (10000 - fee_bps) / 10000
+    amounts_out = effective_in * reserve_out / (reserve_in + effective_in)
+    impact = effective_in / (reserve_in + effective_in) * 10000
+    return QuoteCurve(amounts_in, amounts_out, np.minimum(impact, 9999), float(reserve_in))
+
+
+def v3_curve(pool: V3PoolState, zero_for_one: bool, amounts_in: np.ndarray) -> QuoteCurve:
+    """
+    Piecewise curve for a V3 pool over the snapshot's initialized ticks.
+
+    Beyond the last loaded tick the last liquidity is assumed to continue.
+    """
+    amounts_in = np.asarray(amounts_in, dtype=np.float64)
+    sqrt_spot = pool.sqrt_price_x96 / 2**96
+
+    # Segment boundaries in the swap direction and the liquidity inside each
+    if zero_for_one:
+        ticks = sorted((t for t in pool.liquidity_net if t <= pool.tick), reverse=True)
+    else:
+        ticks = sorted(t for t in pool.liquidity_net if t > pool.tick)
+    bounds = [sqrt_spot] + [1.0001 ** (t / 2) for t in ticks]
+    liquidity = [float(pool.liquidity)]
+    for t in ticks:
+        net = float(pool.liquidity_net[t])
+        liquidity.append(max(liquidity[-1] + (-net if zero_for_one else net), 0.0))
+
+    sqrt_start = np.array(bounds)
+    seg_liquidity = np.array(liquidity)
+
+    # Input consumed and output produced to cross each full segment
+    if zero_for_one:
+        seg_in = seg_liquidity[:-1] * (1 / sqrt_start[1:] - 1 / sqrt_start[:-1])
+        seg_out = seg_liquidity[:-1] * (sqrt_start[:-1] - sqrt_start[1:])
+    else:
+        seg_in = seg_liquidity[:-1] * (sqrt_start[1:] - sqrt_start[:-1])
+        seg_out = seg_liquidity[:-1] * (1 / sqrt_start[:-1] - 1 / sqrt_start[1:])
+    cum_in = np.concatenate(([0.0], np.cumsum(seg_in)))
+    cum_out = np.concatenate(([0.0], np.cumsum(seg_out)))
+
+    effective_in = amounts_in * (FEE_DENOMINATOR - pool.fee) / FEE_DENOMINATOR
+    k = np.searchsorted(cum_in, effective_in, side="right") - 1
+    rest = effective_in - cum_in[k]
+    p0, liq = sqrt_start[k], seg_liquidity[k]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if zero_for_one:
+            p1 = 1 / (1 / p0 + rest / liq)
+            partial = liq * (p0 - p1)
+        else:
+            p1 = p0 + rest / liq
+            partial = liq * (1 / p0 - 1 / p1)
+    amounts_out = cum_out[k] + np.where(liq > 0, np.nan_to_num(partial), 0.0)
+
+    spot = sqrt_spot ** 2 if zero_for_one else 1 / sqrt_spot ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        impact = (1 - amounts_out / (effective_in * spot)) * 10000
+    impact = np.clip(np.nan_to_num(impact, nan=0.0), 0, 9999)
+
+    # Virtual input reserve at spot: L / sqrtP for token0, L * sqrtP for token1
+    reserve_in = pool.liquidity / sqrt_spot if zero_for_one else pool.liquidity * sqrt_spot
+    return QuoteCurve(amounts_in, amounts_out, impact, float(reserve_in))
+
+
+async def get_quote_curve(
+    chain: str,
+    pair_address: str,
+    token_in: Optional[str] = None,
+    token_out: Optional[str] = None,
+    amounts_in: Optional[Sequence[float]] = None,
+    dex: str = ""
+) -> Optional[QuoteCurve]:
+    """
+    Quote curve for swapping into a pool, from mirrored state.
+
+    The pool is mirrored on first use (by address, so no router or factory
+    is needed). Give either `token_in` or `token_out`.
+
+    Args:
+        chain: Chain name
+        pair_address: V2 pair or V3 pool address
+        token_in: Token sold into the pool
+        token_out: Token bought from the pool (alternative to token_in)
+        amounts_in: Input sizes in raw units; a grid scaled to the pool by default
+        dex: DEX name hint ("...v3..." pools are tried as V3 first)
+
+    Returns:
+        QuoteCurve, or None if the pool cannot be mirrored
+    """
+    try:
+        v2_mirror, v3_mirror = reserve_mirror.mirror(chain), v3_quoter.mirror(chain)
+        pair, pool = v2_mirror.get(pair_address), v3_mirror.get(pair_address)
+        if pair is None and pool is None:
+            fee_bps = V2_FEE_BPS.get(dex.lower(), DEFAULT_V2_FEE_BPS)
+            if "v3" in dex.lower():
+                pool = await v3_mirror.track(pair_address)
+                if pool is None:
+                    pair = await v2_mirror.track(pair_address, fee_bps)
+            else:
+                pair = await v2_mirror.track(pair_address, fee_bps)
+                if pair is None:
+                    pool = await v3_mirror.track(pair_address)
+
+        state = pair or pool
+        if state is None:
+            return None
+
+        if token_in is None:
+            if token_out is None:
+                raise ValueError("token_in or token_out is required")
+            token_in = state.token1 if token_out.lower() == state.token0 else state.token0
+
+        token = token_index.get_token(chain, token_in)
+        decimals_in = token.decimals if token else 18
+
+        if pair is not None:
+            reserve_in, reserve_out = pair.oriented(token_in)
+            if reserve_in == 0 or reserve_out == 0:
+                return None
+            sizes = default_sizes(reserve_in) if amounts_in is None else np.asarray(amounts_in, dtype=np.float64)
+            curve = v2_curve(float(reserve_in), float(reserve_out), pair.fee_bps, sizes)
+        else:
+            if pool.liquidity == 0:
+                return None
+            zero_for_one = token_in.lower() == pool.token0
+            depth = pool.liquidity / (pool.sqrt_price_x96 / 2**96) if zero_for_one else pool.liquidity * pool.sqrt_price_x96 / 2**96
+            sizes = default_sizes(depth) if amounts_in is None else np.asarray(amounts_in, dtype=np.float64)
+            curve = v3_curve(pool, zero_for_one, sizes)
+
+        curve.decimals_in = decimals_in
+        return curve
+
+    except Exception as e:
+        logger.warning("Quote curve unavailable for %s on %s: %s", pair_address, chain, e)
+        return None
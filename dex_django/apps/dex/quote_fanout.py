@@ -0,0 +1,199 @@
+"""
+Parallel multi-DEX quote fan-out with a latency budget.
+
+All routers on a chain are asked at once. Whatever has answered when the
+budget expires is ranked and the stragglers are cancelled, so one slow
+router no longer holds up a trade. If nothing usable has arrived by
+then (typically a cold start, when pools are still being resolved), the
+first usable answer is taken as soon as it lands, up to a hard timeout.
+
+Per-DEX latencies are returned with every quote set and aggregated in
+`quote_latency` for tuning the budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("api")
+
+DEFAULT_QUOTE_BUDGET_MS = float(os.getenv("DEX_QUOTE_BUDGET_MS", "150"))
+DEFAULT_QUOTE_HARD_TIMEOUT_MS = float(os.getenv("DEX_QUOTE_HARD_TIMEOUT_MS", "3000"))
+
+# Latency samples kept per (chain, dex)
+LATENCY_WINDOW = 200
+
+QuoteStatus = str  # "ok" | "no_route" | "error" | "timeout"
+
+
+@dataclass
+class DexQuoteResult:
+    """One router's answer (or lack of one) within a fan-out."""
+    dex: str
+    status: QuoteStatus
+    latency_ms: float
+    quote: Any = None
+    amount_out: Decimal = Decimal("0")
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dex": self.dex,
+            "status": self.status,
+            "latency_ms": round(self.latency_ms, 1),
+            "amount_out": str(self.amount_out),
+            "error": self.error,
+        }
+
+
+@dataclass
+class QuoteSet:
+    """Ranked results of a fan-out: usable quotes by output, then the rest."""
+    chain: str
+    results: List[DexQuoteResult]
+    budget_ms: float
+    elapsed_ms: float
+
+    @property
+    def ok(self) -> List[DexQuoteResult]:
+        return [r for r in self.results if r.status == "ok"]
+
+    @property
+    def best(self) -> Optional[DexQuoteResult]:
+        ok = self.ok
+        return ok[0] if ok else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "results": [r.to_dict() for r in self.results],
+        }
+
+
+class QuoteLatencyStats:
+    """Rolling per-DEX quote latency and timeout counts."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, chain: str, result: DexQuoteResult) -> None:
+        key = f"{chain}:{result.dex}"
+        counts = self._counts.setdefault(key, {"ok": 0, "no_route": 0, "error": 0, "timeout": 0})
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if result.status != "timeout":
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(result.latency_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for key, counts in self._counts.items():
+            samples = sorted(self._samples.get(key, ()))
+            stats[key] = {
+                **counts,
+                "p50_ms": round(samples[len(samples) // 2], 1) if samples else None,
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1) if samples else None,
+            }
+        return stats
+
+
+async def fan_out_quotes(
+    chain: str,
+    quoters: Dict[str, Callable[[], Awaitable[Any]]],
+    amount_of: Callable[[Any], Decimal],
+    is_ok: Callable[[Any], bool] = lambda quote: quote is not None,
+    budget_ms: Optional[float] = None,
+    hard_timeout_ms: Optional[float] = None
+) -> QuoteSet:
+    """
+    Run every quoter concurrently and rank what arrives within the budget.
+
+    Args:
+        chain: Chain name (for latency stats)
+        quoters: DEX name -> coroutine factory returning that DEX's quote
+        amount_of: Output amount of a quote, used for ranking
+        is_ok: Whether a returned quote is usable
+        budget_ms: Latency budget; stragglers past it are cancelled
+        hard_timeout_ms: Longest wait for a first usable quote
+
+    Returns:
+        QuoteSet ranked best first, with per-DEX latency
+    """
+    budget_ms = DEFAULT_QUOTE_BUDGET_MS if budget_ms is None else budget_ms
+    hard_timeout_ms = DEFAULT_QUOTE_HARD_TIMEOUT_MS if hard_timeout_ms is None else hard_timeout_ms
+
+    started = time.perf_counter()
+    finished_at: Dict[str, float] = {}
+
+    async def timed(dex: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await factory()
+        finally:
+            finished_at[dex] = time.perf_counter()
+
+    tasks = {asyncio.create_task(timed(dex, factory)): dex for dex, factory in quoters.items()}
+    results: Dict[str, DexQuoteResult] = {}
+
+    def collect(done: set) -> None:
+        for task in done:
+            dex = tasks[task]
+            latency = (finished_at.get(dex, time.perf_counter()) - started) * 1000
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is not None:
+                results[dex] = DexQuoteResult(dex, "error", latency, error=str(error))
+                continue
+            quote = task.result()
+            if is_ok(quote):
+                results[dex] = DexQuoteResult(dex, "ok", latency, quote, Decimal(str(amount_of(quote))))
+            else:
+                results[dex] = DexQuoteResult(dex, "no_route", latency, quote)
+
+    pending = set(tasks)
+    try:
+        done, pending = await asyncio.wait(pending, timeout=budget_ms / 1000) if pending else (set(), set())
+        collect(done)
+
+        # Nothing usable yet: take the first usable answer, up to the hard timeout
+        deadline = started + hard_timeout_ms / 1000
+        while pending and not any(r.status == "ok" for r in results.values()):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for task in pending:
+        dex = tasks[task]
+        results[dex] = DexQuoteResult(dex, "timeout", elapsed_ms)
+
+    ranked = sorted(
+        results.values(),
+        key=lambda r: (r.status != "ok", -r.amount_out, r.latency_ms)
+    )
+    for result in ranked:
+        quote_latency.record(chain, result)
+
+    timeouts = [r.dex for r in ranked if r.status == "timeout"]
+    if timeouts:
+        logger.debug("Quote budget %.0fms on %s cut off: %s", budget_ms, chain, ", ".join(timeouts))
+
+    return QuoteSet(chain=chain, results=ranked, budget_ms=budget_ms, elapsed_ms=elapsed_ms)
+
+
+# Global quote latency stats instance
+quote_latency = QuoteLatencyStats()
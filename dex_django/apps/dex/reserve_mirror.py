@@ -0,0 +1,426 @@
+"""
+Uniswap V2 reserve mirror and constant-product quote math.
+
+Keeps an in-memory copy of V2 pair reserves per chain. Pairs are resolved
+once through the router's factory (factory() / getPair / token0, batched
+via Multicall3), snapshotted with getReserves, and then kept current from
+their Sync events. If the log stream cannot be set up, the mirror falls
+back to one Multicall3 getReserves refresh per new block.
+
+Quotes are computed locally with the exact integer math of
+UniswapV2Library.getAmountOut, so they match the router's getAmountsOut
+bit for bit at the mirrored block, and price impact is closed-form.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from eth_abi import encode
+
+from apps.chains.head_tracker import ChainHead, head_tracker
+from apps.chains.multicall import (
+    MulticallError,
+    decode_reserves,
+    reserves_call,
+)
+from apps.chains.providers import web3_manager
+
+logger = logging.getLogger("api")
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+FACTORY_SELECTOR = "0xc45a0155"    # factory()
+GET_PAIR_SELECTOR = "0xe6a43905"   # getPair(address,address)
+TOKEN0_SELECTOR = "0x0dfe1681"     # token0()
+TOKEN1_SELECTOR = "0xd21220a7"     # token1()
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+# Seconds a "no pair" answer is trusted; new pairs appear all the time
+MISSING_PAIR_TTL = 30.0
+
+# A getReserves snapshot reflects the end of its block, after every Sync in it
+SNAPSHOT_LOG_INDEX = 2**31
+
+# Swap fee per V2 fork; anything not listed uses the Uniswap 0.30%
+V2_FEE_BPS = {
+    "pancakeswap": 25,
+    "pancake": 25,
+}
+DEFAULT_V2_FEE_BPS = 30
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = DEFAULT_V2_FEE_BPS) -> int:
+    """Exact UniswapV2Library.getAmountOut (integer math, rounds down)."""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * 10000 + amount_in_with_fee
+    return numerator // denominator
+
+
+def price_impact_bps(amounts: Sequence[int], hops: Sequence["Hop"]) -> int:
+    """
+    Closed-form price impact of a (multi-hop) swap in basis points.
+
+    Measured against the fee-adjusted mid price, so the swap fee itself is
+    not counted. Per hop the execution/mid ratio is r_in / (r_in + a * g)
+    with g = 1 - fee; the hops multiply.
+    """
+    ratio = 1.0
+    for amount_in, hop in zip(amounts, hops):
+        effective_in = amount_in * (10000 - hop.fee_bps) / 10000
+        ratio *= hop.reserve_in / (hop.reserve_in + effective_in)
+    return min(int((1 - ratio) * 10000), 9999)
+
+
+@dataclass
+class PairReserves:
+    """Mirrored state of one V2 pair."""
+    address: str
+    token0: str
+    token1: str
+    fee_bps: int
+    reserve0: int = 0
+    reserve1: int = 0
+    block_number: int = 0
+    log_index: int = -1
+    version: int = 0
+
+    def oriented(self, token_in: str) -> Tuple[int, int]:
+        """(reserve_in, reserve_out) for a swap starting with `token_in`."""
+        if token_in.lower() == self.token0:
+            return self.reserve0, self.reserve1
+        return self.reserve1, self.reserve0
+
+    def update(
+        self,
+        reserve0: int,
+        reserve1: int,
+        block_number: int,
+        log_index: int = SNAPSHOT_LOG_INDEX
+    ) -> bool:
+        """Apply newer reserves; older updates are ignored."""
+        if (block_number, log_index) < (self.block_number, self.log_index):
+            return False
+        self.reserve0, self.reserve1 = reserve0, reserve1
+        self.block_number, self.log_index = block_number, log_index
+        self.version += 1
+        return True
+
+
+@dataclass(frozen=True)
+class Hop:
+    """Reserves of one hop at quote time."""
+    pair: str
+    reserve_in: int
+    reserve_out: int
+    fee_bps: int
+
+
+@dataclass
+class LocalQuote:
+    """Quote computed from mirrored reserves (raw token units)."""
+    amounts: List[int]
+    hops: List[Hop]
+    price_impact_bps: int
+    block_number: int
+    versions: Tuple[int, ...] = field(default_factory=tuple)
+
+    @property
+    def amount_out(self) -> int:
+        return self.amounts[-1]
+
+    def min_out(self, slippage_bps: int) -> int:
+        return self.amount_out * (10000 - slippage_bps) // 10000
+
+
+class V2ReserveMirror:
+    """In-memory reserves of the V2 pairs quoted on one chain."""
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        self._pairs: Dict[str, PairReserves] = {}
+        # (factory, sorted token pair) -> pair address
+        self._pair_addresses: Dict[Tuple[str, str, str], str] = {}
+        # (factory, sorted token pair) -> monotonic time its "no pair" answer expires
+        self._missing: Dict[Tuple[str, str, str], float] = {}
+        self._factories: Dict[str, str] = {}
+        self._resolving: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+        self._subscription: Optional[str] = None
+        self._subscribed: Set[str] = set()
+        self._resubscribe_task: Optional[asyncio.Task] = None
+        self._poll_per_block = False
+
+        self.stats = {
+            "pairs": 0,
+            "quotes": 0,
+            "sync_events": 0,
+            "snapshots": 0,
+            "missing_pairs": 0,
+        }
+
+    def get(self, pair_address: str) -> Optional[PairReserves]:
+        return self._pairs.get(pair_address.lower())
+
+    async def quote(
+        self,
+        router_address: str,
+        path: Sequence[str],
+        amount_in: int,
+        fee_bps: int = DEFAULT_V2_FEE_BPS
+    ) -> Optional[LocalQuote]:
+        """
+        Quote `amount_in` along `path` from mirrored reserves.
+
+        Returns:
+            LocalQuote, or None if a hop has no V2 pair or no liquidity
+        """
+        pairs = await asyncio.gather(*(
+            self.get_pair(router_address, path[i], path[i + 1], fee_bps)
+            for i in range(len(path) - 1)
+        ))
+        if any(pair is None for pair in pairs):
+            return None
+
+        amounts = [amount_in]
+        hops: List[Hop] = []
+        for token_in, pair in zip(path, pairs):
+            reserve_in, reserve_out = pair.oriented(token_in)
+            if reserve_in == 0 or reserve_out == 0:
+                return None
+            hops.append(Hop(pair.address, reserve_in, reserve_out, pair.fee_bps))
+            amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out, pair.fee_bps))
+
+        self.stats["quotes"] += 1
+        return LocalQuote(
+            amounts=amounts,
+            hops=hops,
+            price_impact_bps=price_impact_bps(amounts, hops),
+            block_number=min(pair.block_number for pair in pairs),
+            versions=tuple(pair.version for pair in pairs)
+        )
+
+    async def get_pair(
+        self,
+        router_address: str,
+        token_a: str,
+        token_b: str,
+        fee_bps: int = DEFAULT_V2_FEE_BPS
+    ) -> Optional[PairReserves]:
+        """Mirrored pair for two tokens, resolving and snapshotting it on first use."""
+        factory = await self._get_factory(router_address)
+        a, b = sorted((token_a.lower(), token_b.lower()))
+        key = (factory, a, b)
+
+        if key in self._pair_addresses:
+            return self._pairs.get(self._pair_addresses[key])
+        if time.monotonic() < self._missing.get(key, 0.0):
+            return None
+
+        # Concurrent first quotes for the same pair share one resolution
+        pending = self._resolving.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resolve_pair(key, fee_bps))
+            self._resolving[key] = pending
+            pending.add_done_callback(lambda _: self._resolving.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def track(self, pair_address: str, fee_bps: int = DEFAULT_V2_FEE_BPS) -> Optional[PairReserves]:
+        """Mirror a pair known only by its address (e.g. from a copy-trade signal)."""
+        address = pair_address.lower()
+        if address in self._pairs:
+            return self._pairs[address]
+
+        multicall = web3_manager.get_multicall(self.chain)
+        try:
+            factory_data, token0_data, token1_data, reserves_data = await asyncio.gather(
+                multicall.call(address, FACTORY_SELECTOR),
+                multicall.call(address, TOKEN0_SELECTOR),
+                multicall.call(address, TOKEN1_SELECTOR),
+                multicall.call(address, reserves_call(address).call_data),
+            )
+        except MulticallError as e:
+            logger.debug("%s on %s is not a standard V2 pair: %s", address, self.chain, e)
+            return None
+
+        token0, token1 = _decode_address(token0_data), _decode_address(token1_data)
+        reserve0, reserve1, _ = decode_reserves(reserves_data)
+        pair = PairReserves(address=address, token0=token0, token1=token1, fee_bps=fee_bps)
+        pair.update(reserve0, reserve1, head_tracker.latest_block(self.chain) or 0)
+
+        self._pairs[address] = pair
+        key = (_decode_address(factory_data), token0, token1)
+        self._pair_addresses[key] = address
+        self._missing.pop(key, None)
+        self.stats["pairs"] = len(self._pairs)
+        self._watch_soon()
+        return pair
+
+    async def refresh(self, addresses: Optional[Sequence[str]] = None) -> int:
+        """Snapshot reserves with one Multicall3 batch; returns pairs updated."""
+        targets = [a.lower() for a in (addresses or list(self._pairs))]
+        if not targets:
+            return 0
+
+        # Pin the snapshot to the tracked head so Sync ordering stays exact
+        block_number = head_tracker.latest_block(self.chain)
+        results = await web3_manager.get_multicall(self.chain).aggregate(
+            [reserves_call(address) for address in targets],
+            hex(block_number) if block_number else "latest"
+        )
+
+        updated = 0
+        for address, result in zip(targets, results):
+            pair = self._pairs.get(address)
+            if pair is None or not result.success:
+                continue
+            reserve0, reserve1, _ = decode_reserves(result.return_data)
+            if pair.update(reserve0, reserve1, block_number or pair.block_number):
+                updated += 1
+
+        self.stats["snapshots"] += 1
+        return updated
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            **self.stats,
+            "pairs": len(self._pairs),
+            "mode": "per_block_multicall" if self._poll_per_block else "sync_events",
+        }
+
+    async def _get_factory(self, router_address: str) -> str:
+        router = router_address.lower()
+        if router not in self._factories:
+            data = await web3_manager.get_multicall(self.chain).call(router_address, FACTORY_SELECTOR)
+            self._factories[router] = _decode_address(data)
+        return self._factories[router]
+
+    async def _resolve_pair(self, key: Tuple[str, str, str], fee_bps: int) -> Optional[PairReserves]:
+        factory, a, b = key
+        multicall = web3_manager.get_multicall(self.chain)
+
+        data = await multicall.call(
+            factory, GET_PAIR_SELECTOR + encode(["address", "address"], [a, b]).hex()
+        )
+        address = _decode_address(data)
+        if address == ZERO_ADDRESS:
+            self._missing[key] = time.monotonic() + MISSING_PAIR_TTL
+            self.stats["missing_pairs"] += 1
+            return None
+
+        try:
+            token0_data, reserves_data = await asyncio.gather(
+                multicall.call(address, TOKEN0_SELECTOR),
+                multicall.call(address, reserves_call(address).call_data),
+            )
+        except MulticallError as e:
+            logger.debug("Pair %s on %s is not a standard V2 pair: %s", address, self.chain, e)
+            self._missing[key] = time.monotonic() + MISSING_PAIR_TTL
+            return None
+
+        token0 = _decode_address(token0_data)
+        reserve0, reserve1, _ = decode_reserves(reserves_data)
+        pair = PairReserves(
+            address=address,
+            token0=token0,
+            token1=b if token0 == a else a,
+            fee_bps=fee_bps
+        )
+        pair.update(reserve0, reserve1, head_tracker.latest_block(self.chain) or 0)
+
+        self._pairs[address] = pair
+        self._pair_addresses[key] = address
+        self._missing.pop(key, None)
+        self.stats["pairs"] = len(self._pairs)
+        self._watch_soon()
+        return pair
+
+    def _watch_soon(self) -> None:
+        """Extend the Sync subscription to newly tracked pairs (debounced)."""
+        if self._poll_per_block:
+            return
+        if self._resubscribe_task is None or self._resubscribe_task.done():
+            self._resubscribe_task = asyncio.create_task(self._resubscribe())
+
+    async def _resubscribe(self) -> None:
+        await asyncio.sleep(0.05)
+        addresses = set(self._pairs)
+        if addresses == self._subscribed:
+            return
+
+        try:
+            tracker = await head_tracker.ensure_started(self.chain)
+            if tracker is None:
+                raise RuntimeError(f"no head tracker for {self.chain}")
+            client = tracker.client
+
+            # Subscribe the new set before dropping the old one so no Sync is missed
+            handle = await client.subscribe_logs(
+                {"address": sorted(addresses), "topics": [SYNC_TOPIC]}, self._on_sync
+            )
+            previous, self._subscription, self._subscribed = self._subscription, handle, addresses
+            if previous:
+                await client.unsubscribe(previous)
+
+        except Exception as e:
+            logger.warning("Sync subscription failed on %s, refreshing per block: %s", self.chain, e)
+            self._poll_per_block = True
+            head_tracker.subscribe(self.chain, self._on_new_head)
+
+    def _on_sync(self, log: Dict[str, Any]) -> None:
+        pair = self._pairs.get(str(log.get("address", "")).lower())
+        if pair is None:
+            return
+
+        if log.get("removed"):
+            # Reorged out: re-read the pair instead of guessing the prior state
+            asyncio.create_task(self.refresh([pair.address]))
+            return
+
+        data = log.get("data", "0x")[2:]
+        if len(data) < 128:
+            return
+        self.stats["sync_events"] += 1
+        pair.update(
+            int(data[:64], 16),
+            int(data[64:128], 16),
+            int(log["blockNumber"], 16),
+            int(log.get("logIndex", "0x0"), 16)
+        )
+
+    def _on_new_head(self, head: ChainHead) -> None:
+        asyncio.create_task(self.refresh())
+
+
+class ReserveMirrorService:
+    """Registry of per-chain reserve mirrors."""
+
+    def __init__(self):
+        self._mirrors: Dict[str, V2ReserveMirror] = {}
+
+    def mirror(self, chain: str) -> V2ReserveMirror:
+        if chain not in self._mirrors:
+            self._mirrors[chain] = V2ReserveMirror(chain)
+        return self._mirrors[chain]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {chain: mirror.get_stats() for chain, mirror in self._mirrors.items()}
+
+
+def _decode_address(return_data: Any) -> str:
+    data = return_data.hex() if isinstance(return_data, (bytes, bytearray)) else str(return_data)
+    data = data[2:] if data.startswith("0x") else data
+    return "0x" + data[-40:].lower()
+
+
+# Global reserve mirror instance
+reserve_mirror = ReserveMirrorService()
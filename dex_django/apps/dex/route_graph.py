@@ -0,0 +1,215 @@
+"""
+Per-chain token graph and amount-aware route search.
+
+Edges are the token pairs known to exist: every pair in the token index
+(stored Pair rows plus those the discovery engine adds later) and pairs
+a router has quoted successfully. Route search enumerates 1-3 hop
+candidate paths through tokens adjacent to both ends and through the
+chain's hub tokens, then scores each candidate by its exact output for
+the requested amount (fees and reserves included) through the caller's
+quote function.
+Quotes come from the in-memory reserve mirrors, so a warm search does
+no RPC.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from apps.storage.token_index import PairEntry, token_index
+
+logger = logging.getLogger("api")
+
+MAX_HOPS = 3
+MAX_CANDIDATE_PATHS = 24
+
+# Output penalty per extra hop, a stand-in for the extra swap gas
+HOP_PENALTY_BPS = 5
+
+QuoteFn = Callable[[List[str], int], Awaitable[Optional[int]]]
+
+
+class TokenGraph:
+    """Undirected token adjacency for one chain (lowercase addresses)."""
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        # token -> neighbour -> DEXes with a pair for the two
+        self._edges: Dict[str, Dict[str, Set[str]]] = {}
+
+    def add_pair(self, token_a: str, token_b: str, dex: str = "") -> bool:
+        """Add an edge; returns True if the token pair was new."""
+        a, b = token_a.lower(), token_b.lower()
+        if a == b:
+            return False
+        is_new = b not in self._edges.get(a, {})
+        self._edges.setdefault(a, {}).setdefault(b, set()).add(dex)
+        self._edges.setdefault(b, {}).setdefault(a, set()).add(dex)
+        return is_new
+
+    def neighbors(self, token: str) -> Set[str]:
+        return set(self._edges.get(token.lower(), {}))
+
+    def has_edge(self, token_a: str, token_b: str) -> bool:
+        return token_b.lower() in self._edges.get(token_a.lower(), {})
+
+    def degree(self, token: str) -> int:
+        return len(self._edges.get(token.lower(), {}))
+
+    def candidate_paths(
+        self,
+        token_in: str,
+        token_out: str,
+        hubs: Iterable[str] = (),
+        max_hops: int = MAX_HOPS,
+        limit: int = MAX_CANDIDATE_PATHS
+    ) -> List[List[str]]:
+        """
+        Candidate paths from `token_in` to `token_out`, shortest first.
+
+        Hub tokens are always tried as intermediates even without a known
+        edge, so a sparse graph still yields the classic WETH/USDC routes;
+        the quote function decides whether they actually exist.
+        """
+        src, dst = token_in.lower(), token_out.lower()
+        hub_set = {h.lower() for h in hubs} - {src, dst}
+
+        paths: List[List[str]] = [[src, dst]]
+        if max_hops >= 2:
+            mids = (self.neighbors(src) & self.neighbors(dst)) | hub_set
+            mids -= {src, dst}
+            for mid in sorted(mids, key=lambda t: (t not in hub_set, -self.degree(t))):
+                paths.append([src, mid, dst])
+
+        if max_hops >= 3:
+            firsts = (self.neighbors(src) | hub_set) - {src, dst}
+            lasts = (self.neighbors(dst) | hub_set) - {src, dst}
+            three_hop = [
+                [src, m1, m2, dst]
+                for m1 in firsts
+                for m2 in lasts
+                if m1 != m2 and (self.has_edge(m1, m2) or (m1 in hub_set and m2 in hub_set))
+            ]
+            three_hop.sort(key=lambda p: (
+                (p[1] not in hub_set) + (p[2] not in hub_set),
+                -(self.degree(p[1]) + self.degree(p[2]))
+            ))
+            paths.extend(three_hop)
+
+        return paths[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": len(self._edges),
+            "edges": sum(len(n) for n in self._edges.values()) // 2,
+        }
+
+
+class RouteGraphService:
+    """Registry of per-chain token graphs."""
+
+    def __init__(self):
+        self._graphs: Dict[str, TokenGraph] = {}
+        self._loaded: Set[str] = set()
+        self._load_lock = asyncio.Lock()
+        token_index.add_listener(self._on_indexed_pair)
+
+        self.stats = {
+            "searches": 0,
+            "candidates_scored": 0,
+            "multi_hop_wins": 0,
+        }
+
+    def graph(self, chain: str) -> TokenGraph:
+        if chain not in self._graphs:
+            self._graphs[chain] = TokenGraph(chain)
+        return self._graphs[chain]
+
+    def add_pair(self, chain: str, token_a: str, token_b: str, dex: str = "") -> None:
+        """Record a pair seen by discovery or a successful quote."""
+        self.graph(chain).add_pair(token_a, token_b, dex)
+
+    async def ensure_loaded(self, chain: str) -> None:
+        """Seed the chain's graph from the token index once."""
+        if chain in self._loaded:
+            return
+        async with self._load_lock:
+            if chain in self._loaded:
+                return
+            try:
+                await token_index.ensure_loaded()
+            except Exception as e:
+                # Discovery and quoting keep filling the graph
+                logger.warning("Could not load stored pairs for %s route graph: %s", chain, e)
+            graph = self.graph(chain)
+            for entry in token_index.pairs(chain):
+                graph.add_pair(entry.token0, entry.token1, entry.dex)
+            self._loaded.add(chain)
+
+    def _on_indexed_pair(self, entry: PairEntry) -> None:
+        self.graph(entry.chain).add_pair(entry.token0, entry.token1, entry.dex)
+
+    async def best_path(
+        self,
+        chain: str,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        quote_fn: QuoteFn,
+        hubs: Iterable[str] = (),
+        max_hops: int = MAX_HOPS
+    ) -> Optional[Tuple[List[str], int]]:
+        """
+        Highest-output path for `amount_in` (raw units).
+
+        Args:
+            chain: Chain name
+            token_in: Input token
+            token_out: Output token
+            amount_in: Input amount in raw token units
+            quote_fn: Returns raw output for (path, amount_in), or None if unroutable
+            hubs: Intermediate tokens always worth trying
+            max_hops: Longest path considered
+
+        Returns:
+            (path, raw amount out) or None if no candidate routes
+        """
+        await self.ensure_loaded(chain)
+        graph = self.graph(chain)
+        candidates = graph.candidate_paths(token_in, token_out, hubs, max_hops)
+
+        outputs = await asyncio.gather(
+            *(quote_fn(path, amount_in) for path in candidates),
+            return_exceptions=True
+        )
+        self.stats["searches"] += 1
+        self.stats["candidates_scored"] += len(candidates)
+
+        best: Optional[Tuple[List[str], int]] = None
+        best_score = 0.0
+        for path, out in zip(candidates, outputs):
+            if isinstance(out, BaseException) or not out:
+                continue
+            score = out * (1 - HOP_PENALTY_BPS * (len(path) - 2) / 10000)
+            if score > best_score:
+                best, best_score = (path, out), score
+
+        if best:
+            # Confirmed routable: future searches see these edges
+            for a, b in zip(best[0], best[0][1:]):
+                graph.add_pair(a, b)
+            if len(best[0]) > 2:
+                self.stats["multi_hop_wins"] += 1
+        return best
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "chains": {chain: graph.get_stats() for chain, graph in self._graphs.items()},
+        }
+
+
+# Global route graph instance
+route_graph = RouteGraphService()
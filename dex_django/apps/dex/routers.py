@@ -1,19 +1,33 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from web3 import AsyncWeb3
 from web3.contract import AsyncContract
 from web3.exceptions import ContractLogicError, Web3Exception
-from django.db import models
 
 # Using your existing apps structure
 from apps.chains.providers import web3_manager, ChainConfig
-from apps.storage.models import Token, Pair
+from apps.chains.head_tracker import head_tracker
+from apps.chains.multicall import (
+    MulticallError,
+    amounts_out_call,
+    decimals_call,
+    decode_amounts,
+    decode_uint,
+)
+from apps.dex.quote_fanout import QuoteSet, fan_out_quotes
+from apps.dex.reserve_mirror import DEFAULT_V2_FEE_BPS, V2_FEE_BPS, LocalQuote, reserve_mirror
+from apps.dex.route_graph import route_graph
+from apps.dex.v3_quoter import DEFAULT_FEE_TIERS, V3Quote, v3_quoter
+from apps.storage.token_index import TokenEntry, normalize_address, token_index
 
 logger = logging.getLogger("api")
 
@@ -31,6 +45,8 @@ class SwapQuote:
     price_impact_bps: int
     router_address: str
     dex: str
+    fees: Optional[List[int]] = None  # V3 pool fee per hop
+    splits: Optional[List[SwapQuote]] = None  # Legs of a split route
 
 
 @dataclass
@@ -45,6 +61,157 @@ class SwapParams:
     path: List[str]
 
 
+# Pools a quote was computed from: (address, reserve version) per pool
+PoolVersions = Tuple[Tuple[str, int], ...]
+
+QUOTE_CACHE_MAX_ENTRIES = 4096
+# Amounts agreeing to this many significant digits share a cache entry
+QUOTE_AMOUNT_SIG_DIGITS = 5
+# Entries never outlive this, even on chains whose head is not tracked
+QUOTE_CACHE_MAX_AGE_S = 15.0
+
+
+@dataclass
+class _CachedQuote:
+    quote: SwapQuote
+    pools: PoolVersions
+    created_at: float
+
+
+class QuoteCache:
+    """
+    LRU cache of router quotes within a block.
+    
+    Keyed by (chain, dex, path, amount bucket, slippage, head block). An
+    entry also records the reserve version of every pool its quote was
+    computed from and is dropped as soon as any of them changes, so a hit
+    is always priced off the current mirrored reserves. Concurrent requests
+    for the same key share one computation.
+    """
+    
+    def __init__(self, max_entries: int = QUOTE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[Any, ...], _CachedQuote] = OrderedDict()
+        self._inflight: Dict[Tuple[Any, ...], asyncio.Task] = {}
+        
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "evictions": 0,
+            "shared": 0,
+        }
+    
+    async def get_or_quote(
+        self,
+        chain: str,
+        dex: str,
+        token_in: str,
+        token_out: str,
+        amount_in: Decimal,
+        slippage_bps: int,
+        compute: Callable[[], Awaitable[Optional[Tuple[SwapQuote, PoolVersions]]]]
+    ) -> Optional[SwapQuote]:
+        """Cached quote for the request, or the result of `compute()` (cached if versioned)."""
+        key = (
+            chain,
+            dex,
+            token_in.lower(),
+            token_out.lower(),
+            f"{amount_in:.{QUOTE_AMOUNT_SIG_DIGITS - 1}e}",
+            slippage_bps,
+            head_tracker.latest_block(chain)
+        )
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._is_current(chain, entry):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return _rescale(entry.quote, amount_in)
+            del self._entries[key]
+            self.stats["stale"] += 1
+        
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+        else:
+            self.stats["shared"] += 1
+        
+        # Shielded: a caller cancelled by its latency budget leaves the quote to the others
+        quote = await asyncio.shield(task)
+        return _rescale(quote, amount_in) if quote else None
+    
+    async def _compute(
+        self,
+        key: Tuple[Any, ...],
+        compute: Callable[[], Awaitable[Optional[Tuple[SwapQuote, PoolVersions]]]]
+    ) -> Optional[SwapQuote]:
+        try:
+            result = await compute()
+        finally:
+            self._inflight.pop(key, None)
+        if not result:
+            return None
+        
+        quote, pools = result
+        # Quotes priced by the router rather than the mirrors have no versions to check
+        if pools:
+            self._entries[key] = _CachedQuote(quote, pools, time.monotonic())
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return quote
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["shared"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round((self.stats["hits"] + self.stats["shared"]) / lookups, 4) if lookups else 0.0,
+        }
+    
+    def _is_current(self, chain: str, entry: _CachedQuote) -> bool:
+        if time.monotonic() - entry.created_at > QUOTE_CACHE_MAX_AGE_S:
+            return False
+        v2_mirror, v3_mirror = reserve_mirror.mirror(chain), v3_quoter.mirror(chain)
+        for address, version in entry.pools:
+            state = v2_mirror.get(address) or v3_mirror.get(address)
+            if state is None or state.version != version:
+                return False
+        return True
+
+
+def _rescale(quote: SwapQuote, amount_in: Decimal) -> SwapQuote:
+    """A bucket-mate's quote adjusted to `amount_in` (linear within the bucket)."""
+    if quote.amount_in == amount_in or not quote.amount_in:
+        return quote
+    ratio = amount_in / quote.amount_in
+    return replace(
+        quote,
+        amount_in=amount_in,
+        amount_out=quote.amount_out * ratio,
+        amount_out_min=quote.amount_out_min * ratio
+    )
+
+
+def _hub_tokens(chain: str) -> List[str]:
+    """Intermediate tokens every route search tries (wrapped native, USDC)."""
+    chain_config = web3_manager.get_chain_config(chain)
+    if not chain_config:
+        return []
+    return [addr for addr in (chain_config.weth_address, chain_config.usdc_address) if addr]
+
+
+def _fallback_paths(chain: str, token_in: str, token_out: str) -> List[List[str]]:
+    """Direct and single-hub paths, for routers queried on-chain."""
+    hubs = [h for h in _hub_tokens(chain) if h.lower() not in (token_in.lower(), token_out.lower())]
+    return [[token_in, token_out]] + [[token_in, hub, token_out] for hub in hubs]
+
+
 class UniswapV2Router:
     """
     Uniswap V2 compatible router (works with PancakeSwap, SushiSwap, etc.).
@@ -107,6 +274,7 @@ class UniswapV2Router:
         self.chain = chain
         self.router_address = router_address
         self.dex_name = dex_name
+        self.fee_bps = V2_FEE_BPS.get(dex_name.lower(), DEFAULT_V2_FEE_BPS)
     
     async def get_quote(
         self,
@@ -116,6 +284,18 @@ class UniswapV2Router:
         slippage_bps: int = 300
     ) -> Optional[SwapQuote]:
         """Get swap quote with price impact and slippage calculation."""
+        return await quote_cache.get_or_quote(
+            self.chain, self.dex_name, token_in, token_out, amount_in, slippage_bps,
+            functools.partial(self._quote, token_in, token_out, amount_in, slippage_bps)
+        )
+    
+    async def _quote(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: Decimal,
+        slippage_bps: int
+    ) -> Optional[Tuple[SwapQuote, PoolVersions]]:
         try:
             provider = await web3_manager.get_provider(self.chain)
             if not provider:
@@ -128,11 +308,6 @@ class UniswapV2Router:
                 abi=self.ROUTER_ABI
             )
             
-            # Build swap path
-            path = await self._build_swap_path(token_in, token_out)
-            if not path:
-                return None
-            
             # Convert amount to wei
             token_in_obj = await self._get_token_info(token_in)
             if not token_in_obj:
@@ -140,11 +315,14 @@ class UniswapV2Router:
             
             amount_in_wei = int(amount_in * Decimal(10 ** token_in_obj.decimals))
             
-            # Get amounts out
-            amounts_out = await router_contract.functions.getAmountsOut(
-                amount_in_wei, 
-                [provider.to_checksum_address(addr) for addr in path]
-            ).call()
+            # Best path for this amount over the chain's token graph
+            route = await self._find_route(token_in, token_out, amount_in_wei)
+            if not route:
+                logger.warning("No swap path found for %s -> %s on %s",
+                              token_in, token_out, self.chain)
+                return None
+            path, amounts_out, price_impact_bps, pools = route
+            amount_out_min_wei = amounts_out[-1] * (10000 - slippage_bps) // 10000
             
             if not amounts_out or len(amounts_out) < 2:
                 return None
@@ -154,10 +332,9 @@ class UniswapV2Router:
             if not token_out_obj:
                 return None
             
-            amount_out = Decimal(amounts_out[-1]) / Decimal(10 ** token_out_obj.decimals)
-            
-            # Calculate slippage
-            amount_out_min = amount_out * (Decimal(10000 - slippage_bps) / Decimal(10000))
+            out_scale = Decimal(10 ** token_out_obj.decimals)
+            amount_out = Decimal(amounts_out[-1]) / out_scale
+            amount_out_min = Decimal(amount_out_min_wei) / out_scale
             
             # Estimate gas
             gas_estimate = await self._estimate_swap_gas(
@@ -168,11 +345,6 @@ class UniswapV2Router:
             gas_prices = await web3_manager.estimate_gas_price(self.chain)
             gas_price = gas_prices.get("fast", 0) if gas_prices else 0
             
-            # Calculate price impact (simplified)
-            price_impact_bps = await self._calculate_price_impact(
-                token_in, token_out, amount_in, amount_out
-            )
-            
             return SwapQuote(
                 amount_in=amount_in,
                 amount_out=amount_out,
@@ -184,85 +356,85 @@ class UniswapV2Router:
                 price_impact_bps=price_impact_bps,
                 router_address=self.router_address,
                 dex=self.dex_name
-            )
+            ), pools
             
         except Exception as e:
             logger.warning("Failed to get quote for %s -> %s on %s: %s", 
                          token_in, token_out, self.dex_name, e)
             return None
     
-    async def _build_swap_path(self, token_in: str, token_out: str) -> Optional[List[str]]:
-        """Build optimal swap path between tokens."""
-        chain_config = web3_manager.get_chain_config(self.chain)
-        if not chain_config:
-            return None
-        
-        # Direct path first
-        if await self._pair_exists(token_in, token_out):
-            return [token_in, token_out]
+    async def quote_amount_out(self, token_in: str, token_out: str, amount_in_wei: int) -> int:
+        """Raw output of the best route for a raw input amount (0 if unroutable)."""
+        route = await self._find_route(token_in, token_out, amount_in_wei)
+        return route[1][-1] if route else 0
+    
+    async def _find_route(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in_wei: int
+    ) -> Optional[Tuple[List[str], List[int], int, PoolVersions]]:
+        """Best path with its per-hop amounts, price impact (bps) and mirrored pairs."""
+        mirror = reserve_mirror.mirror(self.chain)
+        local_quotes: Dict[Tuple[str, ...], LocalQuote] = {}
         
-        # Try path through WETH/WBNB
-        if chain_config.weth_address:
-            weth = chain_config.weth_address
-            if (await self._pair_exists(token_in, weth) and 
-                await self._pair_exists(weth, token_out)):
-                return [token_in, weth, token_out]
+        async def quote_locally(path: List[str], amount: int) -> Optional[int]:
+            quote = await mirror.quote(self.router_address, path, amount, self.fee_bps)
+            if quote:
+                local_quotes[tuple(path)] = quote
+            return quote.amount_out if quote else None
         
-        # Try path through USDC
-        if chain_config.usdc_address:
-            usdc = chain_config.usdc_address
-            if (await self._pair_exists(token_in, usdc) and 
-                await self._pair_exists(usdc, token_out)):
-                return [token_in, usdc, token_out]
+        best = await route_graph.best_path(
+            self.chain, token_in, token_out, amount_in_wei, quote_locally, _hub_tokens(self.chain)
+        )
+        if best:
+            quote = local_quotes[tuple(best[0])]
+            pools = tuple((hop.pair, version) for hop, version in zip(quote.hops, quote.versions))
+            return best[0], quote.amounts, quote.price_impact_bps, pools
         
-        logger.warning("No swap path found for %s -> %s on %s", 
-                      token_in, token_out, self.chain)
+        # Pairs the mirror cannot follow (non-standard factories): ask the router
+        multicall = web3_manager.get_multicall(self.chain)
+        for path in _fallback_paths(self.chain, token_in, token_out):
+            amounts_call = amounts_out_call(
+                AsyncWeb3.to_checksum_address(self.router_address),
+                amount_in_wei,
+                [AsyncWeb3.to_checksum_address(addr) for addr in path]
+            )
+            try:
+                amounts = decode_amounts(await multicall.call(amounts_call.target, amounts_call.call_data))
+            except MulticallError:
+                continue
+            if len(amounts) >= 2 and amounts[-1] > 0:
+                return path, amounts, 9999, ()  # Impact unknown without reserves
         return None
     
-    async def _pair_exists(self, token_a: str, token_b: str) -> bool:
-        """Check if a trading pair exists using your Django models."""
-        try:
-            # Initialize Django ORM if needed
-            import django
-            from django.conf import settings
-            if not settings.configured:
-                django.setup()
-            
-            # Check database first using your existing Pair model
-            pair = Pair.objects.filter(
-                chain__name=self.chain,
-                dex=self.dex_name.lower()
-            ).filter(
-                models.Q(
-                    base_token__address__iexact=token_a,
-                    quote_token__address__iexact=token_b
-                ) | models.Q(
-                    base_token__address__iexact=token_b,
-                    quote_token__address__iexact=token_a
-                )
-            ).first()
-            
-            return pair is not None
-            
-        except Exception:
-            # Fallback to assume pair exists for common tokens
-            return True
-    
-    async def _get_token_info(self, address: str) -> Optional[Token]:
-        """Get token information from your Django database."""
+    async def _get_token_info(self, address: str) -> Optional[TokenEntry]:
+        """Token metadata from the in-memory index; decimals read on-chain for unknown tokens."""
+        if not token_index.loaded:
+            try:
+                await token_index.ensure_loaded()
+            except Exception as e:
+                logger.warning("Token index unavailable, using on-chain metadata: %s", e)
+        
+        entry = token_index.get_token(self.chain, address)
+        if entry:
+            return entry
+        
         try:
-            # Initialize Django ORM if needed
-            import django
-            from django.conf import settings
-            if not settings.configured:
-                django.setup()
-            
-            return Token.objects.filter(
-                chain__name=self.chain,
-                address__iexact=address
-            ).first()
-        except Exception:
+            call = decimals_call(AsyncWeb3.to_checksum_address(address))
+            decimals = decode_uint(
+                await web3_manager.get_multicall(self.chain).call(call.target, call.call_data)
+            )
+        except Exception as e:
+            logger.debug("No decimals for %s on %s: %s", address, self.chain, e)
             return None
+        
+        return token_index.add_token(TokenEntry(
+            chain=self.chain,
+            address=normalize_address(address),
+            symbol="",
+            decimals=decimals
+        ))
     
     async def _estimate_swap_gas(
         self,
@@ -315,33 +487,146 @@ class UniswapV2Router:
         except Exception as e:
             logger.warning("Gas estimation failed, using default: %s", e)
             return chain_config.gas_limit_default if chain_config else 300000
+
+
+class UniswapV3Router:
+    """
+    Uniswap V3 router quoted off-chain from local pool snapshots.
+    Compares fee tiers per hop; falls back to routing through WETH.
+    """
+    
+    # Rough SwapRouter gas: per-swap base, extra hop, initialized tick crossed
+    GAS_BASE = 130000
+    GAS_PER_EXTRA_HOP = 70000
+    GAS_PER_TICK_CROSSED = 25000
+    
+    def __init__(
+        self,
+        chain: str,
+        router_address: str,
+        factory_address: str,
+        dex_name: str,
+        fee_tiers: Tuple[int, ...] = DEFAULT_FEE_TIERS
+    ):
+        self.chain = chain
+        self.router_address = router_address
+        self.factory_address = factory_address
+        self.dex_name = dex_name
+        self.fee_tiers = fee_tiers
+    
+    # Token lookups are shared with the V2 router
+    _get_token_info = UniswapV2Router._get_token_info
+    
+    async def get_quote(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: Decimal,
+        slippage_bps: int = 300
+    ) -> Optional[SwapQuote]:
+        """Get swap quote from simulated V3 swaps (no QuoterV2 calls)."""
+        return await quote_cache.get_or_quote(
+            self.chain, self.dex_name, token_in, token_out, amount_in, slippage_bps,
+            functools.partial(self._quote, token_in, token_out, amount_in, slippage_bps)
+        )
     
-    async def _calculate_price_impact(
+    async def _quote(
         self,
         token_in: str,
         token_out: str,
         amount_in: Decimal,
-        amount_out: Decimal
-    ) -> int:
-        """Calculate price impact in basis points (simplified)."""
+        slippage_bps: int
+    ) -> Optional[Tuple[SwapQuote, PoolVersions]]:
         try:
-            # Get small amount quote for reference price
-            small_amount = amount_in / Decimal(100)  # 1% of trade size
-            small_quote = await self.get_quote(token_in, token_out, small_amount, 0)
+            token_in_obj = await self._get_token_info(token_in)
+            token_out_obj = await self._get_token_info(token_out)
+            if not token_in_obj or not token_out_obj:
+                return None
             
-            if not small_quote:
-                return 9999  # High impact if we can't calculate
+            amount_in_wei = int(amount_in * Decimal(10 ** token_in_obj.decimals))
             
-            # Calculate price per token
-            small_price = small_quote.amount_out / small_quote.amount_in
-            large_price = amount_out / amount_in
+            route = await self._best_route(token_in, token_out, amount_in_wei)
+            if not route:
+                return None
+            path, quote = route
             
-            # Price impact as basis points
-            price_impact = abs(1 - (large_price / small_price)) * 10000
-            return min(int(price_impact), 9999)
+            out_scale = Decimal(10 ** token_out_obj.decimals)
+            gas_prices = await web3_manager.estimate_gas_price(self.chain)
+            hops = len(quote.pools)
             
-        except Exception:
-            return 9999  # Return high impact on error
+            return SwapQuote(
+                amount_in=amount_in,
+                amount_out=Decimal(quote.amount_out) / out_scale,
+                amount_out_min=Decimal(quote.min_out(slippage_bps)) / out_scale,
+                path=path,
+                gas_estimate=(
+                    self.GAS_BASE
+                    + self.GAS_PER_EXTRA_HOP * (hops - 1)
+                    + self.GAS_PER_TICK_CROSSED * quote.ticks_crossed
+                ),
+                gas_price=gas_prices.get("fast", 0) if gas_prices else 0,
+                slippage_bps=slippage_bps,
+                price_impact_bps=quote.price_impact_bps,
+                router_address=self.router_address,
+                dex=self.dex_name,
+                fees=quote.fees
+            ), tuple(zip(quote.pools, quote.versions))
+            
+        except Exception as e:
+            logger.warning("Failed to get V3 quote for %s -> %s on %s: %s",
+                         token_in, token_out, self.dex_name, e)
+            return None
+    
+    async def quote_amount_out(self, token_in: str, token_out: str, amount_in_wei: int) -> int:
+        """Raw output of the best route for a raw input amount (0 if unroutable)."""
+        route = await self._best_route(token_in, token_out, amount_in_wei)
+        return route[1].amount_out if route else 0
+    
+    async def _best_route(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in_wei: int
+    ) -> Optional[Tuple[List[str], V3Quote]]:
+        """Best path over the token graph, with the best fee tier per hop."""
+        hop_fees: Dict[Tuple[str, ...], List[int]] = {}
+        
+        async def quote_locally(path: List[str], amount: int) -> Optional[int]:
+            fees = []
+            for hop_in, hop_out in zip(path, path[1:]):
+                hop = await v3_quoter.best_single_hop(
+                    self.chain, self.factory_address, hop_in, hop_out, amount, self.fee_tiers
+                )
+                if not hop:
+                    return None
+                fees.extend(hop.fees)
+                amount = hop.amount_out
+            hop_fees[tuple(path)] = fees
+            return amount
+        
+        best = await route_graph.best_path(
+            self.chain, token_in, token_out, amount_in_wei, quote_locally, _hub_tokens(self.chain)
+        )
+        if not best:
+            return None
+        
+        path = best[0]
+        if len(path) == 2:
+            quote = await v3_quoter.best_single_hop(
+                self.chain, self.factory_address, path[0], path[1], amount_in_wei, self.fee_tiers
+            )
+        else:
+            # Requote as one swap so impact, ticks and versions cover every hop
+            quote = await v3_quoter.mirror(self.chain).quote_exact_input(
+                self.factory_address, path, hop_fees[tuple(path)], amount_in_wei
+            )
+        return (path, quote) if quote else None
+
+
+# Input shares given to the better DEX when testing split routes
+SPLIT_SHARES = (0.5, 0.6, 0.7, 0.8, 0.9)
+# A split must beat the best single route by this much to pay for its second swap
+SPLIT_MIN_GAIN_BPS = 10
 
 
 class DexRouterManager:
@@ -351,7 +636,7 @@ class DexRouterManager:
     """
     
     def __init__(self):
-        self._routers: Dict[str, Dict[str, UniswapV2Router]] = {}
+        self._routers: Dict[str, Dict[str, Any]] = {}
     
     async def initialize(self) -> None:
         """Initialize DEX routers for supported chains."""
@@ -368,6 +653,10 @@ class DexRouterManager:
                 "uniswap": UniswapV2Router(
                     "base", "0x4752ba5dbc23f44d87826276bf6fd6b1c372ad24", "uniswap"
                 ),
+                "uniswap_v3": UniswapV3Router(
+                    "base", "0x2626664c2603336E57B271c5C0b26F421741e481",
+                    "0x33128a8fC17869897dcE68Ed026d694621f6FDfD", "uniswap_v3"
+                ),
             }
             
             # Ethereum routers (for larger trades)
@@ -375,6 +664,10 @@ class DexRouterManager:
                 "uniswap": UniswapV2Router(
                     "ethereum", "0x7a250d5630b4cf539739df2c5dacb4c659f2488d", "uniswap"
                 ),
+                "uniswap_v3": UniswapV3Router(
+                    "ethereum", "0xE592427A0AEce92De3Edee1F18E0157C05861564",
+                    "0x1F98431c8aD98523631AE4a59f267346ea31F984", "uniswap_v3"
+                ),
             }
             
             logger.info("DEX router manager initialized with %d chains", len(self._routers))
@@ -389,33 +682,119 @@ class DexRouterManager:
         token_in: str,
         token_out: str,
         amount_in: Decimal,
-        slippage_bps: int = 300
+        slippage_bps: int = 300,
+        allow_split: bool = False
     ) -> Optional[SwapQuote]:
-        """Get best quote across all available DEXes on a chain."""
+        """
+        Get best quote across all available DEXes on a chain.
+        
+        With `allow_split`, the input may be divided between the two best
+        DEXes when that beats the best single route by more than the extra
+        swap costs; the result then carries the legs in `splits`.
+        """
+        quote_set = await self.get_quote_set(chain, token_in, token_out, amount_in, slippage_bps)
+        if not quote_set or not quote_set.best:
+            return None
+        quotes = [result.quote for result in quote_set.ok]
+        
+        # Quote set is ranked by output amount
+        best = quotes[0]
+        
+        if allow_split and len(quotes) > 1:
+            split = await self._best_split(chain, token_in, token_out, amount_in, slippage_bps, quotes)
+            if split and split.amount_out > best.amount_out * (1 + Decimal(SPLIT_MIN_GAIN_BPS) / 10000):
+                return split
+        
+        return best
+    
+    async def get_quote_set(
+        self,
+        chain: str,
+        token_in: str,
+        token_out: str,
+        amount_in: Decimal,
+        slippage_bps: int = 300,
+        budget_ms: Optional[float] = None
+    ) -> Optional[QuoteSet]:
+        """
+        Quote every DEX on a chain concurrently within a latency budget.
+        
+        Returns:
+            Ranked QuoteSet with per-DEX latency, or None for unknown chains
+        """
         if chain not in self._routers:
             return None
         
-        quotes = []
+        return await fan_out_quotes(
+            chain,
+            {
+                dex_name: functools.partial(router.get_quote, token_in, token_out, amount_in, slippage_bps)
+                for dex_name, router in self._routers[chain].items()
+            },
+            amount_of=lambda quote: quote.amount_out,
+            budget_ms=budget_ms
+        )
+    
+    async def _best_split(
+        self,
+        chain: str,
+        token_in: str,
+        token_out: str,
+        amount_in: Decimal,
+        slippage_bps: int,
+        quotes: List[SwapQuote]
+    ) -> Optional[SwapQuote]:
+        """Best two-DEX split of `amount_in`, scored on local quotes only."""
+        first, second = sorted(quotes, key=lambda q: q.amount_out, reverse=True)[:2]
+        router_a = self._routers[chain][first.dex]
+        router_b = self._routers[chain][second.dex]
         
-        # Get quotes from all routers
-        for dex_name, router in self._routers[chain].items():
-            try:
-                quote = await router.get_quote(token_in, token_out, amount_in, slippage_bps)
-                if quote:
-                    quotes.append(quote)
-            except Exception as e:
-                logger.warning("Failed to get quote from %s on %s: %s", dex_name, chain, e)
+        token_in_obj = await router_a._get_token_info(token_in)
+        if not token_in_obj:
+            return None
+        amount_in_wei = int(amount_in * Decimal(10 ** token_in_obj.decimals))
+        
+        outputs = await asyncio.gather(*(
+            asyncio.gather(
+                router_a.quote_amount_out(token_in, token_out, int(amount_in_wei * share)),
+                router_b.quote_amount_out(token_in, token_out, amount_in_wei - int(amount_in_wei * share))
+            )
+            for share in SPLIT_SHARES
+        ))
+        totals = [sum(legs) for legs in outputs]
+        best_index = max(range(len(SPLIT_SHARES)), key=totals.__getitem__)
+        if totals[best_index] == 0:
+            return None
         
-        if not quotes:
+        share = Decimal(str(SPLIT_SHARES[best_index]))
+        legs = await asyncio.gather(
+            router_a.get_quote(token_in, token_out, amount_in * share, slippage_bps),
+            router_b.get_quote(token_in, token_out, amount_in * (1 - share), slippage_bps)
+        )
+        if not all(legs):
             return None
         
-        # Return quote with highest output amount
-        return max(quotes, key=lambda q: q.amount_out)
+        major = legs[0] if share >= Decimal("0.5") else legs[1]
+        return SwapQuote(
+            amount_in=amount_in,
+            amount_out=sum(leg.amount_out for leg in legs),
+            amount_out_min=sum(leg.amount_out_min for leg in legs),
+            path=major.path,
+            gas_estimate=sum(leg.gas_estimate for leg in legs),
+            gas_price=max(leg.gas_price for leg in legs),
+            slippage_bps=slippage_bps,
+            price_impact_bps=int(sum(leg.price_impact_bps * leg.amount_in for leg in legs) / amount_in),
+            router_address=major.router_address,
+            dex="split",
+            splits=list(legs)
+        )
     
-    async def get_router(self, chain: str, dex: str) -> Optional[UniswapV2Router]:
+    async def get_router(self, chain: str, dex: str) -> Optional[Any]:
         """Get specific router instance."""
         return self._routers.get(chain, {}).get(dex)
 
 
 # Global instance
-dex_manager = DexRouterManager()
\ No newline at end of file
+dex_manager = DexRouterManager()
+# Global quote cache instance
+quote_cache = QuoteCache()
@@ -1,3 +1,299 @@
-from django.test import TestCase
+from decimal import Decimal, getcontext
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.dex.quote_curves import default_sizes, v2_curve, v3_curve
+from apps.dex.reserve_mirror import get_amount_out
+from apps.dex.v3_quoter import (
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    Q96,
+    SnapshotRangeError,
+    V3PoolState,
+    compute_swap_step,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+    simulate_exact_input,
+)
+
+getcontext().prec = 100
+
+
+def encode_price_sqrt(reserve1: int, reserve0: int) -> int:
+    """encodePriceSqrt from the v3-core test utilities."""
+    return int((Decimal(reserve1) / Decimal(reserve0)).sqrt() * Q96)
+
+
+def exact_sqrt_ratio(tick: int) -> Decimal:
+    return Decimal("1.0001").sqrt() ** tick * Q96
+
+
+def make_pool(tick_spacing: int, positions, tick: int = 0, fee: int = 3000, words=None) -> V3PoolState:
+    """Pool at `tick` with (tick_lower, tick_upper, liquidity) positions and their bitmap words loaded."""
+    liquidity_net = {}
+    liquidity = 0
+    for lower, upper, amount in positions:
+        liquidity_net[lower] = liquidity_net.get(lower, 0) + amount
+        liquidity_net[upper] = liquidity_net.get(upper, 0) - amount
+        if lower <= tick < upper:
+            liquidity += amount
+
+    bitmap = {word: 0 for word in (words if words is not None else range(-8, 8))}
+    for initialized in liquidity_net:
+        compressed = initialized // tick_spacing
+        if compressed >> 8 in bitmap:
+            bitmap[compressed >> 8] |= 1 << (compressed % 256)
+
+    return V3PoolState(
+        address="0xpool",
+        token0="0xtoken0",
+        token1="0xtoken1",
+        fee=fee,
+        tick_spacing=tick_spacing,
+        sqrt_price_x96=get_sqrt_ratio_at_tick(tick),
+        tick=tick,
+        liquidity=liquidity,
+        bitmap=bitmap,
+        liquidity_net=liquidity_net,
+    )
+
+
+def reference_exact_input(positions, zero_for_one: bool, amount_in: int, fee: int) -> Decimal:
+    """Output of an exact-input swap from tick 0, by constant-liquidity segments in Decimal."""
+    boundaries = sorted({t for lower, upper, _ in positions for t in (lower, upper)}, reverse=zero_for_one)
+    boundaries = [t for t in boundaries if (t <= 0 if zero_for_one else t > 0)]
+
+    def liquidity_between(a: int, b: int) -> Decimal:
+        mid = (a + b) / 2
+        return Decimal(sum(amount for lower, upper, amount in positions if lower <= mid < upper))
+
+    remaining = Decimal(amount_in) * (1_000_000 - fee) / 1_000_000
+    sqrt_price = Decimal(1)
+    tick = 0
+    amount_out = Decimal(0)
+    for boundary in boundaries:
+        liquidity = liquidity_between(tick, boundary)
+        sqrt_target = Decimal("1.0001").sqrt() ** boundary
+        if zero_for_one:
+            needed = liquidity * (1 / sqrt_target - 1 / sqrt_price)
+            if remaining < needed:
+                sqrt_next = 1 / (1 / sqrt_price + remaining / liquidity)
+                return amount_out + liquidity * (sqrt_price - sqrt_next)
+            amount_out += liquidity * (sqrt_price - sqrt_target)
+        else:
+            needed = liquidity * (sqrt_target - sqrt_price)
+            if remaining < needed:
+                sqrt_next = sqrt_price + remaining / liquidity
+                return amount_out + liquidity * (1 / sqrt_price - 1 / sqrt_next)
+            amount_out += liquidity * (1 / sqrt_price - 1 / sqrt_target)
+        remaining -= needed
+        sqrt_price, tick = sqrt_target, boundary
+    raise AssertionError("reference swap ran out of liquidity")
+
+
+class TickMathTests(SimpleTestCase):
+    """TickMath port against the v3-core constants and a high-precision reference."""
+
+    def test_bounds(self):
+        self.assertEqual(get_sqrt_ratio_at_tick(MIN_TICK), MIN_SQRT_RATIO)
+        self.assertEqual(get_sqrt_ratio_at_tick(MAX_TICK), MAX_SQRT_RATIO)
+        self.assertEqual(get_sqrt_ratio_at_tick(MIN_TICK + 1), 4295343490)
+        self.assertEqual(
+            get_sqrt_ratio_at_tick(MAX_TICK - 1),
+            1461373636630004318706518188784493106690254656249
+        )
+        with self.assertRaises(ValueError):
+            get_sqrt_ratio_at_tick(MIN_TICK - 1)
+        with self.assertRaises(ValueError):
+            get_sqrt_ratio_at_tick(MAX_TICK + 1)
+
+    def test_known_ticks(self):
+        self.assertEqual(get_sqrt_ratio_at_tick(0), 1 << 96)
+        self.assertEqual(get_sqrt_ratio_at_tick(50), 79426470787362580746886972461)
+
+    def test_matches_reference_for_negative_and_positive_ticks(self):
+        for tick in (MIN_TICK, -500000, -100000, -15361, -15360, -50, -1, 1, 50, 10000, 150000, 500000, MAX_TICK):
+            with self.subTest(tick=tick):
+                exact = exact_sqrt_ratio(tick)
+                error = abs(Decimal(get_sqrt_ratio_at_tick(tick)) - exact)
+                # Within one unit, or 1e-18 relative for the large positive ticks
+                self.assertTrue(error <= 1 or error / exact < Decimal("1e-18"), error)
+
+    def test_tick_at_sqrt_ratio_inverts(self):
+        self.assertEqual(get_tick_at_sqrt_ratio(MIN_SQRT_RATIO), MIN_TICK)
+        self.assertEqual(get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1), MAX_TICK - 1)
+        for tick in (-887271, -60001, -1, 0, 1, 60001, 887271):
+            with self.subTest(tick=tick):
+                ratio = get_sqrt_ratio_at_tick(tick)
+                self.assertEqual(get_tick_at_sqrt_ratio(ratio), tick)
+                self.assertEqual(get_tick_at_sqrt_ratio(ratio - 1), tick - 1)
+
+
+class SwapMathTests(SimpleTestCase):
+    """compute_swap_step against the v3-core SwapMath spec."""
+
+    def test_capped_at_price_target(self):
+        price = encode_price_sqrt(1, 1)
+        target = encode_price_sqrt(101, 100)
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step(price, target, 2 * 10**18, 10**18, 600)
+
+        self.assertEqual(sqrt_next, target)
+        self.assertEqual(amount_in, 9975124224178055)
+        self.assertEqual(amount_out, 9925619580021728)
+        self.assertEqual(fee, 5988667735148)
+
+    def test_fully_spent(self):
+        price = encode_price_sqrt(1, 1)
+        target = encode_price_sqrt(1000, 100)
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step(price, target, 2 * 10**18, 10**18, 600)
+
+        self.assertLess(sqrt_next, target)
+        self.assertEqual(amount_in, 999400000000000000)
+        self.assertEqual(amount_out, 666399946655997866)
+        self.assertEqual(fee, 600000000000000)
+        self.assertEqual(amount_in + fee, 10**18)
+
+    def test_entire_input_taken_as_fee(self):
+        self.assertEqual(
+            compute_swap_step(2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872),
+            (2413, 0, 0, 10)
+        )
+
+
+class TickBitmapTests(SimpleTestCase):
+    """next_initialized_tick_within_one_word against the v3-core TickBitmap spec."""
+
+    def setUp(self):
+        self.pool = make_pool(1, [], words=range(-4, 4))
+        for tick in (-200, -55, -4, 70, 78, 84, 139, 240, 535):
+            self.pool.bitmap[tick >> 8] |= 1 << (tick % 256)
+
+    def test_search_up(self):
+        cases = {78: (84, True), 77: (78, True), -56: (-55, True), 255: (511, False), -257: (-200, True)}
+        for tick, expected in cases.items():
+            with self.subTest(tick=tick):
+                self.assertEqual(self.pool.next_initialized_tick_within_one_word(tick, False), expected)
+
+    def test_search_down(self):
+        cases = {
+            78: (78, True), 79: (78, True), 258: (256, False), 72: (70, True),
+            -257: (-512, False), 1023: (768, False), 900: (768, False),
+        }
+        for tick, expected in cases.items():
+            with self.subTest(tick=tick):
+                self.assertEqual(self.pool.next_initialized_tick_within_one_word(tick, True), expected)
+
+    def test_spacing_compresses_negative_ticks_down(self):
+        pool = make_pool(60, [(-120, 120, 10**18)])
+        self.assertEqual(pool.next_initialized_tick_within_one_word(-1, True), (-120, True))
+        self.assertEqual(pool.next_initialized_tick_within_one_word(-61, True), (-120, True))
+        self.assertEqual(pool.next_initialized_tick_within_one_word(-121, False), (-120, True))
+
+    def test_word_outside_snapshot(self):
+        pool = make_pool(1, [], words=[0])
+        with self.assertRaises(SnapshotRangeError) as raised:
+            pool.next_initialized_tick_within_one_word(-1, True)
+        self.assertEqual(raised.exception.word_position, -1)
+
+
+class SimulateExactInputTests(SimpleTestCase):
+    """Full swap simulation against constant-liquidity segments."""
+
+    # Wide position crossing the -15360 / 15360 word boundaries (spacing 60)
+    # plus a narrow one that is crossed on the way
+    POSITIONS = [(-18000, 18000, 10**18), (-600, 600, 5 * 10**17)]
+
+    def test_single_range_is_one_step(self):
+        pool = make_pool(60, [(-887220, 887220, 2 * 10**18)], words=range(-58, 58))
+        result = simulate_exact_input(pool, True, 10**16)
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step(
+            pool.sqrt_price_x96, get_sqrt_ratio_at_tick(-15360), pool.liquidity, 10**16, pool.fee
+        )
+
+        self.assertEqual(result.amount_in, 10**16)
+        self.assertEqual(result.amount_out, amount_out)
+        self.assertEqual(result.sqrt_price_after, sqrt_next)
+        self.assertEqual(result.ticks_crossed, 0)
+
+    def test_zero_for_one_crosses_ticks_and_words(self):
+        pool = make_pool(60, self.POSITIONS)
+        amount_in = 12 * 10**17
+        result = simulate_exact_input(pool, True, amount_in)
+
+        self.assertEqual(result.amount_in, amount_in)
+        self.assertEqual(result.ticks_crossed, 1)
+        self.assertLess(result.tick_after, -15360)
+        self.assertGreater(result.tick_after, -18000)
+        self.assertLessEqual(get_sqrt_ratio_at_tick(result.tick_after), result.sqrt_price_after)
+        self.assertLess(result.sqrt_price_after, get_sqrt_ratio_at_tick(result.tick_after + 1))
+
+        expected = reference_exact_input(self.POSITIONS, True, amount_in, pool.fee)
+        self.assertLessEqual(Decimal(result.amount_out), expected)
+        self.assertLess(expected - result.amount_out, 10)
+
+    def test_one_for_zero_crosses_ticks_and_words(self):
+        pool = make_pool(60, self.POSITIONS)
+        amount_in = 13 * 10**17
+        result = simulate_exact_input(pool, False, amount_in)
+
+        self.assertEqual(result.ticks_crossed, 1)
+        self.assertGreater(result.tick_after, 15360)
+        expected = reference_exact_input(self.POSITIONS, False, amount_in, pool.fee)
+        self.assertLessEqual(Decimal(result.amount_out), expected)
+        self.assertLess(expected - result.amount_out, 10)
+
+    def test_runs_past_snapshot(self):
+        pool = make_pool(60, self.POSITIONS, words=[-1, 0])
+        with self.assertRaises(SnapshotRangeError) as raised:
+            simulate_exact_input(pool, True, 12 * 10**17)
+        self.assertEqual(raised.exception.word_position, -2)
+
+
+class QuoteCurveTests(SimpleTestCase):
+    """Float64 quote curves against the exact integer quoters."""
+
+    RTOL = 1e-9
+
+    def test_v2_curve_matches_get_amount_out(self):
+        reserve_in, reserve_out = 1234 * 10**18, 2_500_000 * 10**6
+        sizes = default_sizes(reserve_in)
+        curve = v2_curve(float(reserve_in), float(reserve_out), 30, sizes)
+
+        for size, out in zip(sizes, curve.amounts_out):
+            exact = get_amount_out(int(size), reserve_in, reserve_out, 30)
+            self.assertAlmostEqual(out, exact, delta=max(exact * self.RTOL, 1))
+
+    def test_v3_curve_matches_simulation(self):
+        pool = make_pool(60, SimulateExactInputTests.POSITIONS)
+        for zero_for_one in (True, False):
+            sizes = np.geomspace(10**12, 14 * 10**17, 40)
+            curve = v3_curve(pool, zero_for_one, sizes)
+            for size, out in zip(sizes, curve.amounts_out):
+                with self.subTest(zero_for_one=zero_for_one, size=size):
+                    exact = simulate_exact_input(pool, zero_for_one, int(size)).amount_out
+                    self.assertAlmostEqual(out, exact, delta=exact * self.RTOL)
+
+    def test_v2_max_input_under_cap(self):
+        reserve_in, reserve_out, fee_bps = 500 * 10**18, 900_000 * 10**18, 30
+        curve = v2_curve(float(reserve_in), float(reserve_out), fee_bps, default_sizes(reserve_in, 256))
+        size = int(curve.max_input_under(100))
+
+        # Impact (excluding the fee) of the exact quote at that size is the cap
+        effective_in = size * (10000 - fee_bps) / 10000
+        exact_out = get_amount_out(size, reserve_in, reserve_out, fee_bps)
+        impact_bps = (1 - exact_out / (effective_in * reserve_out / reserve_in)) * 10000
+        self.assertAlmostEqual(impact_bps, 100, delta=0.5)
+
+    def test_v3_max_input_under_cap(self):
+        pool = make_pool(60, SimulateExactInputTests.POSITIONS)
+        curve = v3_curve(pool, True, np.geomspace(10**12, 14 * 10**17, 256))
+        size = int(curve.max_input_under(500))
+
+        result = simulate_exact_input(pool, True, size)
+        effective_in = size * (1_000_000 - pool.fee) / 1_000_000
+        spot = (pool.sqrt_price_x96 / Q96) ** 2
+        impact_bps = (1 - result.amount_out / (effective_in * spot)) * 10000
+        self.assertAlmostEqual(impact_bps, 500, delta=0.5)
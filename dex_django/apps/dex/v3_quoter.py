@@ -0,0 +1,701 @@
+"""
+Local Uniswap V3 quoter.
+
+Holds a snapshot of each quoted pool (sqrtPriceX96, tick, in-range
+liquidity, the tick bitmap words around the current tick and the
+liquidityNet of every initialized tick in them) and simulates exact-input
+swaps with a port of the pool's TickMath / SqrtPriceMath / SwapMath. The
+simulation follows UniswapV3Pool.swap step for step, including the
+one-bitmap-word step boundaries, so results match QuoterV2 to the wei at
+the snapshot block.
+
+Snapshots are read in one Multicall3 batch pinned to the tracked head.
+Swap events keep price, tick and liquidity current; Mint and Burn change
+tick liquidity, so they trigger a re-snapshot of the pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from eth_abi import decode, encode
+
+from apps.chains.head_tracker import ChainHead, head_tracker
+from apps.chains.multicall import ContractCall
+from apps.chains.providers import web3_manager
+
+logger = logging.getLogger("api")
+
+GET_POOL_SELECTOR = "0x1698ee82"      # getPool(address,address,uint24)
+SLOT0_SELECTOR = "0x3850c7bd"         # slot0()
+LIQUIDITY_SELECTOR = "0x1a686502"     # liquidity()
+TICK_SPACING_SELECTOR = "0xd0c93a7c"  # tickSpacing()
+TICK_BITMAP_SELECTOR = "0x5339c296"   # tickBitmap(int16)
+TICKS_SELECTOR = "0xf30dba93"         # ticks(int24)
+TOKEN0_SELECTOR = "0x0dfe1681"        # token0()
+TOKEN1_SELECTOR = "0xd21220a7"        # token1()
+FEE_SELECTOR = "0xddca3f43"           # fee()
+FACTORY_SELECTOR = "0xc45a0155"       # factory()
+
+SWAP_TOPIC = "0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67"
+MINT_TOPIC = "0x7a53080ba414158be7ec69b987b5fb7d07dee101fe85488f0853ae16239d0bde"
+BURN_TOPIC = "0x0c396cd989a39f4459b5fa1aed6a9a8dcdbc45908acfd67e028cd568da98982c"
+
+DEFAULT_FEE_TIERS = (100, 500, 3000, 10000)
+
+# Bitmap words loaded on each side of the current one; more are fetched on demand
+SNAPSHOT_WORD_RADIUS = 2
+MAX_SNAPSHOT_EXTENSIONS = 4
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+# Seconds a "no pool" or "no liquidity" answer is trusted before re-resolving
+MISSING_POOL_TTL = 30.0
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 1 << 96
+MAX_UINT256 = (1 << 256) - 1
+MAX_UINT160 = (1 << 160) - 1
+FEE_DENOMINATOR = 1_000_000
+
+# TickMath.getSqrtRatioAtTick: ratio factor per set bit of |tick|
+_TICK_RATIO_FACTORS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+_LOG_SQRT_TICK = math.log(1.0001) / 2
+
+
+class SnapshotRangeError(Exception):
+    """The swap walked past the bitmap words held in the snapshot."""
+
+    def __init__(self, word_position: int):
+        super().__init__(f"tick bitmap word {word_position} not in snapshot")
+        self.word_position = word_position
+
+
+# Exact pool math (integer ports of the V3 core libraries)
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-a * b // denominator)
+
+
+def div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """TickMath.getSqrtRatioAtTick."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick out of range: {tick}")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_RATIO_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """TickMath.getTickAtSqrtRatio: greatest tick whose sqrt ratio is <= the price."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("sqrt price out of range")
+
+    # Float estimate, then settle on the exact tick
+    tick = math.floor(math.log(sqrt_price_x96 / Q96) / _LOG_SQRT_TICK)
+    tick = max(MIN_TICK, min(MAX_TICK, tick))
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """SqrtPriceMath.getAmount0Delta."""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    """SqrtPriceMath.getAmount1Delta."""
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+def get_next_sqrt_price_from_input(sqrt_price: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    """SqrtPriceMath.getNextSqrtPriceFromInput."""
+    if amount_in == 0:
+        return sqrt_price
+
+    if zero_for_one:
+        # getNextSqrtPriceFromAmount0RoundingUp(add=true), including its
+        # uint256 overflow fallback so rounding matches on-chain
+        numerator1 = liquidity << 96
+        product = amount_in * sqrt_price
+        if product <= MAX_UINT256:
+            denominator = numerator1 + product
+            if denominator <= MAX_UINT256:
+                return mul_div_rounding_up(numerator1, sqrt_price, denominator)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price + amount_in)
+
+    # getNextSqrtPriceFromAmount1RoundingDown(add=true)
+    quotient = (amount_in << 96) // liquidity
+    next_price = sqrt_price + quotient
+    if next_price > MAX_UINT160:
+        raise ValueError("sqrt price overflow")
+    return next_price
+
+
+def compute_swap_step(
+    sqrt_current: int,
+    sqrt_target: int,
+    liquidity: int,
+    amount_remaining: int,
+    fee_pips: int
+) -> Tuple[int, int, int, int]:
+    """
+    SwapMath.computeSwapStep for exact input.
+
+    Returns:
+        (sqrt price after, amount in, amount out, fee amount)
+    """
+    zero_for_one = sqrt_current >= sqrt_target
+
+    amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = get_next_sqrt_price_from_input(
+            sqrt_current, liquidity, amount_remaining_less_fee, zero_for_one
+        )
+
+    reached_target = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not reached_target:
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not reached_target:
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not reached_target:
+        # Whatever is left after the input is the fee
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+@dataclass
+class V3PoolState:
+    """Snapshot of one V3 pool."""
+    address: str
+    token0: str
+    token1: str
+    fee: int
+    tick_spacing: int
+    sqrt_price_x96: int = 0
+    tick: int = 0
+    liquidity: int = 0
+    # Bitmap word position -> word, for the loaded words only
+    bitmap: Dict[int, int] = field(default_factory=dict)
+    # Initialized tick -> liquidityNet
+    liquidity_net: Dict[int, int] = field(default_factory=dict)
+    block_number: int = 0
+    log_index: int = -1
+    version: int = 0
+
+    def next_initialized_tick_within_one_word(self, tick: int, lte: bool) -> Tuple[int, bool]:
+        """TickBitmap.nextInitializedTickWithinOneWord over the snapshot."""
+        compressed = tick // self.tick_spacing
+        if lte:
+            word_pos, bit_pos = compressed >> 8, compressed % 256
+            word = self._word(word_pos)
+            masked = word & ((1 << bit_pos) - 1 + (1 << bit_pos))
+            if masked:
+                return (compressed - (bit_pos - (masked.bit_length() - 1))) * self.tick_spacing, True
+            return (compressed - bit_pos) * self.tick_spacing, False
+
+        word_pos, bit_pos = (compressed + 1) >> 8, (compressed + 1) % 256
+        word = self._word(word_pos)
+        masked = word & ~((1 << bit_pos) - 1)
+        if masked:
+            lsb = (masked & -masked).bit_length() - 1
+            return (compressed + 1 + (lsb - bit_pos)) * self.tick_spacing, True
+        return (compressed + 1 + (255 - bit_pos)) * self.tick_spacing, False
+
+    def _word(self, word_pos: int) -> int:
+        if word_pos not in self.bitmap:
+            raise SnapshotRangeError(word_pos)
+        return self.bitmap[word_pos]
+
+
+@dataclass
+class V3SwapResult:
+    """Outcome of a simulated exact-input swap."""
+    amount_in: int
+    amount_out: int
+    sqrt_price_after: int
+    tick_after: int
+    ticks_crossed: int
+
+
+def simulate_exact_input(pool: V3PoolState, zero_for_one: bool, amount_in: int) -> V3SwapResult:
+    """
+    Simulate UniswapV3Pool.swap for an exact input with no price limit.
+
+    Raises:
+        SnapshotRangeError: If the swap reaches a bitmap word outside the snapshot
+    """
+    sqrt_price_limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+    remaining = amount_in
+    amount_out = 0
+    sqrt_price = pool.sqrt_price_x96
+    tick = pool.tick
+    liquidity = pool.liquidity
+    ticks_crossed = 0
+
+    while remaining != 0 and sqrt_price != sqrt_price_limit:
+        sqrt_start = sqrt_price
+        tick_next, initialized = pool.next_initialized_tick_within_one_word(tick, zero_for_one)
+        tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+        sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+
+        if zero_for_one:
+            sqrt_target = sqrt_price_limit if sqrt_next < sqrt_price_limit else sqrt_next
+        else:
+            sqrt_target = sqrt_price_limit if sqrt_next > sqrt_price_limit else sqrt_next
+
+        sqrt_price, step_in, step_out, step_fee = compute_swap_step(
+            sqrt_price, sqrt_target, liquidity, remaining, pool.fee
+        )
+        remaining -= step_in + step_fee
+        amount_out += step_out
+
+        if sqrt_price == sqrt_next:
+            if initialized:
+                net = pool.liquidity_net.get(tick_next, 0)
+                liquidity += -net if zero_for_one else net
+                ticks_crossed += 1
+            tick = tick_next - 1 if zero_for_one else tick_next
+        elif sqrt_price != sqrt_start:
+            tick = get_tick_at_sqrt_ratio(sqrt_price)
+
+    return V3SwapResult(
+        amount_in=amount_in - remaining,
+        amount_out=amount_out,
+        sqrt_price_after=sqrt_price,
+        tick_after=tick,
+        ticks_crossed=ticks_crossed
+    )
+
+
+def price_impact_bps(pool: V3PoolState, zero_for_one: bool, result: V3SwapResult) -> int:
+    """Execution price vs. the fee-adjusted spot price, in basis points."""
+    if result.amount_in == 0 or pool.sqrt_price_x96 == 0:
+        return 9999
+    spot = (pool.sqrt_price_x96 / Q96) ** 2    # token1 per token0
+    if not zero_for_one:
+        spot = 1 / spot
+    effective_in = result.amount_in * (FEE_DENOMINATOR - pool.fee) / FEE_DENOMINATOR
+    ratio = result.amount_out / (effective_in * spot)
+    return max(0, min(int((1 - ratio) * 10000), 9999))
+
+
+@dataclass
+class V3Quote:
+    """Quote through one or more V3 pools (raw token units)."""
+    amounts: List[int]
+    pools: List[str]
+    fees: List[int]
+    price_impact_bps: int
+    ticks_crossed: int
+    block_number: int
+    versions: Tuple[int, ...] = field(default_factory=tuple)
+
+    @property
+    def amount_out(self) -> int:
+        return self.amounts[-1]
+
+    def min_out(self, slippage_bps: int) -> int:
+        return self.amount_out * (10000 - slippage_bps) // 10000
+
+
+class V3PoolMirror:
+    """Snapshots and event-driven updates of the V3 pools quoted on one chain."""
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        self._pools: Dict[str, V3PoolState] = {}
+        # (factory, token a, token b, fee) -> pool address
+        self._pool_addresses: Dict[Tuple[str, str, str, int], str] = {}
+        # (factory, token a, token b, fee) -> monotonic time its "no pool" answer expires
+        self._missing: Dict[Tuple[str, str, str, int], float] = {}
+        self._resolving: Dict[Tuple[str, str, str, int], asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+        self._subscription: Optional[str] = None
+        self._subscribed: Set[str] = set()
+        self._resubscribe_task: Optional[asyncio.Task] = None
+        self._poll_per_block = False
+
+        self.stats = {
+            "quotes": 0,
+            "snapshots": 0,
+            "snapshot_extensions": 0,
+            "swap_events": 0,
+            "missing_pools": 0,
+        }
+
+    async def quote_exact_input(
+        self,
+        factory: str,
+        path: Sequence[str],
+        fees: Sequence[int],
+        amount_in: int
+    ) -> Optional[V3Quote]:
+        """
+        Quote an exact-input swap along `path` through pools of the given fees.
+
+        Returns:
+            V3Quote, or None if a hop has no pool or no liquidity
+        """
+        pools = await asyncio.gather(*(
+            self.get_pool(factory, path[i], path[i + 1], fees[i])
+            for i in range(len(path) - 1)
+        ))
+        if any(pool is None for pool in pools):
+            return None
+
+        amounts = [amount_in]
+        ratio = 1.0
+        ticks_crossed = 0
+        for token_in, pool in zip(path, pools):
+            zero_for_one = token_in.lower() == pool.token0
+            result = await self._simulate(pool, zero_for_one, amounts[-1])
+            if result.amount_out == 0 or result.amount_in < amounts[-1]:
+                # Ran out of liquidity before the full input was consumed
+                return None
+            amounts.append(result.amount_out)
+            ticks_crossed += result.ticks_crossed
+            ratio *= 1 - price_impact_bps(pool, zero_for_one, result) / 10000
+
+        self.stats["quotes"] += 1
+        return V3Quote(
+            amounts=amounts,
+            pools=[pool.address for pool in pools],
+            fees=list(fees),
+            price_impact_bps=min(int((1 - ratio) * 10000), 9999),
+            ticks_crossed=ticks_crossed,
+            block_number=min(pool.block_number for pool in pools),
+            versions=tuple(pool.version for pool in pools)
+        )
+
+    async def get_pool(self, factory: str, token_a: str, token_b: str, fee: int) -> Optional[V3PoolState]:
+        """Pool state for a token pair and fee tier, snapshotting it on first use."""
+        a, b = sorted((token_a.lower(), token_b.lower()))
+        key = (factory.lower(), a, b, fee)
+
+        if key in self._pool_addresses:
+            return self._pools.get(self._pool_addresses[key])
+        if time.monotonic() < self._missing.get(key, 0.0):
+            return None
+
+        pending = self._resolving.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resolve_pool(key))
+            self._resolving[key] = pending
+            pending.add_done_callback(lambda _: self._resolving.pop(key, None))
+        return await asyncio.shield(pending)
+
+    def get(self, pool_address: str) -> Optional[V3PoolState]:
+        return self._pools.get(pool_address.lower())
+
+    async def track(self, pool_address: str) -> Optional[V3PoolState]:
+        """Snapshot and follow a pool known only by its address."""
+        address = pool_address.lower()
+        if address in self._pools:
+            return self._pools[address]
+
+        multicall = web3_manager.get_multicall(self.chain)
+        try:
+            factory_data, token0_data, token1_data, fee_data, spacing_data = await asyncio.gather(*(
+                multicall.call(address, selector)
+                for selector in (FACTORY_SELECTOR, TOKEN0_SELECTOR, TOKEN1_SELECTOR, FEE_SELECTOR, TICK_SPACING_SELECTOR)
+            ))
+        except Exception as e:
+            logger.debug("%s on %s is not a V3 pool: %s", address, self.chain, e)
+            return None
+
+        pool = V3PoolState(
+            address=address,
+            token0="0x" + token0_data[-40:].lower(),
+            token1="0x" + token1_data[-40:].lower(),
+            fee=decode(["uint24"], bytes.fromhex(fee_data[2:]))[0],
+            tick_spacing=decode(["int24"], bytes.fromhex(spacing_data[2:]))[0]
+        )
+        await self.snapshot(pool)
+
+        self._pools[address] = pool
+        key = ("0x" + factory_data[-40:].lower(), pool.token0, pool.token1, pool.fee)
+        self._pool_addresses[key] = address
+        self._missing.pop(key, None)
+        self._watch_soon()
+        return pool
+
+    async def snapshot(self, pool: V3PoolState, extra_words: Sequence[int] = ()) -> None:
+        """
+        Re-read a pool's price, liquidity and tick data at the tracked head.
+
+        Loads the bitmap words around the current tick plus `extra_words`,
+        then the liquidityNet of every initialized tick in them.
+        """
+        block_number = head_tracker.latest_block(self.chain)
+        block = hex(block_number) if block_number else "latest"
+        multicall = web3_manager.get_multicall(self.chain)
+
+        head = await multicall.aggregate(
+            [ContractCall(pool.address, SLOT0_SELECTOR), ContractCall(pool.address, LIQUIDITY_SELECTOR)],
+            block
+        )
+        if not all(result.success for result in head):
+            raise ValueError(f"V3 pool {pool.address} did not answer slot0/liquidity")
+
+        sqrt_price_x96, tick = decode(["uint160", "int24"], bytes.fromhex(head[0].return_data[2:130]))
+        (liquidity,) = decode(["uint128"], bytes.fromhex(head[1].return_data[2:]))
+
+        current_word = (tick // pool.tick_spacing) >> 8
+        words = sorted(
+            set(range(current_word - SNAPSHOT_WORD_RADIUS, current_word + SNAPSHOT_WORD_RADIUS + 1))
+            | set(pool.bitmap) | set(extra_words)
+        )
+        word_results = await multicall.aggregate(
+            [ContractCall(pool.address, TICK_BITMAP_SELECTOR + encode(["int16"], [w]).hex()) for w in words],
+            block
+        )
+        bitmap = {
+            word: decode(["uint256"], bytes.fromhex(result.return_data[2:]))[0]
+            for word, result in zip(words, word_results) if result.success
+        }
+
+        initialized = [
+            ((word << 8) + bit) * pool.tick_spacing
+            for word, bits in bitmap.items()
+            for bit in range(256) if bits >> bit & 1
+        ]
+        tick_results = await multicall.aggregate(
+            [ContractCall(pool.address, TICKS_SELECTOR + encode(["int24"], [t]).hex()) for t in initialized],
+            block
+        ) if initialized else []
+        liquidity_net = {
+            t: decode(["uint128", "int128"], bytes.fromhex(result.return_data[2:130]))[1]
+            for t, result in zip(initialized, tick_results) if result.success
+        }
+
+        pool.sqrt_price_x96, pool.tick, pool.liquidity = sqrt_price_x96, tick, liquidity
+        pool.bitmap, pool.liquidity_net = bitmap, liquidity_net
+        pool.block_number = block_number or pool.block_number
+        pool.log_index = 2**31
+        pool.version += 1
+        self.stats["snapshots"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chain": self.chain,
+            "pools": len(self._pools),
+            **self.stats,
+            "mode": "per_block_snapshot" if self._poll_per_block else "pool_events",
+        }
+
+    async def _simulate(self, pool: V3PoolState, zero_for_one: bool, amount_in: int) -> V3SwapResult:
+        for _ in range(MAX_SNAPSHOT_EXTENSIONS):
+            try:
+                return simulate_exact_input(pool, zero_for_one, amount_in)
+            except SnapshotRangeError as e:
+                # Large swap left the loaded range: pull in the next word and retry
+                self.stats["snapshot_extensions"] += 1
+                await self.snapshot(pool, extra_words=[e.word_position])
+        return simulate_exact_input(pool, zero_for_one, amount_in)
+
+    async def _resolve_pool(self, key: Tuple[str, str, str, int]) -> Optional[V3PoolState]:
+        factory, a, b, fee = key
+        multicall = web3_manager.get_multicall(self.chain)
+
+        data = await multicall.call(
+            factory, GET_POOL_SELECTOR + encode(["address", "address", "uint24"], [a, b, fee]).hex()
+        )
+        address = "0x" + data[-40:].lower()
+        if address == ZERO_ADDRESS:
+            self._missing[key] = time.monotonic() + MISSING_POOL_TTL
+            self.stats["missing_pools"] += 1
+            return None
+
+        spacing_data = await multicall.call(address, TICK_SPACING_SELECTOR)
+        pool = V3PoolState(
+            address=address,
+            token0=a,
+            token1=b,
+            fee=fee,
+            tick_spacing=decode(["int24"], bytes.fromhex(spacing_data[2:]))[0]
+        )
+        await self.snapshot(pool)
+        if pool.liquidity == 0 and not pool.liquidity_net:
+            self._missing[key] = time.monotonic() + MISSING_POOL_TTL
+            return None
+
+        self._pools[address] = pool
+        self._pool_addresses[key] = address
+        self._missing.pop(key, None)
+        self._watch_soon()
+        return pool
+
+    def _watch_soon(self) -> None:
+        if self._poll_per_block:
+            return
+        if self._resubscribe_task is None or self._resubscribe_task.done():
+            self._resubscribe_task = asyncio.create_task(self._resubscribe())
+
+    async def _resubscribe(self) -> None:
+        await asyncio.sleep(0.05)
+        addresses = set(self._pools)
+        if addresses == self._subscribed:
+            return
+
+        try:
+            tracker = await head_tracker.ensure_started(self.chain)
+            if tracker is None:
+                raise RuntimeError(f"no head tracker for {self.chain}")
+            client = tracker.client
+
+            handle = await client.subscribe_logs(
+                {"address": sorted(addresses), "topics": [[SWAP_TOPIC, MINT_TOPIC, BURN_TOPIC]]},
+                self._on_pool_event
+            )
+            previous, self._subscription, self._subscribed = self._subscription, handle, addresses
+            if previous:
+                await client.unsubscribe(previous)
+
+        except Exception as e:
+            logger.warning("V3 pool subscription failed on %s, snapshotting per block: %s", self.chain, e)
+            self._poll_per_block = True
+            head_tracker.subscribe(self.chain, self._on_new_head)
+
+    def _on_pool_event(self, log: Dict[str, Any]) -> None:
+        pool = self._pools.get(str(log.get("address", "")).lower())
+        if pool is None:
+            return
+
+        topics = log.get("topics") or []
+        if log.get("removed") or not topics or topics[0].lower() != SWAP_TOPIC:
+            # Reorgs and liquidity changes: re-read instead of patching ticks
+            self._refresh_soon(pool)
+            return
+
+        position = (int(log["blockNumber"], 16), int(log.get("logIndex", "0x0"), 16))
+        if position < (pool.block_number, pool.log_index):
+            return
+
+        _, _, sqrt_price_x96, liquidity, tick = decode(
+            ["int256", "int256", "uint160", "uint128", "int24"], bytes.fromhex(log["data"][2:])
+        )
+        pool.sqrt_price_x96, pool.liquidity, pool.tick = sqrt_price_x96, liquidity, tick
+        pool.block_number, pool.log_index = position
+        pool.version += 1
+        self.stats["swap_events"] += 1
+
+    def _on_new_head(self, head: ChainHead) -> None:
+        for pool in list(self._pools.values()):
+            self._refresh_soon(pool)
+
+    def _refresh_soon(self, pool: V3PoolState) -> None:
+        task = self._refreshing.get(pool.address)
+        if task is None or task.done():
+            self._refreshing[pool.address] = asyncio.create_task(self.snapshot(pool))
+
+
+class V3QuoterService:
+    """Registry of per-chain V3 pool mirrors."""
+
+    def __init__(self):
+        self._mirrors: Dict[str, V3PoolMirror] = {}
+
+    def mirror(self, chain: str) -> V3PoolMirror:
+        if chain not in self._mirrors:
+            self._mirrors[chain] = V3PoolMirror(chain)
+        return self._mirrors[chain]
+
+    async def best_single_hop(
+        self,
+        chain: str,
+        factory: str,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        fee_tiers: Sequence[int] = DEFAULT_FEE_TIERS
+    ) -> Optional[V3Quote]:
+        """Best direct quote across a pair's fee tiers."""
+        mirror = self.mirror(chain)
+        quotes = await asyncio.gather(
+            *(mirror.quote_exact_input(factory, [token_in, token_out], [fee], amount_in) for fee in fee_tiers),
+            return_exceptions=True
+        )
+        valid = [q for q in quotes if isinstance(q, V3Quote)]
+        return max(valid, key=lambda q: q.amount_out) if valid else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {chain: mirror.get_stats() for chain, mirror in self._mirrors.items()}
+
+
+# Global V3 quoter instance
+v3_quoter = V3QuoterService()
@@ -9,11 +9,13 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Set
 
-import httpx
 from django.core.cache import cache
 from django.utils import timezone as django_timezone
 
+from apps.chains.head_tracker import head_tracker
+from apps.core.http_clients import http_clients
 from apps.storage.models import Token, Pair, Provider
+from apps.storage.token_index import PairEntry, token_index
 
 logger = logging.getLogger("discovery")
 
@@ -98,11 +100,8 @@ class DiscoveryEngine:
         self.seen_pairs: Set[str] = set()  # Track processed pairs
         self.last_scan_time: Optional[datetime] = None
         
-        # HTTP client for API calls
-        self.http_client = httpx.AsyncClient(
-            timeout=httpx.Timeout(10.0),
-            limits=httpx.Limits(max_connections=20, max_keepalive_connections=5)
-        )
+        # HTTP client for API calls (shared per-host connection pools)
+        self.http_client = http_clients.client(timeout=10.0)
     
     async def start(self) -> None:
         """Start the discovery engine scanning loop."""
@@ -307,6 +306,18 @@ class DiscoveryEngine:
             
             if created:
                 logger.info(f"Stored new pair in database: {pair}")
+            
+            # Keep the in-memory index (and the route graph behind it) current
+            token_index.add_token(token0)
+            token_index.add_token(token1)
+            token_index.add_pair(PairEntry(
+                chain=pair_event.chain,
+                dex=pair_event.dex,
+                address=pair_event.pair_address,
+                token0=token0.address,
+                token1=token1.address,
+                fee_bps=pair.fee_bps
+            ))
         
         except Exception as e:
             logger.error(f"Database storage error: {e}")
@@ -326,7 +337,13 @@ class DiscoveryEngine:
         """Get last processed block number for chain."""
         # Simple cache-based tracking - replace with persistent storage
         cache_key = f"last_block:{chain}"
-        return cache.get(cache_key, 18000000)  # Default starting block
+        last_block = cache.get(cache_key)
+        if last_block is not None:
+            return last_block
+        
+        # Nothing processed yet: start from the current head if it is being tracked
+        current_head = head_tracker.latest_block(chain)
+        return current_head if current_head is not None else 18000000  # Default starting block
     
     def _set_last_block(self, chain: str, block_number: int) -> None:
         """Update last processed block number."""
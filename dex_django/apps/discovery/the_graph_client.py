@@ -9,7 +9,8 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-import httpx
+from ..core.endpoints import resolve_url
+from ..core.http_clients import http_clients
 
 logger = logging.getLogger("discovery")
 
@@ -83,10 +84,7 @@ class TheGraphClient:
     }
     
     def __init__(self) -> None:
-        self.http_client = httpx.AsyncClient(
-            timeout=httpx.Timeout(15.0),
-            limits=httpx.Limits(max_connections=10)
-        )
+        self.http_client = http_clients.client(timeout=15.0)
     
     async def close(self) -> None:
         """Close HTTP client."""
@@ -281,7 +279,7 @@ class TheGraphClient:
         """Execute GraphQL query against subgraph."""
         try:
             response = await self.http_client.post(
-                subgraph_url,
+                resolve_url(subgraph_url),
                 json={"query": query},
                 headers={"Content-Type": "application/json"}
             )
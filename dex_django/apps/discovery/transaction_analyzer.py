@@ -23,6 +23,24 @@ from enum import Enum
 import httpx
 from dotenv import load_dotenv
 
+try:
+    from apps.core.http_clients import http_clients
+    from apps.core.single_flight import SingleFlight
+    from apps.chains.head_tracker import head_tracker
+    from apps.core.rate_limiter import Priority, is_rate_limit_response, rate_limiter
+    from apps.core.endpoints import resolve_url
+    from apps.dex.log_decoder import log_decoder
+except ImportError:
+    # Running as a standalone script outside the Django project
+    http_clients = None
+    SingleFlight = None
+    head_tracker = None
+    rate_limiter = None
+    log_decoder = None
+    
+    def resolve_url(url: str) -> str:
+        return url
+
 # Configure detailed logging
 logging.basicConfig(
     level=logging.INFO,
@@ -76,7 +94,13 @@ class TransactionAnalyzer:
         logger.info("Initializing Transaction Analyzer")
         logger.info("=" * 60)
         
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # Shared per-host connection pool when running inside the app
+        self.http_client = (
+            http_clients.client(timeout=30.0) if http_clients else httpx.AsyncClient(timeout=30.0)
+        )
+        
+        # Concurrent identical explorer requests share one in-flight call
+        self._single_flight = SingleFlight("explorer") if SingleFlight else None
         self.initialization_errors = []
         
         # Chain IDs for Etherscan V2 API
@@ -94,8 +118,8 @@ class TransactionAnalyzer:
             "blast": 81457,
         }
         
-        # Single V2 API endpoint for all chains
-        self.api_base_url = "https://api.etherscan.io/v2/api"
+        # Single V2 API endpoint for all chains (local replay server when configured)
+        self.api_base_url = resolve_url("https://api.etherscan.io/v2/api")
         
         # Legacy endpoints (fallback if V2 fails)
         self.legacy_apis = {
@@ -108,6 +132,7 @@ class TransactionAnalyzer:
             "avalanche": "https://api.snowtrace.io/api",
             "fantom": "https://api.ftmscan.com/api"
         }
+        self.legacy_apis = {chain: resolve_url(url) for chain, url in self.legacy_apis.items()}
         
         # API configuration from environment
         self.api_keys = {}
@@ -138,21 +163,22 @@ class TransactionAnalyzer:
                 "0xa5e0829caced8ffdd4de3c43696c57f7d7a678ff": "QuickSwap",
                 "0x1b02da8cb0d097eb8d57a175b88c7d8b47997506": "SushiSwap",
                 "0xe592427a0aece92de3edee1f18e0157c05861564": "Uniswap V3",
-            "Arbitrum": {
+            },
+            "arbitrum": {
                 "0x1b02da8cb0d097eb8d57a175b88c7d8b47997506": "SushiSwap",
                 "0xe592427a0aece92de3edee1f18e0157c05861564": "Uniswap V3",
                 "0x9527e2d01a3064ef6b50c1da1c0cc523803bcff2": "Camelot",
             },
-                
-            "Optimism": {
+            "optimism": {
                 "0xe592427a0aece92de3edee1f18e0157c05861564": "Uniswap V3",
                 "0x9c12939390052919af3155f41bf4160fd3666a6f": "Velodrome V1",
                 "0xa062ae8a9c5e11aaa026fc2670b0d65ccc8b2858": "Velodrome V2",
             },
         }
         
-        # Rate limiting - INCREASED to avoid Etherscan's 2/sec limit
-        self.rate_limit_delay = 0.6  # ~1.6 requests per second (safer than 2/sec limit)
+        # Rate limiting: shared token bucket per (API key, endpoint); the fixed
+        # spacing below only applies when running standalone without it
+        self.rate_limit_delay = 0.6
         self.last_api_call = {}
         
         # Analysis cache
@@ -166,7 +192,8 @@ class TransactionAnalyzer:
             "pairs_analyzed": 0,
             "errors_encountered": [],
             "v2_api_successes": 0,
-            "v2_api_failures": 0
+            "v2_api_failures": 0,
+            "rate_limits_hit": 0
         }
         
         logger.info(f"✅ Transaction Analyzer initialized")        
@@ -423,9 +450,6 @@ class TransactionAnalyzer:
                 message=f"No API key configured for {chain}"
             )
         
-        # Rate limiting
-        await self._rate_limit(chain)
-        
         try:
             # Calculate block range
             logger.debug(f"📏 Calculating block range...")
@@ -457,7 +481,7 @@ class TransactionAnalyzer:
                 self.stats["api_calls_made"] += 1
                 
                 try:
-                    response = await self.http_client.get(self.api_base_url, params=params)
+                    response = await self._explorer_get(self.api_base_url, params)
                     response_text = response.text
                     data = response.json()
                     
@@ -512,7 +536,7 @@ class TransactionAnalyzer:
             logger.debug(f"🌐 Making legacy API request to {chain} explorer...")
             self.stats["api_calls_made"] += 1
             
-            response = await self.http_client.get(api_url, params=params)
+            response = await self._explorer_get(api_url, params)
             response_text = response.text
             
             logger.debug(f"📥 Response status: {response.status_code}")
@@ -640,9 +664,14 @@ class TransactionAnalyzer:
                     if dex_name:
                         dex_usage[dex_name] = dex_usage.get(dex_name, 0) + 1
                     
-                    # Extract token info from input data (simplified)
+                    # Tokens come from the shared receipt decode when the wallet
+                    # monitor already decoded this transaction, otherwise from
+                    # the input data (simplified)
+                    decoded = log_decoder.get(chain, tx.get("hash", "")) if log_decoder else None
                     input_data = tx.get("input", "")
-                    if len(input_data) > 10:
+                    if decoded is not None:
+                        unique_tokens.update(decoded.tokens())
+                    elif len(input_data) > 10:
                         # Method ID for common swap functions
                         method_id = input_data[:10]
                         unique_tokens.add(method_id)  # Simplified token tracking
@@ -668,15 +697,9 @@ class TransactionAnalyzer:
             
             # Calculate confidence score
             avg_trade_usd = avg_trade_size * 2000  # existing approx conversion
-
-    def _calculate_confidence_score(
-        self,
-        total_trades: int,
-        win_rate: float,
-        gas_spent: float
-    ) -> float:
-        score = 40.0  # Increased base score from 0.0
-
+            confidence_score = self._calculate_confidence_score(
+                trades_count, win_rate, trades_count, float(total_gas_spent), avg_trade_usd
+            )
             
             # Get last trade timestamp
             last_tx = transactions[0] if transactions else None
@@ -758,7 +781,60 @@ class TransactionAnalyzer:
         
         return estimated_gains - estimated_losses - gas_cost_usd
     
+    async def _explorer_get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """GET from an explorer API, sharing the response with identical concurrent requests."""
+        if self._single_flight is None:
+            return await self._rate_limited_get(url, params)
+        
+        return await self._single_flight.do(
+            SingleFlight.key(url, params),
+            lambda: self._rate_limited_get(url, params)
+        )
+    
+    async def _rate_limited_get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """One explorer request, paced by the shared (API key, endpoint) token bucket."""
+        api_key = params.get("apikey")
+        
+        if rate_limiter is None:
+            await self._rate_limit(url)
+            return await self.http_client.get(url, params=params)
+        
+        await rate_limiter.acquire(url, api_key, Priority.DISCOVERY)
+        response = await self.http_client.get(url, params=params)
+        
+        if is_rate_limit_response(response):
+            self.stats["rate_limits_hit"] += 1
+            rate_limiter.penalize(url, api_key)
+        
+        return response
+    
     async def _get_current_block(self, chain: str) -> int:
+        """
+        Get current block number for a chain.
+        
+        Read from the in-process head tracker when it follows the chain;
+        otherwise one explorer lookup per chain at a time.
+        """
+        if head_tracker is not None:
+            current_block = head_tracker.latest_block(chain)
+            if current_block is None:
+                try:
+                    tracker = await head_tracker.ensure_started(chain)
+                    current_block = tracker.block_number if tracker else None
+                except Exception as e:
+                    logger.debug(f"⚠️ Head tracker unavailable for {chain}: {e}")
+            if current_block is not None:
+                return current_block
+        
+        if self._single_flight is None:
+            return await self._fetch_current_block(chain)
+        
+        return await self._single_flight.do(
+            ("current_block", chain),
+            lambda: self._fetch_current_block(chain)
+        )
+    
+    async def _fetch_current_block(self, chain: str) -> int:
         """Get current block number for a chain using V2 API if available."""
         
         try:
@@ -775,7 +851,7 @@ class TransactionAnalyzer:
                 }
                 
                 try:
-                    response = await self.http_client.get(self.api_base_url, params=params)
+                    response = await self._explorer_get(self.api_base_url, params)
                     data = response.json()
                     
                     if data.get("result"):
@@ -795,7 +871,7 @@ class TransactionAnalyzer:
                     "apikey": api_key
                 }
                 
-                response = await self.http_client.get(api_url, params=params)
+                response = await self._explorer_get(api_url, params)
                 data = response.json()
                 
                 if data.get("result"):
@@ -807,21 +883,8 @@ class TransactionAnalyzer:
         except Exception as e:
             logger.warning(f"⚠️ Error getting current block for {chain}: {e}")
         
-        # Return approximate recent block as fallback
-        fallback_blocks = {
-            "ethereum": 18500000,
-            "bsc": 33000000,
-            "base": 3000000,
-            "polygon": 50000000,
-            "arbitrum": 150000000,
-            "optimism": 110000000,
-            "avalanche": 35000000,
-            "fantom": 65000000
-        }
-        
-        fallback = fallback_blocks.get(chain, 1000000)
-        logger.debug(f"📦 Using fallback block for {chain}: {fallback}")
-        return fallback
+        # A guessed block would silently query the wrong range
+        raise RuntimeError(f"Current block unavailable for {chain}")
     
     def _get_blocks_per_hour(self, chain: str) -> int:
         """Get approximate blocks per hour for a chain."""
@@ -885,11 +948,11 @@ class TransactionAnalyzer:
 
 
     
-    async def _rate_limit(self, chain: str):
-        """Implement rate limiting per chain."""
+    async def _rate_limit(self, endpoint: str):
+        """Fixed-spacing rate limiting per endpoint (standalone runs only)."""
         
         current_time = asyncio.get_event_loop().time()
-        last_call = self.last_api_call.get(chain, 0)
+        last_call = self.last_api_call.get(endpoint, 0)
         
         time_since_last = current_time - last_call
         if time_since_last < self.rate_limit_delay:
@@ -897,7 +960,7 @@ class TransactionAnalyzer:
             logger.debug(f"⏳ Rate limiting: waiting {wait_time:.2f}s")
             await asyncio.sleep(wait_time)
         
-        self.last_api_call[chain] = asyncio.get_event_loop().time()
+        self.last_api_call[endpoint] = asyncio.get_event_loop().time()
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get analyzer statistics for debugging."""
@@ -992,7 +1055,7 @@ class TransactionAnalyzer:
                 result = await self.find_traders_from_pair(
                     pair_address=pair_address,
                     chain=chain,
-                    hours_back=,  # Extended to 6 hours to find more transactions
+                    hours_back=6,  # Extended to 6 hours to find more transactions
                     min_trades=1   # Low threshold for testing
                 )
                 
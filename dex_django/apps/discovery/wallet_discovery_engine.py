@@ -11,7 +11,8 @@ from typing import Dict, List, Optional, Any, Tuple, Set
 from dataclasses import dataclass
 from enum import Enum
 
-import httpx
+from apps.core.http_clients import http_clients
+from apps.core.rate_limiter import Priority, rate_limiter
 
 try:
     from apps.storage.copy_trading_repo import create_copy_trading_repositories
@@ -106,7 +107,7 @@ class WalletDiscoveryEngine:
     """
     
     def __init__(self):
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.http_client = http_clients.client(timeout=30.0)
         self.discovery_running = False
         self.discovered_wallets: Dict[str, WalletCandidate] = {}
         
@@ -117,9 +118,8 @@ class WalletDiscoveryEngine:
         self.max_risk_score = 75.0  # Risk score threshold
         self.analysis_period_days = 30
         
-        # Rate limiting
-        self.api_call_delay = 0.2  # 200ms between API calls
-        self.last_api_call = 0
+        # Rate limiting: shared token buckets, discovery yields to live monitoring
+        self.rate_limit_priority = Priority.DISCOVERY
         
         # API endpoints
         self.dexscreener_base = "https://api.dexscreener.com/latest"
@@ -169,8 +169,6 @@ class WalletDiscoveryEngine:
         candidates = []
         
         try:
-            await self._rate_limit()
-            
             chain_mapping = {
             "ethereum": "ethereum",
                 "BSC".lower(): "bsc", 
@@ -185,6 +183,7 @@ class WalletDiscoveryEngine:
             url = f"{self.dexscreener_base}/dex/tokens/{chain_name}"
             
             try:
+                await self._rate_limit(url)
                 response = await self.http_client.get(url)
                 if response.status_code == 200:
                     data = response.json()
@@ -349,16 +348,10 @@ class WalletDiscoveryEngine:
         total_score = win_score + volume_score + trade_score + risk_score
         return min(100, max(0, total_score))
     
-    async def _rate_limit(self):
-        """Rate limiting for API calls."""
-        
-        current_time = asyncio.get_event_loop().time()
-        elapsed = current_time - self.last_api_call
-        
-        if elapsed < self.api_call_delay:
-            await asyncio.sleep(self.api_call_delay - elapsed)
+    async def _rate_limit(self, url: str, api_key: Optional[str] = None):
+        """Wait for the shared token bucket of this endpoint and API key."""
         
-        self.last_api_call = asyncio.get_event_loop().time()
+        await rate_limiter.acquire(url, api_key, self.rate_limit_priority)
     
     async def analyze_wallet_performance(
         self,
@@ -8,11 +8,18 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Set
 
-import httpx
 from pydantic import BaseModel, Field
 
-from dex_django.apps.chains.evm_client import EvmClient  
-from dex_django.apps.core.runtime_state import runtime_state
+from apps.chains.evm_client import EvmClient  
+from apps.chains.head_tracker import head_tracker
+from apps.chains.providers import web3_manager
+from apps.core.endpoints import resolve_url
+from apps.core.http_clients import http_clients
+from apps.core.rate_limiter import Priority, is_rate_limit_response, rate_limiter
+from apps.core.runtime_state import runtime_state
+from apps.core.single_flight import SingleFlight
+from apps.dex.log_decoder import log_decoder
+from apps.storage.token_index import token_index
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +67,7 @@ class WalletMonitor:
     """
     
     def __init__(self):
-        self._http_client = httpx.AsyncClient(timeout=30.0)
+        self._http_client = http_clients.client(timeout=30.0)
         self._monitoring_tasks: Dict[str, asyncio.Task] = {}
         self._followed_wallets: Set[str] = set()
         self._is_running = False
@@ -68,8 +75,8 @@ class WalletMonitor:
         # Chain clients (would be injected in production)
         self._evm_clients: Dict[str, EvmClient] = {}
         
-        # Rate limiting
-        self._request_semaphore = asyncio.Semaphore(10)
+        # Concurrent identical explorer requests share one in-flight call
+        self._single_flight = SingleFlight("wallet_monitor")
         
         # DEX contract addresses for filtering
         self._dex_contracts = {
@@ -92,6 +99,11 @@ class WalletMonitor:
                 "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506": "sushiswap",
             }
         }
+        # Looked up by lowercased transaction `to` addresses
+        self._dex_contracts = {
+            chain: {address.lower(): name for address, name in contracts.items()}
+            for chain, contracts in self._dex_contracts.items()
+        }
     
     async def start_monitoring(self, wallet_addresses: List[str]) -> None:
         """
@@ -102,6 +114,12 @@ class WalletMonitor:
         self._is_running = True
         self._followed_wallets.update(wallet_addresses)
         
+        # Shared head tracker replaces per-loop block number lookups
+        try:
+            await head_tracker.ensure_started("ethereum")
+        except Exception as e:
+            logger.warning("Head tracker unavailable, using explorer block lookups: %s", e)
+        
         # Start monitoring tasks for each wallet
         for wallet in wallet_addresses:
             if wallet not in self._monitoring_tasks:
@@ -204,8 +222,7 @@ class WalletMonitor:
             for chain in chains
         ]
         
-        async with self._request_semaphore:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
         for chain, result in zip(chains, results):
             if isinstance(result, Exception):
@@ -259,7 +276,7 @@ class WalletMonitor:
         """
         try:
             # Use Etherscan API to get recent transactions
-            url = "https://api.etherscan.io/api"
+            url = resolve_url("https://api.etherscan.io/api")
             params = {
                 "module": "account",
                 "action": "txlist",
@@ -270,9 +287,8 @@ class WalletMonitor:
                 "apikey": "YourEtherscanAPIKey"  # Would be from config
             }
             
-            async with self._request_semaphore:
-                response = await self._http_client.get(url, params=params)
-                data = response.json()
+            response = await self._explorer_get(url, params)
+            data = response.json()
             
             if data["status"] != "1":
                 logger.warning("Etherscan API error: %s", data.get("message"))
@@ -298,8 +314,8 @@ class WalletMonitor:
         try:
             dex_name = self._dex_contracts["ethereum"].get(tx_data["to"].lower(), "unknown")
             
-            # Mock parsing - in production would decode transaction input and logs
-            return WalletTransaction(
+            # Defaults are replaced by the decoded swap logs when the receipt has them
+            fields = dict(
                 tx_hash=tx_data["hash"],
                 block_number=int(tx_data["blockNumber"]),
                 timestamp=datetime.fromtimestamp(int(tx_data["timeStamp"]), timezone.utc),
@@ -318,6 +334,8 @@ class WalletMonitor:
                 gas_price_gwei=Decimal(tx_data["gasPrice"]) / Decimal("10") ** 9,
                 is_mev=False
             )
+            fields.update(await self._decode_swap("ethereum", tx_data))
+            return WalletTransaction(**fields)
         except Exception as e:
             logger.error("Error parsing Ethereum DEX transaction: %s", e)
             return None
@@ -331,7 +349,7 @@ class WalletMonitor:
         Parse BSC DEX transactions using BscScan API.
         """
         try:
-            url = "https://api.bscscan.com/api"
+            url = resolve_url("https://api.bscscan.com/api")
             params = {
                 "module": "account",
                 "action": "txlist",
@@ -342,9 +360,8 @@ class WalletMonitor:
                 "apikey": "YourBscScanAPIKey"  # Would be from config
             }
             
-            async with self._request_semaphore:
-                response = await self._http_client.get(url, params=params)
-                data = response.json()
+            response = await self._explorer_get(url, params)
+            data = response.json()
             
             if data["status"] != "1":
                 return []
@@ -367,7 +384,7 @@ class WalletMonitor:
         try:
             dex_name = self._dex_contracts["bsc"].get(tx_data["to"].lower(), "unknown")
             
-            return WalletTransaction(
+            fields = dict(
                 tx_hash=tx_data["hash"],
                 block_number=int(tx_data["blockNumber"]),
                 timestamp=datetime.fromtimestamp(int(tx_data["timeStamp"]), timezone.utc),
@@ -386,10 +403,50 @@ class WalletMonitor:
                 gas_price_gwei=Decimal(tx_data["gasPrice"]) / Decimal("10") ** 9,
                 is_mev=False
             )
+            fields.update(await self._decode_swap("bsc", tx_data))
+            return WalletTransaction(**fields)
         except Exception as e:
             logger.error("Error parsing BSC DEX transaction: %s", e)
             return None
     
+    async def _decode_swap(self, chain: str, tx_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Token, side and exact amounts of a transaction from its receipt logs.
+        
+        The decoded receipt stays in the shared log decoder cache, so the
+        analyzers reuse it. Returns {} when the receipt shows no swap.
+        """
+        try:
+            decoded = await log_decoder.decode_transaction(
+                chain, tx_data["hash"], self._evm_clients.get(chain)
+            )
+        except Exception as e:
+            logger.debug("Receipt decode failed for %s: %s", tx_data.get("hash"), e)
+            return {}
+        if decoded is None or not decoded.hops:
+            return {}
+        
+        first, last = decoded.hops[0], decoded.hops[-1]
+        config = web3_manager.get_chain_config(chain)
+        wrapped_native = (config.weth_address or "").lower() if config else ""
+        
+        # Paying with the native token (or its wrapped form) is a buy of the
+        # final output; anything else sells the first input
+        is_buy = int(tx_data.get("value") or 0) > 0 or first.token_in == wrapped_native
+        token = last.token_out if is_buy else first.token_in
+        if token is None:
+            return {}
+        
+        entry = token_index.get_token(chain, token)
+        return {
+            "token_address": token,
+            "token_symbol": entry.symbol if entry else None,
+            "pair_address": last.pool if is_buy else first.pool,
+            "action": "buy" if is_buy else "sell",
+            "amount_in": decoded.to_human(first.token_in, first.amount_in),
+            "amount_out": decoded.to_human(last.token_out, last.amount_out),
+        }
+    
     async def _parse_base_transactions(
         self,
         wallet_address: str,
@@ -450,7 +507,7 @@ class WalletMonitor:
         """
         try:
             # Import copy trading strategy here to avoid circular imports
-            from dex_django.strategy.copy_trading_strategy import copy_trading_strategy
+            from apps.strategy.copy_trading_strategy import copy_trading_strategy
             
             # Get trader config (would be from database in production)
             trader_config = {
@@ -505,19 +562,50 @@ class WalletMonitor:
             tx.chain
         )
     
+    async def _explorer_get(self, url: str, params: Dict[str, Any]) -> Any:
+        """GET from an explorer API, sharing the response with identical concurrent requests."""
+        return await self._single_flight.do(
+            SingleFlight.key(url, params),
+            lambda: self._rate_limited_get(url, params)
+        )
+    
+    async def _rate_limited_get(self, url: str, params: Dict[str, Any]) -> Any:
+        """
+        One explorer request through the shared token bucket.
+        
+        Live monitoring is served ahead of background discovery drawing on
+        the same API key and endpoint.
+        """
+        api_key = params.get("apikey")
+        await rate_limiter.acquire(url, api_key, Priority.LIVE)
+        response = await self._http_client.get(url, params=params)
+        if is_rate_limit_response(response):
+            rate_limiter.penalize(url, api_key)
+        return response
+    
     async def _get_latest_block_number(self) -> int:
         """
         Get latest block number from primary chain (Ethereum).
+        
+        Read from the in-process head tracker; until it has a head, wallet
+        loops polling at the same moment share one explorer lookup.
         """
+        block_number = head_tracker.latest_block("ethereum")
+        if block_number is not None:
+            return block_number
+        
+        return await self._single_flight.do("latest_block", self._fetch_latest_block_number)
+    
+    async def _fetch_latest_block_number(self) -> int:
         try:
-            url = "https://api.etherscan.io/api"
+            url = resolve_url("https://api.etherscan.io/api")
             params = {
                 "module": "proxy",
                 "action": "eth_blockNumber",
                 "apikey": "YourEtherscanAPIKey"
             }
             
-            response = await self._http_client.get(url, params=params)
+            response = await self._rate_limited_get(url, params)
             data = response.json()
             
             if "result" in data:
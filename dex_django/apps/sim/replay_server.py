@@ -0,0 +1,603 @@
+# APP: dex_django/apps/sim
+# FILE: replay_server.py
+"""
+Local RPC / explorer / subgraph stand-in for DEX Sniper Pro benchmarks
+
+Serves Ethereum JSON-RPC, the Etherscan-family `account/txlist`,
+`account/tokentx` and `proxy` APIs, and The Graph subgraph queries from
+recorded fixtures, falling back to deterministic synthetic data. Latency,
+jitter, errors and provider rate-limit responses can be injected so
+throughput and latency benchmarks run offline and reproducibly.
+
+Point the application at it with DEX_REPLAY_URL (see apps/core/endpoints.py):
+
+    python -m apps.sim.replay_server --port 8545 --latency-ms 40 --error-rate 0.01
+    DEX_REPLAY_URL=http://127.0.0.1:8545 python debug_main.py
+
+Fixture file layout (every section optional):
+
+    {
+      "chains": {"ethereum": {"start_block": 19000000, "base_fee_gwei": 20}},
+      "rpc": {"ethereum": [{"method": "eth_call", "params": [...], "result": "0x..."}]},
+      "explorer": {"txlist": {"0xaddress": [...]}, "tokentx": {"0xaddress": [...]}},
+      "subgraphs": {"uniswap/uniswap-v2": {"data": {"pairs": [...]}}}
+    }
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger("sim.replay_server")
+
+# Chain defaults: (chain id, block time seconds, base fee gwei)
+CHAIN_DEFAULTS: Dict[str, Tuple[int, float, float]] = {
+    "ethereum": (1, 12.0, 20.0),
+    "bsc": (56, 3.0, 0.0),
+    "base": (8453, 2.0, 0.05),
+    "polygon": (137, 2.0, 30.0),
+    "arbitrum": (42161, 0.25, 0.01),
+    "optimism": (10, 2.0, 0.01),
+}
+
+# Explorer hosts used by the legacy (per-chain) APIs
+EXPLORER_HOST_CHAINS = {
+    "api.etherscan.io": "ethereum",
+    "api.bscscan.com": "bsc",
+    "api.basescan.org": "base",
+    "api.polygonscan.com": "polygon",
+    "api.arbiscan.io": "arbitrum",
+    "api-optimistic.etherscan.io": "optimism",
+}
+
+# Routers synthetic explorer transactions are sent to
+SYNTHETIC_ROUTERS = {
+    "ethereum": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d",
+    "bsc": "0x10ed43c718714eb63d5aa57b78b54704e256024e",
+    "base": "0x4752ba5dbc23f44d87826276bf6fd6b1c372ad24",
+    "polygon": "0xa5e0829caced8ffdd4de3c43696c57f7d7a678ff",
+}
+
+ZERO_WORD = "0x" + "00" * 32
+
+
+@dataclass
+class FaultConfig:
+    """Injected network conditions."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0        # HTTP 503 responses
+    rate_limit_rate: float = 0.0   # Provider rate-limit responses
+    seed: int = 1
+
+
+def _digest(*parts: Any) -> str:
+    """Deterministic 32-byte hex id."""
+    data = "|".join(str(part) for part in parts).encode()
+    return "0x" + hashlib.sha256(data).hexdigest()
+
+
+class SyntheticChain:
+    """Deterministic chain whose head advances with wall-clock time."""
+
+    def __init__(self, name: str, options: Optional[Dict[str, Any]] = None):
+        options = options or {}
+        chain_id, block_time, base_fee = CHAIN_DEFAULTS.get(name, (1337, 2.0, 1.0))
+
+        self.name = name
+        self.chain_id = int(options.get("chain_id", chain_id))
+        self.block_time = float(options.get("block_time", block_time))
+        self.base_fee_wei = int(float(options.get("base_fee_gwei", base_fee)) * 10**9)
+        self.start_block = int(options.get("start_block", 19_000_000))
+        self.started_at = time.time()
+
+        self.nonces: Dict[str, int] = {}
+        self.sent: Dict[str, Tuple[int, Optional[str]]] = {}
+
+    @property
+    def head(self) -> int:
+        return self.start_block + int((time.time() - self.started_at) / self.block_time)
+
+    def block_timestamp(self, number: int) -> int:
+        return int(self.started_at + (number - self.start_block) * self.block_time)
+
+    def block_hash(self, number: int) -> str:
+        return _digest(self.name, "block", number)
+
+    def base_fee(self, number: int) -> int:
+        # Small deterministic oscillation so fee consumers see movement
+        if not self.base_fee_wei:
+            return 0
+        return int(self.base_fee_wei * (1 + 0.05 * ((number % 7) - 3) / 3))
+
+    def block(self, number: int) -> Dict[str, Any]:
+        header = {
+            "number": hex(number),
+            "hash": self.block_hash(number),
+            "parentHash": self.block_hash(number - 1),
+            "timestamp": hex(self.block_timestamp(number)),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(15_000_000),
+            "miner": "0x" + "00" * 20,
+            "transactions": [],
+        }
+        if self.base_fee_wei:
+            header["baseFeePerGas"] = hex(self.base_fee(number))
+        return header
+
+
+class ReplayServer:
+    """Request handling, fixtures and fault injection behind the HTTP app."""
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None, faults: Optional[FaultConfig] = None):
+        self.fixtures = fixtures or {}
+        self.faults = faults or FaultConfig()
+        self._random = random.Random(self.faults.seed)
+
+        chain_options = self.fixtures.get("chains", {})
+        self.chains: Dict[str, SyntheticChain] = {
+            name: SyntheticChain(name, chain_options.get(name))
+            for name in set(CHAIN_DEFAULTS) | set(chain_options)
+        }
+
+        # Recorded JSON-RPC responses keyed by (chain, method, params)
+        self._recorded: Dict[Tuple[str, str, str], Any] = {}
+        for chain, entries in self.fixtures.get("rpc", {}).items():
+            for entry in entries:
+                key = (chain, entry["method"], self._params_key(entry.get("params", [])))
+                self._recorded[key] = entry.get("result")
+
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "rpc_calls": 0,
+            "explorer_calls": 0,
+            "subgraph_calls": 0,
+            "recorded_hits": 0,
+            "injected_errors": 0,
+            "injected_rate_limits": 0,
+            "methods": {},
+        }
+
+    # Fault injection
+
+    def set_faults(self, **changes: Any) -> FaultConfig:
+        for key, value in changes.items():
+            if hasattr(self.faults, key):
+                setattr(self.faults, key, type(getattr(self.faults, key))(value))
+        if "seed" in changes:
+            self._random.seed(self.faults.seed)
+        return self.faults
+
+    async def inject(self) -> Optional[str]:
+        """Apply latency; return "error" / "rate_limit" when a fault should be served."""
+        self.stats["requests"] += 1
+        delay = self.faults.latency_ms + self._random.uniform(0, self.faults.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        roll = self._random.random()
+        if roll < self.faults.error_rate:
+            self.stats["injected_errors"] += 1
+            return "error"
+        if roll < self.faults.error_rate + self.faults.rate_limit_rate:
+            self.stats["injected_rate_limits"] += 1
+            return "rate_limit"
+        return None
+
+    # JSON-RPC
+
+    def handle_rpc(self, chain_name: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one JSON-RPC request object."""
+        method = request.get("method", "")
+        params = request.get("params") or []
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+
+        self.stats["rpc_calls"] += 1
+        methods = self.stats["methods"]
+        methods[method] = methods.get(method, 0) + 1
+
+        chain = self.chains.get(chain_name)
+        if chain is None:
+            response["error"] = {"code": -32602, "message": f"unknown chain {chain_name}"}
+            return response
+
+        recorded_key = (chain_name, method, self._params_key(params))
+        if recorded_key in self._recorded:
+            self.stats["recorded_hits"] += 1
+            response["result"] = self._recorded[recorded_key]
+            return response
+
+        try:
+            response["result"] = self._synthetic_rpc(chain, method, params)
+        except _RpcMethodError as e:
+            response["error"] = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            response["error"] = {"code": -32603, "message": f"{method} failed: {e}"}
+        return response
+
+    def _synthetic_rpc(self, chain: SyntheticChain, method: str, params: List[Any]) -> Any:
+        head = chain.head
+
+        if method == "eth_chainId":
+            return hex(chain.chain_id)
+        if method == "net_version":
+            return str(chain.chain_id)
+        if method == "eth_blockNumber":
+            return hex(head)
+        if method == "eth_getBlockByNumber":
+            number = self._block_number(params[0] if params else "latest", head)
+            return chain.block(number) if number <= head else None
+        if method == "eth_gasPrice":
+            return hex(chain.base_fee(head) + 10**9 if chain.base_fee_wei else 3 * 10**9)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(10**9)
+        if method == "eth_feeHistory":
+            return self._fee_history(chain, params, head)
+        if method == "eth_getBalance":
+            return hex(10**18)
+        if method == "eth_getTransactionCount":
+            return hex(chain.nonces.get(str(params[0]).lower(), 0))
+        if method == "eth_getCode":
+            return "0x"
+        if method == "eth_call":
+            # Unrecorded calls return one zero word (balance 0, decimals 0, ...)
+            return ZERO_WORD
+        if method == "eth_estimateGas":
+            return hex(150_000)
+        if method == "eth_getLogs":
+            return []
+        if method == "eth_sendRawTransaction":
+            return self._send_raw(chain, params[0], head)
+        if method == "eth_getTransactionReceipt":
+            return self._receipt(chain, params[0], head)
+        if method == "eth_getTransactionByHash":
+            sent = chain.sent.get(str(params[0]).lower())
+            if sent is None:
+                return None
+            return {"hash": params[0], "blockNumber": hex(sent[0]) if sent[0] <= head else None}
+
+        raise _RpcMethodError(-32601, f"method {method} not supported by replay server")
+
+    def _fee_history(self, chain: SyntheticChain, params: List[Any], head: int) -> Dict[str, Any]:
+        count = int(params[0], 16) if isinstance(params[0], str) else int(params[0])
+        newest = self._block_number(params[1] if len(params) > 1 else "latest", head)
+        percentiles = params[2] if len(params) > 2 else []
+        oldest = newest - count + 1
+        blocks = range(oldest, newest + 1)
+
+        result: Dict[str, Any] = {
+            "oldestBlock": hex(oldest),
+            "baseFeePerGas": [hex(chain.base_fee(n)) for n in range(oldest, newest + 2)],
+            "gasUsedRatio": [0.5 for _ in blocks],
+        }
+        if percentiles:
+            result["reward"] = [
+                [hex(int(10**8 * (1 + p / 10))) for p in percentiles]
+                for _ in blocks
+            ]
+        return result
+
+    def _send_raw(self, chain: SyntheticChain, raw: str, head: int) -> str:
+        tx_hash = _digest(chain.name, "tx", raw)
+        sender = None
+        try:
+            from eth_account import Account
+            sender = Account.recover_transaction(raw).lower()
+        except Exception:
+            pass
+        if sender:
+            chain.nonces[sender] = chain.nonces.get(sender, 0) + 1
+        # Mined in the next block
+        chain.sent[tx_hash] = (head + 1, sender)
+        return tx_hash
+
+    def _receipt(self, chain: SyntheticChain, tx_hash: str, head: int) -> Optional[Dict[str, Any]]:
+        sent = chain.sent.get(str(tx_hash).lower())
+        if sent is None or sent[0] > head:
+            return None
+        block_number, sender = sent
+        return {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(block_number),
+            "blockHash": chain.block_hash(block_number),
+            "from": sender,
+            "status": "0x1",
+            "gasUsed": hex(150_000),
+            "cumulativeGasUsed": hex(150_000),
+            "effectiveGasPrice": hex(chain.base_fee(block_number) + 10**9),
+            "logs": [],
+        }
+
+    # Explorer
+
+    def handle_explorer(self, host: str, query: Dict[str, str]) -> Dict[str, Any]:
+        """Answer an Etherscan-style (legacy or V2) API request."""
+        self.stats["explorer_calls"] += 1
+        chain_name = self._explorer_chain(host, query.get("chainid"))
+        module, action = query.get("module"), query.get("action")
+
+        if module == "proxy":
+            request = {"id": 1, "method": action, "params": self._proxy_params(action, query)}
+            return self.handle_rpc(chain_name, request)
+
+        if module == "account" and action in ("txlist", "tokentx"):
+            address = (query.get("address") or "").lower()
+            recorded = self.fixtures.get("explorer", {}).get(action, {}).get(address)
+            if recorded is not None:
+                self.stats["recorded_hits"] += 1
+                transactions = list(recorded)
+            else:
+                transactions = self._synthetic_transactions(chain_name, action, address, query)
+
+            start = int(query.get("startblock") or 0)
+            end = query.get("endblock")
+            end_block = self.chains[chain_name].head if end in (None, "", "latest") else int(end)
+            transactions = [
+                tx for tx in transactions
+                if start <= int(tx.get("blockNumber", 0)) <= end_block
+            ]
+            transactions.sort(
+                key=lambda tx: int(tx.get("blockNumber", 0)),
+                reverse=query.get("sort", "asc") == "desc"
+            )
+
+            offset = int(query.get("offset") or 0)
+            if offset:
+                page = max(int(query.get("page") or 1), 1)
+                transactions = transactions[(page - 1) * offset: page * offset]
+
+            if not transactions:
+                return {"status": "0", "message": "No transactions found", "result": []}
+            return {"status": "1", "message": "OK", "result": transactions}
+
+        return {"status": "0", "message": "NOTOK", "result": f"Unsupported {module}/{action}"}
+
+    def _synthetic_transactions(
+        self,
+        chain_name: str,
+        action: str,
+        address: str,
+        query: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        chain = self.chains[chain_name]
+        rng = random.Random(f"{chain_name}:{action}:{address}")
+        head = chain.head
+        start = max(int(query.get("startblock") or 0), head - 5000)
+        router = SYNTHETIC_ROUTERS.get(chain_name, "0x" + "11" * 20)
+
+        transactions = []
+        for i in range(rng.randint(5, 40)):
+            block_number = rng.randint(start, head) if head > start else head
+            counterparty = "0x" + hashlib.sha256(f"{address}:{i}".encode()).hexdigest()[:40]
+            tx: Dict[str, Any] = {
+                "blockNumber": str(block_number),
+                "timeStamp": str(chain.block_timestamp(block_number)),
+                "hash": _digest(chain_name, action, address, i),
+                "nonce": str(i),
+                "blockHash": chain.block_hash(block_number),
+                "from": counterparty,
+                "to": router if action == "txlist" else address,
+                "value": str(rng.randint(10**15, 5 * 10**18)),
+                "gas": "250000",
+                "gasPrice": str(chain.base_fee(block_number) + 10**9),
+                "gasUsed": str(rng.randint(90_000, 220_000)),
+                "isError": "0",
+                "txreceipt_status": "1",
+                "input": "0x38ed1739",
+                "confirmations": str(head - block_number),
+            }
+            if action == "tokentx":
+                tx.update({
+                    "contractAddress": "0x" + hashlib.sha256(f"token:{i % 4}".encode()).hexdigest()[:40],
+                    "tokenName": f"Token{i % 4}",
+                    "tokenSymbol": f"TK{i % 4}",
+                    "tokenDecimal": "18",
+                })
+            transactions.append(tx)
+        return transactions
+
+    def _explorer_chain(self, host: str, chain_id: Optional[str]) -> str:
+        if chain_id:
+            for name, chain in self.chains.items():
+                if str(chain.chain_id) == str(chain_id):
+                    return name
+        return EXPLORER_HOST_CHAINS.get(host, "ethereum")
+
+    @staticmethod
+    def _proxy_params(action: Optional[str], query: Dict[str, str]) -> List[Any]:
+        if action == "eth_getBlockByNumber":
+            return [query.get("tag", "latest"), query.get("boolean", "false") == "true"]
+        if action in ("eth_getTransactionReceipt", "eth_getTransactionByHash"):
+            return [query.get("txhash")]
+        if action == "eth_getTransactionCount":
+            return [query.get("address"), query.get("tag", "latest")]
+        if action == "eth_sendRawTransaction":
+            return [query.get("hex")]
+        return []
+
+    # Subgraphs
+
+    def handle_subgraph(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a GraphQL query for a subgraph path like subgraphs/name/uniswap/uniswap-v2."""
+        self.stats["subgraph_calls"] += 1
+        name = path.split("subgraphs/name/", 1)[-1]
+        recorded = self.fixtures.get("subgraphs", {}).get(name)
+        if recorded is not None:
+            self.stats["recorded_hits"] += 1
+            return recorded
+
+        query = body.get("query", "")
+        first_match = re.search(r"first:\s*(\d+)", query)
+        min_block_match = re.search(r"createdAtBlockNumber_gt:\s*(\d+)", query)
+        first = int(first_match.group(1)) if first_match else 10
+        min_block = int(min_block_match.group(1)) if min_block_match else 0
+
+        entity = "pools" if re.search(r"\bpools\s*\(", query) else "pairs"
+        chain = self.chains["ethereum"]
+        head = chain.head
+        rng = random.Random(f"{name}:{head // 100}")
+
+        items = []
+        for i in range(first):
+            block_number = head - i * 3
+            if block_number <= min_block:
+                break
+            item = {
+                "id": "0x" + hashlib.sha256(f"{name}:{block_number}".encode()).hexdigest()[:40],
+                "token0": {"id": "0x" + hashlib.sha256(f"t0:{i}".encode()).hexdigest()[:40], "symbol": f"NEW{i}", "name": f"New Token {i}"},
+                "token1": {"id": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", "symbol": "WETH", "name": "Wrapped Ether"},
+                "createdAtBlockNumber": str(block_number),
+                "createdAtTimestamp": str(chain.block_timestamp(block_number)),
+                "txCount": str(rng.randint(1, 500)),
+            }
+            if entity == "pools":
+                item.update({
+                    "feeTier": "3000",
+                    "liquidity": str(rng.randint(10**15, 10**20)),
+                    "totalValueLockedUSD": f"{rng.uniform(500, 500000):.2f}",
+                })
+            else:
+                item.update({
+                    "reserve0": f"{rng.uniform(1000, 10**7):.6f}",
+                    "reserve1": f"{rng.uniform(0.1, 200):.6f}",
+                    "volumeUSD": f"{rng.uniform(0, 10**6):.2f}",
+                })
+            items.append(item)
+
+        return {"data": {entity: items}}
+
+    # Helpers
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "faults": asdict(self.faults),
+            "heads": {name: chain.head for name, chain in self.chains.items()},
+        }
+
+    @staticmethod
+    def _params_key(params: Any) -> str:
+        return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+    @staticmethod
+    def _block_number(tag: Any, head: int) -> int:
+        if isinstance(tag, int):
+            return tag
+        if tag in ("latest", "pending", "safe", "finalized"):
+            return head
+        if tag == "earliest":
+            return 0
+        return int(tag, 16)
+
+
+class _RpcMethodError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def create_replay_app(
+    fixtures: Optional[Dict[str, Any]] = None,
+    faults: Optional[FaultConfig] = None
+) -> FastAPI:
+    """
+    Build the stand-in server application.
+
+    Args:
+        fixtures: Recorded responses (see module docstring)
+        faults: Injected latency / error configuration
+
+    Returns:
+        FastAPI application
+    """
+    server = ReplayServer(fixtures, faults)
+    app = FastAPI(title="DEX Sniper Pro Replay Server")
+    app.state.replay = server
+
+    @app.post("/rpc/{chain}")
+    async def rpc(chain: str, request: Request) -> Any:
+        fault = await server.inject()
+        if fault == "error":
+            return JSONResponse({"error": "injected upstream failure"}, status_code=503)
+        if fault == "rate_limit":
+            return JSONResponse({"error": "too many requests"}, status_code=429)
+
+        payload = await request.json()
+        if isinstance(payload, list):
+            return [server.handle_rpc(chain, item) for item in payload]
+        return server.handle_rpc(chain, payload)
+
+    @app.api_route("/upstream/{host}/{path:path}", methods=["GET", "POST"])
+    async def upstream(host: str, path: str, request: Request) -> Any:
+        fault = await server.inject()
+        if fault == "error":
+            return JSONResponse({"error": "injected upstream failure"}, status_code=503)
+
+        if path.startswith("subgraphs/"):
+            if fault == "rate_limit":
+                return JSONResponse({"errors": [{"message": "rate limited"}]}, status_code=429)
+            body = await request.json() if request.method == "POST" else {}
+            return server.handle_subgraph(path, body)
+
+        if fault == "rate_limit":
+            return {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+        return server.handle_explorer(host.lower(), dict(request.query_params))
+
+    @app.get("/replay/stats")
+    async def stats() -> Dict[str, Any]:
+        return server.get_stats()
+
+    @app.post("/replay/faults")
+    async def set_faults(request: Request) -> Dict[str, Any]:
+        return asdict(server.set_faults(**(await request.json())))
+
+    return app
+
+
+def load_fixtures(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local RPC / explorer stand-in for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--fixtures", help="JSON fixture file with recorded responses")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    app = create_replay_app(load_fixtures(args.fixtures), faults)
+    logger.info(f"Replay server on http://{args.host}:{args.port} (faults: {asdict(faults)})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
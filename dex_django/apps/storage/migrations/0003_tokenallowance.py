@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0002_copytradefilter_followedtrader_copytrade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenAllowance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chain', models.CharField(max_length=20)),
+                ('owner', models.CharField(max_length=100)),
+                ('token', models.CharField(max_length=100)),
+                ('spender', models.CharField(max_length=100)),
+                ('amount', models.CharField(default='0', max_length=80)),
+                ('block_number', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['chain', 'owner'], name='storage_tok_chain_3d7518_idx')],
+                'unique_together': {('chain', 'owner', 'token', 'spender')},
+            },
+        ),
+    ]
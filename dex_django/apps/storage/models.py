@@ -166,6 +166,29 @@ class LedgerEntry(models.Model):
         return f"{self.event_type} [{self.status}] {self.tx_hash[:8]}"
 
 
+class TokenAllowance(models.Model):
+    """Last known ERC20 allowance of one of our accounts to a spender."""
+
+    chain = models.CharField(max_length=20)
+    owner = models.CharField(max_length=100)
+    token = models.CharField(max_length=100)
+    spender = models.CharField(max_length=100)
+    amount = models.CharField(max_length=80, default="0")  # uint256 as a decimal string
+    block_number = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = "storage"
+        unique_together = ("chain", "owner", "token", "spender")
+        indexes = [
+            models.Index(fields=["chain", "owner"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.token[:8]}… -> {self.spender[:8]}… on {self.chain}"
+
+
 # COPY TRADING MODELS - ADD AFTER EXISTING MODELS
 
 class TraderStatus(models.TextChoices):
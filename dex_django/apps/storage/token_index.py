@@ -0,0 +1,194 @@
+"""
+Process-local index of stored tokens and pairs.
+
+Loads every Token and Pair row once and then serves lookups from memory,
+keyed by (chain, address) with EVM addresses lowercased. Solana mints are
+base58 and case-sensitive, so they are kept as-is. The discovery engine
+adds rows as it stores them, and listeners (e.g. the route graph) are told
+about new pairs, so hot paths like quoting never query the database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .models import Pair, Token
+
+logger = logging.getLogger("storage.token_index")
+
+PairListener = Callable[["PairEntry"], None]
+
+
+def normalize_address(address: str) -> str:
+    """Lowercase EVM hex addresses; leave case-sensitive formats untouched."""
+    address = address.strip()
+    return address.lower() if address[:2].lower() == "0x" else address
+
+
+@dataclass(frozen=True)
+class TokenEntry:
+    """Indexed token metadata."""
+    chain: str
+    address: str
+    symbol: str
+    decimals: int
+    fee_on_transfer: bool = False
+
+
+@dataclass(frozen=True)
+class PairEntry:
+    """Indexed DEX pair."""
+    chain: str
+    dex: str
+    address: str
+    token0: str
+    token1: str
+    fee_bps: int = 0
+
+
+class TokenPairIndex:
+    """In-memory tokens and pairs keyed by normalized (chain, address)."""
+
+    def __init__(self):
+        self._tokens: Dict[Tuple[str, str], TokenEntry] = {}
+        self._pairs: Dict[Tuple[str, str, str], PairEntry] = {}
+        # (chain, token a, token b) sorted -> pairs between them
+        self._pairs_by_tokens: Dict[Tuple[str, str, str], Set[Tuple[str, str, str]]] = {}
+        self._listeners: List[PairListener] = []
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+
+        self.stats = {
+            "token_hits": 0,
+            "token_misses": 0,
+            "loads": 0,
+        }
+
+    async def ensure_loaded(self) -> None:
+        if not self.loaded:
+            await self.load()
+
+    async def load(self) -> None:
+        """(Re)load all stored tokens and pairs."""
+        async with self._load_lock:
+            tokens: Dict[Tuple[str, str], TokenEntry] = {}
+            async for token in Token.objects.all():
+                entry = _token_entry(token)
+                tokens[(entry.chain, entry.address)] = entry
+
+            pairs: List[PairEntry] = []
+            async for pair in Pair.objects.select_related("base_token", "quote_token"):
+                pairs.append(PairEntry(
+                    chain=pair.chain.lower(),
+                    dex=pair.dex,
+                    address=normalize_address(pair.address),
+                    token0=normalize_address(pair.base_token.address),
+                    token1=normalize_address(pair.quote_token.address),
+                    fee_bps=pair.fee_bps
+                ))
+
+            # Rows added while loading are kept
+            self._tokens = {**tokens, **self._tokens}
+            for entry in pairs:
+                self._put_pair(entry)
+
+            self.loaded = True
+            self.stats["loads"] += 1
+            logger.info(f"Token index loaded: {len(self._tokens)} tokens, {len(self._pairs)} pairs")
+
+    def get_token(self, chain: str, address: str) -> Optional[TokenEntry]:
+        entry = self._tokens.get((chain.lower(), normalize_address(address)))
+        self.stats["token_hits" if entry else "token_misses"] += 1
+        return entry
+
+    def add_token(self, token: Any) -> TokenEntry:
+        """Index a Token row (or TokenEntry)."""
+        if isinstance(token, TokenEntry):
+            entry = replace(token, chain=token.chain.lower(), address=normalize_address(token.address))
+        else:
+            entry = _token_entry(token)
+        self._tokens[(entry.chain, entry.address)] = entry
+        return entry
+
+    def add_pair(self, pair: Any) -> PairEntry:
+        """Index a Pair row (or PairEntry) and notify listeners if it is new."""
+        if isinstance(pair, PairEntry):
+            entry = replace(
+                pair,
+                chain=pair.chain.lower(),
+                address=normalize_address(pair.address),
+                token0=normalize_address(pair.token0),
+                token1=normalize_address(pair.token1)
+            )
+        else:
+            self.add_token(pair.base_token)
+            self.add_token(pair.quote_token)
+            entry = PairEntry(
+                chain=pair.chain.lower(),
+                dex=pair.dex,
+                address=normalize_address(pair.address),
+                token0=normalize_address(pair.base_token.address),
+                token1=normalize_address(pair.quote_token.address),
+                fee_bps=pair.fee_bps
+            )
+        self._put_pair(entry)
+        return entry
+
+    def pair_exists(self, chain: str, token_a: str, token_b: str, dex: Optional[str] = None) -> bool:
+        keys = self._pairs_by_tokens.get(_token_pair_key(chain, token_a, token_b), set())
+        if dex is None:
+            return bool(keys)
+        return any(self._pairs[key].dex == dex for key in keys)
+
+    def pairs(self, chain: str) -> Iterator[PairEntry]:
+        chain = chain.lower()
+        return (entry for entry in list(self._pairs.values()) if entry.chain == chain)
+
+    def add_listener(self, listener: PairListener) -> None:
+        """Call `listener(entry)` for every pair indexed from now on."""
+        self._listeners.append(listener)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "tokens": len(self._tokens),
+            "pairs": len(self._pairs),
+            **self.stats,
+        }
+
+    def _put_pair(self, entry: PairEntry) -> None:
+        key = (entry.chain, entry.dex, entry.address)
+        is_new = key not in self._pairs
+        self._pairs[key] = entry
+        self._pairs_by_tokens.setdefault(
+            _token_pair_key(entry.chain, entry.token0, entry.token1), set()
+        ).add(key)
+
+        if is_new:
+            for listener in self._listeners:
+                try:
+                    listener(entry)
+                except Exception as e:
+                    logger.warning(f"Token index listener failed: {e}")
+
+
+def _token_entry(token: Any) -> TokenEntry:
+    return TokenEntry(
+        chain=token.chain.lower(),
+        address=normalize_address(token.address),
+        symbol=token.symbol,
+        decimals=token.decimals,
+        fee_on_transfer=token.fee_on_transfer
+    )
+
+
+def _token_pair_key(chain: str, token_a: str, token_b: str) -> Tuple[str, str, str]:
+    a, b = sorted((normalize_address(token_a), normalize_address(token_b)))
+    return chain.lower(), a, b
+
+
+# Global token index instance
+token_index = TokenPairIndex()
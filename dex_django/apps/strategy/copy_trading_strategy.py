@@ -5,20 +5,27 @@ from __future__ import annotations
 import logging
 import asyncio
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple
 
+from eth_account import Account
 from pydantic import BaseModel
 
-from dex_django.apps.discovery.wallet_monitor import WalletTransaction
-from dex_django.apps.strategy.risk_manager import RiskGateResult, RiskManager
-from dex_django.apps.strategy.orders import TradeIntent
-from dex_django.apps.core.runtime_state import runtime_state
+from apps.dex.quote_curves import get_quote_curve
+from apps.discovery.wallet_monitor import WalletTransaction
+from apps.strategy.risk_manager import RiskGateResult, RiskManager
+from apps.strategy.orders import TradeIntent
+from apps.core.runtime_state import runtime_state
+from apps.trading.execution_engine import NATIVE_PRICE_USD, TradeRequest
+from apps.trading.execution_scheduler import execution_scheduler
+from apps.trading.router_executor import NATIVE_TOKEN, router_executor
 
 logger = logging.getLogger(__name__)
 
+WEI = Decimal(10**18)
+
 
 class CopyDecision(Enum):
     """Copy trading decision outcomes."""
@@ -126,6 +133,9 @@ class CopyTradingStrategy:
         self._daily_pnl_usd = Decimal("0.0")
         self._last_reset_date = datetime.now(timezone.utc).date()
 
+        # Background swap-template warming per signal
+        self._warm_tasks: set = set()
+
     # ---------- PUBLIC API ----------
 
     async def process_wallet_transaction(
@@ -151,6 +161,10 @@ class CopyTradingStrategy:
                 )
                 return None
 
+            # Followed traders tend to trade the same token again (exits,
+            # re-entries); pre-build our swaps of it now that we copy it
+            self._schedule_warm(wallet_tx, evaluation)
+
             # 2) Execute copy trade (paper or live)
             execution_result = await self.execute_copy_trade(wallet_tx, evaluation, trader_config, trace_id)
 
@@ -380,21 +394,56 @@ class CopyTradingStrategy:
         copy_mode = trader_config.get("copy_mode", "percentage")
 
         if copy_mode == "fixed_amount":
-            return Decimal(str(trader_config.get("fixed_amount_usd", "100")))
+            amount = Decimal(str(trader_config.get("fixed_amount_usd", "100")))
 
         elif copy_mode == "proportional":
             # Proportional to original trade
             proportion = Decimal(str(trader_config.get("copy_percentage", "5"))) / 100
             proportional_amount = wallet_tx.amount_usd * proportion
             max_copy = Decimal(str(trader_config.get("max_copy_amount_usd", self._max_copy_amount_usd)))
-            return min(proportional_amount, max_copy)
+            amount = min(proportional_amount, max_copy)
 
         else:  # "percentage" of our portfolio
             portfolio_value = await self._get_portfolio_value_usd()
             percentage = Decimal(str(trader_config.get("copy_percentage", self._default_copy_percentage))) / 100
             percentage_amount = portfolio_value * percentage
             max_copy = Decimal(str(trader_config.get("max_copy_amount_usd", self._max_copy_amount_usd)))
-            return min(percentage_amount, max_copy)
+            amount = min(percentage_amount, max_copy)
+
+        # Never size past the point where the pool's price impact exceeds our slippage cap
+        max_slippage_bps = int(trader_config.get("max_slippage_bps", self._max_slippage_bps))
+        max_under_slippage = await self._max_copy_under_slippage(wallet_tx, max_slippage_bps)
+        if max_under_slippage is not None and max_under_slippage < amount:
+            logger.debug(
+                "Copy size capped by pool depth: $%s -> $%s (%s bps on %s)",
+                amount, max_under_slippage, max_slippage_bps, wallet_tx.pair_address
+            )
+            amount = max_under_slippage
+        return amount
+
+    async def _max_copy_under_slippage(
+        self,
+        wallet_tx: WalletTransaction,
+        max_slippage_bps: int
+    ) -> Optional[Decimal]:
+        """
+        Largest USD size whose price impact fits `max_slippage_bps`.
+
+        Uses the quote curve of the traded pool, valuing our input at the
+        rate the copied trade paid. Returns None when it cannot be priced.
+        """
+        if not wallet_tx.pair_address or wallet_tx.amount_in <= 0 or wallet_tx.amount_usd <= 0:
+            return None
+
+        # Buys spend the pool's other token for `token_address`; sells spend `token_address`
+        side = {"token_out": wallet_tx.token_address} if wallet_tx.action == "buy" else {"token_in": wallet_tx.token_address}
+        curve = await get_quote_curve(wallet_tx.chain, wallet_tx.pair_address, dex=wallet_tx.dex_name, **side)
+        if curve is None:
+            return None
+
+        usd_per_token_in = wallet_tx.amount_usd / wallet_tx.amount_in
+        max_input = Decimal(str(curve.max_input_under_human(max_slippage_bps)))
+        return (max_input * usd_per_token_in).quantize(Decimal("0.01"))
 
     async def _check_copy_risk_limits(
         self,
@@ -551,20 +600,102 @@ class CopyTradingStrategy:
         trace_id: str
     ) -> CopyExecutionResult:
         """
-        Execute live copy trade (integration point to your trading engine/executor).
-        Currently a stub that returns not implemented.
+        Execute live copy trade through the execution scheduler.
+
+        The trader's input is scaled by copy_amount_usd / amount_usd (both
+        in whole tokens of the input side) and queued at HIGH urgency; the
+        order is dropped if it has not started within the execution timeout
+        of the trader's transaction.
         """
-        logger.warning("[%s] Live copy trading not yet implemented", trace_id)
+        def failed(reason: str) -> CopyExecutionResult:
+            logger.warning("[%s] Live copy not executed: %s", trace_id, reason)
+            return CopyExecutionResult(
+                success=False,
+                copy_trade_id=None,
+                tx_hash=None,
+                actual_amount_usd=None,
+                execution_delay_seconds=0,
+                failure_reason=reason,
+                total_fees_usd=None
+            )
+
+        chain, token = wallet_tx.chain, wallet_tx.token_address
+        dex = router_executor.router_dex(chain, wallet_tx.dex_name)
+        if dex is None:
+            return failed(f"No router for {wallet_tx.dex_name} on {chain}")
+        if not router_executor.private_key:
+            return failed("No private key configured for live trading")
+        if wallet_tx.amount_usd <= 0:
+            return failed("Trader amount has no USD value")
+
+        if wallet_tx.action == "buy":
+            token_in, token_out = NATIVE_TOKEN, token
+        else:
+            token_in, token_out = token, NATIVE_TOKEN
+
+        request = TradeRequest(
+            token_in=token_in,
+            token_out=token_out,
+            amount_in=wallet_tx.amount_in * evaluation.copy_amount_usd / wallet_tx.amount_usd,
+            chain=chain,
+            dex=dex,
+            slippage_bps=self._max_slippage_bps,
+            user_address=Account.from_key(router_executor.private_key).address,
+            is_paper=False,
+        )
+        deadline = wallet_tx.timestamp + timedelta(seconds=self._default_execution_timeout_sec)
+
+        start = datetime.now(timezone.utc)
+        result = await execution_scheduler.execute(request, "HIGH", deadline)
+        delay = int((datetime.now(timezone.utc) - start).total_seconds())
+        if not result.success:
+            return failed(result.error_message or "Execution failed")
+
+        logger.info("[%s] Live copy executed: %s", trace_id, result.tx_hash)
         return CopyExecutionResult(
-            success=False,
-            copy_trade_id=None,
-            tx_hash=None,
-            actual_amount_usd=None,
-            execution_delay_seconds=0,
-            failure_reason="Live copy trading not yet implemented",
+            success=True,
+            copy_trade_id=None,  # Not persisted here
+            tx_hash=result.tx_hash,
+            actual_amount_usd=evaluation.copy_amount_usd,
+            execution_delay_seconds=delay,
+            failure_reason=None,
             total_fees_usd=None
         )
 
+    def _schedule_warm(self, wallet_tx: WalletTransaction, evaluation: CopyTradeEvaluation) -> None:
+        """Warm our buy and sell swap templates for a copied token off the critical path."""
+        task = asyncio.create_task(self._warm_copy_path(wallet_tx, evaluation))
+        self._warm_tasks.add(task)
+        task.add_done_callback(self._warm_tasks.discard)
+
+    async def _warm_copy_path(self, wallet_tx: WalletTransaction, evaluation: CopyTradeEvaluation) -> None:
+        """
+        Build the router transactions our next copies of this token would sign.
+
+        Both legs are sized from our copy amount. The token is approved for
+        the sell leg here, since we only warm tokens we decided to copy.
+        """
+        try:
+            if await runtime_state.get_paper_enabled():
+                return
+            chain, token = wallet_tx.chain, wallet_tx.token_address
+            dex = router_executor.router_dex(chain, wallet_tx.dex_name)
+            if dex is None:
+                return
+
+            buy_amount = int(evaluation.copy_amount_usd / NATIVE_PRICE_USD * WEI)
+            if not await router_executor.warm_swap_template(NATIVE_TOKEN, token, chain, dex, buy_amount):
+                return
+
+            # Sell leg sized by what that buy returns
+            quote = await router_executor.get_swap_quote(NATIVE_TOKEN, token, Decimal(buy_amount), chain, dex)
+            if quote.get("success"):
+                sell_amount = int(quote["amount_out"])
+                await router_executor.warm_swap_template(token, NATIVE_TOKEN, chain, dex, sell_amount)
+                await router_executor.pre_approve(token, chain, dex, sell_amount)
+        except Exception as e:
+            logger.debug("Template warming failed for %s: %s", wallet_tx.token_address, e)
+
     async def _get_portfolio_value_usd(self) -> Decimal:
         """Get current portfolio value in USD (placeholder)."""
         # Integrate with wallet/accounting service if available.
@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
+from apps.dex.quote_curves import get_quote_curve
+
 logger = logging.getLogger("intelligence.risk")
 
 class RiskLevel(Enum):
@@ -342,11 +344,51 @@ class RiskManager:
             logger.warning(f"Liquidity ${liquidity_usd} below minimum ${profile.min_liquidity_usd}")
             return Decimal("0")  # Don't trade
         
+        # Largest size whose price impact fits the slippage cap, from the pool's curve
+        max_impact_usd = await self._max_size_under_slippage(opportunity, liquidity_usd, profile)
+        if max_impact_usd is not None:
+            return min(amount, max_impact_usd)
+        
         # Limit to percentage of available liquidity to control slippage
         max_liquidity_usage = liquidity_usd * Decimal("0.05")  # Max 5% of liquidity
         
         return min(amount, max_liquidity_usage)
     
+    async def _max_size_under_slippage(
+        self,
+        opportunity: Dict[str, Any],
+        liquidity_usd: Decimal,
+        profile: RiskProfile
+    ) -> Optional[Decimal]:
+        """
+        USD size at which price impact reaches the profile's slippage cap.
+        
+        Reads the quote curve of the opportunity's pool; the input side is
+        valued at half the pool's USD liquidity. Returns None when the pool
+        cannot be mirrored.
+        """
+        pair_address = opportunity.get("pair_address", "")
+        token_in = (
+            opportunity.get("token_in")
+            or opportunity.get("quote_address")
+            or opportunity.get("token1_address")
+        )
+        if not pair_address.startswith("0x") or not token_in:
+            return None
+        
+        curve = await get_quote_curve(
+            opportunity.get("chain", "ethereum"),
+            pair_address,
+            token_in=token_in,
+            dex=opportunity.get("dex", "")
+        )
+        if curve is None or curve.reserve_in <= 0:
+            return None
+        
+        max_input = curve.max_input_under(float(profile.max_slippage_pct * 100))
+        usd_per_unit = liquidity_usd / 2 / Decimal(str(curve.reserve_in))
+        return (Decimal(str(max_input)) * usd_per_unit).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    
     async def _apply_daily_loss_limits(
         self,
         amount: Decimal,
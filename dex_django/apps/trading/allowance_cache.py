@@ -0,0 +1,386 @@
+"""
+Token allowance cache and background approval warming.
+
+Allowances of our own accounts are kept per (chain, owner, token, spender)
+in memory, persisted to the TokenAllowance table, and kept current from
+the owner's Approval and Transfer logs, so the swap path can answer "is the
+router approved?" without an eth_call.
+
+- Approval(owner, spender, value) sets the allowance directly.
+- Transfer(owner, ...) may have been a transferFrom by any spender, which
+  the log does not name; finite allowances of that token are marked stale
+  and re-read in the background. Unlimited allowances are never spent.
+
+The ApprovalWarmer sends approvals for tokens followed traders are
+trading before we have to sell them, one at a time per chain and within
+the ApprovalPolicy limits. Each executor registers the sender for its own
+signing account, so an approval always comes from the owner whose
+allowance it is. A swap that finds its approval still in flight
+waits for that one instead of sending another.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from apps.chains.head_tracker import head_tracker
+from apps.storage.models import TokenAllowance
+
+logger = logging.getLogger("trading.allowance_cache")
+
+APPROVAL_TOPIC = "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925"
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ALLOWANCE_SELECTOR = "0xdd62ed3e"  # allowance(address,address)
+APPROVE_SELECTOR = "0x095ea7b3"    # approve(address,uint256)
+
+MAX_UINT256 = 2**256 - 1
+
+# (chain, owner, token, spender), addresses lowercased
+AllowanceKey = Tuple[str, str, str, str]
+
+# Sends approve(spender, amount) of a token on one chain, signed by the
+# owner it was registered for; returns the tx hash once mined successfully,
+# None otherwise
+Approver = Callable[[str, str, int], Awaitable[Optional[str]]]
+
+
+def _key(chain: str, owner: str, token: str, spender: str) -> AllowanceKey:
+    return (chain, owner.lower(), token.lower(), spender.lower())
+
+
+def _address_word(address: str) -> str:
+    return address.lower().replace("0x", "").rjust(64, "0")
+
+
+def approve_calldata(spender: str, amount: int) -> str:
+    """Calldata for ERC20 approve(spender, amount)."""
+    return APPROVE_SELECTOR + _address_word(spender) + format(amount, "064x")
+
+
+@dataclass
+class AllowanceEntry:
+    """Known allowance of one (owner, token, spender)."""
+    amount: int
+    block_number: int = 0
+    stale: bool = False  # A Transfer may have spent it; re-read before trusting
+
+
+@dataclass
+class ApprovalPolicy:
+    """Approval hygiene limits for background approvals."""
+    headroom_multiple: int = 2          # Approve this multiple of the amount needed
+    max_approvals_per_hour: int = 12    # Per chain
+    allow_unlimited: bool = False       # Never approve MAX_UINT256 unless enabled
+
+    def amount_for(self, required: int) -> int:
+        if self.allow_unlimited:
+            return MAX_UINT256
+        return min(required * self.headroom_multiple, MAX_UINT256)
+
+
+class AllowanceCache:
+    """Allowances of our accounts, event-maintained and persisted."""
+
+    def __init__(self):
+        self._entries: Dict[AllowanceKey, AllowanceEntry] = {}
+        self._watched: Dict[Tuple[str, str], str] = {}  # (chain, owner) -> log subscription
+        self._dirty: Set[AllowanceKey] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "chain_reads": 0,
+            "approval_events": 0,
+            "transfer_events": 0,
+            "persist_errors": 0,
+        }
+
+    async def ensure_loaded(self) -> None:
+        if not self.loaded:
+            await self.load()
+
+    async def load(self) -> None:
+        """Load persisted allowances; entries seen since startup take precedence."""
+        async with self._load_lock:
+            entries: Dict[AllowanceKey, AllowanceEntry] = {}
+            async for row in TokenAllowance.objects.all():
+                entries[_key(row.chain, row.owner, row.token, row.spender)] = AllowanceEntry(
+                    int(row.amount), row.block_number
+                )
+            entries.update(self._entries)
+            self._entries = entries
+            self.loaded = True
+            logger.info(f"Loaded {len(entries)} token allowances")
+
+    def get(self, chain: str, owner: str, token: str, spender: str) -> Optional[int]:
+        """Cached allowance, or None if unknown or possibly spent. Never does RPC."""
+        entry = self._entries.get(_key(chain, owner, token, spender))
+        if entry is None or entry.stale:
+            return None
+        return entry.amount
+
+    async def allowance(self, chain: str, owner: str, token: str, spender: str) -> int:
+        """Allowance from the cache, read from chain on a miss."""
+        await self.ensure_loaded()
+        cached = self.get(chain, owner, token, spender)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        self.stats["misses"] += 1
+        return await self.refresh(chain, owner, token, spender)
+
+    async def refresh(self, chain: str, owner: str, token: str, spender: str) -> int:
+        """Re-read an allowance with eth_call and cache it."""
+        client = await self._client(chain)
+        result = await client.call_contract(
+            token, ALLOWANCE_SELECTOR + _address_word(owner) + _address_word(spender)
+        )
+        self.stats["chain_reads"] += 1
+
+        amount = int(result, 16) if result and result != "0x" else 0
+        self.record(chain, owner, token, spender, amount)
+        return amount
+
+    def record(
+        self,
+        chain: str,
+        owner: str,
+        token: str,
+        spender: str,
+        amount: int,
+        block_number: int = 0
+    ) -> None:
+        """
+        Store a known allowance (after our own approve, a read, or from a log).
+
+        `block_number` is the block a log came from; 0 means current state.
+        """
+        key = _key(chain, owner, token, spender)
+        entry = self._entries.get(key)
+        if entry is not None and block_number and block_number < entry.block_number:
+            return  # Older than what we have
+
+        self._entries[key] = AllowanceEntry(amount, max(block_number, entry.block_number if entry else 0))
+        self._persist(key)
+
+    def record_spend(self, chain: str, owner: str, token: str, spender: str, amount: int) -> None:
+        """Count a swap of ours against the router's allowance before its Transfer arrives."""
+        entry = self._entries.get(_key(chain, owner, token, spender))
+        if entry is not None and entry.amount != MAX_UINT256:
+            entry.amount = max(entry.amount - amount, 0)
+            self._persist(_key(chain, owner, token, spender))
+
+    def invalidate(self, chain: str, owner: str, token: str) -> None:
+        """Mark finite allowances of a token stale and re-read them in the background."""
+        for key, entry in list(self._entries.items()):
+            if key[:3] == (chain, owner.lower(), token.lower()) and entry.amount != MAX_UINT256:
+                entry.stale = True
+                asyncio.create_task(self._refresh_quietly(*key))
+
+    async def watch(self, chain: str, owner: str) -> None:
+        """Follow an account's Approval and Transfer logs on a chain (idempotent)."""
+        key = (chain, owner.lower())
+        if key in self._watched:
+            return
+        self._watched[key] = ""
+
+        try:
+            client = await self._client(chain)
+            self._watched[key] = await client.subscribe_logs(
+                {"topics": [[APPROVAL_TOPIC, TRANSFER_TOPIC], "0x" + _address_word(owner)]},
+                functools.partial(self._on_log, chain, owner.lower())
+            )
+        except Exception as e:
+            self._watched.pop(key, None)
+            logger.warning(f"{chain}: allowance log subscription failed for {owner}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "stale": sum(1 for entry in self._entries.values() if entry.stale),
+            "watched_accounts": len(self._watched),
+        }
+
+    def _on_log(self, chain: str, owner: str, log: Dict[str, Any]) -> None:
+        topics = [str(topic).lower() for topic in log.get("topics") or []]
+        if len(topics) != 3:
+            return  # ERC721 Approval/Transfer index the token id as well
+        token = str(log.get("address", "")).lower()
+
+        if log.get("removed"):
+            self.invalidate(chain, owner, token)
+            return
+
+        if topics[0] == APPROVAL_TOPIC:
+            self.stats["approval_events"] += 1
+            data = log.get("data", "0x")[2:66]
+            self.record(
+                chain, owner, token, "0x" + topics[2][-40:],
+                int(data or "0", 16), int(log.get("blockNumber", "0x0"), 16)
+            )
+        elif topics[0] == TRANSFER_TOPIC:
+            self.stats["transfer_events"] += 1
+            self.invalidate(chain, owner, token)
+
+    async def _refresh_quietly(self, chain: str, owner: str, token: str, spender: str) -> None:
+        try:
+            await self.refresh(chain, owner, token, spender)
+        except Exception as e:
+            logger.debug(f"{chain}: allowance refresh failed for {token}: {e}")
+
+    async def _client(self, chain: str):
+        tracker = await head_tracker.ensure_started(chain)
+        if tracker is None:
+            raise RuntimeError(f"no EVM client for {chain}")
+        return tracker.client
+
+    def _persist(self, key: AllowanceKey) -> None:
+        self._dirty.add(key)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Always writes the latest value of a key, so writes never land out of order
+        while self._dirty:
+            key = self._dirty.pop()
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            chain, owner, token, spender = key
+            try:
+                await TokenAllowance.objects.aupdate_or_create(
+                    chain=chain, owner=owner, token=token, spender=spender,
+                    defaults={"amount": str(entry.amount), "block_number": entry.block_number}
+                )
+            except Exception as e:
+                self.stats["persist_errors"] += 1
+                logger.debug(f"Allowance persist failed for {token}: {e}")
+
+
+class ApprovalWarmer:
+    """Background approvals ahead of the swaps that will need them."""
+
+    def __init__(self, cache: AllowanceCache, policy: Optional[ApprovalPolicy] = None):
+        self.cache = cache
+        self.policy = policy or ApprovalPolicy()
+        self._approvers: Dict[Tuple[str, str], Approver] = {}  # (chain, owner) -> approver
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[AllowanceKey, asyncio.Future] = {}
+        self._sent: Dict[str, Deque[float]] = {}
+
+        self.stats = {
+            "requested": 0,
+            "already_approved": 0,
+            "sent": 0,
+            "failed": 0,
+            "rate_limited": 0,
+        }
+
+    def register(self, chain: str, owner: str, approver: Approver) -> None:
+        """Set the approval sender for an account on a chain; `approver` must sign as `owner`."""
+        self._approvers[(chain, owner.lower())] = approver
+
+    async def request(self, chain: str, owner: str, token: str, spender: str, amount: int) -> bool:
+        """
+        Queue an approval of `token` by `owner` to `spender` if the allowance is below `amount`.
+
+        Returns:
+            True if an approval was queued
+        """
+        if (chain, owner.lower()) not in self._approvers or amount <= 0:
+            return False
+
+        self.stats["requested"] += 1
+        key = _key(chain, owner, token, spender)
+        if key in self._pending:
+            return False
+        if await self.cache.allowance(*key) >= amount:
+            self.stats["already_approved"] += 1
+            return False
+        if key in self._pending:
+            return False
+
+        self._pending[key] = asyncio.get_running_loop().create_future()
+        self._queue(chain).put_nowait((key, amount))
+        return True
+
+    def pending(self, chain: str, owner: str, token: str, spender: str) -> Optional[asyncio.Future]:
+        """Future of a queued or in-flight approval (result: success), if any."""
+        return self._pending.get(_key(chain, owner, token, spender))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "accounts": sorted(f"{chain}:{owner}" for chain, owner in self._approvers),
+        }
+
+    def _queue(self, chain: str) -> asyncio.Queue:
+        if chain not in self._queues:
+            self._queues[chain] = asyncio.Queue()
+        worker = self._workers.get(chain)
+        if worker is None or worker.done():
+            self._workers[chain] = asyncio.create_task(self._work(chain))
+        return self._queues[chain]
+
+    async def _work(self, chain: str) -> None:
+        queue = self._queues[chain]
+        while True:
+            key, amount = await queue.get()
+            approved = False
+            try:
+                approved = await self._approve(chain, key, amount)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"{chain}: background approval of {key[2]} failed: {e}")
+            finally:
+                future = self._pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(approved)
+
+    async def _approve(self, chain: str, key: AllowanceKey, amount: int) -> bool:
+        _, owner, token, spender = key
+        current = self.cache.get(chain, owner, token, spender)
+        if current is not None and current >= amount:
+            return True
+
+        sent = self._sent.setdefault(chain, deque())
+        while sent and time.monotonic() - sent[0] > 3600:
+            sent.popleft()
+        if len(sent) >= self.policy.max_approvals_per_hour:
+            self.stats["rate_limited"] += 1
+            logger.info(f"{chain}: approval budget used up, not pre-approving {token}")
+            return False
+
+        value = self.policy.amount_for(amount)
+        sent.append(time.monotonic())
+        tx_hash = await self._approvers[(chain, owner)](token, spender, value)
+        if tx_hash is None:
+            self.stats["failed"] += 1
+            return False
+
+        self.stats["sent"] += 1
+        self.cache.record(chain, owner, token, spender, value)
+        logger.info(f"{chain}: pre-approved {token} for {spender} ({tx_hash})")
+        return True
+
+
+# Global allowance cache and approval warmer instances
+allowance_cache = AllowanceCache()
+approval_warmer = ApprovalWarmer(allowance_cache)
@@ -8,10 +8,18 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
+from eth_account import Account
+
 from apps.storage.models import Trade, LedgerEntry
+from .execution_engine import NATIVE_PRICE_USD, TradeRequest, TradeResult
+from .execution_scheduler import execution_scheduler
+from .router_executor import NATIVE_TOKEN, router_executor
 
 logger = logging.getLogger("trading.engine")
 
+# Ledger account for paper trades when no signer key is configured
+PAPER_ACCOUNT = "paper"
+
 # Define ALL enums at the top before any classes
 class TradingMode(Enum):
     CONSERVATIVE = "conservative"
@@ -84,7 +92,7 @@ risk_manager = MockRiskManager()
 # Try to import and wrap real modules
 try:
     import apps.intelligence.strategy_engine as imported_strategy_engine
-    import dex_django.apps.strategy.risk_manager as imported_risk_manager
+    import apps.strategy.risk_manager as imported_risk_manager
     
     # Create wrapper with real modules
     wrapper = IntelligenceWrapper(imported_strategy_engine, imported_risk_manager)
@@ -242,9 +250,10 @@ class TradingEngine:
                     )
                     
                     # Process signals (will be empty with mock engine)
+                    by_pair = {o.get("pair_address"): o for o in opportunities}
                     for signal in signals:
                         if hasattr(signal, 'urgency') and signal.urgency in ["CRITICAL", "HIGH"]:
-                            await self._process_trading_signal(signal)
+                            await self._process_trading_signal(signal, by_pair.get(signal.pair_address, {}))
                 
                 # Execute pending trades
                 await self._execute_pending_trades()
@@ -261,6 +270,83 @@ class TradingEngine:
         
         logger.info(f"Trading loop stopped after {loop_count} iterations")
     
+    async def _process_trading_signal(self, signal: Any, opportunity: Dict[str, Any]) -> None:
+        """Queue a BUY signal on the execution scheduler at its urgency and deadline."""
+        
+        sizing = signal.position_sizing
+        if signal.action not in ["BUY", "STRONG_BUY"] or sizing is None:
+            return
+        if (len(self.pending_executions) >= self.max_concurrent_trades
+                or self.daily_trades_count >= self.daily_trade_limit):
+            logger.info(f"Trade limits reached - skipping signal for {signal.pair_address}")
+            return
+        
+        token = opportunity.get("token_address") or opportunity.get("token0_address")
+        dex = router_executor.router_dex(signal.chain, opportunity.get("dex", ""))
+        user_address = self._account_address()
+        if not token or dex is None or user_address is None:
+            logger.info(f"No route for signal on {signal.pair_address} ({signal.chain}) - skipping")
+            return
+        
+        # Buys spend the native token; amounts are whole tokens at the
+        # execution engine's native price, so its risk gate sees the same USD
+        request = TradeRequest(
+            token_in=NATIVE_TOKEN,
+            token_out=token,
+            amount_in=sizing.recommended_amount_usd / NATIVE_PRICE_USD,
+            chain=signal.chain,
+            dex=dex,
+            slippage_bps=int(sizing.max_acceptable_slippage * 100),
+            user_address=user_address,
+            is_paper=self.execution_mode == ExecutionMode.PAPER
+        )
+        execution = TradeExecution(
+            signal_id=f"{signal.chain}:{signal.pair_address}:{int(signal.execution_deadline.timestamp())}",
+            pair_address=signal.pair_address,
+            chain=signal.chain,
+            dex_name=dex,
+            token_address=token,
+            action="BUY",
+            amount_usd=sizing.recommended_amount_usd,
+            expected_slippage=sizing.max_acceptable_slippage,
+            stop_loss_price=sizing.stop_loss_price,
+            take_profit_price=sizing.take_profit_price,
+            execution_deadline=signal.execution_deadline,
+            status=TradeStatus.PENDING
+        )
+        
+        future = execution_scheduler.submit(request, signal.urgency, signal.execution_deadline)
+        self.pending_executions.append(execution)
+        self.daily_trades_count += 1
+        future.add_done_callback(lambda done: self._finish_execution(execution, done))
+        logger.info(f"Queued {signal.urgency} BUY of {token} on {signal.chain} "
+                    f"(${sizing.recommended_amount_usd})")
+    
+    def _finish_execution(self, execution: TradeExecution, future: asyncio.Future) -> None:
+        """Record a scheduled signal's result and drop it from the pending list."""
+        
+        if execution in self.pending_executions:
+            self.pending_executions.remove(execution)
+        if execution.status == TradeStatus.CANCELLED:
+            return
+        
+        result: Optional[TradeResult] = None if future.cancelled() else future.result()
+        if result is not None and result.success:
+            execution.status = TradeStatus.COMPLETED
+            execution.transaction_hash = result.tx_hash
+            execution.gas_used = result.gas_used
+        else:
+            execution.status = TradeStatus.FAILED
+            execution.error_message = result.error_message if result else "Cancelled"
+            logger.warning(f"Signal trade on {execution.chain} failed: {execution.error_message}")
+    
+    def _account_address(self) -> Optional[str]:
+        """Account trades are recorded under; live trading needs the signer key."""
+        
+        if router_executor.private_key:
+            return Account.from_key(router_executor.private_key).address
+        return PAPER_ACCOUNT if self.execution_mode == ExecutionMode.PAPER else None
+    
     async def _initialize_chain_connections(self) -> None:
         """Initialize connections to all supported chains."""
         
@@ -3,9 +3,10 @@ from __future__ import annotations
 import asyncio
 import logging
 import random
-from typing import Dict, Any, Optional
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
 from decimal import Decimal
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from dataclasses import dataclass
 
 from web3 import AsyncWeb3
@@ -13,14 +14,23 @@ from web3.exceptions import ContractLogicError
 from eth_account import Account
 from django.db import transaction
 
-from .router_executor import router_executor
+from .router_executor import NATIVE_TOKEN, router_executor
+from apps.dex.log_decoder import log_decoder
 from apps.ledger.models import Trade, Position, Portfolio
 
 logger = logging.getLogger("trading.execution")
 
+# Approximate native token price for USD estimates until a price oracle exists
+NATIVE_PRICE_USD = Decimal("2500")
+
 @dataclass
 class TradeRequest:
-    """Request to execute a trade."""
+    """
+    Request to execute a trade.
+    
+    `amount_in` is in whole tokens of `token_in`, as are result amounts of
+    `token_out`; raw integer amounts only exist at the router boundary.
+    """
     token_in: str
     token_out: str
     amount_in: Decimal
@@ -43,6 +53,105 @@ class TradeResult:
     execution_time_ms: int
     risk_warnings: list[str]
 
+class DailyVolumeCounter:
+    """
+    Running per-(user, paper/live) USD volume for the current UTC day.
+    
+    Executed trades are added in memory. The totals are reconciled to the
+    ledger in the background every `reconcile_interval` seconds, and are
+    loaded from it on first use, so the risk gate does not query the
+    database on every trade. A failed background reconcile keeps the
+    running total; a failed first load raises, so the gate fails closed.
+    
+    Trades that passed the risk gate but have not finished hold a
+    reservation against the limit, so concurrent trades cannot all pass
+    it. The reservation becomes volume when the trade executes and is
+    released otherwise.
+    """
+    
+    def __init__(
+        self,
+        loader: Callable[[str, bool], Awaitable[Decimal]],
+        reconcile_interval: float = 300.0
+    ):
+        self._loader = loader
+        self.reconcile_interval = reconcile_interval
+        self._volumes: Dict[Tuple[str, bool], Decimal] = {}
+        self._reserved: Dict[Tuple[str, bool], Decimal] = {}
+        self._reconciled_at: Dict[Tuple[str, bool], float] = {}
+        self._reconciling: Dict[Tuple[str, bool], asyncio.Task] = {}
+        self._day: Optional[date] = None
+    
+    async def get(self, user_address: str, is_paper: bool) -> Decimal:
+        """Today's volume; only the first read of a key waits on the ledger."""
+        self._roll_day()
+        key = (user_address.lower(), is_paper)
+        
+        if key not in self._volumes:
+            await self._reconcile(key)
+        elif time.monotonic() - self._reconciled_at.get(key, 0.0) > self.reconcile_interval:
+            task = self._reconciling.get(key)
+            if task is None or task.done():
+                self._reconciling[key] = asyncio.create_task(self._reconcile_quietly(key))
+        
+        return self._volumes.get(key, Decimal("0")) + self._reserved.get(key, Decimal("0"))
+    
+    def add(self, user_address: str, is_paper: bool, amount_usd: Decimal) -> None:
+        """Count an executed trade."""
+        self._roll_day()
+        key = (user_address.lower(), is_paper)
+        self._volumes[key] = self._volumes.get(key, Decimal("0")) + amount_usd
+    
+    def reserve(self, user_address: str, is_paper: bool, amount_usd: Decimal, limit: Decimal) -> bool:
+        """
+        Hold `amount_usd` against the limit for a trade about to execute.
+        
+        Call after `get` has loaded the key. Returns False, reserving
+        nothing, if today's volume plus reservations would exceed `limit`.
+        """
+        self._roll_day()
+        key = (user_address.lower(), is_paper)
+        used = self._volumes.get(key, Decimal("0")) + self._reserved.get(key, Decimal("0"))
+        if used + amount_usd > limit:
+            return False
+        self._reserved[key] = self._reserved.get(key, Decimal("0")) + amount_usd
+        return True
+    
+    def release(self, user_address: str, is_paper: bool, amount_usd: Decimal) -> None:
+        """Drop a reservation of a trade that did not execute."""
+        key = (user_address.lower(), is_paper)
+        if key in self._reserved:
+            self._reserved[key] = max(self._reserved[key] - amount_usd, Decimal("0"))
+    
+    def commit(self, user_address: str, is_paper: bool, amount_usd: Decimal) -> None:
+        """Turn a reservation into volume once its trade executed."""
+        self.release(user_address, is_paper, amount_usd)
+        self.add(user_address, is_paper, amount_usd)
+    
+    async def _reconcile_quietly(self, key: Tuple[str, bool]) -> None:
+        try:
+            await self._reconcile(key)
+        except Exception as e:
+            logger.warning(f"Daily volume reconcile failed, keeping running total: {e}")
+    
+    async def _reconcile(self, key: Tuple[str, bool]) -> None:
+        day = self._day
+        before = self._volumes.get(key, Decimal("0"))
+        ledger = await self._loader(*key)
+        if self._day != day:
+            return
+        # Keep trades added while the ledger was being read
+        self._volumes[key] = ledger + max(self._volumes.get(key, Decimal("0")) - before, Decimal("0"))
+        self._reconciled_at[key] = time.monotonic()
+    
+    def _roll_day(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._volumes.clear()
+            self._reserved.clear()
+            self._reconciled_at.clear()
+
 class ExecutionEngine:
     """
     Real trade execution engine that actually performs swaps.
@@ -52,6 +161,7 @@ class ExecutionEngine:
     def __init__(self):
         self.active_positions: Dict[str, Position] = {}
         self.execution_history: list[TradeResult] = []
+        self._daily_volume = DailyVolumeCounter(self._get_daily_trading_volume)
         
     async def execute_trade(self, request: TradeRequest) -> TradeResult:
         """
@@ -63,47 +173,46 @@ class ExecutionEngine:
         logger.info(f"Executing {'PAPER' if request.is_paper else 'LIVE'} trade: "
                    f"{request.amount_in} {request.token_in} -> {request.token_out}")
         
+        reserved = Decimal("0")  # Held against the daily limit by the risk gate
         try:
-            # Step 1: Risk Assessment
+            # Steps 1-2: risk assessment, pre-flight checks and (for paper
+            # trades) the quote are independent, so they run concurrently;
+            # the first gate that fails cancels the rest
+            gates: Dict[str, asyncio.Task] = {
+                "preflight": asyncio.create_task(self._preflight_checks(request))
+            }
             if not request.risk_override:
-                risk_assessment = await self._assess_trade_risk(request)
-                if risk_assessment["blocked"]:
-                    return TradeResult(
-                        success=False,
-                        tx_hash=None,
-                        amount_out=None,
-                        gas_used=None,
-                        effective_slippage_bps=None,
-                        error_message=f"Risk gate failed: {risk_assessment['reason']}",
-                        execution_time_ms=self._elapsed_ms(start_time),
-                        risk_warnings=risk_assessment["warnings"]
-                    )
+                gates["risk"] = asyncio.create_task(self._assess_trade_risk(request))
+            if request.is_paper:
+                gates["quote"] = asyncio.create_task(self._get_real_quote(request))
             
-            # Step 2: Pre-flight checks
-            preflight_result = await self._preflight_checks(request)
-            if not preflight_result["success"]:
-                return TradeResult(
-                    success=False,
-                    tx_hash=None,
-                    amount_out=None,
-                    gas_used=None,
-                    effective_slippage_bps=None,
-                    error_message=preflight_result["error"],
-                    execution_time_ms=self._elapsed_ms(start_time),
-                    risk_warnings=[]
-                )
+            try:
+                failure = await self._run_gates(gates, start_time)
+            finally:
+                reserved = self._gate_reservation(gates.get("risk"))
+            if failure is not None:
+                return failure
             
             # Step 3: Execute the swap
             if request.is_paper:
-                result = await self._execute_paper_trade(request)
+                result = await self._execute_paper_trade(request, gates["quote"].result())
             else:
                 result = await self._execute_live_trade(request)
             
             # Step 4: Record the trade in database
             await self._record_trade(request, result)
             
-            # Step 5: Update portfolio if successful
+            # Step 5: Update today's volume and portfolio if successful
             if result.success:
+                if reserved:
+                    self._daily_volume.commit(request.user_address, request.is_paper, reserved)
+                    reserved = Decimal("0")
+                else:
+                    self._daily_volume.add(
+                        request.user_address,
+                        request.is_paper,
+                        await self._estimate_position_value_usd(request.amount_in, request.token_in, request.chain)
+                    )
                 await self._update_portfolio(request, result)
             
             execution_time = self._elapsed_ms(start_time)
@@ -126,6 +235,54 @@ class ExecutionEngine:
                 execution_time_ms=self._elapsed_ms(start_time),
                 risk_warnings=[]
             )
+        finally:
+            self._daily_volume.release(request.user_address, request.is_paper, reserved)
+    
+    async def _run_gates(self, gates: Dict[str, asyncio.Task], start_time: datetime) -> Optional[TradeResult]:
+        """
+        Wait for the pre-trade checks; return a failed result as soon as one fails.
+        
+        Checks still running at that point are cancelled.
+        """
+        pending = set(gates.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for name, task in gates.items():
+                    if task not in done:
+                        continue
+                    outcome = task.result()
+                    
+                    if name == "risk" and outcome["blocked"]:
+                        return self._gate_failure(
+                            f"Risk gate failed: {outcome['reason']}", start_time, outcome["warnings"]
+                        )
+                    if name in ("preflight", "quote") and not outcome["success"]:
+                        return self._gate_failure(outcome["error"], start_time)
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    def _gate_reservation(task: Optional[asyncio.Task]) -> Decimal:
+        """Daily-limit reservation held by a risk gate that passed."""
+        if task is None or not task.done() or task.cancelled() or task.exception() is not None:
+            return Decimal("0")
+        outcome = task.result()
+        return Decimal("0") if outcome["blocked"] else outcome.get("reserved_usd", Decimal("0"))
+    
+    def _gate_failure(self, message: str, start_time: datetime, warnings: Optional[list] = None) -> TradeResult:
+        return TradeResult(
+            success=False,
+            tx_hash=None,
+            amount_out=None,
+            gas_used=None,
+            effective_slippage_bps=None,
+            error_message=message,
+            execution_time_ms=self._elapsed_ms(start_time),
+            risk_warnings=warnings or []
+        )
     
     async def _assess_trade_risk(self, request: TradeRequest) -> Dict[str, Any]:
         """Real risk assessment that can block trades."""
@@ -146,10 +303,11 @@ class ExecutionEngine:
                 "warnings": []
             }
         
-        # Check daily trading limits
-        daily_volume = await self._get_daily_trading_volume(request.user_address, request.is_paper)
+        # Check daily trading limits (in-memory running total) and hold this
+        # trade's size against them until it finishes
+        await self._daily_volume.get(request.user_address, request.is_paper)
         
-        if daily_volume + position_size_usd > daily_limit:
+        if not self._daily_volume.reserve(request.user_address, request.is_paper, position_size_usd, daily_limit):
             return {
                 "blocked": True,
                 "reason": f"Daily trading limit exceeded",
@@ -157,8 +315,13 @@ class ExecutionEngine:
             }
         
         # Check token-specific risks
-        token_risk = await self._analyze_token_risk(request.token_out, request.chain)
+        try:
+            token_risk = await self._analyze_token_risk(request.token_out, request.chain)
+        except BaseException:
+            self._daily_volume.release(request.user_address, request.is_paper, position_size_usd)
+            raise
         if token_risk > 80:  # High risk threshold
+            self._daily_volume.release(request.user_address, request.is_paper, position_size_usd)
             return {
                 "blocked": True,
                 "reason": f"Token risk score too high: {token_risk}",
@@ -175,7 +338,8 @@ class ExecutionEngine:
         return {
             "blocked": False,
             "reason": None,
-            "warnings": warnings
+            "warnings": warnings,
+            "reserved_usd": position_size_usd
         }
     
     async def _preflight_checks(self, request: TradeRequest) -> Dict[str, Any]:
@@ -218,22 +382,22 @@ class ExecutionEngine:
         swap_result = await router_executor.execute_swap(
             token_in=request.token_in,
             token_out=request.token_out,
-            amount_in=request.amount_in,
+            amount_in=await self._to_raw_amount(request.amount_in, request.token_in, request.chain),
             chain=request.chain,
             dex=request.dex,
             slippage_bps=request.slippage_bps
         )
         
         if swap_result["success"]:
+            amount_out = await self._from_raw_amount(
+                swap_result.get("amount_out", 0), request.token_out, request.chain
+            )
             return TradeResult(
                 success=True,
                 tx_hash=swap_result["tx_hash"],
-                amount_out=Decimal(str(swap_result.get("amount_out", 0))),
+                amount_out=amount_out,
                 gas_used=swap_result.get("gas_used"),
-                effective_slippage_bps=self._calculate_slippage(
-                    request.amount_in, 
-                    Decimal(str(swap_result.get("amount_out", 0)))
-                ),
+                effective_slippage_bps=self._calculate_slippage(request.amount_in, amount_out),
                 error_message=None,
                 execution_time_ms=0,  # Will be set by caller
                 risk_warnings=[]
@@ -250,11 +414,16 @@ class ExecutionEngine:
                 risk_warnings=[]
             )
     
-    async def _execute_paper_trade(self, request: TradeRequest) -> TradeResult:
+    async def _execute_paper_trade(
+        self,
+        request: TradeRequest,
+        quote_result: Optional[Dict[str, Any]] = None
+    ) -> TradeResult:
         """Execute simulated trade with realistic slippage and timing."""
         
         # Get real quote from router for realistic simulation
-        quote_result = await self._get_real_quote(request)
+        if quote_result is None:
+            quote_result = await self._get_real_quote(request)
         
         if not quote_result["success"]:
             return TradeResult(
@@ -350,10 +519,14 @@ class ExecutionEngine:
             quote_result = await router_executor.get_swap_quote(
                 token_in=request.token_in,
                 token_out=request.token_out,
-                amount_in=request.amount_in,
+                amount_in=await self._to_raw_amount(request.amount_in, request.token_in, request.chain),
                 chain=request.chain,
                 dex=request.dex
             )
+            if quote_result.get("success"):
+                quote_result["amount_out"] = await self._from_raw_amount(
+                    quote_result["amount_out"], request.token_out, request.chain
+                )
             
             return quote_result
             
@@ -364,42 +537,58 @@ class ExecutionEngine:
                 "error": str(e)
             }
     
+    async def _token_decimals(self, token: str, chain: str) -> int:
+        """Decimals of a token; raises if they cannot be determined."""
+        
+        if token.lower() == NATIVE_TOKEN:
+            return 18
+        decimals = await log_decoder.load_decimals(chain, token)
+        if decimals is None:
+            raise ValueError(f"Unknown decimals for {token} on {chain}")
+        return decimals
+    
+    async def _to_raw_amount(self, amount: Decimal, token: str, chain: str) -> int:
+        """Whole-token amount to the raw integer the router expects."""
+        return int(amount.scaleb(await self._token_decimals(token, chain)))
+    
+    async def _from_raw_amount(self, amount: Any, token: str, chain: str) -> Decimal:
+        """Raw integer amount from the router to whole tokens."""
+        return Decimal(int(amount)).scaleb(-await self._token_decimals(token, chain))
+    
     async def _estimate_position_value_usd(self, amount: Decimal, token: str, chain: str) -> Decimal:
         """Estimate USD value of position."""
         
         # Simplified USD estimation - would use price oracle in production
         if "usdc" in token.lower() or "usdt" in token.lower():
             return amount  # Assume 1:1 for stablecoins
-        elif "weth" in token.lower() or token == "0x0000000000000000000000000000000000000000":
-            return amount * Decimal("2500")  # Approximate ETH price
+        elif "weth" in token.lower() or token.lower() == NATIVE_TOKEN:
+            return amount * NATIVE_PRICE_USD
         else:
             return amount * Decimal("100")  # Default estimate
     
     async def _get_daily_trading_volume(self, user_address: str, is_paper: bool) -> Decimal:
-        """Get user's daily trading volume."""
+        """
+        Get user's daily trading volume from the ledger (reconciles the running counter).
         
-        try:
-            from django.utils import timezone as django_timezone
-            today = django_timezone.now().date()
-            
-            trades = Trade.objects.filter(
-                user_address=user_address,
-                is_paper=is_paper,
-                success=True,
-                executed_at__date=today
-            )
-            
-            total_volume = sum(
-                await self._estimate_position_value_usd(
-                    trade.amount_in, trade.token_in, trade.chain
-                ) for trade in trades
+        Raises on database errors; the counter decides what to keep.
+        """
+        from django.utils import timezone as django_timezone
+        today = django_timezone.now().date()
+        
+        trades = Trade.objects.filter(
+            user_address__iexact=user_address,
+            is_paper=is_paper,
+            success=True,
+            executed_at__date=today
+        )
+        
+        total_volume = Decimal("0")
+        async for trade in trades:
+            total_volume += await self._estimate_position_value_usd(
+                trade.amount_in, trade.token_in, trade.chain
             )
-            
-            return Decimal(str(total_volume))
-            
-        except Exception as e:
-            logger.error(f"Failed to get daily volume: {e}")
-            return Decimal("0")
+        
+        return total_volume
     
     async def _analyze_token_risk(self, token_address: str, chain: str) -> float:
         """Analyze token risk score (0-100)."""
@@ -0,0 +1,267 @@
+"""
+Multi-chain execution scheduler.
+
+Trade requests go into one lane per chain. Each lane is a priority queue
+drained by its own worker, so trades on different chains run in parallel
+while trades on one chain go out one at a time in urgency order. The
+urgency labels are StrategyEngine's (CRITICAL, HIGH, MEDIUM, LOW), so a
+fresh-pair snipe moves ahead of a routine rebalance queued before it.
+
+Orders waiting on the same token pair for the same account are
+deduplicated before they reach the executor:
+
+- Identical request (same direction, amount, slippage, DEX and mode): the
+  later order joins the queued one and shares its result. The queued
+  order keeps the higher of the two urgencies.
+- Same direction with different parameters: both orders run.
+- Opposite direction: the later order supersedes the queued ones, which
+  fail with "superseded".
+
+Orders that are already executing are never touched.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .execution_engine import ExecutionEngine, TradeRequest, TradeResult, execution_engine
+
+logger = logging.getLogger("trading.scheduler")
+
+# StrategyEngine urgency label -> queue priority (lower runs first)
+URGENCY_PRIORITY = {
+    "CRITICAL": 0,
+    "HIGH": 1,
+    "MEDIUM": 2,
+    "LOW": 3,
+}
+DEFAULT_URGENCY = "LOW"
+
+# (chain, account, {token_in, token_out})
+OrderKey = Tuple[str, str, FrozenSet[str]]
+
+
+def _order_key(request: TradeRequest) -> OrderKey:
+    return (
+        request.chain,
+        request.user_address.lower(),
+        frozenset((request.token_in.lower(), request.token_out.lower())),
+    )
+
+
+def _same_order(a: TradeRequest, b: TradeRequest) -> bool:
+    """True if two requests on the same key would trade identically."""
+    return (
+        a.token_in.lower() == b.token_in.lower()
+        and a.amount_in == b.amount_in
+        and a.slippage_bps == b.slippage_bps
+        and a.dex == b.dex
+        and a.is_paper == b.is_paper
+        and a.risk_override == b.risk_override
+    )
+
+
+def _expired(deadline: Optional[datetime]) -> bool:
+    """Deadline check that accepts naive (local) and aware datetimes."""
+    if deadline is None:
+        return False
+    if deadline.tzinfo is None:
+        return datetime.now() > deadline
+    return datetime.now(timezone.utc) > deadline
+
+
+def _failed(message: str) -> TradeResult:
+    return TradeResult(
+        success=False,
+        tx_hash=None,
+        amount_out=None,
+        gas_used=None,
+        effective_slippage_bps=None,
+        error_message=message,
+        execution_time_ms=0,
+        risk_warnings=[]
+    )
+
+
+@dataclass(order=True)
+class ScheduledOrder:
+    """A queued trade request; ordered by (priority, submission order)."""
+    priority: int
+    seq: int
+    request: TradeRequest = field(compare=False)
+    urgency: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    deadline: Optional[datetime] = field(default=None, compare=False)
+    dropped: bool = field(default=False, compare=False)  # Re-queued or superseded; skip
+
+
+class ExecutionScheduler:
+    """Per-chain priority lanes in front of the execution engine."""
+
+    def __init__(self, engine: ExecutionEngine):
+        self.engine = engine
+        self._lanes: Dict[str, asyncio.PriorityQueue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._queued: Dict[OrderKey, List[ScheduledOrder]] = {}
+        self._executing: Dict[str, ScheduledOrder] = {}
+        self._seq = itertools.count()
+
+        self.stats = {
+            "submitted": 0,
+            "executed": 0,
+            "deduplicated": 0,
+            "superseded": 0,
+            "expired": 0,
+        }
+
+    def submit(
+        self,
+        request: TradeRequest,
+        urgency: str = DEFAULT_URGENCY,
+        deadline: Optional[datetime] = None
+    ) -> asyncio.Future:
+        """
+        Queue a trade on its chain's lane.
+
+        Args:
+            request: Trade to execute
+            urgency: StrategyEngine urgency label
+            deadline: Drop the order if it has not started by then
+
+        Returns:
+            Future resolving to the TradeResult
+        """
+        urgency = urgency.upper() if urgency.upper() in URGENCY_PRIORITY else DEFAULT_URGENCY
+        priority = URGENCY_PRIORITY[urgency]
+        key = _order_key(request)
+        self.stats["submitted"] += 1
+
+        for queued in list(self._queued.get(key, ())):
+            if _same_order(queued.request, request):
+                self.stats["deduplicated"] += 1
+                if priority < queued.priority:
+                    # Re-queue the waiting order at the higher urgency
+                    self._unqueue(key, queued)
+                    queued = self._enqueue(key, queued.request, urgency, queued.future, queued.deadline)
+                logger.info(f"Duplicate order on {request.chain} joined the queued one ({queued.urgency})")
+                return queued.future
+
+            if queued.request.token_in.lower() != request.token_in.lower():
+                self._unqueue(key, queued)
+                self.stats["superseded"] += 1
+                if not queued.future.done():
+                    queued.future.set_result(_failed("Superseded by a newer order on the same token"))
+                logger.info(f"Queued {queued.urgency} order on {request.chain} superseded by the opposite side")
+
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(key, request, urgency, future, deadline)
+        return future
+
+    async def execute(
+        self,
+        request: TradeRequest,
+        urgency: str = DEFAULT_URGENCY,
+        deadline: Optional[datetime] = None
+    ) -> TradeResult:
+        """Submit a trade and wait for its result."""
+        return await self.submit(request, urgency, deadline)
+
+    async def stop(self) -> None:
+        """Cancel the lane workers; queued orders fail."""
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+        for orders in self._queued.values():
+            for order in orders:
+                if not order.future.done():
+                    order.future.set_result(_failed("Scheduler stopped"))
+        self._queued.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "stats": dict(self.stats),
+            "lanes": {
+                chain: {
+                    "queued": sum(len(orders) for key, orders in self._queued.items() if key[0] == chain),
+                    "executing": self._executing[chain].urgency if chain in self._executing else None,
+                }
+                for chain in self._lanes
+            },
+        }
+
+    def _enqueue(
+        self,
+        key: OrderKey,
+        request: TradeRequest,
+        urgency: str,
+        future: asyncio.Future,
+        deadline: Optional[datetime]
+    ) -> ScheduledOrder:
+        order = ScheduledOrder(
+            priority=URGENCY_PRIORITY[urgency],
+            seq=next(self._seq),
+            request=request,
+            urgency=urgency,
+            future=future,
+            deadline=deadline,
+        )
+        self._queued.setdefault(key, []).append(order)
+        self._lane(request.chain).put_nowait(order)
+        return order
+
+    def _unqueue(self, key: OrderKey, order: ScheduledOrder) -> None:
+        """Take a waiting order off its key; the lane skips it when popped."""
+        order.dropped = True
+        orders = self._queued.get(key, [])
+        if order in orders:
+            orders.remove(order)
+        if not orders:
+            self._queued.pop(key, None)
+
+    def _lane(self, chain: str) -> asyncio.PriorityQueue:
+        if chain not in self._lanes:
+            self._lanes[chain] = asyncio.PriorityQueue()
+        worker = self._workers.get(chain)
+        if worker is None or worker.done():
+            self._workers[chain] = asyncio.create_task(self._work(chain))
+        return self._lanes[chain]
+
+    async def _work(self, chain: str) -> None:
+        lane = self._lanes[chain]
+        while True:
+            order = await lane.get()
+            if order.dropped:
+                continue
+
+            self._unqueue(_order_key(order.request), order)
+
+            if order.future.done():
+                continue
+
+            self._executing[chain] = order
+            try:
+                if _expired(order.deadline):
+                    self.stats["expired"] += 1
+                    order.future.set_result(_failed("Execution deadline passed"))
+                    continue
+                result = await self.engine.execute_trade(order.request)
+            except Exception as e:
+                logger.error(f"Scheduled trade on {chain} failed: {e}")
+                result = _failed(str(e))
+            finally:
+                self._executing.pop(chain, None)
+
+            self.stats["executed"] += 1
+            if not order.future.done():
+                order.future.set_result(result)
+
+
+# Global execution scheduler instance
+execution_scheduler = ExecutionScheduler(execution_engine)
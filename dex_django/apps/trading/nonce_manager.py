@@ -0,0 +1,351 @@
+# APP: dex_django/apps/trading
+# FILE: nonce_manager.py
+"""
+Async nonce allocation for DEX Sniper Pro
+
+Nonces are reserved locally per (chain, account) instead of being fetched
+from the node for every transaction, so several swaps on the same chain can
+be signed and broadcast back-to-back without waiting on each other.
+
+Lifecycle of a nonce:
+    reserve()  -> in flight (signed / about to be broadcast)
+    submitted() -> broadcast, waiting to be mined
+    confirm()  -> mined (success or revert), forgotten
+    release()  -> never broadcast; handed out again by the next reserve()
+    dropped()  -> broadcast but not mined in time; forgotten, resync scheduled
+
+The local counter is (re)synchronised from eth_getTransactionCount(pending)
+on first use, after nonce errors from the node, after a dropped
+transaction, whenever a broadcast transaction has been waiting longer than
+`stale_after`, and whenever nothing is in flight and the last sync is older
+than `resync_interval`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Node error fragments meaning our local nonce view is wrong
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "already known",
+    "replacement transaction underpriced",
+    "invalid nonce",
+)
+
+# Minimum fee bump most nodes accept for a same-nonce replacement is 10%
+REPLACEMENT_BUMP_PERCENT = 12.5
+
+
+class NonceSource(Protocol):
+    """Anything that can report the pending transaction count (EvmClient)."""
+
+    async def get_transaction_count(self, address: str) -> int:
+        ...
+
+
+@dataclass
+class NonceReservation:
+    """A nonce handed out to one transaction."""
+    chain: str
+    account: str
+    nonce: int
+    reserved_at: float = field(default_factory=time.monotonic)
+    tx_hash: Optional[str] = None
+
+    @property
+    def submitted(self) -> bool:
+        return self.tx_hash is not None
+
+
+@dataclass
+class _AccountNonces:
+    """Local nonce state of one account on one chain."""
+    next_nonce: Optional[int] = None
+    in_flight: Dict[int, NonceReservation] = field(default_factory=dict)
+    gaps: Set[int] = field(default_factory=set)
+    synced_at: float = 0.0
+    needs_resync: bool = True
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class NonceManager:
+    """Per-(chain, account) nonce allocator with gap reuse and resync."""
+
+    def __init__(self, resync_interval: float = 60.0, stale_after: float = 300.0):
+        """
+        Initialize the manager.
+
+        Args:
+            resync_interval: Seconds after which an idle account is resynced
+            stale_after: Seconds after which an unmined broadcast is checked
+                against the node and forgotten if the node no longer has it
+        """
+        self.resync_interval = resync_interval
+        self.stale_after = stale_after
+        self._accounts: Dict[Tuple[str, str], _AccountNonces] = {}
+
+        self.stats = {
+            "reserved": 0,
+            "reused_gaps": 0,
+            "released": 0,
+            "confirmed": 0,
+            "dropped": 0,
+            "resyncs": 0,
+            "nonce_errors": 0,
+        }
+
+    async def reserve(self, chain: str, account: str, source: NonceSource) -> NonceReservation:
+        """
+        Reserve the next nonce for an account.
+
+        Released nonces (gaps) are handed out first, lowest first, so a
+        failed broadcast never leaves later transactions stuck behind it.
+
+        Args:
+            chain: Chain name
+            account: Sending address
+            source: Client used for resyncs (EvmClient)
+
+        Returns:
+            Reservation holding the nonce
+        """
+        state = self._state(chain, account)
+
+        async with state.lock:
+            if self._should_resync(state):
+                await self._resync_locked(chain, account, state, source)
+
+            if state.gaps:
+                nonce = min(state.gaps)
+                state.gaps.discard(nonce)
+                self.stats["reused_gaps"] += 1
+            else:
+                nonce = state.next_nonce
+                state.next_nonce += 1
+
+            reservation = NonceReservation(chain=chain, account=account.lower(), nonce=nonce)
+            state.in_flight[nonce] = reservation
+            self.stats["reserved"] += 1
+
+        logger.debug(f"{chain}: reserved nonce {nonce} for {account}")
+        return reservation
+
+    def submitted(self, reservation: NonceReservation, tx_hash: str) -> None:
+        """Record that the transaction using the nonce was broadcast."""
+        reservation.tx_hash = tx_hash
+
+    def confirm(self, reservation: NonceReservation) -> None:
+        """The transaction was mined (successfully or reverted); forget the nonce."""
+        state = self._state(reservation.chain, reservation.account)
+        if state.in_flight.pop(reservation.nonce, None) is not None:
+            self.stats["confirmed"] += 1
+
+    def dropped(self, reservation: NonceReservation) -> None:
+        """
+        The broadcast transaction was not mined in time (dropped or stuck).
+
+        The nonce is forgotten and the next reserve() resyncs from the node:
+        if the node still has the transaction its nonce stays used, if not it
+        is handed out again.
+        """
+        state = self._state(reservation.chain, reservation.account)
+        if state.in_flight.pop(reservation.nonce, None) is not None:
+            self.stats["dropped"] += 1
+        state.needs_resync = True
+        logger.warning(
+            f"{reservation.chain}: nonce {reservation.nonce} of {reservation.account} "
+            f"not mined ({reservation.tx_hash}); resync scheduled"
+        )
+
+    def release(self, reservation: NonceReservation) -> None:
+        """
+        Give back a nonce whose transaction was never broadcast.
+
+        The top nonce simply rolls the counter back; anything lower becomes a
+        gap that the next reservation fills.
+        """
+        if reservation.submitted:
+            return
+
+        state = self._state(reservation.chain, reservation.account)
+        if state.in_flight.pop(reservation.nonce, None) is None:
+            return
+
+        self.stats["released"] += 1
+        if state.next_nonce is not None and reservation.nonce == state.next_nonce - 1:
+            state.next_nonce -= 1
+            # Gaps directly below the new top collapse into the counter too
+            while state.next_nonce - 1 in state.gaps:
+                state.gaps.discard(state.next_nonce - 1)
+                state.next_nonce -= 1
+        else:
+            state.gaps.add(reservation.nonce)
+
+    def replacement(self, reservation: NonceReservation, tx: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a same-nonce replacement (speed-up or cancel) of a broadcast tx.
+
+        Args:
+            reservation: Reservation of the original transaction
+            tx: Original transaction dict
+
+        Returns:
+            Copy of `tx` with the same nonce and fees bumped enough to replace it
+        """
+        replaced = dict(tx)
+        replaced["nonce"] = reservation.nonce
+        bump = 1 + REPLACEMENT_BUMP_PERCENT / 100
+
+        for key in ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"):
+            if replaced.get(key) is not None:
+                replaced[key] = int(int(replaced[key]) * bump) + 1
+
+        return replaced
+
+    def handle_error(self, chain: str, account: str, error: Exception) -> bool:
+        """
+        Inspect a broadcast error; schedule a resync if it is nonce-related.
+
+        Returns:
+            True if the error was a nonce error
+        """
+        message = str(error).lower()
+        if not any(marker in message for marker in NONCE_ERROR_MARKERS):
+            return False
+
+        self.stats["nonce_errors"] += 1
+        self._state(chain, account).needs_resync = True
+        logger.warning(f"{chain}: nonce error for {account} ({error}); resync scheduled")
+        return True
+
+    async def resync(self, chain: str, account: str, source: NonceSource) -> int:
+        """Force a resync from eth_getTransactionCount(pending); returns the next nonce."""
+        state = self._state(chain, account)
+        async with state.lock:
+            await self._resync_locked(chain, account, state, source)
+            return state.next_nonce
+
+    async def prime(self, chain: str, account: str, source: NonceSource) -> None:
+        """
+        Resync now if the next reserve() would, so that it stays a memory read.
+
+        An idle account is always resynced, since an idle resync falls due
+        after `resync_interval` anyway.
+        """
+        state = self._state(chain, account)
+        async with state.lock:
+            if self._should_resync(state) or (not state.in_flight and not state.gaps):
+                await self._resync_locked(chain, account, state, source)
+
+    @asynccontextmanager
+    async def reservation(
+        self,
+        chain: str,
+        account: str,
+        source: NonceSource
+    ) -> AsyncIterator[NonceReservation]:
+        """
+        Reserve a nonce for the duration of a build/sign/broadcast block.
+
+        If the block raises, or exits without calling `submitted()`, the
+        nonce is released for reuse.
+        """
+        reservation = await self.reserve(chain, account, source)
+        try:
+            yield reservation
+        except Exception as e:
+            self.handle_error(chain, account, e)
+            self.release(reservation)
+            raise
+        else:
+            if not reservation.submitted:
+                self.release(reservation)
+
+    def get_status(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = {"stats": dict(self.stats), "accounts": []}
+        accounts: List[Dict[str, Any]] = status["accounts"]
+        for (chain, account), state in self._accounts.items():
+            accounts.append({
+                "chain": chain,
+                "account": account,
+                "next_nonce": state.next_nonce,
+                "in_flight": sorted(state.in_flight),
+                "gaps": sorted(state.gaps),
+                "needs_resync": state.needs_resync,
+            })
+        return status
+
+    def _state(self, chain: str, account: str) -> _AccountNonces:
+        key = (chain, account.lower())
+        if key not in self._accounts:
+            self._accounts[key] = _AccountNonces()
+        return self._accounts[key]
+
+    def _should_resync(self, state: _AccountNonces) -> bool:
+        if state.needs_resync or state.next_nonce is None:
+            return True
+        if state.in_flight:
+            return self._stale_reservations(state) != []
+        idle = not state.gaps
+        return idle and time.monotonic() - state.synced_at > self.resync_interval
+
+    def _stale_reservations(self, state: _AccountNonces) -> List[int]:
+        cutoff = time.monotonic() - self.stale_after
+        return [
+            nonce for nonce, reservation in state.in_flight.items()
+            if reservation.submitted and reservation.reserved_at < cutoff
+        ]
+
+    async def _resync_locked(
+        self,
+        chain: str,
+        account: str,
+        state: _AccountNonces,
+        source: NonceSource
+    ) -> None:
+        pending = await source.get_transaction_count(account)
+        self.stats["resyncs"] += 1
+
+        # Everything below the node's pending count is known to the node
+        for nonce in [n for n in state.in_flight if n < pending]:
+            state.in_flight.pop(nonce)
+
+        # Broadcasts the node does not count after `stale_after` were dropped
+        for nonce in self._stale_reservations(state):
+            state.in_flight.pop(nonce)
+            self.stats["dropped"] += 1
+        state.gaps = {n for n in state.gaps if n >= pending}
+
+        if state.next_nonce is None or not state.in_flight:
+            next_nonce = pending
+        else:
+            # Keep our own unpropagated reservations ahead of the node's view
+            next_nonce = max(pending, max(state.in_flight) + 1)
+
+        # Nonces between the node's count and our counter that nobody holds
+        # would block everything after them; hand them out first
+        if state.in_flight:
+            held = set(state.in_flight)
+            state.gaps |= {n for n in range(pending, next_nonce) if n not in held}
+        else:
+            state.gaps.clear()
+
+        if state.next_nonce is not None and next_nonce != state.next_nonce:
+            logger.info(f"{chain}: nonce for {account} resynced {state.next_nonce} -> {next_nonce}")
+
+        state.next_nonce = next_nonce
+        state.synced_at = time.monotonic()
+        state.needs_resync = False
+
+
+# Global nonce manager instance
+nonce_manager = NonceManager()
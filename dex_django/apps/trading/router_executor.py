@@ -1,18 +1,36 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 from dataclasses import dataclass
-from web3 import Web3
-from web3.contract import Contract
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
 from eth_account import Account
 import os
 import random  # For realistic slippage simulation
+import time
+
+from apps.chains.evm_client import EvmClient
+from apps.core.endpoints import resolve_rpc_urls
+from apps.chains.gas_oracle import gas_oracle
+from apps.trading.allowance_cache import allowance_cache, approval_warmer
+from apps.trading.nonce_manager import NonceReservation, nonce_manager
+from apps.trading.tx_templates import FEE_TIER, swap_templates, v2_swap_method
 
 logger = logging.getLogger("trading.router")
 
+# Native token as passed to execute_swap (ETH, BNB, MATIC, etc.); the one
+# sentinel address every executor and the execution engine compare against
+NATIVE_TOKEN = "0x0000000000000000000000000000000000000000"
+
+# DEX names reported by the wallet monitor -> router config names
+DEX_ALIASES = {
+    "pancakeswap_v2": "pancake_v2",
+}
+
 # ERC20 Token ABI for approvals
 ERC20_ABI = [
     {
@@ -54,6 +72,8 @@ class RouterExecutor:
     
     def __init__(self):
         self.web3_connections = {}
+        self.evm_clients: Dict[str, EvmClient] = {}  # Async RPC clients (receipt watching)
+        self.rpc_endpoints: Dict[str, str] = {}  # Endpoint per chain, shared by web3 and EvmClient
         self.router_configs = {}
         self.private_key = None  # Will load from encrypted storage
         self.initialized = False
@@ -70,6 +90,14 @@ class RouterExecutor:
             # Load private key (encrypted)
             await self._load_private_key()
             
+            # Keep our allowances current from our own Approval/Transfer logs,
+            # and send background pre-approvals from this account
+            if self.private_key:
+                owner = Account.from_key(self.private_key).address
+                for chain in self.web3_connections:
+                    await allowance_cache.watch(chain, owner)
+                    approval_warmer.register(chain, owner, functools.partial(self._send_approval, chain))
+            
             self.initialized = True
             logger.info("Router executor initialized successfully")
             return True
@@ -143,17 +171,24 @@ class RouterExecutor:
             "base": os.getenv("BASE_RPC_URL", "https://mainnet.base.org/"),
             "polygon": os.getenv("POLYGON_RPC_URL", "https://rpc.ankr.com/polygon")
         }
+        # Nonces, receipts and broadcasts must all see the same node
+        self.rpc_endpoints = {
+            chain: resolve_rpc_urls(chain, [url])[0] for chain, url in rpc_endpoints.items()
+        }
         
-        for chain, rpc_url in rpc_endpoints.items():
+        async def connect(chain: str, rpc_url: str) -> None:
             try:
-                web3 = Web3(Web3.HTTPProvider(rpc_url))
-                if web3.is_connected():
+                web3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc_url))
+                if await asyncio.wait_for(web3.is_connected(), timeout=5.0):
                     self.web3_connections[chain] = web3
                     logger.info(f"Connected to {chain}")
                 else:
                     logger.error(f"Failed to connect to {chain}")
             except Exception as e:
                 logger.error(f"Connection error for {chain}: {e}")
+        
+        # Probe all chains at once; one slow endpoint doesn't delay the others
+        await asyncio.gather(*(connect(chain, url) for chain, url in self.rpc_endpoints.items()))
 
     async def _validate_router_contract(self, router_config: RouterConfig) -> bool:
         """
@@ -169,7 +204,7 @@ class RouterExecutor:
             router_address = web3.to_checksum_address(router_config.router_address)
             
             # Check if contract exists at address
-            code = web3.eth.get_code(router_address)
+            code = await web3.eth.get_code(router_address)
             if code == b'':
                 logger.error(f"No contract at {router_address} on {router_config.chain}")
                 return False
@@ -184,7 +219,7 @@ class RouterExecutor:
             logger.error(f"Router validation failed for {router_config.name}: {e}")
             return False
 
-    async def _validate_v2_router(self, web3: Web3, router_address: str, config: RouterConfig) -> bool:
+    async def _validate_v2_router(self, web3: AsyncWeb3, router_address: str, config: RouterConfig) -> bool:
         """Validate Uniswap V2 style router (has factory() function)."""
         try:
             # V2 routers have factory() function
@@ -199,7 +234,7 @@ class RouterExecutor:
                 }]
             )
             
-            factory_address = router_contract.functions.factory().call()
+            factory_address = await router_contract.functions.factory().call()
             expected_factory = config.factory_address
             
             if factory_address.lower() == expected_factory.lower():
@@ -213,7 +248,7 @@ class RouterExecutor:
             logger.error(f"V2 router validation failed for {config.name}: {e}")
             return False
 
-    async def _validate_v3_router(self, web3: Web3, router_address: str, config: RouterConfig) -> bool:
+    async def _validate_v3_router(self, web3: AsyncWeb3, router_address: str, config: RouterConfig) -> bool:
         """Validate Uniswap V3 style router (has WETH9() function)."""
         try:
             # V3 routers have WETH9() function instead of factory()
@@ -228,7 +263,7 @@ class RouterExecutor:
                 }]
             )
             
-            weth_address = router_contract.functions.WETH9().call()
+            weth_address = await router_contract.functions.WETH9().call()
             
             # V3 validation: check if WETH address is reasonable (not zero)
             if weth_address != "0x0000000000000000000000000000000000000000":
@@ -292,7 +327,7 @@ class RouterExecutor:
             
             # Step 1: Get quote for expected output
             path = [token_in, token_out]
-            amounts_out = router.functions.getAmountsOut(
+            amounts_out = await router.functions.getAmountsOut(
                 int(amount_in), path
             ).call()
             expected_output = amounts_out[-1]
@@ -304,20 +339,33 @@ class RouterExecutor:
             # Step 3: Check token approvals (if not ETH)
             if not self._is_native_token(token_in, chain):
                 approval_result = await self._ensure_token_approval(
-                    web3, token_in, config.router_address, int(amount_in), account
+                    web3, token_in, config.router_address, int(amount_in), account, chain
                 )
                 if not approval_result["success"]:
                     return approval_result
             
-            # Step 4: Build swap transaction
-            tx = await self._build_swap_transaction(
-                web3, router, token_in, token_out, amount_in, min_output, account, chain
+            # Step 4: Build swap transaction on a locally reserved nonce, so
+            # concurrent swaps from this account never wait on each other
+            reservation = await nonce_manager.reserve(
+                chain, account.address, self._get_evm_client(chain)
             )
+            try:
+                tx = await self._build_swap_transaction(
+                    web3, router, token_in, token_out, amount_in, min_output, account, chain,
+                    reservation
+                )
+            except Exception:
+                nonce_manager.release(reservation)
+                raise
             
             # Step 5: Execute transaction
-            result = await self._execute_transaction(web3, tx, account)
+            result = await self._execute_transaction(web3, tx, account, chain, reservation)
             
             if result["success"]:
+                if not self._is_native_token(token_in, chain):
+                    allowance_cache.record_spend(
+                        chain, account.address, token_in, config.router_address, int(amount_in)
+                    )
                 result["amount_out"] = expected_output  # Would get from logs in real impl
                 result["effective_slippage_bps"] = slippage_bps + random.randint(0, 50)
             
@@ -349,7 +397,7 @@ class RouterExecutor:
             
             # Get real quote from DEX
             path = [token_in, token_out]
-            amounts_out = router.functions.getAmountsOut(
+            amounts_out = await router.functions.getAmountsOut(
                 int(amount_in), path
             ).call()
             expected_output = amounts_out[-1]
@@ -372,7 +420,7 @@ class RouterExecutor:
                 "amount_out": int(actual_amount_out),
                 "gas_used": 180000,  # Realistic gas usage
                 "effective_slippage_bps": actual_slippage,
-                "block_number": web3.eth.block_number,
+                "block_number": await web3.eth.block_number,
                 "is_paper": True
             }
             
@@ -382,71 +430,120 @@ class RouterExecutor:
     
     async def _ensure_token_approval(
         self, 
-        web3: Web3, 
+        web3: AsyncWeb3, 
         token_address: str, 
         spender: str, 
         amount: int, 
-        account: Account
+        account: Account,
+        chain: str
     ) -> Dict[str, Any]:
-        """Ensure token approval for router spending."""
+        """
+        Ensure token approval for router spending.
+        
+        The allowance comes from the event-maintained cache when known; an
+        approval already sent by the background warmer is awaited rather
+        than duplicated.
+        """
         
         try:
+            cached = allowance_cache.get(chain, account.address, token_address, spender)
+            if cached is None or cached < amount:
+                pending = approval_warmer.pending(chain, account.address, token_address, spender)
+                if pending is not None:
+                    await asyncio.shield(pending)
+                    cached = allowance_cache.get(chain, account.address, token_address, spender)
+            if cached is not None and cached >= amount:
+                return {"success": True, "message": "Sufficient allowance"}
+            
             token_contract = web3.eth.contract(
                 address=web3.to_checksum_address(token_address),
                 abi=ERC20_ABI
             )
             
             # Check current allowance
-            current_allowance = token_contract.functions.allowance(
+            current_allowance = await token_contract.functions.allowance(
                 account.address, spender
             ).call()
+            allowance_cache.record(chain, account.address, token_address, spender, current_allowance)
             
             if current_allowance >= amount:
                 return {"success": True, "message": "Sufficient allowance"}
             
             logger.info(f"Approving {amount} tokens for {spender}")
             
-            # Build approval transaction
-            approve_tx = token_contract.functions.approve(
-                spender, amount * 2  # Approve 2x amount to reduce future approvals
-            ).buildTransaction({
-                'from': account.address,
-                'gas': 60000,
-                'gasPrice': web3.eth.gas_price,
-                'nonce': web3.eth.get_transaction_count(account.address)
-            })
-            
-            # Sign and send approval
-            signed_tx = web3.eth.account.sign_transaction(approve_tx, self.private_key)
-            tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            # Wait for approval confirmation
-            receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-            
-            if receipt['status'] == 1:
-                logger.info(f"Token approval successful: {tx_hash.hex()}")
-                return {"success": True, "approval_tx": tx_hash.hex()}
-            else:
+            # Approve with headroom (2x by default) to reduce future approvals
+            tx_hash = await self._send_approval(
+                chain, token_address, spender, approval_warmer.policy.amount_for(amount)
+            )
+            if tx_hash is None:
                 return {"success": False, "error": "Approval transaction failed"}
+            
+            logger.info(f"Token approval successful: {tx_hash}")
+            return {"success": True, "approval_tx": tx_hash}
                 
         except Exception as e:
             logger.error(f"Token approval failed: {e}")
             return {"success": False, "error": f"Approval failed: {str(e)}"}
     
+    async def _send_approval(
+        self,
+        chain: str,
+        token_address: str,
+        spender: str,
+        amount: int
+    ) -> Optional[str]:
+        """
+        Approve `amount` of a token to a spender and wait for it to be mined.
+        
+        Also the background approval warmer's sender for this account.
+        
+        Returns:
+            Transaction hash on success, None otherwise
+        """
+        web3 = self.web3_connections[chain]
+        account = Account.from_key(self.private_key)
+        token_contract = web3.eth.contract(
+            address=web3.to_checksum_address(token_address),
+            abi=ERC20_ABI
+        )
+        
+        # Build, sign and send approval under a locally reserved nonce
+        async with nonce_manager.reservation(
+            chain, account.address, self._get_evm_client(chain)
+        ) as reservation:
+            approve_tx = await token_contract.functions.approve(
+                web3.to_checksum_address(spender), amount
+            ).build_transaction({
+                'from': account.address,
+                'gas': 60000,
+                **(await self._get_fee_params(chain, "normal")),
+                'nonce': reservation.nonce
+            })
+            
+            signed_tx = web3.eth.account.sign_transaction(approve_tx, self.private_key)
+            tx_hash = await web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            nonce_manager.submitted(reservation, tx_hash.hex())
+        
+        # Wait for approval confirmation (block-driven, no blocking poll)
+        receipt = await self._wait_for_receipt(chain, tx_hash.hex(), timeout=60)
+        if receipt is None:
+            nonce_manager.dropped(reservation)
+            return None
+        nonce_manager.confirm(reservation)
+        
+        if receipt['status'] != 1:
+            return None
+        
+        allowance_cache.record(chain, account.address, token_address, spender, amount, receipt['blockNumber'])
+        return tx_hash.hex()
+    
     def _is_native_token(self, token_address: str, chain: str) -> bool:
         """Check if token is native (ETH, BNB, MATIC, etc.)"""
-        native_tokens = {
-            "ethereum": "0x0000000000000000000000000000000000000000",
-            "bsc": "0x0000000000000000000000000000000000000000", 
-            "polygon": "0x0000000000000000000000000000000000000000",
-            "base": "0x0000000000000000000000000000000000000000"
-        }
-        
-        return token_address.lower() == native_tokens.get(chain, "").lower()
+        return token_address.lower() == NATIVE_TOKEN
     
     async def _calculate_min_output(
         self,
-        router: Contract,
+        router: AsyncContract,
         token_in: str,
         token_out: str,
         amount_in: Decimal,
@@ -457,7 +554,7 @@ class RouterExecutor:
         try:
             # Get amounts out from router
             path = [token_in, token_out]
-            amounts_out = router.functions.getAmountsOut(
+            amounts_out = await router.functions.getAmountsOut(
                 int(amount_in),
                 path
             ).call()
@@ -477,25 +574,33 @@ class RouterExecutor:
     
     async def _build_swap_transaction(
         self,
-        web3: Web3,
-        router: Contract,
+        web3: AsyncWeb3,
+        router: AsyncContract,
         token_in: str,
         token_out: str,
         amount_in: Decimal,
         amount_out_min: int,
         account: Account,
-        chain: str
+        chain: str,
+        reservation: NonceReservation
     ) -> Dict[str, Any]:
         """Build swap transaction data for the specific chain and tokens."""
         
-        deadline = int(asyncio.get_event_loop().time()) + 300  # 5 minutes
+        deadline = int(time.time()) + 300  # 5 minutes
         path = [web3.to_checksum_address(token_in), web3.to_checksum_address(token_out)]
         
+        # Warm path: pre-encoded calldata and gas, only amounts and deadline patched
+        method = v2_swap_method(self._is_native_token(token_in, chain), self._is_native_token(token_out, chain))
+        template = swap_templates.get(chain, router.address, method, path, account.address)
+        if template is not None:
+            fees = await self._get_fee_params(chain, FEE_TIER)
+            return template.build(int(amount_in), amount_out_min, deadline, reservation.nonce, fees)
+        
         base_tx_data = {
             'from': account.address,
             'gas': 300000,  # Will be estimated
-            'gasPrice': await self._get_optimal_gas_price(web3),
-            'nonce': web3.eth.get_transaction_count(account.address)
+            **(await self._get_fee_params(chain, "fast")),
+            'nonce': reservation.nonce
         }
         
         # Choose appropriate swap function
@@ -530,11 +635,11 @@ class RouterExecutor:
             )
         
         # Build transaction with function
-        tx = function.buildTransaction(base_tx_data)
+        tx = await function.build_transaction(base_tx_data)
         
         # Estimate gas more accurately
         try:
-            estimated_gas = web3.eth.estimate_gas(tx)
+            estimated_gas = await web3.eth.estimate_gas(tx)
             tx['gas'] = int(estimated_gas * 1.2)  # 20% buffer
         except Exception as e:
             logger.warning(f"Gas estimation failed: {e}, using default")
@@ -542,20 +647,45 @@ class RouterExecutor:
         
         return tx
     
-    async def _execute_transaction(self, web3: Web3, tx: Dict[str, Any], account: Account) -> Dict[str, Any]:
+    async def _execute_transaction(
+        self,
+        web3: AsyncWeb3,
+        tx: Dict[str, Any],
+        account: Account,
+        chain: str,
+        reservation: NonceReservation
+    ) -> Dict[str, Any]:
         """Sign and execute transaction with proper error handling."""
         
         try:
             # Sign transaction
             signed_tx = web3.eth.account.sign_transaction(tx, self.private_key)
             
-            # Send transaction
-            tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            # Send transaction; a failed broadcast hands the nonce back
+            try:
+                tx_hash = await web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            except Exception as e:
+                nonce_manager.handle_error(chain, account.address, e)
+                raise
+            nonce_manager.submitted(reservation, tx_hash.hex())
+            
+            logger.info(f"Transaction sent: {tx_hash.hex()} (nonce {reservation.nonce})")
             
-            logger.info(f"Transaction sent: {tx_hash.hex()}")
+            # Wait for confirmation (block-driven, no blocking poll)
+            receipt = await self._wait_for_receipt(chain, tx_hash.hex(), timeout=120)
             
-            # Wait for confirmation
-            receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            if receipt is not None:
+                # Mined, whether it succeeded or reverted
+                nonce_manager.confirm(reservation)
+            
+            if receipt is None:
+                # Dropped or stuck: forget the nonce and resync from the node
+                nonce_manager.dropped(reservation)
+                return {
+                    "success": False,
+                    "error": "Transaction not confirmed within 120s",
+                    "tx_hash": tx_hash.hex()
+                }
             
             if receipt['status'] == 1:
                 logger.info(f"Transaction confirmed in block {receipt['blockNumber']}")
@@ -564,7 +694,9 @@ class RouterExecutor:
                     "tx_hash": tx_hash.hex(),
                     "gas_used": receipt['gasUsed'],
                     "block_number": receipt['blockNumber'],
-                    "effective_gas_price": receipt.get('effectiveGasPrice', tx['gasPrice'])
+                    "effective_gas_price": receipt.get(
+                        'effectiveGasPrice', tx.get('gasPrice', tx.get('maxFeePerGas'))
+                    )
                 }
             else:
                 logger.error(f"Transaction reverted: {tx_hash.hex()}")
@@ -575,25 +707,99 @@ class RouterExecutor:
                 }
                 
         except Exception as e:
+            if reservation.submitted:
+                nonce_manager.dropped(reservation)
+            else:
+                nonce_manager.release(reservation)
             logger.error(f"Transaction execution failed: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _get_optimal_gas_price(self, web3: Web3) -> int:
-        """Get optimal gas price for fast execution."""
+    def router_dex(self, chain: str, dex_name: str) -> Optional[str]:
+        """Router config name for a DEX name seen on chain; None if not configured."""
+        dex = DEX_ALIASES.get(dex_name, dex_name)
+        return dex if f"{dex}_{chain}" in self.router_configs else None
+    
+    async def warm_swap_template(
+        self,
+        token_in: str,
+        token_out: str,
+        chain: str,
+        dex: str,
+        amount_hint: int = 0
+    ) -> bool:
+        """
+        Pre-build the swap transaction for a likely trade (V2-style routers).
         
+        Later swaps of this pair skip ABI encoding and gas estimation in
+        `_build_swap_transaction`. Only reads from chain; nothing is sent.
+        """
+        config = self.router_configs.get(f"{dex}_{chain}")
+        if not self.initialized or not self.private_key or not config or config.fee_tiers:
+            return False
+        
+        account = Account.from_key(self.private_key)
+        method = v2_swap_method(self._is_native_token(token_in, chain), self._is_native_token(token_out, chain))
+        template = await swap_templates.warm(
+            chain, config.router_address, method, [token_in, token_out], account.address,
+            self._get_evm_client(chain), amount_hint=amount_hint
+        )
+        return template is not None
+    
+    async def pre_approve(self, token: str, chain: str, dex: str, amount: int) -> bool:
+        """
+        Queue a background approval of `token` to the DEX router ahead of a sell.
+        
+        Sends a transaction, so only call it for tokens we are trading.
+        
+        Returns:
+            True if an approval was queued
+        """
+        config = self.router_configs.get(f"{dex}_{chain}")
+        if not self.initialized or not self.private_key or not config or self._is_native_token(token, chain):
+            return False
+        
+        account = Account.from_key(self.private_key)
+        return await approval_warmer.request(chain, account.address, token, config.router_address, amount)
+    
+    def _get_evm_client(self, chain: str) -> EvmClient:
+        """Async client for a chain on the same endpoint as its web3 connection (created on first use)."""
+        if chain not in self.evm_clients:
+            endpoint = self.rpc_endpoints.get(chain)
+            self.evm_clients[chain] = EvmClient(chain, rpc_urls=[endpoint] if endpoint else None)
+        return self.evm_clients[chain]
+    
+    async def _wait_for_receipt(self, chain: str, tx_hash: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a receipt without blocking the event loop.
+        
+        Uses the chain's EvmClient, which checks all pending receipts once
+        per new block. Quantity fields are returned as ints like web3 receipts.
+        """
+        receipt = await self._get_evm_client(chain).wait_for_receipt(tx_hash, timeout=timeout)
+        if receipt is None:
+            return None
+        
+        normalized = dict(receipt)
+        for key in ("blockNumber", "gasUsed", "effectiveGasPrice", "status"):
+            if isinstance(normalized.get(key), str):
+                normalized[key] = int(normalized[key], 16)
+        return normalized
+    
+    async def _get_fee_params(self, chain: str, tier: str) -> Dict[str, int]:
+        """
+        Fee fields for a transaction from the background gas oracle.
+        
+        EIP-1559 chains get maxFeePerGas/maxPriorityFeePerGas, others gasPrice.
+        The estimate is refreshed every block, so this is a memory read.
+        """
         try:
-            # Get current gas price
-            current_gas = web3.eth.gas_price
-            
-            # Add 20% premium for faster inclusion
-            optimal_gas = int(current_gas * 1.2)
-            
-            logger.debug(f"Current gas: {current_gas}, Optimal gas: {optimal_gas}")
-            return optimal_gas
+            fees = await gas_oracle.get_fees(chain, tier)
+            logger.debug(f"{chain} {tier} fees: {fees.to_dict()}")
+            return fees.to_tx_params()
             
         except Exception as e:
-            logger.warning(f"Failed to get gas price, using default: {e}")
-            return 50_000_000_000  # 50 gwei fallback
+            logger.warning(f"Gas oracle unavailable for {chain}, using default: {e}")
+            return {'gasPrice': 50_000_000_000}  # 50 gwei fallback
 
     # NEW: Real quote method
     async def get_swap_quote(
@@ -620,7 +826,7 @@ class RouterExecutor:
             )
             
             path = [web3.to_checksum_address(token_in), web3.to_checksum_address(token_out)]
-            amounts_out = router.functions.getAmountsOut(int(amount_in), path).call()
+            amounts_out = await router.functions.getAmountsOut(int(amount_in), path).call()
             
             expected_output = amounts_out[-1]
             
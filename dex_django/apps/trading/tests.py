@@ -1,3 +1,658 @@
-from django.test import TestCase
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from eth_abi import encode
+
+from apps.trading.allowance_cache import (
+    APPROVAL_TOPIC,
+    MAX_UINT256,
+    TRANSFER_TOPIC,
+    AllowanceCache,
+    ApprovalPolicy,
+    ApprovalWarmer,
+    approve_calldata,
+)
+from apps.trading.execution_engine import (
+    DailyVolumeCounter,
+    ExecutionEngine,
+    TradeRequest,
+    TradeResult,
+)
+from apps.trading.execution_scheduler import ExecutionScheduler
+from apps.trading.nonce_manager import NonceManager
+
+CHAIN = "ethereum"
+ACCOUNT = "0x" + "aa" * 20
+OTHER_ACCOUNT = "0x" + "bb" * 20
+TOKEN = "0x" + "cc" * 20
+ROUTER = "0x" + "dd" * 20
+
+
+class FakeNonceSource:
+    """Node stand-in reporting a settable pending transaction count."""
+
+    def __init__(self, pending=0):
+        self.pending = pending
+        self.calls = 0
+
+    async def get_transaction_count(self, address):
+        self.calls += 1
+        return self.pending
+
+
+class NonceManagerTests(SimpleTestCase):
+    """Local nonce allocation, gap reuse and resync after drops and errors."""
+
+    async def test_reservations_are_sequential_after_one_sync(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+
+        nonces = [(await manager.reserve(CHAIN, ACCOUNT, source)).nonce for _ in range(3)]
+
+        self.assertEqual(nonces, [5, 6, 7])
+        self.assertEqual(source.calls, 1)
+
+    async def test_released_top_nonce_rolls_the_counter_back(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        await manager.reserve(CHAIN, ACCOUNT, source)
+        top = await manager.reserve(CHAIN, ACCOUNT, source)
+
+        manager.release(top)
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 6)
+        self.assertEqual(manager.stats["reused_gaps"], 0)
+
+    async def test_released_lower_nonce_is_reused_first(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        reservations = [await manager.reserve(CHAIN, ACCOUNT, source) for _ in range(3)]
+
+        manager.release(reservations[0])
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 5)
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 8)
+        self.assertEqual(manager.stats["reused_gaps"], 1)
+
+    async def test_gaps_below_released_top_collapse_into_counter(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        first, second, third = [await manager.reserve(CHAIN, ACCOUNT, source) for _ in range(3)]
+
+        manager.release(second)
+        manager.release(third)
+
+        status = manager.get_status()["accounts"][0]
+        self.assertEqual(status["next_nonce"], 6)
+        self.assertEqual(status["gaps"], [])
+        self.assertEqual(status["in_flight"], [first.nonce])
+
+    async def test_submitted_nonce_is_not_released(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        reservation = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(reservation, "0xhash")
+
+        manager.release(reservation)
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 6)
+
+    async def test_dropped_transaction_nonce_is_handed_out_after_resync(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        dropped = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(dropped, "0xdropped")
+        later = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(later, "0xlater")
+
+        # The node never saw nonce 5, so it still reports 5 pending
+        manager.dropped(dropped)
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 5)
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 7)
+        self.assertEqual(source.calls, 2)
+        self.assertEqual(manager.stats["dropped"], 1)
+
+    async def test_dropped_nonce_the_node_kept_stays_used(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        reservation = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(reservation, "0xslow")
+
+        manager.dropped(reservation)
+        source.pending = 6
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 6)
+
+    async def test_stale_broadcast_is_dropped_on_resync(self):
+        manager = NonceManager(stale_after=0.0)
+        source = FakeNonceSource(pending=5)
+        reservation = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(reservation, "0xstuck")
+
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 5)
+        self.assertEqual(manager.stats["dropped"], 1)
+
+    async def test_confirmed_nonce_is_forgotten(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        reservation = await manager.reserve(CHAIN, ACCOUNT, source)
+        manager.submitted(reservation, "0xmined")
+
+        manager.confirm(reservation)
+
+        self.assertEqual(manager.get_status()["accounts"][0]["in_flight"], [])
+        self.assertEqual(manager.stats["confirmed"], 1)
+
+    async def test_nonce_error_in_reservation_block_releases_and_resyncs(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+
+        with self.assertRaises(ValueError):
+            async with manager.reservation(CHAIN, ACCOUNT, source) as reservation:
+                self.assertEqual(reservation.nonce, 5)
+                raise ValueError("nonce too low: next nonce 9")
+
+        source.pending = 9
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 9)
+        self.assertEqual(manager.stats["nonce_errors"], 1)
+        self.assertEqual(manager.stats["released"], 1)
+
+    async def test_other_errors_do_not_resync(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+
+        self.assertFalse(manager.handle_error(CHAIN, ACCOUNT, RuntimeError("insufficient funds")))
+        await manager.reserve(CHAIN, ACCOUNT, source)
+        await manager.reserve(CHAIN, ACCOUNT, source)
+        self.assertEqual(source.calls, 1)
+
+    async def test_prime_syncs_idle_account(self):
+        manager = NonceManager()
+        source = FakeNonceSource(pending=5)
+        await manager.prime(CHAIN, ACCOUNT, source)
+        source.pending = 7
+
+        await manager.prime(CHAIN, ACCOUNT, source)
+
+        self.assertEqual(source.calls, 2)
+        self.assertEqual((await manager.reserve(CHAIN, ACCOUNT, source)).nonce, 7)
+        self.assertEqual(source.calls, 2)
+
+    def test_replacement_bumps_fees_and_keeps_nonce(self):
+        manager = NonceManager()
+        reservation = type("Reservation", (), {"nonce": 5})()
+
+        replaced = manager.replacement(reservation, {"nonce": 9, "maxFeePerGas": 100, "maxPriorityFeePerGas": 8})
+
+        self.assertEqual(replaced["nonce"], 5)
+        self.assertGreaterEqual(replaced["maxFeePerGas"], 111)
+        self.assertGreaterEqual(replaced["maxPriorityFeePerGas"], 9)
+
+
+def topic(address):
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def allowance_log(event, owner, other, value, block):
+    return {
+        "address": TOKEN,
+        "topics": [event, topic(owner), topic(other)],
+        "data": "0x" + format(value, "064x"),
+        "blockNumber": hex(block),
+    }
+
+
+def offline_cache(chain_allowances=None):
+    """Allowance cache that reads `chain_allowances` instead of the node and persists nothing."""
+    cache = AllowanceCache()
+    cache.loaded = True
+    cache._persist = lambda key: None
+    chain_allowances = chain_allowances if chain_allowances is not None else {}
+
+    async def refresh(chain, owner, token, spender):
+        amount = chain_allowances.get(owner.lower(), 0)
+        cache.stats["chain_reads"] += 1
+        cache.record(chain, owner, token, spender, amount)
+        return amount
+
+    cache.refresh = refresh
+    return cache
+
+
+class FakeApprover:
+    """Approval sender recording (token, spender, amount) per call."""
+
+    def __init__(self, tx_hash="0xapproved"):
+        self.tx_hash = tx_hash
+        self.calls = []
+
+    async def __call__(self, token, spender, amount):
+        self.calls.append((token, spender, amount))
+        return self.tx_hash
+
+
+class AllowanceCacheTests(SimpleTestCase):
+    """Allowances kept current from Approval and Transfer logs."""
+
+    def test_approve_calldata_matches_abi_encoding(self):
+        calldata = approve_calldata(ROUTER, 10**18)
+
+        self.assertEqual(calldata, "0x095ea7b3" + encode(["address", "uint256"], [ROUTER, 10**18]).hex())
+
+    def test_approval_log_sets_allowance(self):
+        cache = offline_cache()
+
+        cache._on_log(CHAIN, ACCOUNT, allowance_log(APPROVAL_TOPIC, ACCOUNT, ROUTER, 500, 10))
+
+        self.assertEqual(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), 500)
+        self.assertEqual(cache.stats["approval_events"], 1)
+
+    def test_older_approval_log_does_not_overwrite(self):
+        cache = offline_cache()
+        cache._on_log(CHAIN, ACCOUNT, allowance_log(APPROVAL_TOPIC, ACCOUNT, ROUTER, 500, 10))
+
+        cache._on_log(CHAIN, ACCOUNT, allowance_log(APPROVAL_TOPIC, ACCOUNT, ROUTER, 100, 9))
+
+        self.assertEqual(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), 500)
+
+    async def test_transfer_log_marks_finite_allowance_stale_and_rereads(self):
+        cache = offline_cache({ACCOUNT: 300})
+        cache.record(CHAIN, ACCOUNT, TOKEN, ROUTER, 500)
+
+        cache._on_log(CHAIN, ACCOUNT, allowance_log(TRANSFER_TOPIC, ACCOUNT, ROUTER, 200, 11))
+
+        self.assertIsNone(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER))
+        await asyncio.sleep(0)
+        self.assertEqual(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), 300)
+
+    def test_transfer_log_leaves_unlimited_allowance(self):
+        cache = offline_cache()
+        cache.record(CHAIN, ACCOUNT, TOKEN, ROUTER, MAX_UINT256)
+
+        cache._on_log(CHAIN, ACCOUNT, allowance_log(TRANSFER_TOPIC, ACCOUNT, ROUTER, 200, 11))
+
+        self.assertEqual(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), MAX_UINT256)
+
+    def test_own_swap_is_counted_against_allowance(self):
+        cache = offline_cache()
+        cache.record(CHAIN, ACCOUNT, TOKEN, ROUTER, 500)
+
+        cache.record_spend(CHAIN, ACCOUNT, TOKEN, ROUTER, 200)
+
+        self.assertEqual(cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), 300)
+
+    async def test_allowance_miss_reads_chain_once(self):
+        cache = offline_cache({ACCOUNT: 700})
+
+        self.assertEqual(await cache.allowance(CHAIN, ACCOUNT, TOKEN, ROUTER), 700)
+        self.assertEqual(await cache.allowance(CHAIN, ACCOUNT, TOKEN, ROUTER), 700)
+        self.assertEqual(cache.stats["chain_reads"], 1)
+        self.assertEqual(cache.stats["hits"], 1)
+
+
+class ApprovalWarmerTests(SimpleTestCase):
+    """Background approvals per (chain, owner) with dedupe and hygiene limits."""
+
+    async def test_each_owner_approves_with_its_own_sender(self):
+        warmer = ApprovalWarmer(offline_cache())
+        first, second = FakeApprover("0xfirst"), FakeApprover("0xsecond")
+        warmer.register(CHAIN, ACCOUNT, first)
+        warmer.register(CHAIN, OTHER_ACCOUNT, second)
+
+        self.assertTrue(await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100))
+        self.assertTrue(await warmer.request(CHAIN, OTHER_ACCOUNT, TOKEN, ROUTER, 50))
+        await warmer.pending(CHAIN, OTHER_ACCOUNT, TOKEN, ROUTER)
+
+        self.assertEqual(first.calls, [(TOKEN, ROUTER, 200)])
+        self.assertEqual(second.calls, [(TOKEN, ROUTER, 100)])
+        self.assertEqual(warmer.cache.get(CHAIN, OTHER_ACCOUNT, TOKEN, ROUTER), 100)
+        self.assertEqual(len(warmer.get_stats()["accounts"]), 2)
+
+    async def test_unregistered_owner_is_not_approved(self):
+        warmer = ApprovalWarmer(offline_cache())
+        warmer.register(CHAIN, ACCOUNT, FakeApprover())
+
+        self.assertFalse(await warmer.request(CHAIN, OTHER_ACCOUNT, TOKEN, ROUTER, 100))
+        self.assertFalse(await warmer.request("bsc", ACCOUNT, TOKEN, ROUTER, 100))
+
+    async def test_duplicate_request_waits_on_pending_approval(self):
+        warmer = ApprovalWarmer(offline_cache())
+        approver = FakeApprover()
+        warmer.register(CHAIN, ACCOUNT, approver)
+
+        self.assertTrue(await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100))
+        self.assertFalse(await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100))
+        self.assertTrue(await warmer.pending(CHAIN, ACCOUNT, TOKEN, ROUTER))
+
+        self.assertEqual(len(approver.calls), 1)
+        self.assertIsNone(warmer.pending(CHAIN, ACCOUNT, TOKEN, ROUTER))
+
+    async def test_sufficient_allowance_is_not_approved_again(self):
+        warmer = ApprovalWarmer(offline_cache({ACCOUNT: 1000}))
+        approver = FakeApprover()
+        warmer.register(CHAIN, ACCOUNT, approver)
+
+        self.assertFalse(await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100))
+
+        self.assertEqual(approver.calls, [])
+        self.assertEqual(warmer.stats["already_approved"], 1)
+
+    async def test_hourly_budget_limits_approvals(self):
+        warmer = ApprovalWarmer(offline_cache(), ApprovalPolicy(max_approvals_per_hour=1))
+        approver = FakeApprover()
+        warmer.register(CHAIN, ACCOUNT, approver)
+        other_token = "0x" + "ee" * 20
+
+        await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100)
+        await warmer.request(CHAIN, ACCOUNT, other_token, ROUTER, 100)
+
+        self.assertFalse(await warmer.pending(CHAIN, ACCOUNT, other_token, ROUTER))
+        self.assertEqual(len(approver.calls), 1)
+        self.assertEqual(warmer.stats["rate_limited"], 1)
+
+    async def test_failed_approval_resolves_pending_false(self):
+        warmer = ApprovalWarmer(offline_cache())
+        warmer.register(CHAIN, ACCOUNT, FakeApprover(tx_hash=None))
+
+        await warmer.request(CHAIN, ACCOUNT, TOKEN, ROUTER, 100)
+
+        self.assertFalse(await warmer.pending(CHAIN, ACCOUNT, TOKEN, ROUTER))
+        self.assertEqual(warmer.cache.get(CHAIN, ACCOUNT, TOKEN, ROUTER), 0)
+        self.assertEqual(warmer.stats["failed"], 1)
+
+
+WETH = "0x" + "11" * 20
+
+
+def trade(token_in=WETH, token_out=TOKEN, amount="1", chain=CHAIN, dex="uniswap_v2", is_paper=True):
+    return TradeRequest(
+        token_in=token_in,
+        token_out=token_out,
+        amount_in=Decimal(amount),
+        chain=chain,
+        dex=dex,
+        slippage_bps=100,
+        user_address=ACCOUNT,
+        is_paper=is_paper,
+    )
+
+
+def ok_result(amount_out=Decimal("1")):
+    return TradeResult(
+        success=True,
+        tx_hash="0xpaper",
+        amount_out=amount_out,
+        gas_used=21000,
+        effective_slippage_bps=0,
+        error_message=None,
+        execution_time_ms=1,
+        risk_warnings=[]
+    )
+
+
+class FakeEngine:
+    """Execution engine stand-in; trades wait on `gate` and are recorded in order."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.started = asyncio.Event()
+        self.executed = []
+
+    async def execute_trade(self, request):
+        self.started.set()
+        await self.gate.wait()
+        self.executed.append(request)
+        return ok_result(request.amount_in)
+
+
+class ExecutionSchedulerTests(SimpleTestCase):
+    """Per-chain lanes: urgency order, dedupe, supersede and deadlines."""
+
+    def setUp(self):
+        self.engine = FakeEngine()
+        self.scheduler = ExecutionScheduler(self.engine)
+
+    async def hold_lane(self, chain=CHAIN):
+        """Occupy a chain's lane with a running trade so later orders stay queued."""
+        self.engine.gate.clear()
+        blocker = self.scheduler.submit(trade(token_out="0x" + "99" * 20, chain=chain), "LOW")
+        await asyncio.wait_for(self.engine.started.wait(), 1)
+        return blocker
+
+    async def test_higher_urgency_runs_first(self):
+        await self.hold_lane()
+        low = self.scheduler.submit(trade(amount="1"), "LOW")
+        medium = self.scheduler.submit(trade(amount="2"), "medium")
+        critical = self.scheduler.submit(trade(amount="3"), "CRITICAL")
+
+        self.engine.gate.set()
+        await asyncio.wait_for(asyncio.gather(low, medium, critical), 1)
+
+        self.assertEqual([r.amount_in for r in self.engine.executed[1:]], [Decimal("3"), Decimal("2"), Decimal("1")])
+
+    async def test_identical_order_joins_queued_one(self):
+        await self.hold_lane()
+        first = self.scheduler.submit(trade(), "LOW")
+        second = self.scheduler.submit(trade(), "LOW")
+
+        self.assertIs(first, second)
+        self.engine.gate.set()
+        result = await asyncio.wait_for(first, 1)
+
+        self.assertTrue(result.success)
+        self.assertEqual(len(self.engine.executed), 2)
+        self.assertEqual(self.scheduler.stats["deduplicated"], 1)
+
+    async def test_duplicate_raises_urgency_of_queued_order(self):
+        await self.hold_lane()
+        other = self.scheduler.submit(trade(token_out="0x" + "77" * 20), "HIGH")
+        joined = self.scheduler.submit(trade(), "LOW")
+        self.scheduler.submit(trade(), "CRITICAL")
+
+        self.engine.gate.set()
+        await asyncio.wait_for(asyncio.gather(other, joined), 1)
+
+        self.assertEqual([r.token_out for r in self.engine.executed[1:]], [TOKEN, "0x" + "77" * 20])
+
+    async def test_same_side_with_different_amount_both_run(self):
+        await self.hold_lane()
+        first = self.scheduler.submit(trade(amount="1"))
+        second = self.scheduler.submit(trade(amount="2"))
+
+        self.engine.gate.set()
+        results = await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(self.engine.executed), 3)
+
+    async def test_opposite_side_supersedes_queued_order(self):
+        await self.hold_lane()
+        buy = self.scheduler.submit(trade(WETH, TOKEN))
+        sell = self.scheduler.submit(trade(TOKEN, WETH))
+
+        superseded = await asyncio.wait_for(buy, 1)
+        self.engine.gate.set()
+        await asyncio.wait_for(sell, 1)
+
+        self.assertFalse(superseded.success)
+        self.assertIn("Superseded", superseded.error_message)
+        self.assertEqual([r.token_in for r in self.engine.executed[1:]], [TOKEN])
+        self.assertEqual(self.scheduler.stats["superseded"], 1)
+
+    async def test_executing_order_is_not_superseded(self):
+        blocker = await self.hold_lane()
+        self.scheduler.submit(trade("0x" + "99" * 20, WETH))
+
+        self.engine.gate.set()
+
+        self.assertTrue((await asyncio.wait_for(blocker, 1)).success)
+
+    async def test_expired_order_is_not_executed(self):
+        await self.hold_lane()
+        expired = self.scheduler.submit(trade(), "HIGH", datetime.now(timezone.utc) - timedelta(seconds=1))
+
+        self.engine.gate.set()
+        result = await asyncio.wait_for(expired, 1)
+
+        self.assertFalse(result.success)
+        self.assertEqual(len(self.engine.executed), 1)
+        self.assertEqual(self.scheduler.stats["expired"], 1)
+
+    async def test_chains_run_in_parallel(self):
+        await self.hold_lane(CHAIN)
+
+        other_chain = self.scheduler.submit(trade(chain="bsc"))
+        await asyncio.sleep(0)
+        self.engine.gate.set()
+
+        self.assertTrue((await asyncio.wait_for(other_chain, 1)).success)
+        self.assertEqual(set(self.scheduler.get_status()["lanes"]), {CHAIN, "bsc"})
+
+
+def ledger(volume="0"):
+    async def load(user_address, is_paper):
+        return Decimal(volume)
+    return load
+
+
+class DailyVolumeCounterTests(SimpleTestCase):
+    """Running daily volume with reservations held by in-flight trades."""
+
+    async def test_first_read_loads_ledger(self):
+        counter = DailyVolumeCounter(ledger("1200"))
+
+        self.assertEqual(await counter.get(ACCOUNT, True), Decimal("1200"))
+        self.assertEqual(await counter.get(ACCOUNT, False), Decimal("1200"))
+
+    async def test_failed_first_load_raises(self):
+        async def broken(user_address, is_paper):
+            raise RuntimeError("database unavailable")
+
+        with self.assertRaises(RuntimeError):
+            await DailyVolumeCounter(broken).get(ACCOUNT, False)
+
+    async def test_reservations_count_against_limit(self):
+        counter = DailyVolumeCounter(ledger("0"))
+        await counter.get(ACCOUNT, False)
+
+        self.assertTrue(counter.reserve(ACCOUNT, False, Decimal("600"), Decimal("1000")))
+        self.assertFalse(counter.reserve(ACCOUNT, False, Decimal("600"), Decimal("1000")))
+
+        counter.release(ACCOUNT, False, Decimal("600"))
+
+        self.assertTrue(counter.reserve(ACCOUNT, False, Decimal("600"), Decimal("1000")))
+
+    async def test_commit_turns_reservation_into_volume(self):
+        counter = DailyVolumeCounter(ledger("100"))
+        await counter.get(ACCOUNT, False)
+        counter.reserve(ACCOUNT, False, Decimal("50"), Decimal("1000"))
+
+        counter.commit(ACCOUNT, False, Decimal("50"))
+        counter.release(ACCOUNT, False, Decimal("50"))
+
+        self.assertEqual(await counter.get(ACCOUNT, False), Decimal("150"))
+
+
+class ExecutionGateTests(SimpleTestCase):
+    """Concurrent pre-trade gates and the daily-volume reservation they hold."""
+
+    def setUp(self):
+        self.engine = ExecutionEngine()
+        self.engine._daily_volume = DailyVolumeCounter(ledger("0"))
+        self.risk_started = asyncio.Event()
+        self.risk_release = asyncio.Event()
+        self.risk_release.set()
+        self.preflight = {"success": True}
+
+        async def position_value(amount, token, chain):
+            return Decimal("1000")
+
+        async def token_risk(token, chain):
+            self.risk_started.set()
+            await self.risk_release.wait()
+            return 10
+
+        async def preflight(request):
+            return self.preflight
+
+        async def quote(request):
+            return {"success": True, "amount_out": Decimal("1")}
+
+        async def paper_trade(request, quote):
+            return ok_result()
+
+        async def nothing(*args):
+            return None
+
+        self.engine._estimate_position_value_usd = position_value
+        self.engine._analyze_token_risk = token_risk
+        self.engine._preflight_checks = preflight
+        self.engine._get_real_quote = quote
+        self.engine._execute_paper_trade = paper_trade
+        self.engine._record_trade = nothing
+        self.engine._update_portfolio = nothing
+
+    async def volume(self):
+        return await self.engine._daily_volume.get(ACCOUNT, False)
+
+    async def test_failed_gate_cancels_risk_gate_and_releases_reservation(self):
+        self.risk_release.clear()
+        failing = {"success": False, "error": "Insufficient balance"}
+
+        async def preflight(request):
+            # Fail once the risk gate holds its reservation
+            await self.risk_started.wait()
+            return failing
+
+        self.engine._preflight_checks = preflight
+
+        result = await self.engine.execute_trade(trade(is_paper=False))
+        await asyncio.sleep(0)
+
+        self.assertFalse(result.success)
+        self.assertEqual(result.error_message, "Insufficient balance")
+        self.assertEqual(await self.volume(), Decimal("0"))
+
+    async def test_failed_gate_after_risk_passed_releases_reservation(self):
+        risk_done = asyncio.Event()
+        assess = self.engine._assess_trade_risk
+
+        async def assess_then_signal(request):
+            outcome = await assess(request)
+            risk_done.set()
+            return outcome
+
+        async def preflight(request):
+            await risk_done.wait()
+            return {"success": False, "error": "Insufficient balance"}
+
+        self.engine._assess_trade_risk = assess_then_signal
+        self.engine._preflight_checks = preflight
+
+        result = await self.engine.execute_trade(trade(is_paper=False))
+
+        self.assertFalse(result.success)
+        self.assertEqual(await self.volume(), Decimal("0"))
+
+    async def test_blocked_risk_gate_fails_trade(self):
+        async def position_value(amount, token, chain):
+            return Decimal("20000")
+
+        self.engine._estimate_position_value_usd = position_value
+
+        result = await self.engine.execute_trade(trade(is_paper=False))
+
+        self.assertFalse(result.success)
+        self.assertIn("Risk gate failed", result.error_message)
+        self.assertEqual(await self.volume(), Decimal("0"))
+
+    async def test_executed_trade_counts_its_volume_once(self):
+        result = await self.engine.execute_trade(trade(is_paper=True))
+
+        self.assertTrue(result.success)
+        self.assertEqual(await self.engine._daily_volume.get(ACCOUNT, True), Decimal("1000"))
+        self.assertEqual(self.engine._daily_volume._reserved[(ACCOUNT, True)], Decimal("0"))
@@ -0,0 +1,385 @@
+# APP: dex_django/apps/trading
+# FILE: tx_templates.py
+"""
+Pre-built swap transactions for the copy-trade warm path.
+
+A template holds everything about a swap that does not depend on the
+signal: the ABI-encoded calldata with zeroed amount and deadline words, a
+gas limit estimated ahead of time for the token path (shared across
+accounts and re-estimated after GAS_LIMIT_TTL_S), the chain id and the account's nonce allocator primed from the
+node. At signal time only the amount, minimum output and deadline words
+are patched in, the nonce comes from local memory and the fees from the
+gas oracle's per-block estimate, leaving signing as the only real work.
+
+Templates never hold a nonce themselves: a reserved but unused nonce
+would stall every later transaction from the account behind it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from apps.chains.gas_oracle import gas_oracle
+from apps.chains.providers import web3_manager
+from .nonce_manager import NonceSource, nonce_manager
+
+logger = logging.getLogger("trading.tx_templates")
+
+# Templates older than this are rebuilt on next warm
+TEMPLATE_TTL_S = 600.0
+# Gas estimates older than this are redone on next warm
+GAS_LIMIT_TTL_S = 600.0
+# How often warmed accounts get their nonce allocator resynced
+NONCE_PRIME_INTERVAL_S = 30.0
+MAX_TEMPLATES = 512
+FEE_TIER = "fast"
+
+# Used when a swap cannot be estimated yet (no balance or allowance)
+DEFAULT_V2_SWAP_GAS = 160000
+DEFAULT_V2_GAS_PER_EXTRA_HOP = 60000
+DEFAULT_V3_SWAP_GAS = 200000
+
+
+@dataclass(frozen=True)
+class SwapMethod:
+    """Router swap function with the head words patched per trade."""
+    signature: str
+    slots: Dict[str, int]       # "amount_in" / "amount_out_min" / "deadline" -> head word
+    amount_as_value: bool = False  # Native input is sent as msg.value
+
+    @property
+    def selector(self) -> bytes:
+        return function_signature_to_4byte_selector(self.signature)
+
+
+V3_EXACT_INPUT_SINGLE = "exactInputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160))"
+
+SWAP_METHODS: Dict[str, SwapMethod] = {
+    "swapExactTokensForTokens": SwapMethod(
+        "swapExactTokensForTokens(uint256,uint256,address[],address,uint256)",
+        {"amount_in": 0, "amount_out_min": 1, "deadline": 4}
+    ),
+    "swapExactTokensForETH": SwapMethod(
+        "swapExactTokensForETH(uint256,uint256,address[],address,uint256)",
+        {"amount_in": 0, "amount_out_min": 1, "deadline": 4}
+    ),
+    "swapExactETHForTokens": SwapMethod(
+        "swapExactETHForTokens(uint256,address[],address,uint256)",
+        {"amount_out_min": 0, "deadline": 3},
+        amount_as_value=True
+    ),
+    "exactInputSingle": SwapMethod(
+        V3_EXACT_INPUT_SINGLE,
+        {"deadline": 4, "amount_in": 5, "amount_out_min": 6}
+    ),
+}
+
+
+def v2_swap_method(native_in: bool, native_out: bool) -> str:
+    """V2 router function for a swap's native-token ends."""
+    if native_in:
+        return "swapExactETHForTokens"
+    if native_out:
+        return "swapExactTokensForETH"
+    return "swapExactTokensForTokens"
+
+
+def encode_swap_skeleton(
+    method: str,
+    path: Sequence[str],
+    recipient: str,
+    fee: Optional[int] = None
+) -> bytes:
+    """Calldata for `method` with every per-trade word left at zero."""
+    spec = SWAP_METHODS[method]
+    path = [to_checksum_address(addr) for addr in path]
+    recipient = to_checksum_address(recipient)
+
+    if method == "exactInputSingle":
+        if fee is None or len(path) != 2:
+            raise ValueError("exactInputSingle needs a single hop and a pool fee")
+        args: List[Any] = [(path[0], path[1], fee, recipient, 0, 0, 0, 0)]
+        types = ["(address,address,uint24,address,uint256,uint256,uint256,uint160)"]
+    elif method == "swapExactETHForTokens":
+        args, types = [0, path, recipient, 0], ["uint256", "address[]", "address", "uint256"]
+    else:
+        args, types = [0, 0, path, recipient, 0], ["uint256", "uint256", "address[]", "address", "uint256"]
+
+    return spec.selector + encode(types, args)
+
+
+@dataclass
+class SwapTemplate:
+    """Signal-independent part of one swap transaction."""
+    chain: str
+    chain_id: int
+    router: str
+    method: str
+    path: Tuple[str, ...]
+    account: str
+    calldata: bytes
+    gas_limit: int
+    built_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.built_at > TEMPLATE_TTL_S
+
+    def build(
+        self,
+        amount_in: int,
+        amount_out_min: int,
+        deadline: int,
+        nonce: int,
+        fees: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """Unsigned transaction with the per-trade words and current fees patched in."""
+        spec = SWAP_METHODS[self.method]
+        data = bytearray(self.calldata)
+        for name, value in (("amount_in", amount_in), ("amount_out_min", amount_out_min), ("deadline", deadline)):
+            word = spec.slots.get(name)
+            if word is not None:
+                start = 4 + 32 * word
+                data[start:start + 32] = int(value).to_bytes(32, "big")
+
+        self.uses += 1
+
+        return {
+            "chainId": self.chain_id,
+            "from": self.account,
+            "to": self.router,
+            "data": "0x" + data.hex(),
+            "value": int(amount_in) if spec.amount_as_value else 0,
+            "gas": self.gas_limit,
+            "nonce": nonce,
+            **fees,
+        }
+
+
+TemplateKey = Tuple[str, str, str, Tuple[str, ...], str]
+# (chain, router, method, path)
+GasKey = Tuple[str, str, str, Tuple[str, ...]]
+
+
+class SwapTemplateCache:
+    """Warmed swap templates keyed by (chain, router, method, path, account)."""
+
+    def __init__(self, max_templates: int = MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self._templates: Dict[TemplateKey, SwapTemplate] = {}
+        # Estimated gas limit and when it was estimated
+        self._gas_limits: Dict[GasKey, Tuple[int, float]] = {}
+        self._warming: Dict[TemplateKey, asyncio.Task] = {}
+        # Accounts whose nonce allocator is kept primed, with their RPC source
+        self._accounts: Dict[Tuple[str, str], NonceSource] = {}
+        self._prime_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "warmed": 0,
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "gas_estimates": 0,
+            "gas_estimate_failures": 0,
+        }
+
+    def get(
+        self,
+        chain: str,
+        router: str,
+        method: str,
+        path: Sequence[str],
+        account: str
+    ) -> Optional[SwapTemplate]:
+        """Template for a swap, if one is warm."""
+        key = _key(chain, router, method, path, account)
+        template = self._templates.get(key)
+        if template is not None and template.expired:
+            del self._templates[key]
+            self.stats["expired"] += 1
+            template = None
+        self.stats["hits" if template else "misses"] += 1
+        return template
+
+    async def warm(
+        self,
+        chain: str,
+        router: str,
+        method: str,
+        path: Sequence[str],
+        account: str,
+        source: Any,
+        fee: Optional[int] = None,
+        amount_hint: int = 0
+    ) -> Optional[SwapTemplate]:
+        """
+        Build (or keep) the template for a swap, off the critical path.
+
+        Args:
+            chain: Chain name
+            router: Router address
+            method: Key of SWAP_METHODS
+            path: Token path (two tokens for exactInputSingle)
+            account: Sending and receiving address
+            source: Client with estimate_gas and get_transaction_count (EvmClient)
+            fee: Pool fee for exactInputSingle
+            amount_hint: Typical raw input, used for the gas estimate
+
+        Returns:
+            The template, or None if it could not be built
+        """
+        key = _key(chain, router, method, path, account)
+        template = self._templates.get(key)
+        if template is not None and not template.expired:
+            return template
+
+        task = self._warming.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._build(key, chain, router, method, path, account, source, fee, amount_hint)
+            )
+            self._warming[key] = task
+        return await asyncio.shield(task)
+
+    async def _build(
+        self,
+        key: TemplateKey,
+        chain: str,
+        router: str,
+        method: str,
+        path: Sequence[str],
+        account: str,
+        source: Any,
+        fee: Optional[int],
+        amount_hint: int
+    ) -> Optional[SwapTemplate]:
+        try:
+            chain_config = web3_manager.get_chain_config(chain)
+            if not chain_config:
+                return None
+
+            calldata = encode_swap_skeleton(method, path, account, fee)
+            gas_limit = await self._gas_limit(chain, router, method, path, account, calldata, source, amount_hint)
+            await gas_oracle.ensure_started(chain)
+
+            self._accounts[(chain, account.lower())] = source
+            await nonce_manager.prime(chain, account, source)
+            self._ensure_priming()
+
+            template = SwapTemplate(
+                chain=chain,
+                chain_id=chain_config.chain_id,
+                router=to_checksum_address(router),
+                method=method,
+                path=tuple(addr.lower() for addr in path),
+                account=to_checksum_address(account),
+                calldata=calldata,
+                gas_limit=gas_limit
+            )
+            self._templates[key] = template
+            if len(self._templates) > self.max_templates:
+                oldest = min(self._templates, key=lambda k: self._templates[k].built_at)
+                del self._templates[oldest]
+
+            self.stats["warmed"] += 1
+            logger.debug(f"{chain}: warmed {method} template on {router} ({len(path) - 1} hops)")
+            return template
+
+        except Exception as e:
+            logger.warning(f"{chain}: could not warm {method} template on {router}: {e}")
+            return None
+        finally:
+            self._warming.pop(key, None)
+
+    async def _gas_limit(
+        self,
+        chain: str,
+        router: str,
+        method: str,
+        path: Sequence[str],
+        account: str,
+        calldata: bytes,
+        source: Any,
+        amount_hint: int
+    ) -> int:
+        """
+        Gas limit for a swap path, shared by every account's template.
+
+        Only successful estimates are cached; without one the per-method
+        default is used and the next warm estimates again.
+        """
+        hops = len(path) - 1
+        gas_key = (chain, router.lower(), method, tuple(addr.lower() for addr in path))
+        cached = self._gas_limits.get(gas_key)
+        if cached is not None and time.monotonic() - cached[1] <= GAS_LIMIT_TTL_S:
+            return cached[0]
+
+        if method == "exactInputSingle":
+            gas_limit = DEFAULT_V3_SWAP_GAS
+        else:
+            gas_limit = DEFAULT_V2_SWAP_GAS + DEFAULT_V2_GAS_PER_EXTRA_HOP * (hops - 1)
+
+        if amount_hint > 0:
+            spec = SWAP_METHODS[method]
+            data = bytearray(calldata)
+            if "amount_in" in spec.slots:
+                start = 4 + 32 * spec.slots["amount_in"]
+                data[start:start + 32] = amount_hint.to_bytes(32, "big")
+            deadline_at = 4 + 32 * spec.slots["deadline"]
+            data[deadline_at:deadline_at + 32] = (int(time.time()) + 600).to_bytes(32, "big")
+            try:
+                # EvmClient.estimate_gas already adds its buffer; the default stays the floor
+                gas_limit = max(gas_limit, await source.estimate_gas(
+                    router, "0x" + data.hex(), amount_hint if spec.amount_as_value else 0, account
+                ))
+                self.stats["gas_estimates"] += 1
+                self._gas_limits[gas_key] = (gas_limit, time.monotonic())
+            except Exception as e:
+                self.stats["gas_estimate_failures"] += 1
+                logger.debug(f"{chain}: gas estimate for {method} on {router} failed, using default: {e}")
+
+        return gas_limit
+
+    def _ensure_priming(self) -> None:
+        if self._prime_task is None or self._prime_task.done():
+            self._prime_task = asyncio.create_task(self._prime_loop())
+
+    async def _prime_loop(self) -> None:
+        """Keep warmed accounts' nonces synced so a reservation never waits on RPC."""
+        while self._accounts:
+            await asyncio.sleep(NONCE_PRIME_INTERVAL_S)
+            for key in [k for k, t in self._templates.items() if t.expired]:
+                del self._templates[key]
+                self.stats["expired"] += 1
+            now = time.monotonic()
+            for key in [k for k, (_, at) in self._gas_limits.items() if now - at > GAS_LIMIT_TTL_S]:
+                del self._gas_limits[key]
+            for (chain, account), source in list(self._accounts.items()):
+                try:
+                    await nonce_manager.prime(chain, account, source)
+                except Exception as e:
+                    logger.debug(f"{chain}: nonce prime for {account} failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "templates": len(self._templates),
+            "gas_limits": len(self._gas_limits),
+            "primed_accounts": len(self._accounts),
+        }
+
+
+def _key(chain: str, router: str, method: str, path: Sequence[str], account: str) -> TemplateKey:
+    return chain, router.lower(), method, tuple(addr.lower() for addr in path), account.lower()
+
+
+# Global swap template cache instance
+swap_templates = SwapTemplateCache()
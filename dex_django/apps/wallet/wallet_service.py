@@ -7,10 +7,19 @@ from decimal import Decimal
 from dataclasses import dataclass
 from datetime import datetime
 
-import httpx
 from django.core.cache import cache
 from django.utils import timezone
 
+from apps.chains.multicall import (
+    Multicall3Aggregator,
+    balance_of_call,
+    decimals_call,
+    decode_uint,
+    eth_balance_call,
+)
+from apps.chains.gas_oracle import gas_oracle
+from apps.core.http_clients import http_clients
+
 logger = logging.getLogger("wallet")
 
 @dataclass
@@ -122,60 +131,61 @@ class WalletService:
         token_balances = {}
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Get native balance
-                native_payload = {
-                    "jsonrpc": "2.0",
-                    "method": "eth_getBalance",
-                    "params": [address, "latest"],
-                    "id": 1
-                }
+            async with http_clients.client(timeout=15.0) as client:
                 
-                logger.debug(f"[{trace_id}] Fetching native balance from {rpc_url}")
-                response = await client.post(rpc_url, json=native_payload)
-                
-                if response.status_code == 200:
+                async def eth_call(params: Dict[str, Any], block: str) -> str:
+                    payload = {
+                        "jsonrpc": "2.0",
+                        "method": "eth_call",
+                        "params": [params, block],
+                        "id": 1
+                    }
+                    response = await client.post(rpc_url, json=payload)
+                    response.raise_for_status()
                     data = response.json()
-                    if "result" in data:
-                        # Convert wei to ether
-                        wei_balance = int(data["result"], 16)
-                        native_balance = Decimal(wei_balance) / Decimal(10**18)
-                        logger.debug(f"[{trace_id}] Native balance: {native_balance}")
+                    if "error" in data:
+                        raise Exception(f"RPC error: {data['error']}")
+                    return data["result"]
                 
-                # Get token balances
+                # Native balance, token balances and token decimals in one aggregate3 call
                 token_contracts = self.token_contracts.get(chain, {})
+                calls = [eth_balance_call(address)]
+                for contract_address in token_contracts.values():
+                    calls.append(balance_of_call(contract_address, address))
+                    calls.append(decimals_call(contract_address))
+                
+                logger.debug(f"[{trace_id}] Fetching {len(calls)} balance reads via Multicall3 from {rpc_url}")
+                results = await Multicall3Aggregator(eth_call).aggregate(calls)
                 
-                for token_symbol, contract_address in token_contracts.items():
+                if results[0].success:
+                    # Convert wei to ether
+                    wei_balance = decode_uint(results[0].return_data)
+                    native_balance = Decimal(wei_balance) / Decimal(10**18)
+                    logger.debug(f"[{trace_id}] Native balance: {native_balance}")
+                
+                for index, token_symbol in enumerate(token_contracts):
+                    balance_result = results[1 + index * 2]
+                    decimals_result = results[2 + index * 2]
+                    
                     try:
-                        # ERC20 balanceOf call
-                        balance_data = f"0x70a08231000000000000000000000000{address[2:].lower()}"
+                        if not balance_result.success or balance_result.return_data == "0x":
+                            continue
                         
-                        token_payload = {
-                            "jsonrpc": "2.0",
-                            "method": "eth_call",
-                            "params": [{
-                                "to": contract_address,
-                                "data": balance_data
-                            }, "latest"],
-                            "id": 2
-                        }
+                        if decimals_result.success and decimals_result.return_data != "0x":
+                            decimals = decode_uint(decimals_result.return_data)
+                        else:
+                            # Most tokens use 18 decimals, but USDC/USDT use 6
+                            decimals = 6 if token_symbol in ["USDC", "USDT"] else 18
                         
-                        token_response = await client.post(rpc_url, json=token_payload)
+                        raw_balance = decode_uint(balance_result.return_data)
+                        token_balance = Decimal(raw_balance) / Decimal(10**decimals)
                         
-                        if token_response.status_code == 200:
-                            token_data = token_response.json()
-                            if "result" in token_data and token_data["result"] != "0x":
-                                # Most tokens use 18 decimals, but USDC/USDT use 6
-                                decimals = 6 if token_symbol in ["USDC", "USDT"] else 18
-                                raw_balance = int(token_data["result"], 16)
-                                token_balance = Decimal(raw_balance) / Decimal(10**decimals)
-                                
-                                if token_balance > 0:
-                                    token_balances[token_symbol] = token_balance
-                                    logger.debug(f"[{trace_id}] {token_symbol} balance: {token_balance}")
-                                    
+                        if token_balance > 0:
+                            token_balances[token_symbol] = token_balance
+                            logger.debug(f"[{trace_id}] {token_symbol} balance: {token_balance}")
+                            
                     except Exception as e:
-                        logger.debug(f"[{trace_id}] Failed to fetch {token_symbol} balance: {e}")
+                        logger.debug(f"[{trace_id}] Failed to decode {token_symbol} balance: {e}")
                         continue
                         
         except Exception as e:
@@ -203,7 +213,7 @@ class WalletService:
         token_balances = {}
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with http_clients.client(timeout=15.0) as client:
                 # Get SOL balance
                 sol_payload = {
                     "jsonrpc": "2.0",
@@ -347,26 +357,11 @@ class WalletService:
         return routers.get(chain, "0x0000000000000000000000000000000000000000")
     
     async def _estimate_gas_price(self, chain: str) -> str:
-        """Estimate current gas price for chain."""
+        """Estimate current gas price for chain (wei, from the background gas oracle)."""
         try:
-            rpc_url = self.rpc_endpoints.get(chain)
-            if not rpc_url or chain == "solana":
-                return "20000000000"  # 20 gwei default
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "method": "eth_gasPrice",
-                    "params": [],
-                    "id": 1
-                }
-                
-                response = await client.post(rpc_url, json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if "result" in data:
-                        return data["result"]
+            if chain != "solana":
+                fees = await gas_oracle.get_fees(chain, "normal")
+                return str(fees.gas_price)
                         
         except Exception as e:
             logger.debug(f"Failed to estimate gas price for {chain}: {e}")
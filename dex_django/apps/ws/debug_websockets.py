@@ -11,7 +11,7 @@ from uuid import uuid4
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 
-from dex_django.apps.core.debug_state import debug_state
+from apps.core.debug_state import debug_state
 
 router = APIRouter()
 logger = logging.getLogger("ws.debug")